@@ -13,6 +13,7 @@ from fastapi.middleware.cors import CORSMiddleware
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
 from .routes import jobs, cv, audit, scoring, settings, candidates, notifications  # noqa: E402
+from .services.fast_json import FastJSONResponse  # noqa: E402
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -20,6 +21,17 @@ async def lifespan(app: FastAPI):
     from .db import get_pool, close_pool  # noqa: E402
     get_pool()  # initialize on startup
 
+    # Settings edits from any process invalidate the in-process settings copy
+    from .services import settings_cache
+    settings_cache.start_listener()
+
+    # Runs whose owning process is gone become resumable (live ones keep heartbeating)
+    try:
+        from .services.scoring_runs import recover_stale
+        recover_stale()
+    except Exception:
+        pass
+
     # Start scheduler (if enabled via SCHEDULER_ENABLED=true)
     try:
         from .services.scheduler import start_scheduler, stop_scheduler
@@ -29,18 +41,24 @@ async def lifespan(app: FastAPI):
 
     yield
 
-    # Shutdown
+    # Shutdown — let an active scoring run finish its in-flight calls first
+    try:
+        await scoring.drain()
+    except Exception:
+        pass
     try:
         from .services.scheduler import stop_scheduler
         stop_scheduler()
     except Exception:
         pass
+    settings_cache.stop_listener()
     close_pool()
 
 app = FastAPI(
     title="AI Job Matcher API",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # CORS — allow the Next.js frontend
@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 from ..db import db
+from ..services import candidate_profile
 
 router = APIRouter()
 
@@ -54,6 +55,17 @@ def get_active_candidate():
     return {"id": row["id"], "name": row.get("name", ""), "resume_text": row.get("resume_text", "")}
 
 
+# ── Resolved profile used for scoring ────────────────────────────────────
+@router.get("/candidates/profile")
+def get_candidate_profile():
+    """Which resume scoring and CV generation currently use, with its derived data and cache counters."""
+    try:
+        candidate_profile.active()
+    except RuntimeError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return candidate_profile.stats()
+
+
 # ── Create a candidate ───────────────────────────────────────────────────
 @router.post("/candidates")
 def create_candidate(body: CandidateCreate):
@@ -69,6 +81,7 @@ def create_candidate(body: CandidateCreate):
         )
         row = cur.fetchone()
         conn.commit()
+    candidate_profile.invalidate()
     return {"id": row["id"], "name": row["name"]}
 
 
@@ -87,6 +100,7 @@ def set_active(candidate_id: int):
             conn.rollback()
             raise HTTPException(status_code=404, detail="Candidate not found")
         conn.commit()
+    candidate_profile.invalidate()
     return {"message": f"Candidate {candidate_id} is now active"}
 
 
@@ -101,4 +115,5 @@ def delete_candidate(candidate_id: int):
             conn.rollback()
             raise HTTPException(status_code=404, detail="Candidate not found")
         conn.commit()
+    candidate_profile.invalidate()
     return {"message": f"Candidate {candidate_id} deleted"}
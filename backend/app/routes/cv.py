@@ -11,88 +11,21 @@ from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Any, Optional
 from ..db import db
+from ..services import candidate_profile, fast_json, jd_compactor, settings_cache, tolerant_json
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# ── Resume loader (reads from candidate_resume.txt or DB) ──────────────────
-_resume_cache: str | None = None
-_PROCESS_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "processo classificacao.md")
-_DEFAULT_QUALIFICATION_THRESHOLD = int(os.getenv("SCORE_THRESHOLD_DEFAULT", "80"))
-
-
-def _extract_resume_from_process_file(path: str) -> str:
-    """Extract resume block from processo classificacao.md (legacy workflow source)."""
-    if not os.path.isfile(path):
-        return ""
-    try:
-        with open(path, encoding="utf-8") as f:
-            text = f.read()
-    except Exception:
-        return ""
-
-    marker = "📄 RESUME —"
-    idx = text.find(marker)
-    if idx == -1:
-        return ""
-
-    tail = text[idx:]
-    end_candidates = [
-        tail.find("\n----------------------------------------------------------------"),
-        tail.find("\nYou are an expert resume building specialist."),
-    ]
-    end_positions = [pos for pos in end_candidates if pos != -1]
-    end = min(end_positions) if end_positions else len(tail)
-    return tail[:end].strip()
-
+# ── Resume (resolved and cached by services/candidate_profile.py) ────────
 
 def _get_resume() -> str:
-    """Load the candidate resume from file or DB, cached after first call."""
-    global _resume_cache
-    if _resume_cache is not None:
-        return _resume_cache
-
-    # Try file first
-    resume_path = os.path.join(os.path.dirname(__file__), "..", "..", "candidate_resume.txt")
-    resume_path = os.path.normpath(resume_path)
-    if os.path.exists(resume_path):
-        with open(resume_path, encoding="utf-8") as f:
-            _resume_cache = f.read()
-        return _resume_cache
-
-    # Legacy workflow doc fallback
-    process_resume = _extract_resume_from_process_file(_PROCESS_FILE)
-    if process_resume:
-        _resume_cache = process_resume
-        return _resume_cache
-
-    # Fallback: try DB candidates table
-    try:
-        with db() as (conn, cur):
-            cur.execute("SELECT resume_text FROM candidates ORDER BY id DESC LIMIT 1")
-            row = cur.fetchone()
-            if row and row["resume_text"]:
-                _resume_cache = row["resume_text"]
-                return _resume_cache
-    except Exception:
-        pass
-
-    raise RuntimeError(
-        "No resume configured. Configure an active candidate in DB or place your CV in backend/candidate_resume.txt."
-    )
+    """The active candidate's resume — the same one scoring uses."""
+    return candidate_profile.active().resume_text
 
 
 def _get_qualification_threshold() -> int:
     """Read runtime qualification threshold from app_settings.score_threshold."""
-    try:
-        with db() as (conn, cur):
-            cur.execute("SELECT value FROM app_settings WHERE key = 'score_threshold'")
-            row = cur.fetchone()
-            if row and row.get("value") is not None:
-                return max(0, min(100, int(row["value"])))
-    except Exception:
-        pass
-    return max(0, min(100, _DEFAULT_QUALIFICATION_THRESHOLD))
+    return settings_cache.qualification_threshold()
 
 
 class CvEnhanceRequest(BaseModel):
@@ -316,66 +249,17 @@ def _extract_skill_hints_from_score(detailed_score: Any) -> tuple[list[str], lis
 
 
 def _extract_enhanced_cv_from_json_like_text(text: str) -> Optional[str]:
-    """Try to extract enhanced_cv field from a JSON-like string payload."""
-    if not isinstance(text, str):
-        return None
-    stripped = text.strip()
-    if not stripped:
+    """Try to extract enhanced_cv field from a JSON-like (possibly truncated) string payload."""
+    if not isinstance(text, str) or "enhanced_cv" not in text:
         return None
-
-    # Direct JSON parse first.
     try:
-        payload = json.loads(stripped)
-        if isinstance(payload, dict):
-            cv = payload.get("enhanced_cv")
-            if isinstance(cv, str) and cv.strip():
-                return cv.strip()
-    except Exception:
-        pass
-
-    # Fallback for malformed/truncated JSON.
-    key_match = re.search(r'"enhanced_cv"\s*:\s*"', stripped)
-    if not key_match:
-        return None
-
-    raw_chars: list[str] = []
-    escaped = False
-    idx = key_match.end()
-    while idx < len(stripped):
-        ch = stripped[idx]
-        if escaped:
-            raw_chars.append(ch)
-            escaped = False
-            idx += 1
-            continue
-        if ch == "\\":
-            raw_chars.append(ch)
-            escaped = True
-            idx += 1
-            continue
-        if ch == '"':
-            # End of JSON string value.
-            break
-        raw_chars.append(ch)
-        idx += 1
-
-    raw = "".join(raw_chars).strip()
-    if not raw:
-        return None
-
-    try:
-        return json.loads(f'"{raw}"').strip()
-    except Exception:
-        # Best effort unescape for partial/truncated JSON strings.
-        return (
-            raw.replace('\\"', '"')
-            .replace("\\n", "\n")
-            .replace("\\r", "\n")
-            .replace("\\t", "\t")
-            .replace("\\/", "/")
-            .replace("\\\\", "\\")
-            .strip()
-        )
+        payload = tolerant_json.loads(text)
+    except ValueError:
+        payload = tolerant_json.extract_fields(text)
+    cv = payload.get("enhanced_cv") if isinstance(payload, dict) else None
+    if isinstance(cv, str) and cv.strip():
+        return cv.strip()
+    return None
 
 
 def _normalize_enhanced_content(content: Any) -> str:
@@ -396,10 +280,7 @@ def _normalize_enhanced_content(content: Any) -> str:
         return ""
 
     # Markdown fence cleanup.
-    text = re.sub(r"^```json\s*", "", text, flags=re.IGNORECASE).strip()
-    text = re.sub(r"^```html\s*", "", text, flags=re.IGNORECASE).strip()
-    text = re.sub(r"^```\s*", "", text).strip()
-    text = re.sub(r"\s*```$", "", text).strip()
+    text = tolerant_json.strip_fences(text)
 
     # If the whole text is a JSON object (or malformed one containing enhanced_cv), extract HTML.
     extracted = _extract_enhanced_cv_from_json_like_text(text)
@@ -647,45 +528,16 @@ def _extract_json_robust_cv(text: str) -> dict:
     if not text or not text.strip():
         raise ValueError("Empty Gemini response")
 
-    cleaned = text.strip()
-    cleaned = re.sub(r"^```json\s*", "", cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r"^```[a-zA-Z]*\s*", "", cleaned)
-    cleaned = re.sub(r"\s*```$", "", cleaned)
-    cleaned = cleaned.strip()
-
-    # 1) direct JSON parse
+    cleaned = tolerant_json.strip_fences(text)
     try:
-        payload = json.loads(cleaned)
-        if isinstance(payload, dict):
-            return _normalize_cv_ai_payload(payload)
-    except Exception:
-        pass
-
-    # 2) extract first JSON object
-    m = re.search(r"\{[\s\S]*\}", cleaned)
-    if m:
-        candidate = m.group(0)
-        try:
-            payload = json.loads(candidate)
-            if isinstance(payload, dict):
-                return _normalize_cv_ai_payload(payload)
-        except Exception:
-            # try closing truncation braces
-            fixed = candidate
-            open_brackets = fixed.count("[") - fixed.count("]")
-            open_braces = fixed.count("{") - fixed.count("}")
-            if open_brackets > 0:
-                fixed += "]" * open_brackets
-            if open_braces > 0:
-                fixed += "}" * open_braces
-            try:
-                payload = json.loads(fixed)
-                if isinstance(payload, dict):
-                    return _normalize_cv_ai_payload(payload)
-            except Exception:
-                pass
-
-    # 3) HTML fallback if model returned direct HTML instead of JSON
+        payload = tolerant_json.loads(cleaned)
+    except ValueError:
+        # Broken past repair: keep whichever top-level fields were complete
+        payload = tolerant_json.extract_fields(cleaned) or None
+    if isinstance(payload, dict):
+        return _normalize_cv_ai_payload(payload)
+
+    # HTML fallback if model returned direct HTML instead of JSON
     if "<h1" in cleaned.lower() or ("<p" in cleaned.lower() and "<" in cleaned and ">" in cleaned):
         return _normalize_cv_ai_payload({}, raw_text_fallback=cleaned)
 
@@ -737,7 +589,7 @@ TARGET POSITION:
 Company: {company}
 Title: {job_title}
 Job Posting Description:
-{description[:4000]}
+{jd_compactor.compact(description, token_budget=1000).text}
 
 CANDIDATE'S RESUME:
 {resume_for_prompt}
@@ -968,8 +820,8 @@ def enhance_cv(body: CvEnhanceRequest):
                 next_ver,
                 resume,
                 enhanced_cv,
-                json.dumps(skills_matched or []),
-                json.dumps(skills_missing or []),
+                fast_json.dumps(skills_matched or []),
+                fast_json.dumps(skills_missing or []),
                 fit_score,
             ],
         )
@@ -2,7 +2,6 @@
 
 import json
 import logging
-import os
 import re
 from datetime import datetime as _dt
 from fastapi import APIRouter, HTTPException, Query
@@ -11,6 +10,8 @@ from pydantic import BaseModel
 from typing import Any, Optional
 from urllib.parse import parse_qs, unquote, urlparse
 from ..db import db
+from ..services import dedup_index, settings_cache
+from ..services.fast_json import FastJSONResponse
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -25,7 +26,6 @@ _SECTION_DIMENSIONS = {
     "soft_skills": "Soft Skills",
     "location_arrangement": "Cultural & Location Fit",
 }
-_DEFAULT_QUALIFICATION_THRESHOLD = int(os.getenv("SCORE_THRESHOLD_DEFAULT", "80"))
 
 
 def _to_int(value: Any, default: int = 0) -> int:
@@ -58,15 +58,7 @@ def _compute_interview_probability(score: int) -> str:
 
 def _get_qualification_threshold() -> int:
     """Read runtime qualification threshold from app_settings.score_threshold."""
-    try:
-        with db() as (conn, cur):
-            cur.execute("SELECT value FROM app_settings WHERE key = 'score_threshold'")
-            row = cur.fetchone()
-            if row and row.get("value") is not None:
-                return max(0, min(100, int(row["value"])))
-    except Exception:
-        pass
-    return max(0, min(100, _DEFAULT_QUALIFICATION_THRESHOLD))
+    return settings_cache.qualification_threshold()
 
 
 def _normalize_section(section: dict[str, Any], fallback_dimension: str) -> dict[str, Any]:
@@ -234,6 +226,12 @@ def _normalize_detailed_score(detailed_score: Any, scored_at: Optional[str] = No
         normalized["best_provider"] = best_provider
         normalized["results"] = results
         normalized["errors"] = detailed_score.get("errors", {})
+        if isinstance(detailed_score.get("consensus"), dict):
+            normalized["consensus"] = detailed_score["consensus"]
+
+    if detailed_score.get("ensemble_mode") and isinstance(detailed_score.get("ensemble"), dict):
+        normalized["ensemble_mode"] = True
+        normalized["ensemble"] = detailed_score["ensemble"]
 
     return normalized
 
@@ -404,13 +402,14 @@ def list_jobs(
         )
         rows = cur.fetchall()
 
-    return {
+    # Returned as a response so FastAPI skips its jsonable_encoder pass over 200 descriptions
+    return FastJSONResponse({
         "data": [_serialize_job(r) for r in rows],
         "total": total,
         "page": page,
         "limit": limit,
         "has_more": (page * limit) < total,
-    }
+    })
 
 
 @router.get("/jobs/{job_id}")
@@ -783,6 +782,11 @@ def fetch_job_from_url(body: FetchUrlRequest):
         new_job = cur.fetchone()
         conn.commit()
 
+    try:
+        dedup_index.index_job(new_job["id"], description)
+    except Exception as e:
+        logger.warning(f"Dedup index update failed for job {new_job['id']}: {e}")
+
     return {
         "success": True,
         "already_existed": False,
@@ -790,3 +794,59 @@ def fetch_job_from_url(body: FetchUrlRequest):
     }
 
 
+# ── Near-duplicates ───────────────────────────────────────────────────────
+
+_DUPLICATE_COLUMNS = "id, job_title, company_name, location, score, status, created_at"
+
+
+def _duplicate_rows(ids: list[int]) -> dict[int, dict]:
+    if not ids:
+        return {}
+    with db() as (conn, cur):
+        cur.execute(f"SELECT {_DUPLICATE_COLUMNS} FROM jobs WHERE id = ANY(%s)", [ids])
+        return {
+            row["id"]: {**row, "created_at": row["created_at"].isoformat() if row["created_at"] else None}
+            for row in cur.fetchall()
+        }
+
+
+@router.get("/jobs/{job_id}/duplicates")
+def get_job_duplicates(job_id: int, threshold: float = Query(dedup_index.DUPLICATE_THRESHOLD, ge=0.5, le=1.0)):
+    """Near-duplicate postings of a job, most similar first."""
+    with db() as (conn, cur):
+        cur.execute("SELECT job_description FROM jobs WHERE id = %s", [job_id])
+        row = cur.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    matches = dedup_index.find_duplicates(job_id, row["job_description"], threshold=threshold)
+    rows = _duplicate_rows([jid for jid, _ in matches])
+    return {
+        "job_id": job_id,
+        "threshold": threshold,
+        "duplicates": [{**rows[jid], "similarity": sim} for jid, sim in matches if jid in rows],
+    }
+
+
+@router.get("/jobs/duplicates/groups")
+def get_duplicate_groups(
+    threshold: float = Query(dedup_index.DUPLICATE_THRESHOLD, ge=0.5, le=1.0),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Clusters of near-duplicate postings, largest first."""
+    groups = dedup_index.duplicate_groups(threshold=threshold)
+    shown = groups[:limit]
+    rows = _duplicate_rows([jid for group in shown for jid in group])
+    return {
+        "threshold": threshold,
+        "total_groups": len(groups),
+        "duplicate_jobs": sum(len(g) for g in groups),
+        "groups": [[rows[jid] for jid in group if jid in rows] for group in shown],
+    }
+
+
+@router.post("/jobs/duplicates/reindex")
+def reindex_duplicates(limit: int = Query(5000, ge=1, le=100000)):
+    """Backfill MinHash signatures for jobs that do not have one yet."""
+    indexed = dedup_index.ensure_indexed(limit=limit)
+    return {"indexed": indexed, **dedup_index.stats()}
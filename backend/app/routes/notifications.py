@@ -5,6 +5,7 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import Optional
 from ..db import db
+from ..services import settings_cache
 
 router = APIRouter()
 _DEFAULT_SCORE_THRESHOLD = int(os.getenv("SCORE_THRESHOLD_DEFAULT", "80"))
@@ -24,17 +25,12 @@ def get_notification_settings():
         "email_enabled": False,
         "score_threshold": _DEFAULT_SCORE_THRESHOLD,
     }
-    with db() as (conn, cur):
-        cur.execute(
-            "SELECT key, value FROM app_settings WHERE key IN ('telegram_enabled', 'email_enabled', 'score_threshold')"
-        )
-        for row in cur.fetchall():
-            k = row["key"]
-            v = row["value"]
-            if k in ("telegram_enabled", "email_enabled"):
-                defaults[k] = v.lower() in ("true", "1", "yes")
-            elif k == "score_threshold":
-                defaults[k] = int(v)
+    stored = settings_cache.snapshot()
+    for k in ("telegram_enabled", "email_enabled"):
+        if k in stored:
+            defaults[k] = stored[k].lower() in ("true", "1", "yes")
+    if "score_threshold" in stored:
+        defaults["score_threshold"] = int(stored["score_threshold"])
     return defaults
 
 
@@ -57,6 +53,8 @@ def save_notification_settings(body: NotificationSettingsUpdate):
                    ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value""",
                 [key, value],
             )
+        settings_cache.notify_changed(cur, ",".join(updates))
+    settings_cache.invalidate()
     return {"message": f"Updated: {', '.join(updates.keys())}"}
 
 
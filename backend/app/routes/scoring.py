@@ -5,33 +5,69 @@ Supports **OpenAI** and **Gemini** as scoring providers (user-selectable).
 Streams batch progress to the frontend via Server-Sent Events.
 """
 
+import asyncio
+import contextvars
+import hashlib
 import json
+import logging
 import os
-import random
 import re
 import time
-from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from threading import Lock
 from typing import Literal, Optional
 
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from ..db import db
+from ..services import (
+    adaptive_limits,
+    batch_scoring,
+    candidate_profile,
+    dedup_index,
+    ensemble,
+    fast_json,
+    hedging,
+    jd_compactor,
+    key_scheduler,
+    llm_clients,
+    prefilter,
+    rate_limiter,
+    score_cache,
+    score_matrix,
+    scoring_queue,
+    scoring_runs,
+    settings_cache,
+    stream_json,
+    tolerant_json,
+    write_behind,
+)
+from ..services.scoring_pool import (
+    MAX_CONCURRENCY,
+    PoolEvent,
+    get_provider_concurrency,
+    iter_scored_async,
+    iter_sync,
+    run_sync,
+)
 from .settings import get_api_key, get_groq_api_keys
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # ── Cancellation flag (module-level) ─────────────────────────────────────
 _cancel_flag = False
+_draining = False  # set on shutdown: stop dispatching, record the run as interrupted
 _running = False
-_progress = {"scored": 0, "total": 0, "started_at": None}
+_progress = {"scored": 0, "total": 0, "started_at": None, "run_id": None}
+_inflight_tasks: set[asyncio.Task] = set()  # async provider calls of the current run
 
 # ── Scoring providers + in-memory rate limiting ───────────────────────────
 Provider = Literal["groq", "openai", "gemini"]
 SingleScoreModel = Literal["groq", "openai", "gemini", "compare"]
+MAX_JOBS_PER_REQUEST = 8  # jobs packed into one batched scoring prompt
 
 _LEGACY_SECTION_DIMENSIONS = {
     "technical_skills": "Technical Skills",
@@ -44,22 +80,6 @@ _LEGACY_SECTION_DIMENSIONS = {
     "location_arrangement": "Cultural & Location Fit",
 }
 
-_PROVIDER_RATE_LIMITS = {
-    "groq": {"minute": 60, "hour": 3600, "day": 30000},  # conservative vs official limits
-    "openai": {"minute": 60, "hour": 3500, "day": 10000},
-    "gemini": {"minute": 15, "hour": 1000, "day": 1500},
-}
-_WINDOW_SECONDS = {"minute": 60, "hour": 3600, "day": 86400}
-_rate_lock = Lock()
-_provider_calls = {
-    provider: {window: deque() for window in _WINDOW_SECONDS}
-    for provider in _PROVIDER_RATE_LIMITS
-}
-_groq_key_index = 0
-_groq_key_lock = Lock()
-_groq_key_cooldowns: dict[int, float] = {}
-_groq_key_last_call: dict[int, float] = {}
-_GROQ_MIN_DELAY_PER_KEY = 3.5
 _GROQ_KEY_PROFILES = [
     {
         "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/131.0.0.0",
@@ -74,7 +94,6 @@ _GROQ_KEY_PROFILES = [
         "x_request_source": "research-tool",
     },
 ]
-_DEFAULT_QUALIFICATION_THRESHOLD = int(os.getenv("SCORE_THRESHOLD_DEFAULT", "80"))
 
 
 def _is_rate_limit_error(msg: str) -> bool:
@@ -87,77 +106,32 @@ def _is_rate_limit_error(msg: str) -> bool:
     )
 
 
-def _enforce_provider_rate_limit(provider: Provider) -> None:
-    now = time.time()
-    with _rate_lock:
-        # Drop old entries
-        for window, seconds in _WINDOW_SECONDS.items():
-            calls = _provider_calls[provider][window]
-            while calls and (now - calls[0]) > seconds:
-                calls.popleft()
-
-        # Validate limits
-        for window, limit in _PROVIDER_RATE_LIMITS[provider].items():
-            calls = _provider_calls[provider][window]
-            if len(calls) >= limit:
-                raise RuntimeError(
-                    f"Rate limit ({provider}): {limit}/{window} exceeded."
-                )
-
-        # Record this request in all windows
-        for window in _WINDOW_SECONDS:
-            _provider_calls[provider][window].append(now)
-
-
-def _get_next_groq_key() -> tuple[str, int]:
-    """
-    Return the next available Groq key in round-robin order.
-    Skips keys in cooldown and enforces a minimum delay per key with jitter.
-    """
-    keys = get_groq_api_keys()
-    if not keys:
-        raise RuntimeError("GROQ_API_KEYS not configured. Add comma-separated keys in Settings.")
-
-    now = time.time()
-    selected_idx: Optional[int] = None
-    wait_seconds = 0.0
-
-    with _groq_key_lock:
-        global _groq_key_index
-        key_count = len(keys)
-        for _ in range(key_count):
-            idx = _groq_key_index % key_count
-            _groq_key_index = (_groq_key_index + 1) % key_count
-
-            cooldown_until = _groq_key_cooldowns.get(idx, 0.0)
-            if cooldown_until > now:
-                continue
+async def _enforce_provider_rate_limit_async(provider: Provider, timeout: Optional[float] = None) -> None:
+    """Wait for a request slot in the shared limiter (raises a "Rate limit" error past `timeout`)."""
+    await rate_limiter.acquire_async(provider, timeout)
 
-            last_call = _groq_key_last_call.get(idx, 0.0)
-            elapsed = now - last_call
-            remaining = max(0.0, _GROQ_MIN_DELAY_PER_KEY - elapsed)
-            if remaining > 0:
-                wait_seconds = remaining + random.uniform(0.2, 0.8)
-            selected_idx = idx
-            break
 
-    if selected_idx is None:
-        raise RuntimeError("All configured Groq API keys are cooling down.")
+def _groq_key_ids(keys: list[str]) -> list[str]:
+    return [key_scheduler.key_id("groq", key) for key in keys]
 
-    if wait_seconds > 0:
-        time.sleep(wait_seconds)
 
-    return keys[selected_idx], selected_idx
+def _groq_scheduler(keys: list[str]) -> key_scheduler.KeyScheduler:
+    return key_scheduler.get_scheduler("groq", _groq_key_ids(keys))
 
 
-def _cooldown_groq_key(key_index: int, seconds: int = 90) -> None:
-    with _groq_key_lock:
-        _groq_key_cooldowns[key_index] = time.time() + max(1, int(seconds))
+async def _get_next_groq_key_async(keys: list[str]) -> tuple[str, int, str]:
+    """
+    Take the Groq key that is free soonest (weights, slots and adaptive
+    limits applied) and wait until it may be used. Returns (api key, index,
+    key id); pair with `_release_groq_key`.
+    """
+    key_id = await _groq_scheduler(keys).acquire_async(timeout=rate_limiter.MAX_WAIT_SECONDS)
+    idx = _groq_key_ids(keys).index(key_id)
+    return keys[idx], idx, key_id
 
 
-def _record_groq_call(key_index: int) -> None:
-    with _groq_key_lock:
-        _groq_key_last_call[key_index] = time.time()
+def _release_groq_key(keys: list[str], key_id: str) -> None:
+    _groq_scheduler(keys).release(key_id)
 
 
 def _get_qualification_threshold() -> int:
@@ -167,88 +141,23 @@ def _get_qualification_threshold() -> int:
     1) app_settings.score_threshold (runtime editable in UI)
     2) SCORE_THRESHOLD_DEFAULT env (fallback, default 80)
     """
-    try:
-        with db() as (conn, cur):
-            cur.execute("SELECT value FROM app_settings WHERE key = 'score_threshold'")
-            row = cur.fetchone()
-            if row and row.get("value") is not None:
-                return max(0, min(100, int(row["value"])))
-    except Exception:
-        pass
-    return max(0, min(100, _DEFAULT_QUALIFICATION_THRESHOLD))
+    return settings_cache.qualification_threshold()
 
-# ── Candidate resume loader ──────────────────────────────────────────────
-_RESUME_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "candidate_resume.txt")
-_PROCESS_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "processo classificacao.md")
+# ── Candidate resume ─────────────────────────────────────────────────────
+# Resolved and cached by services/candidate_profile.py, shared with CV generation
 
+# Candidate scored by the current task when it isn't the active one (score matrix)
+_profile_override: contextvars.ContextVar[Optional[candidate_profile.CandidateProfile]] = contextvars.ContextVar(
+    "scoring_profile_override", default=None
+)
 
-def _extract_resume_from_process_file(path: str) -> str:
-    """
-    Extract the candidate resume block from processo classificacao.md.
-    This keeps compatibility with the legacy n8n workflow docs as source of truth.
-    """
-    if not os.path.isfile(path):
-        return ""
-
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            text = f.read()
-    except Exception:
-        return ""
-
-    # Primary marker-based extraction
-    marker = "📄 RESUME —"
-    idx = text.find(marker)
-    if idx == -1:
-        return ""
-
-    tail = text[idx:]
-    # Stop when we hit a large separator line or the next prompt block
-    end_candidates = [
-        tail.find("\n----------------------------------------------------------------"),
-        tail.find("\nYou are an expert resume building specialist."),
-    ]
-    end_positions = [pos for pos in end_candidates if pos != -1]
-    end = min(end_positions) if end_positions else len(tail)
-    block = tail[:end].strip()
-    return block
-
-def _load_candidate_resume() -> str:
-    """Load candidate resume from file, or fall back to DB candidates table."""
-    # Try loading from file first
-    for path in [_RESUME_FILE, os.path.join(os.getcwd(), "candidate_resume.txt")]:
-        if os.path.isfile(path):
-            with open(path, "r", encoding="utf-8") as f:
-                return f.read().strip()
-
-    # Legacy workflow doc fallback (contains the resume body in markdown)
-    process_resume = _extract_resume_from_process_file(_PROCESS_FILE)
-    if process_resume:
-        return process_resume
-
-    # Fallback: load from candidates table
-    try:
-        with db() as (conn, cur):
-            cur.execute("SELECT resume_text FROM candidates WHERE is_active = true LIMIT 1")
-            row = cur.fetchone()
-            if row and row.get("resume_text"):
-                return row["resume_text"]
-    except Exception:
-        pass
 
-    raise RuntimeError(
-        "No candidate resume found. Place a candidate_resume.txt in the backend/ "
-        "directory or insert a row into the candidates table."
-    )
+def _current_profile() -> candidate_profile.CandidateProfile:
+    return _profile_override.get() or candidate_profile.active()
 
-# Load once at module level (lazy on first use)
-_cached_resume: Optional[str] = None
 
 def _get_resume() -> str:
-    global _cached_resume
-    if _cached_resume is None:
-        _cached_resume = _load_candidate_resume()
-    return _cached_resume
+    return _current_profile().resume_text
 
 
 # ── Request / Response models ────────────────────────────────────────────
@@ -256,11 +165,58 @@ def _get_resume() -> str:
 class ScoringRequest(BaseModel):
     batch_size: int = 25
     status_filter: str = "Pending"  # only score jobs with this status
-    sort_by: str = "newest_first"   # newest_first | oldest_first | id
+    sort_by: str = "newest_first"   # newest_first | oldest_first | id | prefilter
+    provider: Provider = "groq"
+    concurrency: Optional[int] = Field(default=None, ge=1, le=MAX_CONCURRENCY)  # None = per-provider default
+    force_rescore: bool = False     # bypass the scoring result cache
+    min_prefilter_score: Optional[float] = Field(default=None, ge=0, le=100)  # skip lexically irrelevant jobs
+    jobs_per_request: int = Field(default=1, ge=1, le=MAX_JOBS_PER_REQUEST)  # >1 = batched prompts
+
+class EnqueueRequest(BaseModel):
+    batch_size: int = Field(default=100, ge=1, le=5000)
+    status_filter: str = "Pending"
+    sort_by: str = "prefilter"
+    provider: Provider = "groq"
+    force_rescore: bool = False
+    min_prefilter_score: Optional[float] = Field(default=None, ge=0, le=100)
+
 
 class SingleScoreRequest(BaseModel):
     job_db_id: int
     model: SingleScoreModel = "groq"  # "groq" | "openai" | "gemini" | "compare"
+    force_rescore: bool = False       # bypass the scoring result cache
+    hedge: Optional[bool] = None      # None = SCORING_HEDGE_ENABLED
+    hedge_provider: Optional[Provider] = None  # secondary; default per _HEDGE_PARTNERS
+
+
+class EnsembleMember(BaseModel):
+    provider: Provider
+    model: Optional[str] = None       # None = the provider's configured model
+
+    @property
+    def label(self) -> str:
+        return f"{self.provider}:{self.model or _provider_model(self.provider)}"
+
+
+class EnsembleRequest(BaseModel):
+    job_db_id: int
+    members: list[EnsembleMember] = Field(
+        default_factory=lambda: [EnsembleMember(provider="openai"), EnsembleMember(provider="gemini")],
+        min_length=1,
+        max_length=6,
+    )
+    force_rescore: bool = False
+
+
+class MatrixRequest(BaseModel):
+    candidate_ids: Optional[list[int]] = None  # None = every candidate with a resume
+    top_k: int = Field(default=score_matrix.TOP_K, ge=1, le=1000)  # LLM calls per candidate, at most
+    min_prefilter_score: Optional[float] = Field(default=None, ge=0, le=100)
+    status_filter: Optional[str] = None  # None = the whole corpus
+    job_ids: Optional[list[int]] = None
+    provider: Provider = "groq"
+    concurrency: Optional[int] = Field(default=None, ge=1, le=MAX_CONCURRENCY)
+    force_rescore: bool = False
 
 
 def _to_int(value, default: int = 0) -> int:
@@ -424,74 +380,44 @@ def _coerce_scoring_result(result: dict) -> dict:
     }
 
 
-# ── Robust JSON parser (ported from legacy multi_ai_analyzer.py) ──────────
+# ── Robust JSON parser (see services/tolerant_json.py) ────────────────────
 
 def _extract_json_robust(text: str) -> dict:
     """
     Robustly extract JSON from AI response, handling:
-    - Markdown code blocks
-    - Truncated responses (missing closing braces)
-    - Regex fallback for individual field extraction
+    - Markdown code blocks and trailing chatter
+    - Truncated responses (cut strings, missing closing braces)
+    - Field-level fallback for whatever top-level fields were complete
+    A top-level array yields its first object; any other non-object raises.
     """
     if not text:
         return {"overall_score": 0, "overall_justification": "No response received from AI"}
 
-    # Step 1: Clean markdown artifacts
-    cleaned = text.strip()
-    cleaned = re.sub(r'^```json\s*', '', cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r'^```\s*', '', cleaned)
-    cleaned = re.sub(r'\s*```$', '', cleaned)
-    cleaned = cleaned.strip()
-
-    # Step 2: Direct parse
-    try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError:
-        pass
-
-    # Step 3: Regex extract JSON object
-    json_match = re.search(r'\{[\s\S]*\}', cleaned)
-    if json_match:
-        try:
-            return json.loads(json_match.group())
-        except json.JSONDecodeError:
-            pass
-
-    # Step 4: Fix truncation — add missing closing braces
-    fixed = cleaned
-    open_brackets = fixed.count('[') - fixed.count(']')
-    open_braces = fixed.count('{') - fixed.count('}')
-
-    if open_brackets > 0:
-        fixed += ']' * open_brackets
-    if open_braces > 0:
-        fixed += '}' * open_braces
-
     try:
-        return json.loads(fixed)
-    except json.JSONDecodeError:
-        pass
-
-    # Step 5: Field-level regex extraction
+        payload = tolerant_json.loads(text)
+    except ValueError:
+        payload = None
+    if isinstance(payload, dict):
+        return payload
+    if isinstance(payload, list):
+        first = next((item for item in payload if isinstance(item, dict)), None)
+        if first is not None:
+            return first
+
+    fields = tolerant_json.extract_fields(text)
     result = {}
-    score_m = re.search(r'"overall_score"\s*:\s*(\d+)', cleaned)
-    if not score_m:
-        score_m = re.search(r'"score"\s*:\s*(\d+)', cleaned)
-    if score_m:
-        result["overall_score"] = int(score_m.group(1))
-
-    just_m = re.search(r'"overall_justification"\s*:\s*"([^"]*(?:\\"[^"]*)*)"', cleaned)
-    if not just_m:
-        just_m = re.search(r'"executive_summary"\s*:\s*"([^"]*(?:\\"[^"]*)*)"', cleaned)
-    if not just_m:
-        just_m = re.search(r'"justification"\s*:\s*"([^"]*(?:\\"[^"]*)*)"', cleaned)
-    if just_m:
-        result["overall_justification"] = just_m.group(1).replace('\\"', '"')
+    score = fields.get("overall_score", fields.get("score"))
+    if isinstance(score, (int, float)) and not isinstance(score, bool):
+        result["overall_score"] = int(score)
+    for key in ("overall_justification", "executive_summary", "justification"):
+        if isinstance(fields.get(key), str):
+            result["overall_justification"] = fields[key]
+            break
 
     if result:
         return result
 
-    raise ValueError(f"Could not parse JSON from AI response: {cleaned[:300]}...")
+    raise ValueError(f"Could not parse JSON from AI response: {tolerant_json.strip_fences(text)[:300]}...")
 
 
 # ══════════════════════════════════════════════════════════════════════════
@@ -561,118 +487,251 @@ You MUST respond with ONLY valid JSON matching this schema:
 }"""
 
 
-def _build_user_prompt(job_title: str, company: str, description: str) -> str:
-    """Build the user prompt shared by both OpenAI and Gemini."""
-    return f"""JOB POSTING:
+# Prompt layout: a stable prefix (system prompt + resume) that is byte-identical
+# for every job in a run, so provider-side prefix caching can reuse it, followed
+# by the per-job suffix below.
+_JOB_PROMPT_TEMPLATE = """JOB POSTING:
 Company: {company}
 Title: {job_title}
 Full Description:
-{description[:8000]}
+{description}
+
+Perform the detailed section-by-section analysis of the candidate's resume above against this job posting now."""
+
+# Part of every cache key — editing the prompt invalidates cached analyses
+_PROMPT_VERSION = hashlib.sha256(
+    (_SYSTEM_PROMPT + _JOB_PROMPT_TEMPLATE).encode("utf-8")
+).hexdigest()[:12]
+
+
+def _cacheable_prefix() -> str:
+    """System instructions + resume — identical across every call in a run."""
+    return f"{_SYSTEM_PROMPT}\n\nCANDIDATE'S RESUME:\n{_get_resume()}"
+
+
+def _build_user_prompt(job_title: str, company: str, description: str) -> str:
+    """Build the per-job prompt suffix shared by all providers.
+
+    `description` normally arrives compacted (see services/jd_compactor.py);
+    the character cap only matters when compaction is disabled.
+    """
+    return _JOB_PROMPT_TEMPLATE.format(company=company, job_title=job_title, description=description[:8000])
+
+
+def _prompt_messages(user_prompt: str) -> list[dict]:
+    """Chat messages for the OpenAI-compatible providers (OpenAI, Groq)."""
+    return [
+        {"role": "system", "content": _cacheable_prefix()},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def _chat_messages(job_title: str, company: str, description: str) -> list[dict]:
+    return _prompt_messages(_build_user_prompt(job_title, company, description))
 
-CANDIDATE'S RESUME:
-{_get_resume()}
 
-Perform the detailed section-by-section analysis now."""
+def _chat_usage(response) -> dict:
+    """Token usage of an OpenAI-compatible response, including prefix-cache hits."""
+    usage = getattr(response, "usage", None)
+    if not usage:
+        return {"tokens_used": 0, "prompt_tokens": 0, "cached_tokens": 0}
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "tokens_used": usage.total_tokens or 0,
+        "prompt_tokens": usage.prompt_tokens or 0,
+        "cached_tokens": getattr(details, "cached_tokens", None) or 0,
+    }
+
+
+def _gemini_usage(response) -> dict:
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        "tokens_used": getattr(usage, "total_token_count", 0) or 0,
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "cached_tokens": getattr(usage, "cached_content_token_count", 0) or 0,
+    }
+
+
+def _finalize_result(text: str, model: str, provider: str, usage: dict) -> dict:
+    """Parse model output and stamp provider metadata and token usage on it."""
+    return _stamp_result(_extract_json_robust(text.strip()), model, provider, usage)
+
+
+def _stamp_result(result: dict, model: str, provider: str, usage: dict) -> dict:
+    result["fit_assessment_label"] = str(result.get("fit_assessment_label") or "").strip()
+    gap_analysis = result.get("gap_analysis")
+    result["gap_analysis"] = gap_analysis if isinstance(gap_analysis, dict) else {}
+    result["model"] = model
+    result["provider"] = provider
+    result.update(usage)
+    return result
+
+
+_MAX_OUTPUT_TOKENS = 3000  # per scored job
+
+
+def _chat_completion_args(max_tokens: int = _MAX_OUTPUT_TOKENS) -> dict:
+    return {
+        "temperature": 0.3,
+        "max_tokens": max_tokens,
+        "response_format": {"type": "json_object"},
+    }
+
+
+@dataclass
+class _Completion:
+    """Raw provider output before it is parsed into a scoring result."""
+    text: str
+    model: str
+    provider: str
+    usage: dict
+    meta: dict = field(default_factory=dict)  # provider extras, e.g. groq_key_index
+
+
+def _finalize_completion(completion: _Completion) -> dict:
+    result = _finalize_result(completion.text, completion.model, completion.provider, completion.usage)
+    result.update(completion.meta)
+    return result
 
 
 # ══════════════════════════════════════════════════════════════════════════
 # OPENAI SCORER
 # ══════════════════════════════════════════════════════════════════════════
 
-def _score_job_openai(job_title: str, company: str, description: str) -> dict:
-    """Score a single job using OpenAI GPT. Returns full breakdown dict."""
-    from openai import OpenAI
+_PROVIDER_MODELS = {
+    "groq": ("GROQ_MODEL", "llama-3.3-70b-versatile"),
+    "openai": ("OPENAI_MODEL", "gpt-4o-mini"),
+    "gemini": ("GEMINI_MODEL", "gemini-2.5-flash"),
+}
+
+
+# (provider, model) pinned by an ensemble member for the current task
+_model_override: contextvars.ContextVar[Optional[tuple[str, str]]] = contextvars.ContextVar(
+    "scoring_model_override", default=None
+)
+
+
+def _provider_model(provider: str) -> str:
+    """Model name configured for a provider (ensemble override, env override, else default)."""
+    override = _model_override.get()
+    if override and override[0] == provider:
+        return override[1]
+    env_name, default = _PROVIDER_MODELS[provider]
+    return os.getenv(env_name, default)
 
+
+def _openai_settings() -> tuple[str, str]:
     api_key = get_api_key("OPENAI_API_KEY") or ""
-    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    model = _provider_model("openai")
 
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY not configured. Set it in Settings or .env file.")
+    llm_clients.retain("openai", [api_key])
+    return api_key, model
 
-    client = OpenAI(api_key=api_key)
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": _SYSTEM_PROMPT},
-            {"role": "user", "content": _build_user_prompt(job_title, company, description)},
-        ],
-        temperature=0.3,
-        max_tokens=3000,
-        response_format={"type": "json_object"},
-    )
+async def _chat_create_async(client, model: str, user_prompt: str, max_tokens: int, key_id: str):
+    """Chat completion that reports the rate-limit headers to the adaptive controller."""
+    try:
+        raw = await client.chat.completions.with_raw_response.create(
+            model=model,
+            messages=_prompt_messages(user_prompt),
+            **_chat_completion_args(max_tokens),
+        )
+    except BaseException as e:  # cancellation must return the slot too
+        adaptive_limits.controller.release(
+            key_id, adaptive_limits.error_headers(e), rate_limited=_is_rate_limit_error(str(e))
+        )
+        raise
+    response = raw.parse()
+    adaptive_limits.controller.release(key_id, raw.headers, tokens_used=_chat_usage(response)["tokens_used"])
+    return response
 
-    text = response.choices[0].message.content.strip()
-    result = _extract_json_robust(text)
-    result["fit_assessment_label"] = str(result.get("fit_assessment_label") or "").strip()
-    gap_analysis = result.get("gap_analysis")
-    result["gap_analysis"] = gap_analysis if isinstance(gap_analysis, dict) else {}
-    result["model"] = model
-    result["provider"] = "openai"
-    result["tokens_used"] = response.usage.total_tokens if response.usage else 0
-    return result
+
+async def _complete_openai_async(user_prompt: str, max_tokens: int = _MAX_OUTPUT_TOKENS) -> _Completion:
+    """OpenAI completion; cancelling the task aborts the HTTP call."""
+    api_key, model = _openai_settings()
+    client = llm_clients.get_openai_client("openai", api_key, model, use_async=True)
+
+    await adaptive_limits.controller.acquire_async(["openai"], timeout=rate_limiter.MAX_WAIT_SECONDS)
+    response = await _chat_create_async(client, model, user_prompt, max_tokens, "openai")
+    return _Completion(response.choices[0].message.content, model, "openai", _chat_usage(response))
+
+
+async def _score_job_openai_async(job_title: str, company: str, description: str) -> dict:
+    """Score a single job using OpenAI GPT. Returns full breakdown dict."""
+    return _finalize_completion(await _complete_openai_async(_build_user_prompt(job_title, company, description)))
 
 
 # ══════════════════════════════════════════════════════════════════════════
 # GROQ SCORER (OpenAI-compatible API)
 # ══════════════════════════════════════════════════════════════════════════
 
-def _score_job_groq(job_title: str, company: str, description: str) -> dict:
-    """Score a single job using Groq (OpenAI-compatible endpoint) with key rotation."""
-    import httpx
-    from openai import OpenAI
+_GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+
+
+def _groq_headers(key_idx: int) -> dict:
+    profile = _GROQ_KEY_PROFILES[key_idx % len(_GROQ_KEY_PROFILES)]
+    return {
+        "User-Agent": profile["user_agent"],
+        "X-Request-Source": profile["x_request_source"],
+    }
+
+
+def _groq_client(api_key: str, key_idx: int, model: str, use_async: bool = False):
+    """Warm Groq client for this key, carrying the key's header profile."""
+    return llm_clients.get_openai_client(
+        "groq",
+        api_key,
+        model,
+        base_url=_GROQ_BASE_URL,
+        headers=_groq_headers(key_idx),
+        use_async=use_async,
+    )
+
+
+def _groq_call_client(api_key: str, key_idx: int, key_id: str, model: str):
+    """Async client for a reserved key; the adaptive slot is returned if it can't be built."""
+    try:
+        return _groq_client(api_key, key_idx, model, use_async=True)
+    except BaseException:
+        adaptive_limits.controller.release(key_id)
+        raise
+
 
+def _groq_keys_and_model() -> tuple[list[str], str]:
     keys = get_groq_api_keys()
     if not keys:
         raise RuntimeError("GROQ_API_KEYS not configured. Add comma-separated keys in Settings.")
+    llm_clients.retain("groq", keys)
+    return keys, _provider_model("groq")
+
 
-    model = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+async def _complete_groq_async(user_prompt: str, max_tokens: int = _MAX_OUTPUT_TOKENS) -> _Completion:
+    """Groq (OpenAI-compatible endpoint) completion with key rotation; key waits and HTTP calls are cancellable."""
+    keys, model = _groq_keys_and_model()
     last_rate_limit_err: Optional[str] = None
 
     for _ in range(len(keys)):
-        api_key, key_idx = _get_next_groq_key()
-        profile = _GROQ_KEY_PROFILES[key_idx % len(_GROQ_KEY_PROFILES)]
+        api_key, key_idx, key_id = await _get_next_groq_key_async(keys)
 
         try:
-            with httpx.Client(
-                headers={
-                    "User-Agent": profile["user_agent"],
-                    "X-Request-Source": profile["x_request_source"],
-                },
-                timeout=60.0,
-            ) as http_client:
-                client = OpenAI(
-                    api_key=api_key,
-                    base_url="https://api.groq.com/openai/v1",
-                    http_client=http_client,
-                )
-                _record_groq_call(key_idx)
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": _SYSTEM_PROMPT},
-                        {"role": "user", "content": _build_user_prompt(job_title, company, description)},
-                    ],
-                    temperature=0.3,
-                    max_tokens=3000,
-                    response_format={"type": "json_object"},
-                )
-
-                text = response.choices[0].message.content.strip()
-                result = _extract_json_robust(text)
-                result["fit_assessment_label"] = str(result.get("fit_assessment_label") or "").strip()
-                gap_analysis = result.get("gap_analysis")
-                result["gap_analysis"] = gap_analysis if isinstance(gap_analysis, dict) else {}
-                result["model"] = model
-                result["provider"] = "groq"
-                result["groq_key_index"] = key_idx + 1
-                result["tokens_used"] = response.usage.total_tokens if response.usage else 0
-                return result
+            try:
+                client = _groq_call_client(api_key, key_idx, key_id, model)
+                response = await _chat_create_async(client, model, user_prompt, max_tokens, key_id)
+            finally:
+                _release_groq_key(keys, key_id)
+            return _Completion(
+                response.choices[0].message.content,
+                model,
+                "groq",
+                _chat_usage(response),
+                {"groq_key_index": key_idx + 1},
+            )
         except Exception as e:
             msg = str(e)
             if _is_rate_limit_error(msg):
-                last_rate_limit_err = msg
-                _cooldown_groq_key(key_idx, 90)
+                last_rate_limit_err = msg  # the controller has paused this key until its reset
                 continue
             raise
 
@@ -681,45 +740,45 @@ def _score_job_groq(job_title: str, company: str, description: str) -> dict:
     )
 
 
+async def _score_job_groq_async(job_title: str, company: str, description: str) -> dict:
+    """Score a single job using Groq with key rotation."""
+    return _finalize_completion(await _complete_groq_async(_build_user_prompt(job_title, company, description)))
+
+
 # ══════════════════════════════════════════════════════════════════════════
 # GEMINI SCORER
 # ══════════════════════════════════════════════════════════════════════════
 
-def _score_job_gemini(job_title: str, company: str, description: str) -> dict:
-    """Score a single job using Google Gemini. Returns full breakdown dict."""
-    import google.generativeai as genai
+# Safety settings — prevent blocking legitimate job analysis
+_GEMINI_SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
+]
+
 
+def _gemini_model():
+    """Return (genai module, warm GenerativeModel, model name) from the client registry."""
     api_key = get_api_key("GEMINI_API_KEY") or ""
-    model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    model_name = _provider_model("gemini")
 
     if not api_key:
         raise RuntimeError("GEMINI_API_KEY not configured. Set it in Settings or .env file.")
 
-    genai.configure(api_key=api_key)
+    genai, gen_model = llm_clients.get_gemini_model(api_key, model_name, _cacheable_prefix())
+    return genai, gen_model, model_name
 
-    # Safety settings — prevent blocking legitimate job analysis
-    safety_settings = [
-        {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-        {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-        {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-        {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-    ]
 
-    gen_model = genai.GenerativeModel(
-        model_name,
-        system_instruction=_SYSTEM_PROMPT,
+def _gemini_generation_config(genai, max_tokens: int = _MAX_OUTPUT_TOKENS):
+    return genai.types.GenerationConfig(
+        temperature=0.3,
+        max_output_tokens=max_tokens,
+        response_mime_type="application/json",
     )
 
-    response = gen_model.generate_content(
-        _build_user_prompt(job_title, company, description),
-        generation_config=genai.types.GenerationConfig(
-            temperature=0.3,
-            max_output_tokens=3000,
-            response_mime_type="application/json",
-        ),
-        safety_settings=safety_settings,
-    )
 
+def _gemini_completion(response, model_name: str) -> _Completion:
     # Check if response was blocked
     if not response.candidates:
         raise RuntimeError(
@@ -734,32 +793,44 @@ def _score_job_gemini(job_title: str, company: str, description: str) -> dict:
             reasons = {2: "MAX_TOKENS", 3: "SAFETY", 4: "RECITATION"}
             raise RuntimeError(f"Gemini stopped: {reasons.get(fr, fr)}. Try a different model.")
 
-    content = response.text.strip()
-    result = _extract_json_robust(content)
-    result["fit_assessment_label"] = str(result.get("fit_assessment_label") or "").strip()
-    gap_analysis = result.get("gap_analysis")
-    result["gap_analysis"] = gap_analysis if isinstance(gap_analysis, dict) else {}
+    return _Completion(response.text, model_name, "gemini", _gemini_usage(response))
+
 
-    result["model"] = model_name
-    result["provider"] = "gemini"
-    # Gemini doesn't expose token counts the same way — estimate from content lengths
-    result["tokens_used"] = getattr(
-        getattr(response, "usage_metadata", None), "total_token_count", 0
+async def _complete_gemini_async(user_prompt: str, max_tokens: int = _MAX_OUTPUT_TOKENS) -> _Completion:
+    """Gemini completion over the SDK's async transport."""
+    genai, gen_model, model_name = _gemini_model()
+
+    response = await gen_model.generate_content_async(
+        user_prompt,
+        generation_config=_gemini_generation_config(genai, max_tokens),
+        safety_settings=_GEMINI_SAFETY_SETTINGS,
     )
-    return result
+    return _gemini_completion(response, model_name)
+
+
+async def _score_job_gemini_async(job_title: str, company: str, description: str) -> dict:
+    """Score a single job using Google Gemini. Returns full breakdown dict."""
+    return _finalize_completion(await _complete_gemini_async(_build_user_prompt(job_title, company, description)))
 
 
 # ── Router function: pick the right scorer ────────────────────────────────
 
-def _score_job_detailed(
+async def _score_job_uncached_async(
+    job_title: str, company: str, description: str, provider: Provider = "groq"
+) -> dict:
+    """Score a single job with the chosen AI provider; latencies feed the hedging window."""
+    return await hedging.timed(provider, _score_job_provider_async(job_title, company, description, provider))
+
+
+async def _score_job_provider_async(
     job_title: str, company: str, description: str, provider: Provider = "groq"
 ) -> dict:
-    """Score a single job with the chosen AI provider. Returns full breakdown."""
-    _enforce_provider_rate_limit(provider)
+    """Score with `provider`, failing over Groq -> Gemini -> OpenAI when every Groq key is rate-limited."""
+    await _enforce_provider_rate_limit_async(provider)
 
     if provider == "groq":
         try:
-            return _coerce_scoring_result(_score_job_groq(job_title, company, description))
+            return _coerce_scoring_result(await _score_job_groq_async(job_title, company, description))
         except RuntimeError as e:
             if not _is_rate_limit_error(str(e)):
                 raise
@@ -768,8 +839,8 @@ def _score_job_detailed(
             gemini_key = get_api_key("GEMINI_API_KEY") or ""
             if gemini_key:
                 try:
-                    _enforce_provider_rate_limit("gemini")
-                    out = _coerce_scoring_result(_score_job_gemini(job_title, company, description))
+                    await _enforce_provider_rate_limit_async("gemini", timeout=0)
+                    out = _coerce_scoring_result(await _score_job_gemini_async(job_title, company, description))
                     out["failover_from"] = "groq"
                     return out
                 except Exception:
@@ -777,256 +848,1290 @@ def _score_job_detailed(
 
             openai_key = get_api_key("OPENAI_API_KEY") or ""
             if openai_key:
-                _enforce_provider_rate_limit("openai")
-                out = _coerce_scoring_result(_score_job_openai(job_title, company, description))
+                await _enforce_provider_rate_limit_async("openai", timeout=0)
+                out = _coerce_scoring_result(await _score_job_openai_async(job_title, company, description))
                 out["failover_from"] = "groq"
                 return out
 
             raise
     if provider == "gemini":
-        return _coerce_scoring_result(_score_job_gemini(job_title, company, description))
+        return _coerce_scoring_result(await _score_job_gemini_async(job_title, company, description))
     if provider == "openai":
-        return _coerce_scoring_result(_score_job_openai(job_title, company, description))
+        return _coerce_scoring_result(await _score_job_openai_async(job_title, company, description))
     raise ValueError(f"Unsupported provider: {provider}")
 
 
-# ── SSE generator ────────────────────────────────────────────────────────
-
-def _sse_event(event_type: str, data: dict) -> str:
-    """Format a Server-Sent Event."""
-    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+# ── Streaming completions ────────────────────────────────────────────────
+# Same prompts and limits as above, but text deltas are yielded as they
+# arrive so complete JSON fields can be shown before the response ends.
+# Usage lands in the caller's `usage` dict once the provider reports it
+# (the last chunk); key rotation only happens before the first token.
 
+async def _open_chat_stream(client, model: str, user_prompt: str, max_tokens: int, key_id: str):
+    """Start a streamed chat completion; returns (headers, stream). Releases the slot on failure."""
+    try:
+        raw = await client.chat.completions.with_raw_response.create(
+            model=model,
+            messages=_prompt_messages(user_prompt),
+            stream=True,
+            stream_options={"include_usage": True},
+            **_chat_completion_args(max_tokens),
+        )
+    except BaseException as e:
+        adaptive_limits.controller.release(
+            key_id, adaptive_limits.error_headers(e), rate_limited=_is_rate_limit_error(str(e))
+        )
+        raise
+    return raw.headers, raw.parse()
 
-def _scoring_generator(batch_size: int, status_filter: str, sort_by: str = "newest_first"):
-    """Generator that yields SSE events as jobs are scored."""
-    global _cancel_flag, _running, _progress
-    _cancel_flag = False
-    _running = True
-    _progress = {"scored": 0, "total": 0, "started_at": datetime.now(timezone.utc).isoformat()}
 
+async def _iter_chat_stream(headers, stream, key_id: str, usage: dict):
     try:
-        # Fetch jobs to score
-        with db() as (conn, cur):
-            # Determine sort order
-            order_clause = {
-                "newest_first": "time_posted DESC NULLS LAST, id DESC",
-                "oldest_first": "time_posted ASC NULLS LAST, id ASC",
-                "id":           "id ASC",
-            }.get(sort_by, "time_posted DESC NULLS LAST, id DESC")
-
-            cur.execute(
-                f"""
-                SELECT id, job_title, company_name, job_description, score
-                FROM jobs
-                WHERE LOWER(status) = LOWER(%s) AND (score IS NULL OR score = 0)
-                ORDER BY {order_clause}
-                LIMIT %s
-                """,
-                [status_filter, batch_size],
-            )
-            jobs_to_score = [dict(row) for row in cur.fetchall()]
+        async for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage.update(_chat_usage(chunk))
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        await stream.close()  # a client that went away must not keep the HTTP stream open
+        adaptive_limits.controller.release(key_id, headers, tokens_used=usage.get("tokens_used", 0))
 
-        total = len(jobs_to_score)
-        _progress["total"] = total
 
-        if total == 0:
-            yield _sse_event("info", {
-                "type": "info",
-                "message": f"No unscored jobs with status '{status_filter}' found.",
-            })
+async def _stream_groq(user_prompt: str, usage: dict, meta: dict):
+    keys, model = _groq_keys_and_model()
+    meta["model"] = model
+    last_rate_limit_err: Optional[str] = None
+
+    for _ in range(len(keys)):
+        api_key, key_idx, key_id = await _get_next_groq_key_async(keys)
+        try:
+            try:
+                headers, stream = await _open_chat_stream(
+                    _groq_call_client(api_key, key_idx, key_id, model), model, user_prompt, _MAX_OUTPUT_TOKENS, key_id
+                )
+            except Exception as e:
+                if _is_rate_limit_error(str(e)):
+                    last_rate_limit_err = str(e)  # the controller has paused this key until its reset
+                    continue
+                raise
+            meta["groq_key_index"] = key_idx + 1
+            async for delta in _iter_chat_stream(headers, stream, key_id, usage):
+                yield delta
             return
+        finally:
+            _release_groq_key(keys, key_id)
 
-        yield _sse_event("start", {
-            "type": "start",
-            "total": total,
-            "batch_size": batch_size,
-            "status_filter": status_filter,
-            "started_at": _progress["started_at"],
-        })
+    raise RuntimeError(
+        f"All {len(keys)} Groq API keys rate-limited. Last error: {last_rate_limit_err or 'unknown'}"
+    )
 
-        scored_count = 0
-        total_tokens = 0
-        errors = 0
-        qualification_threshold = _get_qualification_threshold()
-
-        for job in jobs_to_score:
-            if _cancel_flag:
-                yield _sse_event("cancelled", {
-                    "type": "cancelled",
-                    "scored": scored_count,
-                    "total": total,
-                    "message": "Scoring cancelled by user.",
-                })
-                return
-
-            job_id = job["id"]
-            job_title = job["job_title"] or "Unknown"
-            company = job["company_name"] or "Unknown"
-            description = job["job_description"] or ""
-
-            # Send "scoring" event before calling AI
-            yield _sse_event("scoring", {
-                "type": "scoring",
-                "job_id": job_id,
-                "job_title": job_title,
-                "company": company,
-                "progress": scored_count,
-                "total": total,
-            })
 
-            try:
-                start_time = time.time()
-                result = _score_job_detailed(job_title, company, description)
-                elapsed = round(time.time() - start_time, 2)
-
-                overall_score = int(result.get("overall_score", 0))
-                justification = result.get("overall_justification", "")
-
-                # Persist to DB — including detailed_score JSONB
-                with db() as (conn, cur):
-                    new_status = "qualified" if overall_score >= qualification_threshold else "low_score"
-                    cur.execute(
-                        """
-                        UPDATE jobs
-                        SET score = %s,
-                            justification = %s,
-                            status = %s,
-                            detailed_score = %s,
-                            scored_at = NOW(),
-                            updated_at = NOW(),
-                            version = version + 1
-                        WHERE id = %s
-                        """,
-                        [overall_score, justification, new_status, json.dumps(result), job_id],
-                    )
-
-                scored_count += 1
-                total_tokens += result.get("tokens_used", 0)
-                _progress["scored"] = scored_count
-
-                yield _sse_event("scored", {
-                    "type": "scored",
-                    "job_id": job_id,
-                    "job_title": job_title,
-                    "company": company,
-                    "score": overall_score,
-                    "justification": justification,
-                    "skills_matched": result.get("skills_matched", []),
-                    "skills_missing": result.get("skills_missing", []),
-                    "model": result.get("model", ""),
-                    "provider": result.get("provider", "openai"),
-                    "tokens_used": result.get("tokens_used", 0),
-                    "elapsed_seconds": elapsed,
-                    "sections": result.get("sections", []),
-                    "interview_probability": result.get("interview_probability", ""),
-                    "key_risks": result.get("key_risks", []),
-                    "progress": scored_count,
-                    "total": total,
-                })
+async def _stream_openai(user_prompt: str, usage: dict, meta: dict):
+    api_key, model = _openai_settings()
+    meta["model"] = model
+    client = llm_clients.get_openai_client("openai", api_key, model, use_async=True)
 
-            except Exception as e:
-                errors += 1
-                scored_count += 1
-                _progress["scored"] = scored_count
-
-                yield _sse_event("error", {
-                    "type": "error",
-                    "job_id": job_id,
-                    "job_title": job_title,
-                    "company": company,
-                    "error": str(e),
-                    "progress": scored_count,
-                    "total": total,
-                })
+    await adaptive_limits.controller.acquire_async(["openai"], timeout=rate_limiter.MAX_WAIT_SECONDS)
+    headers, stream = await _open_chat_stream(client, model, user_prompt, _MAX_OUTPUT_TOKENS, "openai")
+    async for delta in _iter_chat_stream(headers, stream, "openai", usage):
+        yield delta
 
-        # Summary
-        yield _sse_event("complete", {
-            "type": "complete",
-            "scored": scored_count - errors,
-            "errors": errors,
-            "total": total,
-            "total_tokens": total_tokens,
-            "finished_at": datetime.now(timezone.utc).isoformat(),
-        })
 
-    finally:
-        _running = False
+async def _stream_gemini(user_prompt: str, usage: dict, meta: dict):
+    genai, gen_model, model_name = _gemini_model()
+    meta["model"] = model_name
 
+    response = await gen_model.generate_content_async(
+        user_prompt,
+        generation_config=_gemini_generation_config(genai),
+        safety_settings=_GEMINI_SAFETY_SETTINGS,
+        stream=True,
+    )
+    async for chunk in response:
+        if getattr(chunk, "usage_metadata", None):
+            usage.update(_gemini_usage(chunk))
+        try:
+            text = chunk.text
+        except ValueError:  # a chunk without text parts (e.g. the final finish_reason chunk)
+            continue
+        if text:
+            yield text
 
-# ── Routes ───────────────────────────────────────────────────────────────
 
-@router.post("/scoring/start")
-def start_scoring(body: ScoringRequest):
-    """Start an AI scoring run. Returns an SSE stream."""
-    global _running
-    if _running:
-        return StreamingResponse(
-            iter([_sse_event("error", {
-                "type": "error",
-                "message": "A scoring run is already in progress.",
-            })]),
-            media_type="text/event-stream",
-        )
+_STREAMERS = {"groq": _stream_groq, "openai": _stream_openai, "gemini": _stream_gemini}
 
-    return StreamingResponse(
-        _scoring_generator(body.batch_size, body.status_filter, body.sort_by),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
-    )
 
+async def _stream_completion(provider: Provider, user_prompt: str, usage: dict, meta: dict):
+    """Yield text deltas of one scoring completion; fills `usage` and `meta` (model, key index)."""
+    if provider not in _STREAMERS:
+        raise ValueError(f"Unsupported provider: {provider}")
+    await _enforce_provider_rate_limit_async(provider)
+    async for delta in _STREAMERS[provider](user_prompt, usage, meta):
+        yield delta
 
-@router.post("/scoring/stop")
-def stop_scoring():
-    """Cancel the current scoring run."""
-    global _cancel_flag
-    if not _running:
-        return {"status": "idle", "message": "No scoring run in progress."}
-    _cancel_flag = True
-    return {"status": "cancelling", "message": "Scoring will stop after current job completes."}
 
+# ── Batched multi-job prompts ─────────────────────────────────────────────
+# Requests-per-minute, not tokens, is the binding limit, so K jobs can share
+# one request: the model returns {"results": [...]} with one entry per job,
+# tagged with the job's ref. Slots are validated individually; a malformed
+# or missing slot is rescored on its own.
 
-@router.get("/scoring/status")
-def scoring_status():
-    """Return current scoring run status."""
-    return {
-        "running": _running,
-        "progress": _progress,
-    }
+_BATCH_OUTPUT_TOKEN_CAPS = {"groq": 32000, "openai": 16000, "gemini": 65000}
 
+_BATCH_PROMPT_HEADER = """Analyse EACH of the {count} job postings below against the candidate's resume above, independently of one another.
 
-@router.get("/scoring/unscored-count")
-def unscored_count(status: str = Query("Pending")):
-    """Count jobs that haven't been scored yet."""
-    with db() as (conn, cur):
-        cur.execute(
-            "SELECT COUNT(*) FROM jobs WHERE LOWER(status) = LOWER(%s) AND (score IS NULL OR score = 0)",
-            [status],
-        )
-        count = cur.fetchone()["count"]
-    return {"count": count, "status_filter": status}
+Respond with ONLY a JSON object of the form {{"results": [...]}} holding exactly {count} entries, one per posting and in the same order. Each entry follows the full analysis schema from your instructions and adds a "job_ref" field copied from the posting's JOB REF line."""
 
 
-# ── Single-job scoring (with AI model selector) ──────────────────────────
+def _build_batch_prompt(jobs: list[tuple[str, str, str, str]]) -> str:
+    """Prompt suffix for [(ref, job_title, company, description)]."""
+    blocks = [
+        f"### JOB REF: {ref}\nCompany: {company}\nTitle: {job_title}\nFull Description:\n{description[:8000]}"
+        for ref, job_title, company, description in jobs
+    ]
+    return _BATCH_PROMPT_HEADER.format(count=len(jobs)) + "\n\n" + "\n\n".join(blocks)
 
-@router.post("/scoring/single")
-def score_single_job(body: SingleScoreRequest):
-    """
-    Score a single job (by DB id) with detailed section-by-section analysis.
-    Supports model selection: "openai" | "gemini" | "compare".
 
-    In "compare" mode, scores with BOTH providers and returns side-by-side results.
-    """
-    with db() as (conn, cur):
-        cur.execute(
-            """SELECT id, job_title, company_name, job_description
-               FROM jobs WHERE id = %s""",
-            [body.job_db_id],
-        )
-        job = cur.fetchone()
+def _batch_max_tokens(provider: Provider, count: int) -> int:
+    return min(_MAX_OUTPUT_TOKENS * count, _BATCH_OUTPUT_TOKEN_CAPS[provider])
+
+
+def _valid_batch_slot(item) -> bool:
+    if not isinstance(item, dict):
+        return False
+    score = item.get("overall_score", item.get("score"))
+    if isinstance(score, str) and score.strip().isdigit():
+        score = int(score.strip())
+    return isinstance(score, (int, float)) and not isinstance(score, bool) and 0 <= score <= 100
+
+
+def _split_batch_completion(completion: _Completion, refs: list[str]) -> list[Optional[dict]]:
+    """Per-job results in `refs` order; None marks a slot that must be rescored alone."""
+    payload = tolerant_json.loads((completion.text or "").strip())  # a bare array of results is fine here
+    items = payload.get("results") if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        return [None] * len(refs)
+
+    by_ref: dict[str, dict] = {}
+    for position, item in enumerate(items):
+        if not _valid_batch_slot(item):
+            continue
+        ref = str(item.get("job_ref") or "").strip()
+        if not ref and position < len(refs):
+            ref = refs[position]  # untagged entries are matched by position
+        if ref in refs and ref not in by_ref:
+            by_ref[ref] = item
+
+    # Usage is reported for the whole request; attribute an even share to each slot
+    share = {k: round(v / len(refs)) for k, v in completion.usage.items()}
+    results: list[Optional[dict]] = []
+    for ref in refs:
+        item = by_ref.get(ref)
+        if item is None:
+            results.append(None)
+            continue
+        item = {k: v for k, v in item.items() if k != "job_ref"}
+        result = _coerce_scoring_result(_stamp_result(item, completion.model, completion.provider, share))
+        result.update(completion.meta)
+        result["batch_size"] = len(refs)
+        results.append(result)
+    return results
+
+
+async def _complete_async(provider: Provider, user_prompt: str, max_tokens: int) -> _Completion:
+    if provider == "groq":
+        return await _complete_groq_async(user_prompt, max_tokens)
+    if provider == "gemini":
+        return await _complete_gemini_async(user_prompt, max_tokens)
+    if provider == "openai":
+        return await _complete_openai_async(user_prompt, max_tokens)
+    raise ValueError(f"Unsupported provider: {provider}")
+
+
+def _complete(provider: Provider, user_prompt: str, max_tokens: int) -> _Completion:
+    """Blocking `_complete_async` for thread-based callers (batch transports)."""
+    return run_sync(_complete_async(provider, user_prompt, max_tokens))
+
+
+def _batch_refs(jobs: list[tuple[str, str, str]]) -> tuple[list[str], str]:
+    refs = [f"J{i + 1}" for i in range(len(jobs))]
+    return refs, _build_batch_prompt([(ref, *job) for ref, job in zip(refs, jobs)])
+
+
+async def _score_batch_uncached_async(
+    jobs: list[tuple[str, str, str]], provider: Provider = "groq"
+) -> list[Optional[dict]]:
+    """Score [(job_title, company, description)] in ONE provider request."""
+    await _enforce_provider_rate_limit_async(provider)
+    refs, prompt = _batch_refs(jobs)
+    completion = await _complete_async(provider, prompt, _batch_max_tokens(provider, len(jobs)))
+    return _split_batch_completion(completion, refs)
+
+
+# ── Result cache wrappers ─────────────────────────────────────────────────
+
+def _resume_hash() -> str:
+    return _current_profile().content_hash
+
+
+def _prompt_version() -> str:
+    """System prompt version plus description compaction settings."""
+    return f"{_PROMPT_VERSION}-{jd_compactor.fingerprint()}"
+
+
+def _cache_key(job_title: str, company: str, description: str, provider: Provider) -> Optional[str]:
+    if not score_cache.is_enabled() or provider not in _PROVIDER_MODELS:
+        return None
+    return score_cache.make_key(
+        job_title,
+        company,
+        description,
+        _resume_hash(),
+        _prompt_version(),
+        provider,
+        _provider_model(provider),
+    )
+
+
+def _cache_lookup(cache_key: Optional[str]) -> Optional[dict]:
+    if not cache_key:
+        return None
+    cached = score_cache.get(cache_key)
+    if cached is None:
+        return None
+    cached["cache_hit"] = True
+    cached["tokens_used"] = 0  # nothing was spent on this score
+    return cached
+
+
+def _cache_store(cache_key: Optional[str], provider: Provider, result: dict) -> None:
+    if cache_key:
+        score_cache.put(cache_key, result, provider, _provider_model(provider), _prompt_version())
+
+
+def _stamp_compaction(result: dict, compacted: "jd_compactor.CompactedDescription") -> dict:
+    result["jd_tokens"] = compacted.tokens
+    result["jd_tokens_saved"] = compacted.tokens_saved
+    return result
+
+
+async def _score_job_detailed_async(
+    job_title: str,
+    company: str,
+    description: str,
+    provider: Provider = "groq",
+    force_rescore: bool = False,
+) -> dict:
+    """
+    Score a job, answering from the content-addressed cache when possible.
+    `force_rescore=True` skips the lookup but still refreshes the cache entry.
+    Cache I/O runs in a thread.
+    """
+    cache_key = await asyncio.to_thread(_cache_key, job_title, company, description, provider)
+    if not force_rescore:
+        cached = await asyncio.to_thread(_cache_lookup, cache_key)
+        if cached is not None:
+            return cached
+
+    compacted = jd_compactor.compact(description)
+    result = await _score_job_uncached_async(job_title, company, compacted.text, provider=provider)
+    _stamp_compaction(result, compacted)
+    result["resume_hash"] = await asyncio.to_thread(_resume_hash)
+    await asyncio.to_thread(_cache_store, cache_key, provider, result)
+    return result
+
+
+async def _score_batch_detailed_async(
+    jobs: list[tuple[str, str, str]],
+    provider: Provider = "groq",
+    force_rescore: bool = False,
+) -> list:
+    """
+    Batched `_score_job_detailed_async`: cache hits are answered locally, the
+    misses share one request, and malformed slots (or a failed request) fall
+    back to single-job scoring. Returns a result dict or an Exception per job.
+    """
+    keys = [await asyncio.to_thread(_cache_key, *job, provider) for job in jobs]
+    out: list = [None if force_rescore else await asyncio.to_thread(_cache_lookup, key) for key in keys]
+    misses = [i for i, result in enumerate(out) if result is None]
+    compacted = {i: jd_compactor.compact(jobs[i][2]) for i in misses}
+    resume_hash = await asyncio.to_thread(_resume_hash)
+
+    batch: list[Optional[dict]] = [None] * len(misses)
+    if len(misses) > 1:
+        try:
+            batch = await _score_batch_uncached_async(
+                [(jobs[i][0], jobs[i][1], compacted[i].text) for i in misses], provider=provider
+            )
+        except Exception as e:
+            logger.warning(f"Batched scoring request failed, scoring {len(misses)} jobs singly: {e}")
+
+    for i, result in zip(misses, batch):
+        if result is None:
+            try:
+                result = await _score_job_uncached_async(jobs[i][0], jobs[i][1], compacted[i].text, provider=provider)
+            except Exception as e:
+                out[i] = e
+                continue
+            result["batch_size"] = 1
+            result["batch_fallback"] = len(misses) > 1
+        _stamp_compaction(result, compacted[i])
+        result["resume_hash"] = resume_hash
+        await asyncio.to_thread(_cache_store, keys[i], provider, result)
+        out[i] = result
+    return out
+
+
+# ── Near-duplicate reuse ──────────────────────────────────────────────────
+
+def _find_scored_sibling(job_id: int, description: str) -> Optional[dict]:
+    """
+    Return a copy of a near-duplicate sibling's detailed_score, if one was
+    scored against the current resume. Marks it with `reused_from_job_id`.
+    """
+    if not dedup_index.is_reuse_enabled() or not description:
+        return None
+    try:
+        matches = dedup_index.find_duplicates(job_id, description, threshold=dedup_index.REUSE_THRESHOLD)
+    except Exception as e:
+        logger.warning(f"Dedup lookup failed for job {job_id}: {e}")
+        return None
+    if not matches:
+        return None
+
+    with db() as (conn, cur):
+        cur.execute(
+            "SELECT id, detailed_score FROM jobs WHERE id = ANY(%s) AND detailed_score IS NOT NULL",
+            [[jid for jid, _ in matches]],
+        )
+        scored = {row["id"]: row["detailed_score"] for row in cur.fetchall()}
+
+    resume_hash = _resume_hash()
+    for sibling_id, sim in matches:
+        payload = scored.get(sibling_id)
+        if isinstance(payload, str):
+            try:
+                payload = json.loads(payload)
+            except json.JSONDecodeError:
+                continue
+        if not isinstance(payload, dict) or payload.get("compare_mode"):
+            continue
+        if payload.get("resume_hash") != resume_hash:
+            continue  # sibling was scored for a different resume
+        reused = {k: v for k, v in payload.items() if k not in ("cache_hit", "cached_at")}
+        reused["reused_from_job_id"] = sibling_id
+        reused["duplicate_similarity"] = sim
+        reused["tokens_used"] = 0
+        return reused
+    return None
+
+
+# ── SSE generator ────────────────────────────────────────────────────────
+
+def _sse_event(event_type: str, data: dict) -> str:
+    """Format a Server-Sent Event."""
+    return fast_json.sse_event(event_type, data)
+
+
+def _fetch_jobs_to_score(
+    batch_size: int,
+    status_filter: str,
+    sort_by: str,
+    min_prefilter_score: Optional[float] = None,
+) -> list[dict]:
+    use_prefilter = sort_by == "prefilter" or min_prefilter_score is not None
+    if use_prefilter:
+        try:
+            prefilter.refresh(_get_resume())
+        except Exception as e:
+            logger.warning(f"Prefilter refresh failed, falling back to unranked order: {e}")
+            use_prefilter = False
+
+    with db() as (conn, cur):
+        # Determine sort order
+        order_clause = {
+            "newest_first": "time_posted DESC NULLS LAST, id DESC",
+            "oldest_first": "time_posted ASC NULLS LAST, id ASC",
+            "id":           "id ASC",
+            "prefilter":    "prefilter_score DESC NULLS LAST, id DESC",
+        }.get(sort_by, "time_posted DESC NULLS LAST, id DESC")
+
+        conditions = ["LOWER(status) = LOWER(%s)", "(score IS NULL OR score = 0)"]
+        params: list = [status_filter]
+        if use_prefilter and min_prefilter_score is not None:
+            conditions.append("prefilter_score >= %s")
+            params.append(min_prefilter_score)
+
+        cur.execute(
+            f"""
+            SELECT id, job_title, company_name, job_description, score
+            FROM jobs
+            WHERE {" AND ".join(conditions)}
+            ORDER BY {order_clause}
+            LIMIT %s
+            """,
+            params + [batch_size],
+        )
+        return [dict(row) for row in cur.fetchall()]
+
+
+def _write_scores(rows: list[tuple]) -> None:
+    """One UPDATE for many (id, score, justification, status, detailed_score) rows."""
+    from psycopg2.extras import execute_values
+
+    with db() as (conn, cur):
+        execute_values(
+            cur,
+            """
+            UPDATE jobs AS j
+            SET score = v.score,
+                justification = v.justification,
+                status = v.status,
+                detailed_score = v.detailed_score::jsonb,
+                scored_at = NOW(),
+                updated_at = NOW(),
+                version = j.version + 1
+            FROM (VALUES %s) AS v(id, score, justification, status, detailed_score)
+            WHERE j.id = v.id
+            """,
+            rows,
+            template="(%s, %s::integer, %s::text, %s::text, %s::text)",
+            page_size=max(len(rows), 1),
+        )
+
+
+_write_back = write_behind.WriteBehindBuffer(_write_scores, name="scoring write-back")
+
+
+def _persist_score(job_id: int, result: dict, qualification_threshold: int) -> None:
+    """
+    Persist a score — including detailed_score JSONB. Rows go through the
+    write-behind buffer; call `_flush_scores` before treating them as durable.
+    """
+    overall_score = int(result.get("overall_score", 0))
+    justification = result.get("overall_justification", "")
+    new_status = "qualified" if overall_score >= qualification_threshold else "low_score"
+    row = (job_id, overall_score, justification, new_status, fast_json.dumps(result))
+    if write_behind.is_enabled():
+        _write_back.add(job_id, row)
+    else:
+        _write_scores([row])
+
+
+def _flush_scores() -> None:
+    """Write buffered scores now; failures are logged by the buffer."""
+    try:
+        _write_back.flush()
+    except Exception as e:
+        logger.error(f"Could not flush buffered scores: {e}")
+
+
+def _written(job_ids: list[int]) -> list[int]:
+    """The jobs in `job_ids` whose score is not waiting in the write-back buffer (for a first write or a retry)."""
+    return [job_id for job_id in job_ids if not _write_back.is_pending(job_id)]
+
+
+def _write_run_items(rows: list[tuple]) -> None:
+    """
+    Write buffered `scoring_runs.item_row`s. Scores are flushed first, so an
+    item is never `scored` before its jobs row is; an item whose score is
+    still buffered keeps its previous status and `finish` re-queues it.
+    """
+    if any(row[2] == "scored" for row in rows):
+        _write_back.flush()
+        written = set(_written([row[1] for row in rows if row[2] == "scored"]))
+        rows = [row for row in rows if row[2] != "scored" or row[1] in written]
+    scoring_runs.record_many(rows)
+
+
+# Run-item updates (dispatch and outcome of every job), one transaction per flush
+_run_items = write_behind.WriteBehindBuffer(_write_run_items, name="scoring run items")
+
+
+def _flush_run_items() -> None:
+    try:
+        _run_items.flush()
+    except Exception as e:
+        logger.error(f"Could not flush buffered run items: {e}")
+
+
+def _job_args(job: dict) -> tuple[str, str, str]:
+    return (
+        job["job_title"] or "Unknown",
+        job["company_name"] or "Unknown",
+        job["job_description"] or "",
+    )
+
+
+async def _score_and_persist_async(
+    job: dict, provider: Provider, qualification_threshold: int, force_rescore: bool = False
+) -> dict:
+    """Score one job (or reuse a near-duplicate's score) and write the result back; DB work runs in a thread."""
+    result = None
+    if not force_rescore:
+        result = await asyncio.to_thread(_find_scored_sibling, job["id"], job["job_description"] or "")
+    if result is None:
+        result = await _score_job_detailed_async(*_job_args(job), provider=provider, force_rescore=force_rescore)
+    await asyncio.to_thread(_persist_score, job["id"], result, qualification_threshold)
+    return result
+
+
+def _persist_outcomes(chunk: list[dict], outcomes: dict, qualification_threshold: int) -> list[tuple]:
+    """Write each successful result; returns [(job, result | Exception)] in chunk order."""
+    persisted = []
+    for job in chunk:
+        outcome = outcomes[job["id"]]
+        if not isinstance(outcome, Exception):
+            try:
+                _persist_score(job["id"], outcome, qualification_threshold)
+            except Exception as e:
+                outcome = e
+        persisted.append((job, outcome))
+    return persisted
+
+
+async def _score_and_persist_batch_async(
+    chunk: list[dict], provider: Provider, qualification_threshold: int, force_rescore: bool = False
+) -> list[tuple]:
+    """Score a chunk of jobs with one batched request (after reuse/cache checks)."""
+    outcomes: dict = {}
+    todo = []
+    for job in chunk:
+        reused = None
+        if not force_rescore:
+            reused = await asyncio.to_thread(_find_scored_sibling, job["id"], job["job_description"] or "")
+        if reused is not None:
+            outcomes[job["id"]] = reused
+        else:
+            todo.append(job)
+    if todo:
+        results = await _score_batch_detailed_async(
+            [_job_args(job) for job in todo], provider=provider, force_rescore=force_rescore
+        )
+        outcomes.update({job["id"]: result for job, result in zip(todo, results)})
+    return await asyncio.to_thread(_persist_outcomes, chunk, outcomes, qualification_threshold)
+
+
+def _expand_batch_event(event: PoolEvent) -> list[PoolEvent]:
+    """Split a pool event for a chunk of jobs into per-job events."""
+    chunk = event.job
+    if event.kind == "scored":
+        return [
+            PoolEvent("error", job, error=outcome, elapsed=event.elapsed)
+            if isinstance(outcome, Exception)
+            else PoolEvent("scored", job, result=outcome, elapsed=event.elapsed)
+            for job, outcome in event.result
+        ]
+    return [PoolEvent(event.kind, job, error=event.error, elapsed=event.elapsed) for job in chunk]
+
+
+def _chunks(jobs: list[dict], size: int) -> list[list[dict]]:
+    return [jobs[i:i + size] for i in range(0, len(jobs), size)]
+
+
+async def iter_job_events_async(
+    jobs: list[dict],
+    provider: Provider,
+    qualification_threshold: int,
+    workers: int,
+    jobs_per_request: int = 1,
+    force_rescore: bool = False,
+    should_cancel=None,
+    inflight: Optional[set] = None,
+):
+    """
+    Score and persist `jobs`, yielding one PoolEvent per job; provider calls
+    run as cancellable tasks. With `jobs_per_request > 1` the pool works on
+    chunks sent as batched prompts.
+    """
+    batched = jobs_per_request > 1
+    events = iter_scored_async(
+        _chunks(jobs, jobs_per_request) if batched else jobs,
+        (
+            (lambda chunk: _score_and_persist_batch_async(chunk, provider, qualification_threshold, force_rescore))
+            if batched
+            else (lambda job: _score_and_persist_async(job, provider, qualification_threshold, force_rescore))
+        ),
+        workers=workers,
+        should_cancel=should_cancel or (lambda: False),
+        inflight=inflight,
+    )
+    try:
+        async for event in events:
+            for job_event in (_expand_batch_event(event) if batched else [event]):
+                yield job_event
+    finally:
+        await events.aclose()
+
+
+def iter_job_events(
+    jobs: list[dict],
+    provider: Provider,
+    qualification_threshold: int,
+    workers: int,
+    jobs_per_request: int = 1,
+    force_rescore: bool = False,
+    should_cancel=None,
+):
+    """`iter_job_events_async` for blocking callers (scheduler, queue worker)."""
+    return iter_sync(iter_job_events_async(
+        jobs,
+        provider,
+        qualification_threshold,
+        workers=workers,
+        jobs_per_request=jobs_per_request,
+        force_rescore=force_rescore,
+        should_cancel=should_cancel,
+    ))
+
+
+class _RunTracker:
+    """Turns pool events into SSE payloads and keeps the run counters."""
+
+    def __init__(
+        self, total: int, provider: Provider, workers: int, run_id: Optional[int] = None, lease_owner: Optional[str] = None
+    ):
+        self.total = total
+        self.provider = provider
+        self.workers = workers
+        self.run_id = run_id
+        self.lease_owner = lease_owner
+        self.done = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.total_tokens = 0
+        self.cache_hits = 0
+        self.duplicates_reused = 0
+        self.jd_tokens_saved = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.llm_scored = 0
+        self.provider_requests = 0.0
+        self.started = time.time()
+        self.lease_renewed = self.started
+        self.dispatched: set[int] = set()
+        self.scored_ids: list[int] = []  # leases completed at the end, once their scores are written
+        self.failed: dict[int, str] = {}  # job id -> error, handed back to the queue for a retry
+
+    def handle(self, event) -> str:
+        job = event.job
+        job_title, company, _ = _job_args(job)
+
+        if event.kind == "scoring":
+            return _sse_event("scoring", {
+                "type": "scoring",
+                "job_id": job["id"],
+                "job_title": job_title,
+                "company": company,
+                "progress": self.done,
+                "total": self.total,
+            })
+
+        self.done += 1
+        _progress["scored"] = self.done
+
+        if event.kind == "cancelled":
+            self.cancelled += 1
+            return _sse_event("error", {
+                "type": "error",
+                "job_id": job["id"],
+                "job_title": job_title,
+                "company": company,
+                "error": "Cancelled in flight by user.",
+                "cancelled": True,
+                "progress": self.done,
+                "total": self.total,
+            })
+
+        if event.kind == "error":
+            self.errors += 1
+            return _sse_event("error", {
+                "type": "error",
+                "job_id": job["id"],
+                "job_title": job_title,
+                "company": company,
+                "error": str(event.error),
+                "progress": self.done,
+                "total": self.total,
+            })
+
+        result = event.result or {}
+        self.total_tokens += result.get("tokens_used", 0)
+        if result.get("cache_hit"):
+            self.cache_hits += 1
+        if result.get("reused_from_job_id"):
+            self.duplicates_reused += 1
+        elif not result.get("cache_hit"):
+            self.jd_tokens_saved += result.get("jd_tokens_saved", 0)
+            self.prompt_tokens += result.get("prompt_tokens", 0)
+            self.cached_prompt_tokens += result.get("cached_tokens", 0)
+            self.llm_scored += 1
+            self.provider_requests += 1 / max(result.get("batch_size", 1), 1)
+            _progress["prompt_cache_hit_ratio"] = self.prompt_cache_hit_ratio
+        return _sse_event("scored", {
+            "type": "scored",
+            "job_id": job["id"],
+            "job_title": job_title,
+            "company": company,
+            "score": int(result.get("overall_score", 0)),
+            "justification": result.get("overall_justification", ""),
+            "skills_matched": result.get("skills_matched", []),
+            "skills_missing": result.get("skills_missing", []),
+            "model": result.get("model", ""),
+            "provider": result.get("provider", self.provider),
+            "tokens_used": result.get("tokens_used", 0),
+            "jd_tokens_saved": result.get("jd_tokens_saved", 0),
+            "cached_tokens": result.get("cached_tokens", 0),
+            "jobs_in_request": result.get("batch_size", 1),
+            "elapsed_seconds": event.elapsed,
+            "cache_hit": bool(result.get("cache_hit")),
+            "reused_from_job_id": result.get("reused_from_job_id"),
+            "sections": result.get("sections", []),
+            "interview_probability": result.get("interview_probability", ""),
+            "key_risks": result.get("key_risks", []),
+            "progress": self.done,
+            "total": self.total,
+        })
+
+    def record(self, event) -> None:
+        """
+        Queue the event for `scoring_run_items` through the run-item buffer
+        (best-effort — a DB hiccup doesn't stop the run).
+        """
+        if self.lease_owner and time.time() - self.lease_renewed > scoring_queue.LEASE_SECONDS / 3:
+            self.lease_renewed = time.time()
+            try:
+                scoring_queue.extend(self.lease_owner)
+            except Exception as e:
+                logger.warning(f"Could not extend scoring leases: {e}")
+        if event.kind == "scored":
+            self.scored_ids.append(event.job["id"])
+        elif event.kind == "error":
+            self.failed[event.job["id"]] = str(event.error)
+        if self.run_id is None:
+            return
+        job_id = event.job["id"]
+        if event.kind == "scoring":
+            self.dispatched.add(job_id)
+            row = scoring_runs.item_row(self.run_id, job_id, "running")
+        elif event.kind == "scored":
+            result = event.result or {}
+            row = scoring_runs.item_row(
+                self.run_id,
+                job_id,
+                "scored",
+                score=int(result.get("overall_score", 0)),
+                latency_ms=int(event.elapsed * 1000),
+                tokens_used=result.get("tokens_used", 0),
+                started=job_id in self.dispatched,
+            )
+        else:
+            row = scoring_runs.item_row(
+                self.run_id,
+                job_id,
+                event.kind,
+                latency_ms=int(event.elapsed * 1000),
+                error=str(event.error) if event.error else None,
+                started=job_id in self.dispatched,
+            )
+        try:
+            if write_behind.is_enabled():
+                _run_items.add((self.run_id, job_id), row)
+            else:
+                _write_run_items([row])
+        except Exception as e:
+            logger.warning(f"Scoring run {self.run_id}: could not record job {job_id}, no longer tracking: {e}")
+            self.run_id = None
+
+    def run_status(self) -> str:
+        """Terminal status for `scoring_runs` once the event stream ended normally."""
+        if _draining:
+            return "interrupted"
+        if _cancel_flag and (self.done < self.total or self.cancelled):
+            return "cancelled"
+        return "completed"
+
+    def start_event(self, batch_size: int, status_filter: str) -> str:
+        return _sse_event("start", {
+            "type": "start",
+            "run_id": self.run_id,
+            "total": self.total,
+            "batch_size": batch_size,
+            "status_filter": status_filter,
+            "provider": self.provider,
+            "concurrency": self.workers,
+            "started_at": _progress["started_at"],
+        })
+
+    @property
+    def jobs_per_request(self) -> float:
+        """Effective jobs scored per provider request (>1 with batched prompts)."""
+        return round(self.llm_scored / self.provider_requests, 2) if self.provider_requests else 0.0
+
+    @property
+    def prompt_cache_hit_ratio(self) -> float:
+        """Share of prompt tokens served from the provider's prefix cache this run."""
+        return round(self.cached_prompt_tokens / self.prompt_tokens, 3) if self.prompt_tokens else 0.0
+
+    def final_event(self) -> str:
+        if _cancel_flag and (self.done < self.total or self.cancelled):
+            return _sse_event("cancelled", {
+                "type": "cancelled",
+                "scored": self.done - self.errors - self.cancelled,
+                "total": self.total,
+                "message": "Scoring cancelled by user.",
+            })
+
+        # Summary
+        run_minutes = max(time.time() - self.started, 1e-6) / 60
+        return _sse_event("complete", {
+            "type": "complete",
+            "scored": self.done - self.errors,
+            "errors": self.errors,
+            "total": self.total,
+            "total_tokens": self.total_tokens,
+            "cache_hits": self.cache_hits,
+            "duplicates_reused": self.duplicates_reused,
+            "jd_tokens_saved": self.jd_tokens_saved,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "prompt_cache_hit_ratio": self.prompt_cache_hit_ratio,
+            "provider_requests": round(self.provider_requests),
+            "jobs_per_request": self.jobs_per_request,
+            "concurrency": self.workers,
+            "jobs_per_minute": round(self.done / run_minutes, 2),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+        })
+
+
+def _begin_run() -> None:
+    global _cancel_flag, _draining, _running, _progress
+    _cancel_flag = False
+    _draining = False
+    _running = True
+    _progress = {"scored": 0, "total": 0, "started_at": datetime.now(timezone.utc).isoformat(), "run_id": None}
+
+
+def _load_jobs(job_ids: list[int]) -> list[dict]:
+    """Jobs by id, in the given order (ids of deleted jobs are dropped)."""
+    with db() as (conn, cur):
+        cur.execute(
+            "SELECT id, job_title, company_name, job_description, score FROM jobs WHERE id = ANY(%s)",
+            [job_ids],
+        )
+        by_id = {row["id"]: dict(row) for row in cur.fetchall()}
+    return [by_id[job_id] for job_id in job_ids if job_id in by_id]
+
+
+def _claim(jobs: list[dict], lease_owner: str) -> list[dict]:
+    """Lease the jobs in `scoring_queue` so no other claimer scores them concurrently."""
+    try:
+        return scoring_queue.claim_jobs(jobs, lease_owner)
+    except Exception as e:
+        logger.warning(f"Could not lease jobs, scoring without cross-process claims: {e}")
+        return jobs
+
+
+def _open_run(
+    params: dict, lease_owner: str, resume_run_id: Optional[int] = None
+) -> tuple[Optional[int], list[dict]]:
+    """
+    (run id, jobs to score) — either a fresh queue recorded as a new run, or
+    the unfinished items of `resume_run_id`. Jobs scored elsewhere since the
+    run stopped are skipped unless the run forces rescoring; jobs another
+    claimer holds a lease on are left to it. The rest are leased to `lease_owner`.
+    """
+    if resume_run_id is not None:
+        _run, job_ids = scoring_runs.resume(resume_run_id)
+        jobs = _load_jobs(job_ids)
+        if not params.get("force_rescore"):
+            for job in [job for job in jobs if job["score"]]:
+                scoring_runs.record(resume_run_id, job["id"], "skipped")
+            jobs = [job for job in jobs if not job["score"]]
+        return resume_run_id, _claim(jobs, lease_owner)
+
+    jobs = _claim(_fetch_jobs_to_score(
+        params["batch_size"], params["status_filter"], params["sort_by"], params.get("min_prefilter_score")
+    ), lease_owner)
+    if not jobs:
+        return None, jobs
+    try:
+        run_id = scoring_runs.create(params["provider"], params, [job["id"] for job in jobs])
+    except Exception as e:
+        logger.warning(f"Could not record scoring run, continuing without resume support: {e}")
+        run_id = None
+    return run_id, jobs
+
+
+def _close_run(
+    run_id: Optional[int],
+    status: str,
+    error: Optional[str] = None,
+    tracker: Optional["_RunTracker"] = None,
+    lease_owner: Optional[str] = None,
+) -> None:
+    """
+    Settle the run's leases — complete jobs whose score was written, fail the
+    ones that errored, hand the rest back to the queue — and close the run.
+    """
+    if lease_owner:
+        try:
+            if tracker is not None:
+                scoring_queue.complete(_written(tracker.scored_ids), lease_owner)
+                for job_id, reason in tracker.failed.items():
+                    scoring_queue.fail(job_id, reason, lease_owner)
+            scoring_queue.release(lease_owner)
+        except Exception as e:
+            logger.warning(f"Could not release scoring leases: {e}")
+    if run_id is None:
+        return
+    try:
+        scoring_runs.finish(run_id, status, error)
+    except Exception as e:
+        logger.warning(f"Could not close scoring run {run_id}: {e}")
+
+
+_RUN_PARAM_KEYS = (
+    "batch_size", "status_filter", "sort_by", "provider", "concurrency",
+    "force_rescore", "min_prefilter_score", "jobs_per_request",
+)
+
+
+def _run_params(arguments: dict) -> dict:
+    """The generator arguments stored with a run, so it can be resumed with the same settings."""
+    return {key: arguments[key] for key in _RUN_PARAM_KEYS}
+
+
+def _no_jobs_event(status_filter: str) -> str:
+    return _sse_event("info", {
+        "type": "info",
+        "message": f"No unscored jobs with status '{status_filter}' found.",
+    })
+
+
+async def _scoring_generator_async(
+    batch_size: int,
+    status_filter: str,
+    sort_by: str = "newest_first",
+    provider: Provider = "groq",
+    concurrency: Optional[int] = None,
+    force_rescore: bool = False,
+    min_prefilter_score: Optional[float] = None,
+    jobs_per_request: int = 1,
+    resume_run_id: Optional[int] = None,
+):
+    """
+    Async SSE generator — all provider calls run as tasks on the event loop.
+    `/scoring/stop` cancels the tasks in `_inflight_tasks` immediately.
+    """
+    global _running
+    _begin_run()
+    params = _run_params(locals())
+    lease_owner = scoring_queue.new_owner()  # this run's leases only, not the scheduler's
+    run_id, run_status, run_error = None, "interrupted", None
+    tracker: Optional[_RunTracker] = None
+
+    try:
+        run_id, jobs_to_score = await asyncio.to_thread(_open_run, params, lease_owner, resume_run_id)
+        total = len(jobs_to_score)
+        _progress.update(total=total, run_id=run_id)
+
+        if total == 0:
+            run_status = "completed"
+            yield _no_jobs_event(status_filter)
+            return
+
+        requests = -(-total // max(jobs_per_request, 1))
+        workers = min(requests, get_provider_concurrency(provider, concurrency))
+        _progress["concurrency"] = workers
+        tracker = _RunTracker(total, provider, workers, run_id, lease_owner)
+        yield tracker.start_event(batch_size, status_filter)
+
+        qualification_threshold = await asyncio.to_thread(_get_qualification_threshold)
+        events = iter_job_events_async(
+            jobs_to_score,
+            provider,
+            qualification_threshold,
+            workers=workers,
+            jobs_per_request=jobs_per_request,
+            force_rescore=force_rescore,
+            should_cancel=lambda: _cancel_flag,
+            inflight=_inflight_tasks,
+        )
+        try:
+            async for event in events:
+                await asyncio.to_thread(tracker.record, event)
+                yield tracker.handle(event)
+        finally:
+            await events.aclose()
+
+        run_status = tracker.run_status()
+        yield tracker.final_event()
+
+    except Exception as e:
+        run_status, run_error = "failed", str(e)
+        raise
+    finally:
+        await asyncio.to_thread(_flush_scores)
+        await asyncio.to_thread(_flush_run_items)
+        await asyncio.to_thread(_close_run, run_id, run_status, run_error, tracker, lease_owner)
+        _running = False
+
+
+def _cancel_inflight() -> int:
+    """Cancel every in-flight async provider call. Safe to call from any thread."""
+    tasks = list(_inflight_tasks)
+    for task in tasks:
+        task.get_loop().call_soon_threadsafe(task.cancel)
+    return len(tasks)
+
+
+async def drain(timeout: float = float(os.getenv("SCORING_DRAIN_SECONDS", "20"))) -> bool:
+    """
+    Shutdown hook: stop dispatching new jobs, give in-flight calls `timeout`
+    seconds to finish, then abort the rest. The run is recorded as
+    `interrupted` so it can be resumed. Buffered scores are written last.
+    Returns True if it drained cleanly.
+    """
+    try:
+        return await _drain_run(timeout)
+    finally:
+        await asyncio.to_thread(_write_back.close)
+        await asyncio.to_thread(_run_items.close)
+        await asyncio.to_thread(score_matrix.close)
+
+
+async def _drain_run(timeout: float) -> bool:
+    global _cancel_flag, _draining
+    if not _running:
+        return True
+    _draining = True
+    _cancel_flag = True
+    deadline = time.monotonic() + timeout
+    while _running and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    if not _running:
+        return True
+    aborted = _cancel_inflight()
+    logger.warning(f"Scoring drain timed out after {timeout}s; aborted {aborted} in-flight request(s)")
+    for _ in range(20):
+        if not _running:
+            break
+        await asyncio.sleep(0.1)
+    return False
+
+
+# ── Routes ───────────────────────────────────────────────────────────────
+
+@router.post("/scoring/start")
+async def start_scoring(body: ScoringRequest):
+    """Start an AI scoring run. Returns an SSE stream."""
+    if _running:
+        return StreamingResponse(
+            iter([_sse_event("error", {
+                "type": "error",
+                "message": "A scoring run is already in progress.",
+            })]),
+            media_type="text/event-stream",
+        )
+
+    return StreamingResponse(
+        _scoring_generator_async(
+            body.batch_size,
+            body.status_filter,
+            body.sort_by,
+            provider=body.provider,
+            concurrency=body.concurrency,
+            force_rescore=body.force_rescore,
+            min_prefilter_score=body.min_prefilter_score,
+            jobs_per_request=body.jobs_per_request,
+        ),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.post("/scoring/stop")
+def stop_scoring():
+    """Cancel the current scoring run, aborting in-flight provider calls."""
+    global _cancel_flag
+    if not _running:
+        return {"status": "idle", "message": "No scoring run in progress."}
+    _cancel_flag = True
+    aborted = _cancel_inflight()
+    return {
+        "status": "cancelling",
+        "message": f"Scoring stopped; {aborted} in-flight request(s) aborted.",
+        "aborted": aborted,
+    }
+
+
+@router.get("/scoring/status")
+def scoring_status():
+    """Return the current (or most recent) scoring run as recorded in `scoring_runs`."""
+    run = None
+    try:
+        run = scoring_runs.get(_progress["run_id"]) if _progress.get("run_id") else scoring_runs.latest()
+    except Exception as e:
+        logger.warning(f"Could not read scoring run state: {e}")
+    return {
+        # A run owned by another worker process is still "running" here
+        "running": _running or bool(run and run["status"] == "running"),
+        "progress": _progress,
+        "run": run,
+    }
+
+
+@router.get("/scoring/runs")
+def list_scoring_runs(limit: int = Query(20, ge=1, le=200)):
+    """Recent scoring runs with per-status item counts."""
+    return {"runs": scoring_runs.list_runs(limit)}
+
+
+@router.get("/scoring/runs/{run_id}")
+def get_scoring_run(run_id: int):
+    """One scoring run with its unfinished and failed items."""
+    run = scoring_runs.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Scoring run not found")
+    return run
+
+
+@router.post("/scoring/runs/{run_id}/resume")
+async def resume_scoring_run(run_id: int):
+    """Resume a stopped or interrupted run from the items it never finished. Returns an SSE stream."""
+    if _running:
+        raise HTTPException(status_code=409, detail="A scoring run is already in progress.")
+    run = await asyncio.to_thread(scoring_runs.get, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Scoring run not found")
+    if not run["resumable"]:
+        raise HTTPException(status_code=409, detail=f"Scoring run is {run['status']} and cannot be resumed")
+
+    params = {key: run["params"].get(key) for key in _RUN_PARAM_KEYS}
+    return StreamingResponse(
+        _scoring_generator_async(**params, resume_run_id=run_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.get("/scoring/limits")
+def scoring_limits():
+    """Learned per-key concurrency and provider-reported quota, the shared request buckets and score write-back."""
+    return {
+        "keys": adaptive_limits.controller.snapshot(),
+        "key_scheduling": key_scheduler.stats(),
+        "latency": hedging.latencies.stats(),
+        "buckets": rate_limiter.stats(),
+        "write_back": _write_back.stats(),
+        "run_items_write_back": _run_items.stats(),
+        "matrix_write_back": score_matrix.stats(),
+    }
+
+
+@router.get("/scoring/clients")
+def scoring_clients():
+    """Return connection-reuse stats for the warm provider client registry."""
+    return llm_clients.pool_stats()
+
+
+@router.get("/scoring/cache")
+def scoring_cache_stats():
+    """Return hit/miss counters and size of the scoring result cache."""
+    return score_cache.stats()
+
+
+@router.post("/scoring/cache/evict")
+def scoring_cache_evict():
+    """Run TTL + LRU eviction now."""
+    return {"evicted": score_cache.evict()}
+
+
+@router.delete("/scoring/cache")
+def scoring_cache_clear():
+    """Drop every cached scoring result (forces fresh analyses)."""
+    return {"deleted": score_cache.clear()}
+
+
+@router.get("/scoring/prefilter")
+def prefilter_stats():
+    """Return lexical pre-ranking index stats."""
+    return prefilter.stats()
+
+
+@router.post("/scoring/prefilter/refresh")
+def prefilter_refresh(full: bool = Query(False)):
+    """Recompute `prefilter_score` (incrementally unless `full`) against the active resume."""
+    return prefilter.refresh(_get_resume(), full=full)
+
+
+@router.get("/scoring/batches")
+def scoring_batches(limit: int = Query(20, ge=1, le=200)):
+    """List recent provider batch-API submissions."""
+    return {"batches": batch_scoring.list_batches(limit)}
+
+
+@router.post("/scoring/batches/submit")
+def scoring_batches_submit(provider: Provider = Query("groq"), limit: Optional[int] = Query(None, ge=1)):
+    """Submit pending jobs as one offline batch (results arrive on a later poll)."""
+    submitted = batch_scoring.submit(provider, limit)
+    return {"submitted": submitted}
+
+
+@router.post("/scoring/batches/poll")
+def scoring_batches_poll():
+    """Ingest any finished batches into `jobs.detailed_score`."""
+    return {"batches": batch_scoring.poll()}
+
+
+@router.post("/scoring/queue")
+def enqueue_scoring(body: EnqueueRequest):
+    """Queue unscored jobs for standalone workers (`python -m app.worker`) instead of scoring them here."""
+    jobs = _fetch_jobs_to_score(body.batch_size, body.status_filter, body.sort_by, body.min_prefilter_score)
+    job_ids = [job["id"] for job in jobs]
+    # Keep the selection order: the first job selected is claimed first
+    priority = [float(len(job_ids) - i) for i in range(len(job_ids))]
+    added = scoring_queue.enqueue(job_ids, body.provider, body.force_rescore, priority)
+    return {"selected": len(job_ids), "enqueued": added}
+
+
+@router.get("/scoring/queue")
+def scoring_queue_stats():
+    """Queue depth, active leases and workers."""
+    return scoring_queue.stats()
+
+
+@router.get("/scoring/unscored-count")
+def unscored_count(status: str = Query("Pending")):
+    """Count jobs that haven't been scored yet."""
+    with db() as (conn, cur):
+        cur.execute(
+            "SELECT COUNT(*) FROM jobs WHERE LOWER(status) = LOWER(%s) AND (score IS NULL OR score = 0)",
+            [status],
+        )
+        count = cur.fetchone()["count"]
+    return {"count": count, "status_filter": status}
+
+
+# ── Single-job scoring (with AI model selector) ──────────────────────────
+
+def _load_job_for_scoring(job_db_id: int) -> dict:
+    with db() as (conn, cur):
+        cur.execute(
+            """SELECT id, job_title, company_name, job_description
+               FROM jobs WHERE id = %s""",
+            [job_db_id],
+        )
+        job = cur.fetchone()
 
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -1036,27 +2141,264 @@ def score_single_job(body: SingleScoreRequest):
             status_code=400,
             detail="Job has no description. Fetch the job URL first to get the full posting."
         )
+    return job
+
+
+def _save_single_score(job_db_id: int, result: dict) -> None:
+    """Save score + justification + detailed breakdown to the job."""
+    overall_score = int(result.get("overall_score", 0))
+    justification = result.get("overall_justification", "")
+    qualification_threshold = _get_qualification_threshold()
+
+    new_status = "qualified" if overall_score >= qualification_threshold else "low_score"
+    with db() as (conn, cur):
+        cur.execute(
+            """UPDATE jobs
+               SET score = %s,
+                   justification = %s,
+                   status = %s,
+                   detailed_score = %s,
+                   updated_at = NOW(),
+                   version = version + 1
+               WHERE id = %s
+               RETURNING version""",
+            [overall_score, justification, new_status, fast_json.dumps(result), job_db_id],
+        )
+        conn.commit()
+
+
+_HEDGE_PARTNERS: dict[str, Provider] = {"groq": "gemini", "openai": "gemini", "gemini": "groq"}
+
+
+async def _score_single_hedged(job_title: str, company: str, description: str, body: SingleScoreRequest) -> dict:
+    """Score with `body.model`, hedged with a second provider when the hedging policy is on."""
+    primary: Provider = body.model
+    secondary = body.hedge_provider or _HEDGE_PARTNERS[primary]
+    use_hedge = hedging.is_enabled() if body.hedge is None else body.hedge
+
+    def score(provider: Provider):
+        return _score_job_detailed_async(job_title, company, description, provider=provider, force_rescore=body.force_rescore)
+
+    if not use_hedge or secondary == primary:
+        return await score(primary)
+    result, info = await hedging.hedged(primary, secondary, score, is_valid=_valid_batch_slot)
+    result["hedge"] = info
+    return result
+
+
+async def _score_with_model_async(
+    job_title: str, company: str, description: str, member: EnsembleMember, force_rescore: bool
+) -> dict:
+    """Score with one ensemble member; the model override only lives in this task's context."""
+    if member.model:
+        _model_override.set((member.provider, member.model))
+    return await _score_job_detailed_async(
+        job_title, company, description, provider=member.provider, force_rescore=force_rescore
+    )
+
+
+async def _ensemble_generator(body: EnsembleRequest, job: dict):
+    jt = job["job_title"] or "Unknown"
+    co = job["company_name"] or "Unknown"
+    desc = job["job_description"]
+
+    members = {}
+    for member in body.members:
+        members.setdefault(member.label, member)  # duplicate pairs would only score twice
+    info = {label: {"provider": m.provider, "model": label.split(":", 1)[1]} for label, m in members.items()}
+    threshold = await asyncio.to_thread(_get_qualification_threshold)
+    yield _sse_event("start", {"type": "start", "job_db_id": body.job_db_id, "members": list(members)})
+
+    done: list[ensemble.MemberResult] = []
+    async for outcome in ensemble.run(
+        list(members),
+        lambda label: _score_with_model_async(jt, co, desc, members[label], body.force_rescore),
+    ):
+        done.append(outcome)
+        if outcome.error is not None:
+            yield _sse_event("member_error", {
+                "type": "member_error", "label": outcome.label, **info[outcome.label],
+                "error": outcome.error, "latency_ms": outcome.latency_ms,
+            })
+        else:
+            yield _sse_event("member", {
+                "type": "member", "label": outcome.label, **info[outcome.label],
+                "result": outcome.result, "latency_ms": outcome.latency_ms,
+            })
+
+    ok = [m.result for m in done if m.result is not None]
+    if not ok:
+        errors = {m.label: m.error for m in done}
+        yield _sse_event("error", {
+            "type": "error",
+            "rate_limited": all(_is_rate_limit_error(e or "") for e in errors.values()),
+            "message": "All ensemble members failed.",
+            "errors": errors,
+        })
+        return
+
+    summary = ensemble.consensus(ok, threshold)
+    payload = ensemble.compact_payload(done, summary, info)
+    await asyncio.to_thread(_save_single_score, body.job_db_id, payload)
+    yield _sse_event("consensus", {"type": "consensus", "job_db_id": body.job_db_id, **summary})
+    yield _sse_event("done", {"type": "done", "job_db_id": body.job_db_id, "result": payload})
+
+
+@router.post("/scoring/ensemble")
+async def score_ensemble(body: EnsembleRequest):
+    """
+    Score one job with several provider/model pairs concurrently. Streams a
+    `member` (or `member_error`) event per pair as it finishes, then the
+    server-side `consensus`; the compact ensemble payload is saved to
+    `detailed_score` with the consensus average as the job's score.
+    """
+    job = await asyncio.to_thread(_load_job_for_scoring, body.job_db_id)
+    return StreamingResponse(
+        _ensemble_generator(body, job),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+# Fields sent as `partial` events as soon as they are complete
+_PARTIAL_FIELDS = ("overall_score", "fit_assessment_label", "overall_justification")
+_PARTIAL_ARRAYS = ("sections",)
+
+
+def _partial_event(key: str, value, index: Optional[int] = None) -> str:
+    data = {"type": "partial", "field": key, "value": value}
+    if index is not None:
+        data["index"] = index
+    return _sse_event("partial", data)
+
+
+def _partials_from_result(result: dict):
+    """Partial events for a result that is already complete (cache / sibling reuse)."""
+    for key in _PARTIAL_FIELDS:
+        if key in result:
+            yield _partial_event(key, result[key])
+    for key in _PARTIAL_ARRAYS:
+        for index, item in enumerate(result.get(key) or []):
+            yield _partial_event(key, item, index)
+
+
+async def _single_stream_generator(body: SingleScoreRequest, job: dict):
+    jt = job["job_title"] or "Unknown"
+    co = job["company_name"] or "Unknown"
+    desc = job["job_description"]
+    provider: Provider = body.model
+    started = time.time()
+
+    yield _sse_event("start", {"type": "start", "job_db_id": body.job_db_id, "provider": provider})
+    try:
+        result = None
+        cache_key = None
+        if not body.force_rescore:
+            result = await asyncio.to_thread(_find_scored_sibling, body.job_db_id, desc)
+        if result is None:
+            cache_key = await asyncio.to_thread(_cache_key, jt, co, desc, provider)
+            if not body.force_rescore:
+                result = await asyncio.to_thread(_cache_lookup, cache_key)
+
+        if result is not None:
+            for event in _partials_from_result(result):
+                yield event
+        else:
+            compacted = jd_compactor.compact(desc)
+            parser = stream_json.IncrementalParser(stream_arrays=_PARTIAL_ARRAYS)
+            usage: dict = {}
+            meta: dict = {}
+            first_partial_ms = None
+            async for delta in _stream_completion(provider, _build_user_prompt(jt, co, compacted.text), usage, meta):
+                for partial in parser.feed(delta):
+                    if partial.index is not None or partial.key in _PARTIAL_FIELDS:
+                        if first_partial_ms is None:
+                            first_partial_ms = int((time.time() - started) * 1000)
+                        yield _partial_event(partial.key, partial.value, partial.index)
+
+            model = meta.pop("model", _provider_model(provider))
+            result = _coerce_scoring_result(
+                _finalize_completion(_Completion(parser.text, model, provider, usage, meta))
+            )
+            result["first_partial_ms"] = first_partial_ms
+            _stamp_compaction(result, compacted)
+            result["resume_hash"] = await asyncio.to_thread(_resume_hash)
+            await asyncio.to_thread(_cache_store, cache_key, provider, result)
+
+        await asyncio.to_thread(_save_single_score, body.job_db_id, result)
+    except Exception as e:
+        logger.warning(f"Streamed scoring of job {body.job_db_id} failed: {e}")
+        yield _sse_event("error", {
+            "type": "error",
+            "rate_limited": _is_rate_limit_error(str(e)),
+            "message": str(e),
+        })
+        return
+
+    yield _sse_event("done", {
+        "type": "done",
+        "job_db_id": body.job_db_id,
+        "mode": provider,
+        "result": result,
+        "elapsed_ms": int((time.time() - started) * 1000),
+    })
+
+
+@router.post("/scoring/single/stream")
+async def score_single_job_stream(body: SingleScoreRequest):
+    """
+    Streaming variant of /scoring/single for one provider. Emits `partial`
+    events as `overall_score`, `fit_assessment_label`,
+    `overall_justification` and each `sections` entry complete, then `done`
+    with the saved result. Compare/ensemble scoring is /scoring/ensemble.
+    """
+    if body.model == "compare":
+        raise HTTPException(status_code=400, detail="Streaming supports a single provider; use /scoring/ensemble to compare.")
+    job = await asyncio.to_thread(_load_job_for_scoring, body.job_db_id)
+    return StreamingResponse(
+        _single_stream_generator(body, job),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.post("/scoring/single")
+async def score_single_job(body: SingleScoreRequest):
+    """
+    Score a single job (by DB id) with detailed section-by-section analysis.
+    Supports model selection: "groq" | "openai" | "gemini" | "compare".
+
+    In "compare" mode, scores with BOTH providers and returns side-by-side results.
+    """
+    job = await asyncio.to_thread(_load_job_for_scoring, body.job_db_id)
 
     jt = job["job_title"] or "Unknown"
     co = job["company_name"] or "Unknown"
     desc = job["job_description"]
 
-    # ── Compare mode: run both providers ─────────────────────────
+    # ── Compare mode: run both providers concurrently ────────────
     if body.model == "compare":
         results = {}
         errors = {}
+        members = []
 
-        # Try OpenAI
-        try:
-            results["openai"] = _score_job_detailed(jt, co, desc, provider="openai")
-        except Exception as e:
-            errors["openai"] = str(e)
+        async def score(provider: Provider) -> dict:
+            return await _score_job_detailed_async(jt, co, desc, provider=provider, force_rescore=body.force_rescore)
 
-        # Try Gemini
-        try:
-            results["gemini"] = _score_job_detailed(jt, co, desc, provider="gemini")
-        except Exception as e:
-            errors["gemini"] = str(e)
+        async for member in ensemble.run(["openai", "gemini"], score):
+            members.append(member)
+            if member.error is not None:
+                errors[member.label] = member.error
+            else:
+                results[member.label] = member.result
 
         if not results:
             only_rate_limited = all(_is_rate_limit_error(err) for err in errors.values() if err)
@@ -1074,35 +2416,17 @@ def score_single_job(body: SingleScoreRequest):
         best_provider = max(results, key=lambda k: int(results[k].get("overall_score", 0)))
         best_result = results[best_provider]
 
-        overall_score = int(best_result.get("overall_score", 0))
-        justification = best_result.get("overall_justification", "")
-        qualification_threshold = _get_qualification_threshold()
-
         # Save comparison data to DB
         compare_payload = {
             "compare_mode": True,
             "results": results,
             "errors": errors,
             "best_provider": best_provider,
+            "consensus": ensemble.consensus(list(results.values()), _get_qualification_threshold()),
             # Duplicate top-level fields from best for backward compat
             **best_result,
         }
-
-        new_status = "qualified" if overall_score >= qualification_threshold else "low_score"
-        with db() as (conn, cur):
-            cur.execute(
-                """UPDATE jobs
-                   SET score = %s,
-                       justification = %s,
-                       status = %s,
-                       detailed_score = %s,
-                       updated_at = NOW(),
-                       version = version + 1
-                   WHERE id = %s
-                   RETURNING version""",
-                [overall_score, justification, new_status, json.dumps(compare_payload), body.job_db_id],
-            )
-            conn.commit()
+        await asyncio.to_thread(_save_single_score, body.job_db_id, compare_payload)
 
         return {
             "success": True,
@@ -1113,32 +2437,17 @@ def score_single_job(body: SingleScoreRequest):
 
     # ── Single provider mode ─────────────────────────────────────
     try:
-        result = _score_job_detailed(jt, co, desc, provider=body.model)
+        result = None
+        if not body.force_rescore:
+            result = await asyncio.to_thread(_find_scored_sibling, body.job_db_id, desc)
+        if result is None:
+            result = await _score_single_hedged(jt, co, desc, body)
     except RuntimeError as e:
         if _is_rate_limit_error(str(e)):
             raise HTTPException(status_code=429, detail=str(e))
         raise
 
-    overall_score = int(result.get("overall_score", 0))
-    justification = result.get("overall_justification", "")
-    qualification_threshold = _get_qualification_threshold()
-
-    # Save score + justification + detailed breakdown to the job
-    new_status = "qualified" if overall_score >= qualification_threshold else "low_score"
-    with db() as (conn, cur):
-        cur.execute(
-            """UPDATE jobs
-               SET score = %s,
-                   justification = %s,
-                   status = %s,
-                   detailed_score = %s,
-                   updated_at = NOW(),
-                   version = version + 1
-               WHERE id = %s
-               RETURNING version""",
-            [overall_score, justification, new_status, json.dumps(result), body.job_db_id],
-        )
-        conn.commit()
+    await asyncio.to_thread(_save_single_score, body.job_db_id, result)
 
     return {
         "success": True,
@@ -1146,3 +2455,143 @@ def score_single_job(body: SingleScoreRequest):
         "mode": body.model,
         "result": result,
     }
+
+
+# ── Candidate × job matrix (see services/score_matrix.py) ────────────────
+
+async def _score_pair_async(
+    pair: dict, provider: Provider, qualification_threshold: int, force_rescore: bool
+) -> dict:
+    """Score one planned pair; the candidate override only lives in this task's context."""
+    profile = pair["profile"]
+    _profile_override.set(profile)
+    result = await _score_job_detailed_async(*_job_args(pair), provider=provider, force_rescore=force_rescore)
+    await asyncio.to_thread(score_matrix.record, profile, pair["id"], result, qualification_threshold)
+    return result
+
+
+def _plan_matrix_pairs(body: MatrixRequest) -> tuple[score_matrix.Plan, list[dict]]:
+    """The plan plus one pool item per pair to score (job columns + candidate), grouped by candidate."""
+    matrix_plan = score_matrix.plan(
+        body.candidate_ids,
+        top_k=body.top_k,
+        min_prefilter_score=body.min_prefilter_score,
+        status_filter=body.status_filter,
+        job_ids=body.job_ids,
+        force_rescore=body.force_rescore,
+    )
+    jobs = {job["id"]: job for job in _load_jobs(sorted({p.job_id for p in matrix_plan.to_score}))}
+    items = [
+        {**jobs[p.job_id], "candidate_id": p.candidate_id, "profile": matrix_plan.profiles[p.candidate_id],
+         "prefilter_score": p.prefilter_score}
+        for p in matrix_plan.to_score
+        if p.job_id in jobs
+    ]
+    return matrix_plan, items
+
+
+async def _matrix_generator(body: MatrixRequest):
+    """SSE stream of a matrix run: plan, then only the planned pairs go to the LLM."""
+    global _running
+    _begin_run()
+    started = time.time()
+    scored = errors = cancelled = tokens = cache_hits = 0
+    try:
+        matrix_plan, items = await asyncio.to_thread(_plan_matrix_pairs, body)
+        _progress.update(total=len(items))
+        yield _sse_event("start", {"type": "start", "provider": body.provider, "top_k": body.top_k, **matrix_plan.summary()})
+        if not items:
+            yield _sse_event("complete", {"type": "complete", "scored": 0, "errors": 0, "elapsed": 0.0})
+            return
+
+        workers = min(len(items), get_provider_concurrency(body.provider, body.concurrency))
+        threshold = await asyncio.to_thread(_get_qualification_threshold)
+        events = iter_scored_async(
+            items,
+            lambda pair: _score_pair_async(pair, body.provider, threshold, body.force_rescore),
+            workers=workers,
+            should_cancel=lambda: _cancel_flag,
+            inflight=_inflight_tasks,
+        )
+        try:
+            async for event in events:
+                pair = event.job
+                ids = {"candidate_id": pair["candidate_id"], "job_id": pair["id"]}
+                if event.kind == "scored":
+                    scored += 1
+                    tokens += event.result.get("tokens_used", 0) or 0
+                    cache_hits += bool(event.result.get("cache_hit"))
+                    _progress["scored"] = scored + errors
+                    yield _sse_event("scored", {
+                        "type": "scored", **ids, "job_title": pair["job_title"],
+                        "score": event.result.get("overall_score"), "prefilter_score": pair["prefilter_score"],
+                        "cache_hit": bool(event.result.get("cache_hit")), "elapsed": event.elapsed,
+                        "progress": {"done": scored + errors, "total": len(items)},
+                    })
+                elif event.kind == "error":
+                    errors += 1
+                    _progress["scored"] = scored + errors
+                    yield _sse_event("error", {"type": "error", **ids, "message": str(event.error)})
+                elif event.kind == "cancelled":
+                    cancelled += 1
+        finally:
+            await events.aclose()
+
+        yield _sse_event("complete", {
+            "type": "complete", "scored": scored, "errors": errors, "cancelled": cancelled,
+            "cache_hits": cache_hits, "tokens_used": tokens, "elapsed": round(time.time() - started, 1),
+            "stopped": _cancel_flag,
+        })
+    finally:
+        await asyncio.to_thread(score_matrix.flush)
+        _running = False
+
+
+@router.post("/scoring/matrix/plan")
+def plan_scoring_matrix(body: MatrixRequest):
+    """Pre-rank candidate × job pairs and report which would go to the LLM (records the ranking only)."""
+    return score_matrix.plan(
+        body.candidate_ids,
+        top_k=body.top_k,
+        min_prefilter_score=body.min_prefilter_score,
+        status_filter=body.status_filter,
+        job_ids=body.job_ids,
+        force_rescore=body.force_rescore,
+    ).summary()
+
+
+@router.post("/scoring/matrix")
+async def start_scoring_matrix(body: MatrixRequest):
+    """Score the top-K pre-ranked jobs of each candidate in `candidate_ids`. Returns an SSE stream."""
+    if _running:
+        return StreamingResponse(
+            iter([_sse_event("error", {
+                "type": "error",
+                "message": "A scoring run is already in progress.",
+            })]),
+            media_type="text/event-stream",
+        )
+
+    return StreamingResponse(
+        _matrix_generator(body),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.get("/scoring/matrix")
+def get_scoring_matrix(
+    candidate_ids: Optional[str] = Query(None, description="Comma-separated candidate ids; default all"),
+    limit: int = Query(20, ge=1, le=500),
+    min_score: Optional[int] = Query(None, ge=0, le=100),
+):
+    """Each candidate's best jobs from `job_scores`."""
+    try:
+        ids = [int(part) for part in candidate_ids.split(",") if part.strip()] if candidate_ids else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="candidate_ids must be comma-separated integers")
+    return score_matrix.matrix(ids, limit=limit, min_score=min_score)
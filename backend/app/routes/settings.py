@@ -6,6 +6,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 from ..db import db
+from ..services import settings_cache
 
 router = APIRouter()
 
@@ -13,15 +14,10 @@ router = APIRouter()
 # ── Helpers ────────────────────────────────────────────────────────────────
 
 def _get_setting(key: str) -> Optional[str]:
-    """Read a setting from DB, fallback to os.environ."""
-    try:
-        with db() as (conn, cur):
-            cur.execute("SELECT value FROM app_settings WHERE key = %s", (key,))
-            row = cur.fetchone()
-            if row:
-                return row["value"]
-    except Exception:
-        pass  # Table might not exist yet
+    """Read a setting from DB (via the settings cache), fallback to os.environ."""
+    value = settings_cache.get(key)
+    if value is not None:
+        return value
     return os.environ.get(key)
 
 
@@ -34,6 +30,8 @@ def _set_setting(key: str, value: str):
                ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value""",
             (key, value),
         )
+        settings_cache.notify_changed(cur, key)
+    settings_cache.invalidate()
 
 
 def get_api_key(key_name: str) -> Optional[str]:
@@ -95,9 +93,21 @@ async def save_api_keys(body: ApiKeysBody):
         saved.append("GROQ_API_KEYS")
     if not saved:
         raise HTTPException(status_code=400, detail="No keys provided")
+
+    # Drop warm provider clients built with the old keys
+    from ..services import llm_clients
+    providers = {"OPENAI_API_KEY": "openai", "GEMINI_API_KEY": "gemini", "GROQ_API_KEYS": "groq"}
+    for key_name in saved:
+        llm_clients.invalidate(providers[key_name])
     return {"saved": saved, "message": f"Saved {len(saved)} key(s) successfully"}
 
 
+@router.get("/settings/cache")
+def settings_cache_stats():
+    """Hit/load counters of the in-process settings cache and whether change notifications are live."""
+    return settings_cache.stats()
+
+
 @router.post("/settings/test-openai")
 async def test_openai():
     """Test the OpenAI API key with a minimal request."""
@@ -0,0 +1,255 @@
+"""
+Adaptive Limits — AIMD per-key concurrency driven by rate-limit headers.
+
+Groq and OpenAI report the quota left on every response:
+
+    x-ratelimit-limit-requests / -tokens       quota for the window
+    x-ratelimit-remaining-requests / -tokens   what is left of it
+    x-ratelimit-reset-requests / -tokens       when it refills ("2m59.56s", "6ms")
+    retry-after                                seconds to wait after a 429
+
+Each API key gets a concurrency limit that grows additively (+1 per
+`limit` successes) while the headers show headroom, halves on a 429, and
+blocks the key until exactly the reset/retry-after the provider reported —
+instead of a fixed per-key delay and a blanket 90 s cooldown. When the
+remaining requests or tokens can't cover the calls already in flight, the
+key pauses until its window resets rather than running into a 429.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from threading import Condition
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+INITIAL_CONCURRENCY = float(os.getenv("ADAPTIVE_INITIAL_CONCURRENCY", "2"))
+MAX_CONCURRENCY = float(os.getenv("ADAPTIVE_MAX_CONCURRENCY", "16"))
+DECREASE_FACTOR = 0.5
+FALLBACK_COOLDOWN = float(os.getenv("ADAPTIVE_FALLBACK_COOLDOWN_SECONDS", "20"))  # 429 without any reset hint
+_POLL_SECONDS = 0.25
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value) -> Optional[float]:
+    """Seconds from "1.5", "6ms", "2m59.56s" or "1h2m"; None if unparseable."""
+    if value is None:
+        return None
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(text)
+    if not parts or "".join(n + u for n, u in parts) != text.replace(" ", ""):
+        return None
+    return sum(float(n) * _UNIT_SECONDS[u] for n, u in parts)
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RateLimitInfo:
+    limit_requests: Optional[int] = None
+    remaining_requests: Optional[int] = None
+    reset_requests: Optional[float] = None
+    limit_tokens: Optional[int] = None
+    remaining_tokens: Optional[int] = None
+    reset_tokens: Optional[float] = None
+    retry_after: Optional[float] = None
+
+
+def parse_headers(headers) -> Optional[RateLimitInfo]:
+    """RateLimitInfo from response headers (any mapping), or None if there are none."""
+    if not headers:
+        return None
+    get = lambda name: headers.get(name)  # noqa: E731 — httpx.Headers is case-insensitive
+    info = RateLimitInfo(
+        limit_requests=_to_int(get("x-ratelimit-limit-requests")),
+        remaining_requests=_to_int(get("x-ratelimit-remaining-requests")),
+        reset_requests=parse_duration(get("x-ratelimit-reset-requests")),
+        limit_tokens=_to_int(get("x-ratelimit-limit-tokens")),
+        remaining_tokens=_to_int(get("x-ratelimit-remaining-tokens")),
+        reset_tokens=parse_duration(get("x-ratelimit-reset-tokens")),
+        retry_after=parse_duration(get("retry-after")),
+    )
+    return info if any(v is not None for v in vars(info).values()) else None
+
+
+def error_headers(error: Exception):
+    """Headers of the HTTP response behind an SDK error, if any."""
+    return getattr(getattr(error, "response", None), "headers", None)
+
+
+@dataclass
+class _KeyState:
+    limit: float = INITIAL_CONCURRENCY
+    inflight: int = 0
+    blocked_until: float = 0.0
+    last_reserved: float = 0.0
+    tokens_per_request: float = 0.0  # EWMA of tokens used per call
+    successes: int = 0
+    throttled: int = 0
+    info: RateLimitInfo = field(default_factory=RateLimitInfo)
+    updated_at: Optional[float] = None
+
+
+class AdaptiveController:
+    def __init__(self):
+        self._cond = Condition()
+        self._keys: dict[str, _KeyState] = {}
+
+    def _state(self, key: str) -> _KeyState:
+        state = self._keys.get(key)
+        if state is None:
+            state = self._keys[key] = _KeyState()
+        return state
+
+    def try_reserve(self, keys: list[str]) -> tuple[Optional[str], float]:
+        """
+        Take a slot on the key with the most headroom: (key, 0). If none is
+        free, (None, seconds until the earliest one may be).
+        """
+        now = time.time()
+        with self._cond:
+            best, best_rank, wait = None, None, float("inf")
+            for key in keys:
+                state = self._state(key)
+                if state.blocked_until > now:
+                    wait = min(wait, state.blocked_until - now)
+                    continue
+                if state.inflight >= max(1, int(state.limit)):
+                    wait = min(wait, _POLL_SECONDS)
+                    continue
+                rank = (state.inflight / state.limit, state.last_reserved)
+                if best_rank is None or rank < best_rank:
+                    best, best_rank = key, rank
+            if best is None:
+                return None, (wait if wait != float("inf") else _POLL_SECONDS)
+            state = self._keys[best]
+            state.inflight += 1
+            state.last_reserved = now
+            return best, 0.0
+
+    def capacity(self, key: str) -> int:
+        """Calls currently allowed in flight on `key`."""
+        with self._cond:
+            return max(1, int(self._state(key).limit))
+
+    def paused_until(self, key: str) -> float:
+        with self._cond:
+            return self._state(key).blocked_until
+
+    def begin(self, key: str) -> None:
+        """Count a call that an external scheduler dispatched on `key` (paired with `release`)."""
+        with self._cond:
+            self._state(key).inflight += 1
+
+    def acquire(self, keys: list[str], timeout: Optional[float] = None) -> str:
+        """Block until some key in `keys` has a free slot; returns it."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            key, wait = self.try_reserve(keys)
+            if key is not None:
+                return key
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise RuntimeError(f"Rate limit: no capacity on {len(keys)} key(s) for {wait:.1f}s")
+            with self._cond:
+                self._cond.wait(wait)
+
+    async def acquire_async(self, keys: list[str], timeout: Optional[float] = None) -> str:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            key, wait = self.try_reserve(keys)
+            if key is not None:
+                return key
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise RuntimeError(f"Rate limit: no capacity on {len(keys)} key(s) for {wait:.1f}s")
+            await asyncio.sleep(min(wait, _POLL_SECONDS))
+
+    def release(self, key: str, headers=None, tokens_used: int = 0, rate_limited: bool = False) -> None:
+        """Return the slot and learn from the response (or 429) headers."""
+        info = parse_headers(headers)
+        now = time.time()
+        with self._cond:
+            state = self._state(key)
+            state.inflight = max(0, state.inflight - 1)
+            if info is not None:
+                state.info = info
+                state.updated_at = now
+            if tokens_used:
+                state.tokens_per_request = (
+                    tokens_used if not state.tokens_per_request
+                    else 0.8 * state.tokens_per_request + 0.2 * tokens_used
+                )
+
+            if rate_limited:
+                state.throttled += 1
+                state.limit = max(1.0, state.limit * DECREASE_FACTOR)
+                pause = None
+                if info is not None:
+                    pause = info.retry_after or max(info.reset_requests or 0.0, info.reset_tokens or 0.0) or None
+                state.blocked_until = max(state.blocked_until, now + (pause or FALLBACK_COOLDOWN))
+                logger.info(f"Adaptive limits: {key} throttled, concurrency -> {state.limit:.1f}, paused {pause or FALLBACK_COOLDOWN:.1f}s")
+            else:
+                state.successes += 1
+                if self._has_headroom(state, info, now):
+                    state.limit = min(MAX_CONCURRENCY, state.limit + 1.0 / state.limit)
+            self._cond.notify_all()
+
+    @staticmethod
+    def _has_headroom(state: _KeyState, info: Optional[RateLimitInfo], now: float) -> bool:
+        """False (and pause the key until reset) when the quota left can't cover calls in flight."""
+        if info is None:
+            return True
+        needed = state.inflight + 1
+        if info.remaining_requests is not None and info.remaining_requests < needed:
+            state.blocked_until = max(state.blocked_until, now + (info.reset_requests or 0.0))
+            return False
+        if (
+            info.remaining_tokens is not None
+            and state.tokens_per_request
+            and info.remaining_tokens < state.tokens_per_request * needed
+        ):
+            state.blocked_until = max(state.blocked_until, now + (info.reset_tokens or 0.0))
+            return False
+        return True
+
+    def snapshot(self) -> dict:
+        """Learned limits per key, for the limits endpoint."""
+        now = time.time()
+        with self._cond:
+            return {
+                key: {
+                    "concurrency": round(state.limit, 2),
+                    "inflight": state.inflight,
+                    "paused_for_seconds": round(max(0.0, state.blocked_until - now), 2),
+                    "successes": state.successes,
+                    "throttled": state.throttled,
+                    "tokens_per_request": round(state.tokens_per_request),
+                    "limit_requests": state.info.limit_requests,
+                    "remaining_requests": state.info.remaining_requests,
+                    "limit_tokens": state.info.limit_tokens,
+                    "remaining_tokens": state.info.remaining_tokens,
+                    "headers_age_seconds": round(now - state.updated_at, 1) if state.updated_at else None,
+                }
+                for key, state in self._keys.items()
+            }
+
+    def reset(self) -> None:
+        with self._cond:
+            self._keys.clear()
+
+
+controller = AdaptiveController()
@@ -12,21 +12,12 @@ from email.mime.multipart import MIMEMultipart
 from typing import Optional, List, Dict
 import httpx
 
-_DEFAULT_SCORE_THRESHOLD = int(os.getenv("SCORE_THRESHOLD_DEFAULT", "80"))
+from . import settings_cache
 
 
 def _get_setting(key: str) -> Optional[str]:
-    """Get a setting from app_settings table, with env fallback."""
-    try:
-        from ..db import db
-        with db() as (conn, cur):
-            cur.execute("SELECT value FROM app_settings WHERE key = %s", [key])
-            row = cur.fetchone()
-            if row and row["value"]:
-                return row["value"]
-    except Exception:
-        pass
-    return os.getenv(key)
+    """Get a setting from app_settings (cached), with env fallback."""
+    return settings_cache.get(key) or os.getenv(key)
 
 
 async def send_telegram(message: str) -> dict:
@@ -110,25 +101,10 @@ async def notify_high_match(
     Supports rich formatting with APPLY NOW link, CV download link,
     location, and justification snippet (backported from legacy pattern).
     """
-    from ..db import db
-
     # Check if notifications are enabled
-    telegram_enabled = True  # default on
-    email_enabled = False
-    threshold = _DEFAULT_SCORE_THRESHOLD
-
-    try:
-        with db() as (conn, cur):
-            cur.execute("SELECT key, value FROM app_settings WHERE key IN ('telegram_enabled', 'email_enabled', 'score_threshold')")
-            for row in cur.fetchall():
-                if row["key"] == "telegram_enabled":
-                    telegram_enabled = row["value"].lower() in ("true", "1", "yes")
-                elif row["key"] == "email_enabled":
-                    email_enabled = row["value"].lower() in ("true", "1", "yes")
-                elif row["key"] == "score_threshold":
-                    threshold = int(row["value"])
-    except Exception:
-        pass
+    telegram_enabled = settings_cache.get_bool("telegram_enabled", True)  # default on
+    email_enabled = settings_cache.get_bool("email_enabled", False)
+    threshold = settings_cache.qualification_threshold()
 
     if score < threshold:
         return
@@ -197,16 +173,7 @@ async def notify_batch_complete(
     If `qualified_jobs` is provided, each entry is included with its details
     (company, title, score, apply link) — matching legacy's send_batch_summary.
     """
-    telegram_enabled = True
-    try:
-        from ..db import db
-        with db() as (conn, cur):
-            cur.execute("SELECT value FROM app_settings WHERE key = 'telegram_enabled'")
-            row = cur.fetchone()
-            if row:
-                telegram_enabled = row["value"].lower() in ("true", "1", "yes")
-    except Exception:
-        pass
+    telegram_enabled = settings_cache.get_bool("telegram_enabled", True)
 
     message = (
         f"📊 <b>Batch Scoring Complete</b>\n\n"
@@ -0,0 +1,408 @@
+"""
+Batch Scoring — offline bulk scoring through provider batch APIs.
+
+Overnight scheduler runs don't need interactive latency. In batch mode the
+scheduler:
+  1. writes one JSONL chat-completion request per pending job
+     (custom_id = "job-<id>", same prompt as interactive scoring)
+  2. uploads and submits it as a batch, recorded in `scoring_batches`
+  3. on later ticks polls open batches, downloads finished output and
+     ingests each line through `_coerce_scoring_result` into
+     `jobs.detailed_score`
+
+Transports are pluggable:
+  - OpenAIBatchTransport: the OpenAI-compatible Files + Batches API
+    (OpenAI and Groq)
+  - LocalBatchTransport: an in-process stand-in that answers each request
+    with a callable — used for providers without a batch API (Gemini),
+    when SCORING_BATCH_TRANSPORT=local, and by the tests
+"""
+
+import io
+import json
+import logging
+import os
+import uuid
+from typing import Callable, Optional
+
+from . import fast_json
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+MAX_BATCH_JOBS = int(os.getenv("SCORING_BATCH_MAX_JOBS", "2000"))
+
+# Remote statuses that will never produce (more) output
+_TERMINAL_FAILURES = {"failed", "expired", "cancelled", "cancelling"}
+
+
+class BatchTransport:
+    """Minimal Files + Batches surface used by the batch runner."""
+
+    name = "base"
+
+    def upload(self, jsonl: bytes) -> str:
+        raise NotImplementedError
+
+    def create(self, input_file_id: str) -> str:
+        raise NotImplementedError
+
+    def status(self, batch_id: str) -> dict:
+        """{"status": ..., "output_file_id": ..., "error_file_id": ...}"""
+        raise NotImplementedError
+
+    def download(self, file_id: str) -> str:
+        raise NotImplementedError
+
+
+class OpenAIBatchTransport(BatchTransport):
+    """OpenAI-compatible batch API (OpenAI, Groq) via a warm SDK client."""
+
+    name = "provider"
+
+    def __init__(self, client):
+        self.client = client
+
+    def upload(self, jsonl: bytes) -> str:
+        uploaded = self.client.files.create(file=("scoring_batch.jsonl", io.BytesIO(jsonl)), purpose="batch")
+        return uploaded.id
+
+    def create(self, input_file_id: str) -> str:
+        batch = self.client.batches.create(
+            input_file_id=input_file_id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=COMPLETION_WINDOW,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> dict:
+        batch = self.client.batches.retrieve(batch_id)
+        return {
+            "status": batch.status,
+            "output_file_id": batch.output_file_id,
+            "error_file_id": batch.error_file_id,
+        }
+
+    def download(self, file_id: str) -> str:
+        return self.client.files.content(file_id).text
+
+
+class LocalBatchTransport(BatchTransport):
+    """
+    In-process stand-in for a batch API. `handler(body) -> response body`
+    answers one chat-completion request; batches complete on first poll.
+    """
+
+    name = "local"
+
+    def __init__(self, handler: Callable[[dict], dict]):
+        self.handler = handler
+        self._files: dict[str, str] = {}
+        self._batches: dict[str, dict] = {}
+
+    def upload(self, jsonl: bytes) -> str:
+        file_id = f"file-local-{uuid.uuid4().hex[:12]}"
+        self._files[file_id] = jsonl.decode("utf-8")
+        return file_id
+
+    def create(self, input_file_id: str) -> str:
+        batch_id = f"batch-local-{uuid.uuid4().hex[:12]}"
+        self._batches[batch_id] = {"input_file_id": input_file_id, "status": "validating", "output_file_id": None}
+        return batch_id
+
+    def status(self, batch_id: str) -> dict:
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return {"status": "expired", "output_file_id": None, "error_file_id": None}
+        if batch["status"] != "completed":
+            batch["output_file_id"] = self._run(batch["input_file_id"])
+            batch["status"] = "completed"
+        return {"status": "completed", "output_file_id": batch["output_file_id"], "error_file_id": None}
+
+    def download(self, file_id: str) -> str:
+        return self._files[file_id]
+
+    def _run(self, input_file_id: str) -> str:
+        lines = []
+        for raw in self._files[input_file_id].splitlines():
+            if not raw.strip():
+                continue
+            request = json.loads(raw)
+            try:
+                response = {"status_code": 200, "body": self.handler(request["body"])}
+                error = None
+            except Exception as e:
+                response, error = None, {"message": str(e)}
+            lines.append(fast_json.dumps({"custom_id": request["custom_id"], "response": response, "error": error}))
+        output_id = f"file-local-{uuid.uuid4().hex[:12]}"
+        self._files[output_id] = "\n".join(lines)
+        return output_id
+
+
+# ── Transport selection ─────────────────────────────────────────────────────
+
+def _interactive_handler(provider: str) -> Callable[[dict], dict]:
+    """Answer batch requests with the regular (interactive) provider call."""
+    from ..routes.scoring import _complete
+
+    def handle(body: dict) -> dict:
+        user_prompt = next(m["content"] for m in reversed(body["messages"]) if m["role"] == "user")
+        completion = _complete(provider, user_prompt, body.get("max_tokens", 3000))
+        usage = completion.usage
+        return {
+            "model": completion.model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": completion.text}}],
+            "usage": {
+                "total_tokens": usage.get("tokens_used", 0),
+                "prompt_tokens": usage.get("prompt_tokens", 0),
+                "prompt_tokens_details": {"cached_tokens": usage.get("cached_tokens", 0)},
+            },
+        }
+
+    return handle
+
+
+def get_transport(provider: str) -> BatchTransport:
+    """Provider batch API where one exists, else the local stand-in."""
+    from ..routes import scoring
+
+    mode = os.getenv("SCORING_BATCH_TRANSPORT", "provider").lower()
+    if mode == "local" or provider == "gemini":
+        return LocalBatchTransport(_interactive_handler(provider))
+    if provider == "openai":
+        api_key, model = scoring._openai_settings()
+        from . import llm_clients
+        return OpenAIBatchTransport(llm_clients.get_openai_client("openai", api_key, model))
+    if provider == "groq":
+        keys, model = scoring._groq_keys_and_model()
+        return OpenAIBatchTransport(scoring._groq_client(keys[0], 0, model))
+    raise ValueError(f"Unsupported provider: {provider}")
+
+
+# ── JSONL requests / results ────────────────────────────────────────────────
+
+def build_requests(jobs: list[dict], provider: str) -> bytes:
+    """One chat-completion request per job, same prompt as interactive scoring."""
+    from ..routes.scoring import _chat_completion_args, _chat_messages, _job_args, _provider_model
+    from . import jd_compactor
+
+    model = _provider_model(provider)
+    lines = []
+    for job in jobs:
+        job_title, company, description = _job_args(job)
+        body = {
+            "model": model,
+            "messages": _chat_messages(job_title, company, jd_compactor.compact(description).text),
+            **_chat_completion_args(),
+        }
+        lines.append(fast_json.dumps({"custom_id": f"job-{job['id']}", "method": "POST", "url": BATCH_ENDPOINT, "body": body}))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def parse_results(output: str, provider: str) -> tuple[dict[int, dict], dict[int, str]]:
+    """({job_id: coerced result}, {job_id: error}) from a batch output file."""
+    from ..routes.scoring import _coerce_scoring_result, _finalize_result
+
+    results: dict[int, dict] = {}
+    errors: dict[int, str] = {}
+    for raw in output.splitlines():
+        if not raw.strip():
+            continue
+        line = json.loads(raw)
+        try:
+            job_id = int(str(line.get("custom_id", "")).removeprefix("job-"))
+        except ValueError:
+            continue
+        response = line.get("response") or {}
+        body = response.get("body") or {}
+        if line.get("error") or response.get("status_code", 200) >= 400 or not body.get("choices"):
+            errors[job_id] = str((line.get("error") or body.get("error") or {}).get("message", "no output"))
+            continue
+        usage = body.get("usage") or {}
+        result = _finalize_result(
+            body["choices"][0]["message"]["content"] or "",
+            body.get("model", ""),
+            provider,
+            {
+                "tokens_used": usage.get("total_tokens", 0),
+                "prompt_tokens": usage.get("prompt_tokens", 0),
+                "cached_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+            },
+        )
+        result = _coerce_scoring_result(result)
+        result["batch_api"] = True
+        results[job_id] = result
+    return results, errors
+
+
+# ── Batch bookkeeping (scoring_batches) ─────────────────────────────────────
+
+def _pending_jobs(limit: int) -> list[dict]:
+    from ..db import db
+    with db() as (conn, cur):
+        cur.execute(
+            """
+            SELECT j.id, j.job_title, j.company_name, j.job_description
+            FROM jobs j
+            WHERE j.score IS NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM scoring_batches b
+                  WHERE b.status = 'submitted' AND j.id = ANY(b.job_ids)
+              )
+            ORDER BY j.prefilter_score DESC NULLS LAST, j.created_at DESC
+            LIMIT %s
+            """,
+            [limit],
+        )
+        return [dict(row) for row in cur.fetchall()]
+
+
+def _record_batch(provider: str, model: str, transport: str, remote_id: str, input_file_id: str, job_ids: list[int]) -> int:
+    from ..db import db
+    with db() as (conn, cur):
+        cur.execute(
+            """
+            INSERT INTO scoring_batches
+                (provider, model, transport, remote_batch_id, input_file_id, job_ids, request_count)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            RETURNING id
+            """,
+            [provider, model, transport, remote_id, input_file_id, job_ids, len(job_ids)],
+        )
+        return cur.fetchone()["id"]
+
+
+def _open_batches() -> list[dict]:
+    from ..db import db
+    with db() as (conn, cur):
+        cur.execute(
+            "SELECT id, provider, transport, remote_batch_id FROM scoring_batches WHERE status = 'submitted' ORDER BY id"
+        )
+        return [dict(row) for row in cur.fetchall()]
+
+
+def _close_batch(batch_id: int, status: str, output_file_id: Optional[str] = None,
+                 scored: int = 0, errors: int = 0, error: Optional[str] = None) -> None:
+    from ..db import db
+    with db() as (conn, cur):
+        cur.execute(
+            """
+            UPDATE scoring_batches
+            SET status = %s, output_file_id = %s, scored_count = %s, error_count = %s,
+                error = %s, completed_at = NOW()
+            WHERE id = %s
+            """,
+            [status, output_file_id, scored, errors, error, batch_id],
+        )
+
+
+def list_batches(limit: int = 20) -> list[dict]:
+    from ..db import db
+    with db() as (conn, cur):
+        cur.execute(
+            """
+            SELECT id, provider, model, transport, remote_batch_id, status, request_count,
+                   scored_count, error_count, error, created_at, completed_at
+            FROM scoring_batches ORDER BY id DESC LIMIT %s
+            """,
+            [limit],
+        )
+        rows = [dict(row) for row in cur.fetchall()]
+    for row in rows:
+        for col in ("created_at", "completed_at"):
+            if row[col] is not None:
+                row[col] = row[col].isoformat()
+    return rows
+
+
+# ── Runner ──────────────────────────────────────────────────────────────────
+
+# Local batches only live in this process, so their transports are kept here
+_local_transports: dict[str, BatchTransport] = {}
+
+
+def submit(provider: str = "groq", limit: Optional[int] = None, transport: Optional[BatchTransport] = None) -> Optional[dict]:
+    """Submit one batch with up to `limit` pending jobs. Returns None when nothing is pending."""
+    from ..routes.scoring import _provider_model
+
+    jobs = _pending_jobs(min(limit or MAX_BATCH_JOBS, MAX_BATCH_JOBS))
+    if not jobs:
+        return None
+
+    transport = transport or get_transport(provider)
+    input_file_id = transport.upload(build_requests(jobs, provider))
+    remote_id = transport.create(input_file_id)
+    if transport.name == "local":
+        _local_transports[remote_id] = transport
+
+    job_ids = [job["id"] for job in jobs]
+    batch_id = _record_batch(provider, _provider_model(provider), transport.name, remote_id, input_file_id, job_ids)
+    logger.info(f"Batch scoring: submitted batch {batch_id} ({remote_id}) with {len(job_ids)} jobs via {transport.name}")
+    return {"id": batch_id, "remote_batch_id": remote_id, "jobs": len(job_ids), "transport": transport.name}
+
+
+def _transport_for(batch: dict) -> Optional[BatchTransport]:
+    if batch["transport"] == "local":
+        return _local_transports.get(batch["remote_batch_id"])
+    return get_transport(batch["provider"])
+
+
+def ingest(output: str, provider: str) -> tuple[int, int]:
+    """Persist every result in a batch output file. Returns (scored, errors)."""
+    from ..routes.scoring import _flush_scores, _get_qualification_threshold, _persist_score, _resume_hash
+
+    results, errors = parse_results(output, provider)
+    for job_id, error in errors.items():
+        logger.warning(f"Batch scoring: job {job_id} failed in batch: {error}")
+
+    threshold = _get_qualification_threshold()
+    resume_hash = _resume_hash()
+    scored = 0
+    for job_id, result in results.items():
+        result["resume_hash"] = resume_hash
+        try:
+            _persist_score(job_id, result, threshold)
+            scored += 1
+        except Exception as e:
+            logger.warning(f"Batch scoring: could not persist job {job_id}: {e}")
+    _flush_scores()
+    return scored, len(results) + len(errors) - scored
+
+
+def poll(transport: Optional[BatchTransport] = None) -> list[dict]:
+    """Check every open batch; ingest finished ones. Returns a summary per batch."""
+    summaries = []
+    for batch in _open_batches():
+        try:
+            client = transport or _transport_for(batch)
+            if client is None:
+                # A local batch from a previous process — its jobs go back to the pool
+                _close_batch(batch["id"], "expired", error="local batch lost on restart")
+                summaries.append({"id": batch["id"], "status": "expired"})
+                continue
+
+            state = client.status(batch["remote_batch_id"])
+            status = state.get("status")
+            if status == "completed":
+                output = client.download(state["output_file_id"]) if state.get("output_file_id") else ""
+                scored, errors = ingest(output, batch["provider"])
+                _close_batch(batch["id"], "ingested", state.get("output_file_id"), scored, errors)
+                _local_transports.pop(batch["remote_batch_id"], None)
+                summaries.append({"id": batch["id"], "status": "ingested", "scored": scored, "errors": errors})
+            elif status in _TERMINAL_FAILURES:
+                _close_batch(batch["id"], "failed" if status == "failed" else "expired", error=f"remote status: {status}")
+                summaries.append({"id": batch["id"], "status": status})
+            else:
+                summaries.append({"id": batch["id"], "status": status or "unknown"})
+        except Exception as e:
+            logger.error(f"Batch scoring: polling batch {batch['id']} failed: {e}")
+            summaries.append({"id": batch["id"], "status": "poll_error", "error": str(e)})
+    return summaries
+
+
+def run_cycle(provider: str = "groq", limit: Optional[int] = None) -> dict:
+    """Scheduler entry point: ingest finished batches, then submit pending jobs."""
+    polled = poll()
+    submitted = submit(provider, limit)
+    return {"polled": polled, "submitted": submitted}
@@ -0,0 +1,384 @@
+"""
+Candidate Profile — the one resolved resume, with its derived data.
+
+Scoring and CV generation used to keep their own module-level copy of the
+resume, each resolved from a different source and never refreshed when
+`/candidates/{id}/active` switched candidates. Both now read `active()`:
+
+  1. backend/candidate_resume.txt (local override, shadows the database)
+  2. the resume block in "processo classificacao.md" (legacy workflow doc)
+  3. the candidates row marked `is_active`
+  4. the newest candidates row
+
+so switching candidates takes effect only when neither file is present.
+
+Everything derived from the text — content hash, parsed sections, skills,
+token count and the lexical term vector — is computed once per profile.
+`content_hash` is what scoring uses as the resume part of its cache keys,
+and `cache_key` identifies the profile itself (source, id, version, hash).
+
+The candidates routes call `invalidate()` after every change, so their own
+process switches immediately. Other processes (the worker) re-check which
+row is current every CANDIDATE_PROFILE_TTL_SECONDS (default 30) with one
+small query on `candidates(id, version)` — see migration 013 — and only
+rebuild when it moved. When the profile really changes, caches built from
+the previous resume (prefilter BM25 stats, warm Gemini models whose system
+instruction embeds it) are dropped as well.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+from . import jd_compactor, prefilter
+from .score_cache import text_hash
+
+logger = logging.getLogger(__name__)
+
+TTL_SECONDS = float(os.getenv("CANDIDATE_PROFILE_TTL_SECONDS", "30"))
+
+_BACKEND_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", ".."))
+RESUME_FILES = [
+    os.path.join(_BACKEND_DIR, "candidate_resume.txt"),
+    os.path.join(os.getcwd(), "candidate_resume.txt"),
+]
+PROCESS_FILE = os.path.join(_BACKEND_DIR, "processo classificacao.md")
+
+_SECTION_HEADINGS = {
+    "summary": "summary",
+    "executive summary": "summary",
+    "professional summary": "summary",
+    "profile": "summary",
+    "objective": "summary",
+    "experience": "experience",
+    "professional experience": "experience",
+    "work experience": "experience",
+    "employment history": "experience",
+    "work history": "experience",
+    "skills": "skills",
+    "key skills": "skills",
+    "technical skills": "skills",
+    "core competencies": "skills",
+    "education": "education",
+    "academic background": "education",
+    "certifications": "certifications",
+    "certificates": "certifications",
+    "licenses": "certifications",
+    "projects": "projects",
+    "key projects": "projects",
+    "languages": "languages",
+    "awards": "awards",
+    "achievements": "awards",
+    "key achievements": "awards",
+    "accomplishments": "awards",
+}
+# Separators between skills; commas only outside parentheses ("ITIL, COBIT" stays whole)
+_SKILL_SPLIT_RE = re.compile(r"[|;•·\n]|,(?![^()]*\))")
+
+
+@dataclass(frozen=True)
+class CandidateProfile:
+    source: str  # candidate | file | process_file
+    resume_text: str
+    content_hash: str
+    candidate_id: Optional[int] = None
+    version: int = 1
+    name: str = ""
+    sections: dict[str, str] = field(default_factory=dict)
+    skills: frozenset[str] = frozenset()
+    token_count: int = 0
+    term_freqs: dict[str, int] = field(default_factory=dict)  # resume terms (prefilter vocabulary) -> count
+    built_at: float = field(default_factory=time.time)
+
+    @property
+    def cache_key(self) -> str:
+        ident = self.candidate_id if self.candidate_id is not None else self.source
+        return f"{ident}:v{self.version}:{self.content_hash[:16]}"
+
+    def summary(self) -> dict:
+        return {
+            "source": self.source,
+            "candidate_id": self.candidate_id,
+            "name": self.name,
+            "version": self.version,
+            "content_hash": self.content_hash[:12],
+            "cache_key": self.cache_key,
+            "sections": sorted(k for k, v in self.sections.items() if v),
+            "skills": len(self.skills),
+            "token_count": self.token_count,
+            "terms": len(self.term_freqs),
+        }
+
+
+_lock = threading.Lock()
+_profile: Optional[CandidateProfile] = None
+_signature_seen: Optional[tuple] = None
+_checked_at = 0.0
+_generation = 0  # bumped by every invalidation; a build that raced one is not kept
+_by_id: dict[int, CandidateProfile] = {}  # derived data per candidate, for load_many()
+_counters = {"hits": 0, "checks": 0, "builds": 0, "invalidations": 0, "changes": 0}
+
+
+# ── Derived data ─────────────────────────────────────────────────────────
+
+def parse_sections(text: str) -> dict[str, str]:
+    """Resume text split by recognised headings; text before the first heading goes to `header`."""
+    sections: dict[str, list[str]] = {"header": []}
+    current = "header"
+    for raw in (text or "").splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        heading = re.sub(r"^#{1,6}\s*", "", line).strip("*_` ").rstrip(":").strip().lower()
+        if heading in _SECTION_HEADINGS:
+            current = _SECTION_HEADINGS[heading]
+            sections.setdefault(current, [])
+            continue
+        sections.setdefault(current, []).append(line)
+    return {key: "\n".join(lines) for key, lines in sections.items()}
+
+
+def extract_skills(skills_section: str) -> frozenset[str]:
+    skills = set()
+    for piece in _SKILL_SPLIT_RE.split(skills_section or ""):
+        skill = piece.strip().lstrip("-*• ").strip().lower()
+        if skill and len(skill.split()) <= 8:
+            skills.add(skill)
+    return frozenset(skills)
+
+
+def build(
+    resume_text: str,
+    source: str = "file",
+    candidate_id: Optional[int] = None,
+    version: int = 1,
+    name: str = "",
+) -> CandidateProfile:
+    """Compute every derived artefact for `resume_text` (the expensive part, done once per profile)."""
+    with _lock:
+        _counters["builds"] += 1
+    sections = parse_sections(resume_text)
+    vocab = prefilter.query_terms(resume_text)
+    term_freqs = Counter(t for t in prefilter.tokenize(resume_text) if t in vocab)
+    if not name:
+        header = sections.get("header", "")
+        name = header.splitlines()[0] if header else ""
+    return CandidateProfile(
+        source=source,
+        resume_text=resume_text,
+        content_hash=text_hash(resume_text),
+        candidate_id=candidate_id,
+        version=version,
+        name=name,
+        sections=sections,
+        skills=extract_skills(sections.get("skills", "")),
+        token_count=jd_compactor.estimate_tokens(resume_text),
+        term_freqs=dict(term_freqs),
+    )
+
+
+# ── Resolution ───────────────────────────────────────────────────────────
+
+def _extract_resume_from_process_file(path: str) -> str:
+    """
+    Extract the candidate resume block from processo classificacao.md.
+    This keeps compatibility with the legacy n8n workflow docs as source of truth.
+    """
+    if not os.path.isfile(path):
+        return ""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except Exception:
+        return ""
+
+    marker = "📄 RESUME —"
+    idx = text.find(marker)
+    if idx == -1:
+        return ""
+
+    tail = text[idx:]
+    # Stop at a large separator line or the next prompt block
+    end_candidates = [
+        tail.find("\n----------------------------------------------------------------"),
+        tail.find("\nYou are an expert resume building specialist."),
+    ]
+    end_positions = [pos for pos in end_candidates if pos != -1]
+    end = min(end_positions) if end_positions else len(tail)
+    return tail[:end].strip()
+
+
+def _current_row() -> Optional[dict]:
+    """Id/version/is_active of the row that would be used: the active one, else the newest."""
+    from ..db import db
+
+    with db() as (conn, cur):
+        cur.execute(
+            """
+            SELECT id, version, is_active FROM candidates
+            WHERE resume_text IS NOT NULL AND resume_text <> ''
+            ORDER BY is_active DESC NULLS LAST, id DESC LIMIT 1
+            """
+        )
+        return cur.fetchone()
+
+
+def _load_candidate(candidate_id: int) -> Optional[CandidateProfile]:
+    profiles = load_many([candidate_id])
+    return profiles[0] if profiles else None
+
+
+def load_many(candidate_ids: Optional[list[int]] = None) -> list[CandidateProfile]:
+    """
+    Profiles of several candidates (every candidate with a resume when
+    `candidate_ids` is None), ordered by id. Derived data is reused for as
+    long as a candidate's row is unchanged.
+    """
+    from ..db import db
+
+    with db() as (conn, cur):
+        sql = "SELECT id, name, version, resume_text FROM candidates WHERE resume_text IS NOT NULL AND resume_text <> ''"
+        if candidate_ids is None:
+            cur.execute(sql + " ORDER BY id")
+        else:
+            cur.execute(sql + " AND id = ANY(%s) ORDER BY id", [list(candidate_ids)])
+        rows = cur.fetchall()
+
+    profiles = []
+    for row in rows:
+        version, name = row.get("version") or 1, row.get("name") or ""
+        with _lock:
+            cached = _by_id.get(row["id"])
+        if cached is None or (cached.version, cached.name, cached.resume_text) != (version, name, row["resume_text"]):
+            cached = build(row["resume_text"], "candidate", row["id"], version, name)
+            with _lock:
+                _by_id[row["id"]] = cached
+        profiles.append(cached)
+    return profiles
+
+
+def _file_signature() -> Optional[tuple]:
+    for path in RESUME_FILES:
+        if os.path.isfile(path):
+            st = os.stat(path)
+            return ("file", path, st.st_mtime_ns, st.st_size)
+    if os.path.isfile(PROCESS_FILE):
+        st = os.stat(PROCESS_FILE)
+        return ("process_file", PROCESS_FILE, st.st_mtime_ns, st.st_size)
+    return None
+
+
+def _row_signature() -> tuple:
+    try:
+        row = _current_row()
+    except Exception as e:
+        logger.debug(f"Candidate profile: candidates table unavailable: {e}")
+        row = None
+    if row:
+        return ("candidate", row["id"], row.get("version") or 1)
+    return ("none",)
+
+
+def _signature() -> tuple:
+    """Cheap identity of what `_resolve()` would return; a change means the profile must be rebuilt."""
+    file_sig = _file_signature()
+    if file_sig is None:
+        return _row_signature()
+    if file_sig[0] == "process_file":
+        # The doc may not hold a resume block; the row it then falls back to is part of the identity
+        return file_sig + (_row_signature(),)
+    return file_sig
+
+
+def _resolve(signature: tuple) -> CandidateProfile:
+    kind = signature[0]
+    if kind == "candidate":
+        profile = _load_candidate(signature[1])
+        if profile is not None:
+            return profile
+    elif kind == "file":
+        with open(signature[1], "r", encoding="utf-8") as f:
+            text = f.read().strip()
+        if text:
+            return build(text, "file")
+    elif kind == "process_file":
+        text = _extract_resume_from_process_file(signature[1])
+        if text:
+            return build(text, "process_file")
+        return _resolve(signature[4])
+    raise RuntimeError(
+        "No candidate resume found. Mark a candidate as active, place a candidate_resume.txt in the "
+        "backend/ directory or insert a row into the candidates table."
+    )
+
+
+# ── Cache ────────────────────────────────────────────────────────────────
+
+def active() -> CandidateProfile:
+    """The profile scoring and CV generation should use. Raises RuntimeError if there is no resume at all."""
+    global _profile, _signature_seen, _checked_at
+    with _lock:
+        if _signature_seen is not None and time.monotonic() - _checked_at < TTL_SECONDS:
+            _counters["hits"] += 1
+            return _profile
+        generation = _generation
+        previous, previous_signature = _profile, _signature_seen
+
+    signature = _signature()
+    if previous is not None and signature == previous_signature:
+        profile = previous
+        with _lock:
+            _counters["checks"] += 1
+    else:
+        profile = _resolve(signature)
+
+    with _lock:
+        if generation == _generation:
+            _profile, _signature_seen, _checked_at = profile, signature, time.monotonic()
+    if previous is not None and profile.content_hash != previous.content_hash:
+        _on_change(previous, profile)
+    return profile
+
+
+def invalidate() -> None:
+    """Resolve the profile again on next use (derived caches are dropped only if it changed)."""
+    global _signature_seen, _generation
+    with _lock:
+        # The old profile is kept only to tell whether the next one differs
+        _signature_seen = None
+        _generation += 1
+        _counters["invalidations"] += 1
+
+
+def _on_change(previous: CandidateProfile, profile: CandidateProfile) -> None:
+    with _lock:
+        _counters["changes"] += 1
+    logger.info(f"Candidate profile changed: {previous.cache_key} -> {profile.cache_key}")
+    _drop_derived_caches()
+
+
+def _drop_derived_caches() -> None:
+    try:
+        prefilter.reset()
+        from . import llm_clients
+
+        # Gemini models carry the resume in their system instruction
+        llm_clients.invalidate("gemini")
+    except Exception as e:
+        logger.warning(f"Candidate profile: failed to drop derived caches: {e}")
+
+
+def stats() -> dict:
+    with _lock:
+        profile = _profile
+        return {
+            **_counters,
+            "ttl_seconds": TTL_SECONDS,
+            "age_seconds": round(time.monotonic() - _checked_at, 1) if _profile is not None else None,
+            "profile": profile.summary() if profile is not None else None,
+        }
@@ -0,0 +1,315 @@
+"""
+Near-Duplicate Job Index — MinHash + LSH over `jobs.job_description`.
+
+Imports (scripts/merge_csvs.py, /jobs/fetch-url) contain many postings whose
+descriptions differ only in boilerplate. Each description is reduced to a
+64-value MinHash signature over 5-word shingles and stored compactly
+(256 bytes) in the `job_signatures` side table, together with a hash of
+the description it was computed from; a job whose description changed is
+re-signed. An in-memory LSH index (8 bands x 8 rows) is built lazily from
+that table, so finding the near-duplicates of a job is a handful of dict
+lookups (sub-millisecond). Every DEDUP_RELOAD_SECONDS the index pulls the
+rows changed since its high-water mark, so signatures written by other
+processes (the queue worker, another API worker) become visible, and drops
+the jobs whose signature row is gone (deleted jobs cascade to the table).
+
+With 8x8 banding, pairs with Jaccard >= 0.9 collide ~99% of the time and
+pairs below 0.5 ~3% of the time; candidates are then confirmed with the
+signature similarity estimate.
+"""
+
+import hashlib
+import logging
+import os
+import random
+import re
+import struct
+import time
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+DUPLICATE_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+REUSE_THRESHOLD = float(os.getenv("DEDUP_REUSE_THRESHOLD", "0.9"))
+RELOAD_SECONDS = float(os.getenv("DEDUP_RELOAD_SECONDS", "60"))
+# updated_at is the writer's transaction start, so a row can commit after a
+# reload that already read past it; re-reading a short window catches those.
+_RELOAD_OVERLAP = timedelta(seconds=30)
+
+_MERSENNE = (1 << 61) - 1
+_MAX32 = (1 << 32) - 1
+_rng = random.Random(1_048_583)  # fixed seed — signatures are persisted
+_PERMS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+_SIG_FORMAT = f"<{NUM_PERM}I"
+
+_TOKEN_RE = re.compile(r"[a-z0-9à-ÿ]+")
+
+_lock = Lock()
+_loaded = False
+_checked_at = 0.0
+_high_water: Optional[datetime] = None  # newest updated_at read from the table
+_signatures: dict[int, tuple[int, ...]] = {}
+_description_hashes: dict[int, Optional[str]] = {}
+_buckets: dict[tuple[int, bytes], set[int]] = {}
+
+
+# ── Signatures ──────────────────────────────────────────────────────────────
+
+def _shingles(text: str) -> set[int]:
+    tokens = _TOKEN_RE.findall((text or "").lower())
+    if not tokens:
+        return set()
+    if len(tokens) < SHINGLE_SIZE:
+        grams = [" ".join(tokens)]
+    else:
+        grams = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little")
+        for g in grams
+    }
+
+
+def signature_for(text: str) -> Optional[tuple[int, ...]]:
+    """MinHash signature of a description, or None when it has no tokens."""
+    shingles = _shingles(text)
+    if not shingles:
+        return None
+    return tuple(
+        min(((a * x + b) % _MERSENNE) for x in shingles) & _MAX32
+        for a, b in _PERMS
+    )
+
+
+def description_hash(text: str) -> str:
+    """Same value as Postgres `encode(sha256(convert_to(text, 'UTF8')), 'hex')`."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def pack(sig: tuple[int, ...]) -> bytes:
+    return struct.pack(_SIG_FORMAT, *sig)
+
+
+def unpack(blob: bytes) -> tuple[int, ...]:
+    return struct.unpack(_SIG_FORMAT, bytes(blob))
+
+
+def _band_keys(sig: tuple[int, ...]) -> list[tuple[int, bytes]]:
+    blob = pack(sig)
+    width = ROWS * 4
+    return [(band, blob[band * width:(band + 1) * width]) for band in range(BANDS)]
+
+
+# ── In-memory LSH index ─────────────────────────────────────────────────────
+
+def _add_to_memory(job_id: int, sig: tuple[int, ...], desc_hash: Optional[str] = None) -> None:
+    """Caller holds `_lock`."""
+    old = _signatures.get(job_id)
+    if old is not None:
+        for key in _band_keys(old):
+            _buckets.get(key, set()).discard(job_id)
+    _signatures[job_id] = sig
+    _description_hashes[job_id] = desc_hash
+    for key in _band_keys(sig):
+        _buckets.setdefault(key, set()).add(job_id)
+
+
+def _remove_from_memory(job_id: int) -> None:
+    """Caller holds `_lock`."""
+    sig = _signatures.pop(job_id, None)
+    _description_hashes.pop(job_id, None)
+    if sig is not None:
+        for key in _band_keys(sig):
+            _buckets.get(key, set()).discard(job_id)
+
+
+def _ensure_loaded() -> None:
+    """Load the index on first use, then pull rows changed since the high-water mark every RELOAD_SECONDS."""
+    global _loaded, _checked_at, _high_water
+    if _loaded and time.time() - _checked_at < RELOAD_SECONDS:
+        return
+    from ..db import db
+    with _lock:
+        since = _high_water - _RELOAD_OVERLAP if _loaded and _high_water else None
+        # Only ids indexed before the query can be judged missing; index_job commits before adding in memory
+        known = set(_signatures)
+    existing = None
+    with db() as (conn, cur):
+        if since is None:
+            cur.execute("SELECT job_id, signature, description_hash, updated_at FROM job_signatures")
+        else:
+            cur.execute("SELECT job_id FROM job_signatures")
+            existing = {row["job_id"] for row in cur.fetchall()}
+            cur.execute(
+                "SELECT job_id, signature, description_hash, updated_at FROM job_signatures WHERE updated_at >= %s",
+                [since],
+            )
+        rows = cur.fetchall()
+    with _lock:
+        if existing is not None:
+            for job_id in known - existing:
+                _remove_from_memory(job_id)
+        for row in rows:
+            _add_to_memory(row["job_id"], unpack(row["signature"]), row["description_hash"])
+            if _high_water is None or row["updated_at"] > _high_water:
+                _high_water = row["updated_at"]
+        if not _loaded:
+            logger.info(f"Dedup index loaded: {len(rows)} signatures")
+        _loaded = True
+        _checked_at = time.time()
+
+
+def reset() -> None:
+    """Forget the in-memory index (it reloads from the table on next use)."""
+    global _loaded, _checked_at, _high_water
+    with _lock:
+        _signatures.clear()
+        _description_hashes.clear()
+        _buckets.clear()
+        _loaded = False
+        _checked_at = 0.0
+        _high_water = None
+
+
+def candidates(sig: tuple[int, ...], exclude: Optional[int] = None, threshold: float = DUPLICATE_THRESHOLD) -> list[tuple[int, float]]:
+    """Near-duplicates of a signature as [(job_id, similarity)], most similar first."""
+    with _lock:
+        seen: set[int] = set()
+        for key in _band_keys(sig):
+            seen |= _buckets.get(key, set())
+        seen.discard(exclude)  # type: ignore[arg-type]
+        scored = [(jid, similarity(sig, _signatures[jid])) for jid in seen]
+    return sorted(
+        ((jid, round(sim, 3)) for jid, sim in scored if sim >= threshold),
+        key=lambda item: -item[1],
+    )
+
+
+# ── Persistence ─────────────────────────────────────────────────────────────
+
+def index_job(job_id: int, description: str) -> Optional[tuple[int, ...]]:
+    """Compute, store and index a job's signature. Returns the signature."""
+    sig = signature_for(description)
+    if sig is None:
+        return None
+    desc_hash = description_hash(description)
+    _ensure_loaded()
+    from ..db import db
+    with db() as (conn, cur):
+        cur.execute(
+            """
+            INSERT INTO job_signatures (job_id, signature, description_hash, updated_at)
+            VALUES (%s, %s, %s, NOW())
+            ON CONFLICT (job_id) DO UPDATE
+            SET signature = EXCLUDED.signature, description_hash = EXCLUDED.description_hash, updated_at = NOW()
+            """,
+            [job_id, pack(sig), desc_hash],
+        )
+    with _lock:
+        _add_to_memory(job_id, sig, desc_hash)
+    return sig
+
+
+def ensure_indexed(limit: int = 5000) -> int:
+    """Backfill signatures for jobs with a description but no signature, or one computed from an older description."""
+    _ensure_loaded()
+    from ..db import db
+    with db() as (conn, cur):
+        cur.execute(
+            """
+            SELECT j.id, j.job_description
+            FROM jobs j
+            LEFT JOIN job_signatures s ON s.job_id = j.id
+            WHERE COALESCE(j.job_description, '') <> ''
+              AND (s.job_id IS NULL
+                   OR s.description_hash IS DISTINCT FROM encode(sha256(convert_to(j.job_description, 'UTF8')), 'hex'))
+            ORDER BY j.id
+            LIMIT %s
+            """,
+            [limit],
+        )
+        rows = cur.fetchall()
+
+    indexed = 0
+    for row in rows:
+        try:
+            if index_job(row["id"], row["job_description"]) is not None:
+                indexed += 1
+        except Exception as e:
+            logger.warning(f"Dedup index: could not index job {row['id']}: {e}")
+    return indexed
+
+
+def find_duplicates(job_id: int, description: Optional[str] = None, threshold: float = DUPLICATE_THRESHOLD) -> list[tuple[int, float]]:
+    """
+    Near-duplicates of a stored job. When a description is given, the job is
+    (re-)indexed first if it has no signature or its description changed.
+    """
+    _ensure_loaded()
+    with _lock:
+        sig = _signatures.get(job_id)
+        stored_hash = _description_hashes.get(job_id)
+    if description and (sig is None or stored_hash != description_hash(description)):
+        sig = index_job(job_id, description)
+    if sig is None:
+        return []
+    return candidates(sig, exclude=job_id, threshold=threshold)
+
+
+def duplicate_groups(threshold: float = DUPLICATE_THRESHOLD, min_size: int = 2) -> list[list[int]]:
+    """Connected components of the near-duplicate graph (union-find)."""
+    _ensure_loaded()
+    with _lock:
+        items = list(_signatures.items())
+
+    parent: dict[int, int] = {}
+
+    def find(x: int) -> int:
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        parent[x] = root
+        return root
+
+    for jid, sig in items:
+        for other, _sim in candidates(sig, exclude=jid, threshold=threshold):
+            ra, rb = find(jid), find(other)
+            if ra != rb:
+                parent[max(ra, rb)] = min(ra, rb)
+
+    groups: dict[int, list[int]] = {}
+    for jid, _sig in items:
+        groups.setdefault(find(jid), []).append(jid)
+    return sorted(
+        (sorted(members) for members in groups.values() if len(members) >= min_size),
+        key=lambda g: (-len(g), g[0]),
+    )
+
+
+def is_reuse_enabled() -> bool:
+    return os.getenv("DEDUP_REUSE_ENABLED", "true").lower() in ("true", "1", "yes")
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "loaded": _loaded,
+            "high_water": _high_water.isoformat() if _high_water else None,
+            "reload_seconds": RELOAD_SECONDS,
+            "signatures": len(_signatures),
+            "buckets": len(_buckets),
+            "num_perm": NUM_PERM,
+            "bands": BANDS,
+            "duplicate_threshold": DUPLICATE_THRESHOLD,
+            "reuse_threshold": REUSE_THRESHOLD,
+        }
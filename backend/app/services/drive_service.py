@@ -10,27 +10,19 @@ from typing import Optional
 
 
 def _read_setting(*keys: str) -> str:
-    """Read setting from env first, then app_settings table."""
+    """Read setting from env first, then app_settings (cached)."""
+    from . import settings_cache
+
     for key in keys:
         val = os.getenv(key, "").strip()
         if val:
             return val
 
-    try:
-        from ..db import db
-        with db() as (conn, cur):
-            placeholders = ", ".join(["%s"] * len(keys))
-            cur.execute(
-                f"SELECT key, value FROM app_settings WHERE key IN ({placeholders})",
-                list(keys),
-            )
-            rows = cur.fetchall()
-            by_key = {r["key"]: str(r["value"]).strip() for r in rows if r.get("value")}
-            for key in keys:
-                if by_key.get(key):
-                    return by_key[key]
-    except Exception:
-        pass
+    stored = settings_cache.snapshot()
+    for key in keys:
+        val = str(stored.get(key) or "").strip()
+        if val:
+            return val
     return ""
 
 
@@ -0,0 +1,135 @@
+"""
+Ensemble — score one job with several provider/model pairs at once.
+
+Members run concurrently and are yielded as each finishes, so a caller can
+stream results while slower models are still working. `consensus` is the
+server-side port of MultiAIJobAnalyzer.get_consensus from the legacy
+analyzer: mean/min/max of the member scores plus an agreement level from
+their spread (≤10 high, ≤25 moderate, else low).
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+HIGH_AGREEMENT_SPREAD = 10
+MODERATE_AGREEMENT_SPREAD = 25
+
+
+@dataclass
+class MemberResult:
+    label: str
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    latency_ms: int = 0
+
+
+async def run(
+    labels: list[str],
+    call: Callable[[str], Awaitable[dict]],
+) -> AsyncIterator[MemberResult]:
+    """Run `call(label)` for every label concurrently; yield MemberResults in completion order."""
+    started = time.monotonic()
+
+    async def member(label: str) -> MemberResult:
+        try:
+            result = await call(label)
+        except Exception as e:
+            return MemberResult(label, error=str(e), latency_ms=int((time.monotonic() - started) * 1000))
+        return MemberResult(label, result=result, latency_ms=int((time.monotonic() - started) * 1000))
+
+    tasks = [asyncio.create_task(member(label)) for label in labels]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away (or the caller stopped early): don't leave calls running
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _score(result: dict) -> int:
+    try:
+        return int(result.get("overall_score", result.get("score", 0)))
+    except (TypeError, ValueError):
+        return 0
+
+
+def consensus(results: list[dict], threshold: int = 75) -> dict:
+    """Consensus over successful member results (legacy get_consensus semantics)."""
+    if not results:
+        return {
+            "average_score": 0,
+            "min_score": 0,
+            "max_score": 0,
+            "consensus_qualified": False,
+            "all_qualified": False,
+            "any_qualified": False,
+            "agreement_level": "none",
+            "members": 0,
+        }
+
+    scores = [_score(r) for r in results]
+    qualified_votes = [score >= threshold for score in scores]
+    avg_score = sum(scores) / len(scores)
+
+    spread = max(scores) - min(scores)
+    if spread <= HIGH_AGREEMENT_SPREAD:
+        agreement = "high"
+    elif spread <= MODERATE_AGREEMENT_SPREAD:
+        agreement = "moderate"
+    else:
+        agreement = "low"
+
+    return {
+        "average_score": round(avg_score, 1),
+        "min_score": min(scores),
+        "max_score": max(scores),
+        "consensus_qualified": avg_score >= threshold,
+        "all_qualified": all(qualified_votes),
+        "any_qualified": any(qualified_votes),
+        "agreement_level": agreement,
+        "members": len(scores),
+    }
+
+
+def representative(members: list[MemberResult], average: float) -> Optional[MemberResult]:
+    """The successful member whose score is closest to the ensemble average (first wins ties)."""
+    scored = [m for m in members if m.result is not None]
+    if not scored:
+        return None
+    return min(scored, key=lambda m: abs(_score(m.result) - average))
+
+
+def compact_payload(members: list[MemberResult], summary: dict, member_info: dict[str, dict[str, Any]]) -> dict:
+    """
+    `detailed_score` payload: the representative member's full breakdown
+    with the consensus score on top, plus one summary line per member
+    (no per-member breakdowns, which would multiply the row size).
+    """
+    chosen = representative(members, summary["average_score"])
+    payload = dict(chosen.result) if chosen else {}
+    payload.update(
+        {
+            "overall_score": round(summary["average_score"]),
+            "ensemble_mode": True,
+            "ensemble": {
+                "consensus": summary,
+                "representative": chosen.label if chosen else None,
+                "members": [
+                    {
+                        "label": m.label,
+                        **member_info.get(m.label, {}),
+                        "overall_score": _score(m.result) if m.result is not None else None,
+                        "latency_ms": m.latency_ms,
+                        "cache_hit": bool(m.result and m.result.get("cache_hit")),
+                        "error": m.error,
+                    }
+                    for m in members
+                ],
+            },
+        }
+    )
+    return payload
@@ -0,0 +1,76 @@
+"""
+Fast JSON — one serializer for API responses, SSE events and JSONB writes.
+
+Backed by orjson when it is installed (several times faster than the
+stdlib on the 200-row /jobs pages and per-event SSE payloads), with a
+compact stdlib fallback so the app still runs without it.
+
+  - `FastJSONResponse`: the app's default response class. Routes that
+    return it directly also skip FastAPI's `jsonable_encoder` walk.
+  - `sse_event`: "event: …\\ndata: …\\n\\n" frames.
+  - `dumps` for JSON/JSONB query parameters, `register_psycopg2` so
+    json/jsonb columns are decoded with the same library.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def _default(obj: Any):
+    """Types that neither serializer handles natively."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if hasattr(obj, "model_dump"):  # pydantic models
+        return obj.model_dump(mode="json")
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumpb(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    return dumpb(obj).decode("utf-8")
+
+
+def loads(data: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumpb(content)
+
+
+def sse_event(event_type: str, data: Any) -> str:
+    """Format a Server-Sent Event."""
+    return f"event: {event_type}\ndata: {dumps(data)}\n\n"
+
+
+def register_psycopg2() -> None:
+    """Decode json/jsonb columns with `loads` on every connection."""
+    from psycopg2.extras import register_default_json, register_default_jsonb
+
+    register_default_json(globally=True, loads=loads)
+    register_default_jsonb(globally=True, loads=loads)
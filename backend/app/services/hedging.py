@@ -0,0 +1,150 @@
+"""
+Hedging — cut tail latency of interactive scoring with a backup request.
+
+The primary provider is called first. If it hasn't produced a valid result
+after the hedge delay, the secondary provider is fired as well; the first
+valid result wins and the other call is cancelled. A primary that fails
+outright triggers the secondary immediately.
+
+The delay is the primary's p95 latency over a rolling window (so only the
+slowest ~5% of calls are hedged, and the extra spend stays near 5%),
+clamped to [HEDGE_MIN_DELAY, HEDGE_MAX_DELAY]. Until a provider has
+HEDGE_MIN_SAMPLES latencies, HEDGE_DEFAULT_DELAY is used.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from threading import Lock
+from typing import Any, Awaitable, Callable, Optional
+
+WINDOW = int(os.getenv("HEDGE_LATENCY_WINDOW", "200"))
+MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "5"))
+DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY_SECONDS", "8"))
+MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "1"))
+MAX_DELAY = float(os.getenv("HEDGE_MAX_DELAY_SECONDS", "30"))
+
+
+def is_enabled() -> bool:
+    return os.getenv("SCORING_HEDGE_ENABLED", "false").lower() in ("true", "1", "yes")
+
+
+class LatencyTracker:
+    """Rolling window of call latencies per provider."""
+
+    def __init__(self, window: int = WINDOW):
+        self._window = window
+        self._lock = Lock()
+        self._samples: dict[str, deque[float]] = {}
+
+    def record(self, provider: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(provider)
+            if samples is None:
+                samples = self._samples[provider] = deque(maxlen=self._window)
+            samples.append(seconds)
+
+    def quantile(self, provider: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(provider, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))]
+
+    def count(self, provider: str) -> int:
+        with self._lock:
+            return len(self._samples.get(provider, ()))
+
+    def stats(self) -> dict:
+        with self._lock:
+            providers = list(self._samples)
+        return {
+            provider: {
+                "samples": self.count(provider),
+                "p50_seconds": round(self.quantile(provider, 0.5) or 0.0, 2),
+                "p95_seconds": round(self.quantile(provider, 0.95) or 0.0, 2),
+                "hedge_delay_seconds": round(hedge_delay(provider, self), 2),
+            }
+            for provider in providers
+        }
+
+
+latencies = LatencyTracker()
+
+
+def hedge_delay(provider: str, tracker: Optional[LatencyTracker] = None) -> float:
+    tracker = tracker or latencies
+    if tracker.count(provider) < MIN_SAMPLES:
+        return DEFAULT_DELAY
+    return min(MAX_DELAY, max(MIN_DELAY, tracker.quantile(provider, 0.95)))
+
+
+async def timed(provider: str, awaitable: Awaitable[Any], tracker: Optional[LatencyTracker] = None):
+    """Await `awaitable`, recording its latency for `provider` (cancelled calls count as at least that slow)."""
+    tracker = tracker or latencies
+    started = time.monotonic()
+    try:
+        result = await awaitable
+    except asyncio.CancelledError:
+        tracker.record(provider, time.monotonic() - started)
+        raise
+    tracker.record(provider, time.monotonic() - started)
+    return result
+
+
+async def hedged(
+    primary: str,
+    secondary: str,
+    call: Callable[[str], Awaitable[Any]],
+    is_valid: Callable[[Any], bool] = lambda result: result is not None,
+    delay: Optional[float] = None,
+    tracker: Optional[LatencyTracker] = None,
+) -> tuple[Any, dict]:
+    """
+    Run `call(primary)`, hedged with `call(secondary)` after `delay`
+    (default: the primary's p95 in `tracker`). Latencies are recorded by
+    the caller (see `timed`). Returns (result, info) where info has
+    `winner`, `hedged` and `delay`. Raises the primary's error if neither
+    call produced a valid result.
+    """
+    delay = hedge_delay(primary, tracker) if delay is None else delay
+    tasks = {asyncio.create_task(call(primary)): primary}
+    errors: dict[str, BaseException] = {}
+    info = {"winner": None, "hedged": False, "delay": round(delay, 2)}
+
+    def launch_secondary() -> None:
+        if not info["hedged"]:
+            info["hedged"] = True
+            tasks[asyncio.create_task(call(secondary))] = secondary
+
+    try:
+        timeout: Optional[float] = delay
+        while tasks:
+            done, _pending = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch_secondary()  # primary is in its tail
+                timeout = None
+                continue
+            for task in done:
+                provider = tasks.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    errors[provider] = e
+                    continue
+                if is_valid(result):
+                    info["winner"] = provider
+                    return result, info
+                errors[provider] = ValueError(f"{provider} returned an invalid result")
+            if not info["hedged"]:
+                launch_secondary()  # primary failed before the hedge delay
+                timeout = None
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    raise errors.get(primary) or errors[secondary]
@@ -0,0 +1,201 @@
+"""
+Job Description Compactor — section-aware, token-budgeted prompt input.
+
+Scoring prompts used to take `description[:8000]`, which on long postings
+keeps the company blurb, benefits and EEO boilerplate and cuts off the
+requirements at the end. Instead, each posting is:
+
+  1. split into lines, whitespace-normalized and de-duplicated
+  2. grouped into sections by their headings (requirements,
+     responsibilities, overview, company, benefits, legal)
+  3. stripped of legal/EEO text and compressed in low-value sections
+  4. fitted to a token budget by keeping lines in section priority order,
+     then re-emitted in the original order
+
+Token counts use `tiktoken` when it is installed and a chars/4 estimate
+otherwise.
+"""
+
+import hashlib
+import importlib.util
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+TOKEN_BUDGET = int(os.getenv("SCORING_JD_TOKEN_BUDGET", "1800"))
+_HAS_TIKTOKEN = importlib.util.find_spec("tiktoken") is not None
+
+# Lower value = kept first when the budget is tight
+_PRIORITY = {
+    "requirements": 0,
+    "responsibilities": 1,
+    "overview": 2,
+    "other": 3,
+    "company": 4,
+    "benefits": 5,
+}
+# Low-value sections are compressed to their first N lines
+_SECTION_LINE_CAPS = {"company": 3, "benefits": 4}
+
+_HEADING_PATTERNS = [
+    ("legal", r"equal (employment )?opportunit|\beeo\b|diversity|inclusion|accommodation|privacy|disclaimer|e-verify|gdpr|legal notice"),
+    ("benefits", r"benefit|perks|what we offer|we offer|compensation|salary|why (join|work)|rewards|what'?s in it for you"),
+    ("requirements", r"requirement|qualification|must[- ]have|nice[- ]to[- ]have|what you('ll)? bring|who you are|your profile|skills|experience|preferred|bonus points|looking for|about you"),
+    ("responsibilities", r"responsibilit|what you('ll)? do|duties|the role|your role|role overview|day[- ]to[- ]day|your mission|tasks|you will|your impact|key accountabilit"),
+    ("company", r"about (us|the company|the team|[a-z0-9&.\- ]{2,30})$|who we are|our (company|story|mission|culture)|company overview"),
+]
+_HEADING_RES = [(kind, re.compile(pattern, re.IGNORECASE)) for kind, pattern in _HEADING_PATTERNS]
+
+# Boilerplate sentences that are dropped wherever they appear
+_LEGAL_LINE_RE = re.compile(
+    r"equal (employment )?opportunity employer|without regard to (race|age|sex|religion)"
+    r"|reasonable accommodation|e-verify|protected (veteran|characteristic)"
+    r"|(race|color|religion), (color|religion|sex|national origin)|privacy (notice|policy)"
+    r"|affirmative action|do not (accept|respond to) (unsolicited|agency)",
+    re.IGNORECASE,
+)
+_BULLET_RE = re.compile(r"^[\s\-\*•●▪–·>]+")
+_WS_RE = re.compile(r"[ \t ]+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+(?=[A-Z0-9•\-])")
+_MAX_HEADING_CHARS = 70
+_MAX_LINE_CHARS = 400  # longer lines (single-paragraph postings) are split into sentences
+
+
+@dataclass
+class CompactedDescription:
+    text: str
+    original_tokens: int
+    tokens: int
+    dropped: dict[str, int] = field(default_factory=dict)  # section -> lines removed
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.original_tokens - self.tokens)
+
+
+@lru_cache(maxsize=1)
+def _encoder():
+    import tiktoken
+
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _HAS_TIKTOKEN:
+        return len(_encoder().encode(text, disallowed_special=()))
+    return math.ceil(len(text) / 4)
+
+
+def is_enabled() -> bool:
+    return os.getenv("SCORING_JD_COMPACTION", "true").lower() in ("true", "1", "yes")
+
+
+def fingerprint(token_budget: Optional[int] = None) -> str:
+    """Short tag for cache keys — changes when compaction would change the prompt."""
+    budget = TOKEN_BUDGET if token_budget is None else token_budget
+    tag = f"v1:{budget}" if is_enabled() else "off"
+    return hashlib.sha256(tag.encode("utf-8")).hexdigest()[:8]
+
+
+def _heading_kind(line: str) -> Optional[str]:
+    """Section kind if `line` looks like a heading, else None."""
+    stripped = line.rstrip(":").strip()
+    if not stripped or len(stripped) > _MAX_HEADING_CHARS or len(stripped.split()) > 8:
+        return None
+    if stripped.endswith((".", "!", "?")) and not line.endswith(":"):
+        return None
+    for kind, pattern in _HEADING_RES:
+        if pattern.search(stripped):
+            return kind
+    return None
+
+
+def _split_lines(description: str) -> list[str]:
+    lines: list[str] = []
+    seen: set[str] = set()
+    for raw in description.replace("\r", "\n").split("\n"):
+        raw = _WS_RE.sub(" ", raw).strip()
+        parts = _SENTENCE_RE.split(raw) if len(raw) > _MAX_LINE_CHARS else [raw]
+        for line in parts:
+            line = line.strip()
+            if not line:
+                continue
+            key = _BULLET_RE.sub("", line).lower()
+            if key in seen:
+                continue  # scraped postings often repeat whole blocks
+            seen.add(key)
+            lines.append(line)
+    return lines
+
+
+def sections(description: str) -> list[tuple[str, list[str]]]:
+    """[(section kind, lines)] in posting order; the first line of a section is its heading."""
+    out: list[tuple[str, list[str]]] = [("overview", [])]
+    for line in _split_lines(description or ""):
+        kind = _heading_kind(line)
+        if kind is not None:
+            out.append((kind, [line]))
+        else:
+            out[-1][1].append(line)
+    return [(kind, lines) for kind, lines in out if lines]
+
+
+def compact(description: Optional[str], token_budget: Optional[int] = None) -> CompactedDescription:
+    """Compact a posting to fit `token_budget` tokens (default SCORING_JD_TOKEN_BUDGET)."""
+    description = description or ""
+    budget = TOKEN_BUDGET if token_budget is None else token_budget
+    original_tokens = estimate_tokens(description)
+    if not is_enabled():
+        return CompactedDescription(description, original_tokens, original_tokens)
+
+    dropped: dict[str, int] = {}
+
+    def drop(kind: str, n: int = 1) -> None:
+        dropped[kind] = dropped.get(kind, 0) + n
+
+    # (priority, position, section index, kind, line, tokens) for every surviving line
+    candidates: list[tuple[int, int, int, str, str, int]] = []
+    headings: dict[int, tuple[int, str]] = {}  # section index -> (heading position, kind)
+    position = 0
+    for index, (kind, lines) in enumerate(sections(description)):
+        if kind == "legal":
+            drop(kind, len(lines))
+            continue
+        cap = _SECTION_LINE_CAPS.get(kind)
+        for i, line in enumerate(lines):
+            if _LEGAL_LINE_RE.search(line):
+                drop("legal")
+                continue
+            if cap is not None and i > cap:
+                drop(kind)
+                continue
+            if i == 0 and kind != "overview":
+                headings[index] = (position, kind)
+            line = line[: budget * 4]  # truncate run-on lines to roughly the whole budget
+            priority = _PRIORITY.get(kind, _PRIORITY["other"])
+            candidates.append((priority, position, index, kind, line, estimate_tokens(line) + 1))
+            position += 1
+
+    kept: dict[int, tuple[int, str]] = {}
+    used = 0
+    for _priority, pos, index, kind, line, cost in sorted(candidates):
+        if used + cost > budget:
+            drop(kind)
+            continue
+        kept[pos] = (index, line)
+        used += cost
+
+    # A heading is only worth its tokens if some of its section survived
+    with_body = {index for pos, (index, _line) in kept.items() if headings.get(index, (None,))[0] != pos}
+    for index, (pos, kind) in headings.items():
+        if pos in kept and index not in with_body:
+            del kept[pos]
+            drop(kind)
+
+    text = "\n".join(kept[pos][1] for pos in sorted(kept))
+    return CompactedDescription(text, original_tokens, estimate_tokens(text), dropped)
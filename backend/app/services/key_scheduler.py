@@ -0,0 +1,240 @@
+"""
+Key Scheduler — hands out the API key that is free soonest.
+
+Keys sit in a min-heap ordered by the time each can next start a call.
+`reserve()` pops the earliest key and returns it with how long the caller
+must wait — it never sleeps itself, so async workers wait on the event loop
+and many workers reserve different keys (or later start times) at once.
+
+Per key:
+  - weight: a tier-2 key (weight 2) may start calls twice as often as a
+            weight-1 key and wins ties
+  - slots:  hard cap on its concurrent calls; the effective cap is the
+            lower of this and the adaptive controller's learned limit
+  - pauses reported by the adaptive controller (429s, exhausted quota)
+    push the key's next start back; stale heap entries are corrected
+    lazily when popped
+
+Configured with GROQ_KEY_WEIGHTS / GROQ_KEY_SLOTS (comma-separated, one
+value per key, in key order). Keys are identified by a fingerprint of the
+key itself (`key_id()`), so reordering GROQ_API_KEYS keeps each key's
+in-flight count and learned adaptive limits with the right key.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from threading import Condition, Lock
+from typing import Optional
+
+from . import adaptive_limits
+
+MIN_INTERVAL = float(os.getenv("KEY_MIN_INTERVAL_SECONDS", "0.25"))  # between call starts on a weight-1 key
+_POLL_SECONDS = 0.05
+_WAIT_SAMPLES = 1000
+
+
+@dataclass
+class KeySpec:
+    key_id: str
+    weight: float = 1.0
+    slots: int = int(adaptive_limits.MAX_CONCURRENCY)
+
+
+@dataclass
+class _Key:
+    spec: KeySpec
+    inflight: int = 0
+    next_start: float = 0.0
+    version: int = 0       # bumps invalidate older heap entries
+    queued: bool = False   # has a live heap entry
+
+
+class KeyScheduler:
+    def __init__(self, specs: list[KeySpec], controller: Optional[adaptive_limits.AdaptiveController] = None):
+        self.controller = controller or adaptive_limits.controller
+        self._cond = Condition()
+        self._keys = {spec.key_id: _Key(spec) for spec in specs}
+        self._heap: list[tuple[float, float, int, str, int]] = []
+        self._seq = itertools.count()
+        self._waits: deque[float] = deque(maxlen=_WAIT_SAMPLES)
+        self._reservations = 0
+        self._total_wait = 0.0
+        now = time.time()
+        for key in self._keys.values():
+            self._push(key, now)
+
+    def _push(self, key: _Key, at: float) -> None:
+        key.version += 1
+        key.queued = True
+        heapq.heappush(self._heap, (at, -key.spec.weight, next(self._seq), key.spec.key_id, key.version))
+
+    def _capacity(self, key: _Key) -> int:
+        return max(1, min(key.spec.slots, self.controller.capacity(key.spec.key_id)))
+
+    def reserve(self) -> tuple[Optional[str], float]:
+        """
+        (key, seconds to wait before calling) for the key free soonest, or
+        (None, poll interval) when every key is at its concurrency cap.
+        The slot is held until `release(key)`.
+        """
+        now = time.time()
+        with self._cond:
+            while self._heap:
+                at, _w, _seq, key_id, version = heapq.heappop(self._heap)
+                key = self._keys[key_id]
+                if version != key.version:
+                    continue  # superseded entry
+                key.queued = False
+                if key.inflight >= self._capacity(key):
+                    continue  # re-queued by release()
+                start = max(at, now, self.controller.paused_until(key_id))
+                if start > max(at, now) + 1e-3 and self._heap and self._heap[0][0] < start:
+                    self._push(key, start)  # paused since it was queued — let others go first
+                    continue
+                key.inflight += 1
+                key.next_start = start + MIN_INTERVAL / key.spec.weight
+                if key.inflight < self._capacity(key):
+                    self._push(key, key.next_start)
+                self.controller.begin(key_id)
+                return key_id, start - now
+            return None, _POLL_SECONDS
+
+    def release(self, key_id: str) -> None:
+        with self._cond:
+            key = self._keys.get(key_id)
+            if key is None:
+                return
+            key.inflight = max(0, key.inflight - 1)
+            if not key.queued and key.inflight < self._capacity(key):
+                self._push(key, max(key.next_start, time.time()))
+            self._cond.notify_all()
+
+    def _record_wait(self, waited: float) -> None:
+        with self._cond:
+            self._reservations += 1
+            self._total_wait += waited
+            self._waits.append(waited)
+
+    def acquire(self, timeout: Optional[float] = None) -> str:
+        """Reserve a key and wait (blocking this thread) until it may be used."""
+        started = time.monotonic()
+        while True:
+            key_id, wait = self.reserve()
+            if key_id is not None:
+                break
+            if timeout is not None and time.monotonic() - started > timeout:
+                raise RuntimeError(f"Rate limit: all {len(self._keys)} key(s) busy for {timeout:.0f}s")
+            with self._cond:
+                self._cond.wait(wait)
+        if timeout is not None and time.monotonic() - started + wait > timeout:
+            self.release(key_id)
+            self.controller.release(key_id)
+            raise RuntimeError(f"Rate limit: next key slot in {wait:.1f}s")
+        if wait > 0:
+            time.sleep(wait)
+        self._record_wait(time.monotonic() - started)
+        return key_id
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> str:
+        """Reserve a key and wait on the event loop until it may be used."""
+        started = time.monotonic()
+        while True:
+            key_id, wait = self.reserve()
+            if key_id is not None:
+                break
+            if timeout is not None and time.monotonic() - started > timeout:
+                raise RuntimeError(f"Rate limit: all {len(self._keys)} key(s) busy for {timeout:.0f}s")
+            await asyncio.sleep(wait)
+        if timeout is not None and time.monotonic() - started + wait > timeout:
+            self.release(key_id)
+            self.controller.release(key_id)
+            raise RuntimeError(f"Rate limit: next key slot in {wait:.1f}s")
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except BaseException:
+                self.release(key_id)
+                self.controller.release(key_id)
+                raise
+        self._record_wait(time.monotonic() - started)
+        return key_id
+
+    def stats(self) -> dict:
+        with self._cond:
+            waits = sorted(self._waits)
+            keys = {
+                key_id: {
+                    "weight": key.spec.weight,
+                    "slots": key.spec.slots,
+                    "inflight": key.inflight,
+                    "capacity": self._capacity(key),
+                }
+                for key_id, key in self._keys.items()
+            }
+            reservations, total_wait = self._reservations, self._total_wait
+
+        def pct(q: float) -> float:
+            return round(waits[min(len(waits) - 1, math.ceil(q * len(waits)) - 1)], 3) if waits else 0.0
+
+        return {
+            "keys": keys,
+            "reservations": reservations,
+            "avg_wait_seconds": round(total_wait / reservations, 3) if reservations else 0.0,
+            "p50_wait_seconds": pct(0.5),
+            "p95_wait_seconds": pct(0.95),
+            "max_wait_seconds": round(waits[-1], 3) if waits else 0.0,
+        }
+
+
+def _env_list(name: str, count: int, default: float) -> list[float]:
+    values = [v.strip() for v in os.getenv(name, "").split(",") if v.strip()]
+    out = []
+    for i in range(count):
+        try:
+            out.append(float(values[i]) if i < len(values) else default)
+        except ValueError:
+            out.append(default)
+    return out
+
+
+def key_id(prefix: str, api_key: str) -> str:
+    """Stable id of an API key (never the key itself): `{prefix}:{sha256 prefix}`."""
+    return f"{prefix}:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]}"
+
+
+def specs_from_env(prefix: str, key_ids: list[str]) -> list[KeySpec]:
+    """KeySpecs for `key_ids` (in configured key order) from {PREFIX}_KEY_WEIGHTS / {PREFIX}_KEY_SLOTS."""
+    weights = _env_list(f"{prefix.upper()}_KEY_WEIGHTS", len(key_ids), 1.0)
+    slots = _env_list(f"{prefix.upper()}_KEY_SLOTS", len(key_ids), adaptive_limits.MAX_CONCURRENCY)
+    return [
+        KeySpec(kid, weight=max(weights[i], 0.01), slots=max(1, int(slots[i])))
+        for i, kid in enumerate(key_ids)
+    ]
+
+
+_schedulers: dict[str, tuple[tuple, KeyScheduler]] = {}
+_schedulers_lock = Lock()
+
+
+def get_scheduler(prefix: str, key_ids: list[str]) -> KeyScheduler:
+    """The shared scheduler for the keys of `prefix`; rebuilt when the key set or config changes."""
+    specs = specs_from_env(prefix, key_ids)
+    signature = tuple((s.key_id, s.weight, s.slots) for s in specs)
+    with _schedulers_lock:
+        cached = _schedulers.get(prefix)
+        if cached is None or cached[0] != signature:
+            cached = _schedulers[prefix] = (signature, KeyScheduler(specs))
+        return cached[1]
+
+
+def stats() -> dict:
+    with _schedulers_lock:
+        schedulers = [(prefix, scheduler) for prefix, (_sig, scheduler) in _schedulers.items()]
+    return {prefix: scheduler.stats() for prefix, scheduler in schedulers}
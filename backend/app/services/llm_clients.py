@@ -0,0 +1,284 @@
+"""
+LLM Client Registry — process-wide, warm provider clients.
+
+Scorers used to build a fresh `httpx.Client` / `OpenAI` client (and call
+`genai.configure`) for every job, paying TCP+TLS setup and SDK construction
+on each score. This registry keeps one keep-alive client per
+(provider, API key, model, base URL, header profile, sync|async) and hands
+the same instance back on every call. HTTP/2 is used when the optional `h2`
+package is installed.
+
+Gemini models carry their system instruction (which embeds the resume), so
+they are keyed by its fingerprint too. Several candidates' models can be
+warm at once; the least recently used beyond LLM_GEMINI_MODEL_CACHE are
+dropped.
+
+Clients are only rebuilt when the configured keys change:
+  - `retain(provider, keys)` drops clients whose key is no longer configured
+    (called by the scorers with the keys they just read from app_settings)
+  - `invalidate(provider)` drops everything for a provider (Settings save)
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import os
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+_HTTP2 = importlib.util.find_spec("h2") is not None
+_TIMEOUT_SECONDS = float(os.getenv("LLM_HTTP_TIMEOUT", "60"))
+_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "120"))
+_MAX_GEMINI_MODELS = max(1, int(os.getenv("LLM_GEMINI_MODEL_CACHE", "16")))
+
+
+@dataclass
+class _Entry:
+    provider: str
+    key_fingerprint: str
+    key_preview: str
+    model: str
+    mode: str  # "sync" | "async" | "gemini"
+    client: Any
+    http_client: Any = None
+    loop_ref: Any = None
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    uses: int = 0
+
+
+_lock = Lock()
+_entries: "OrderedDict[tuple, _Entry]" = OrderedDict()  # least recently used first
+_counters = {"created": 0, "reused": 0, "evicted": 0}
+_gemini_configured_key: Optional[str] = None
+
+
+def _fingerprint(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def _headers_fingerprint(headers: Optional[dict]) -> str:
+    if not headers:
+        return ""
+    canonical = "\n".join(f"{k.lower()}:{v}" for k, v in sorted(headers.items(), key=lambda kv: kv[0].lower()))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+def _preview(api_key: str) -> str:
+    return f"{api_key[:4]}...{api_key[-4:]}" if len(api_key) > 12 else "***"
+
+
+def _limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=_MAX_CONNECTIONS,
+        max_keepalive_connections=_MAX_CONNECTIONS,
+        keepalive_expiry=_KEEPALIVE_EXPIRY,
+    )
+
+
+def _close_entry(entry: _Entry) -> None:
+    """Close a client's connection pool; async pools are closed on their own loop."""
+    http_client = entry.http_client
+    if http_client is None:
+        return
+    try:
+        if entry.mode == "async":
+            loop = entry.loop_ref() if entry.loop_ref else None
+            if loop is not None and not loop.is_closed() and loop.is_running():
+                asyncio.run_coroutine_threadsafe(http_client.aclose(), loop)
+        else:
+            http_client.close()
+    except Exception as e:  # noqa: BLE001 — closing is best-effort
+        logger.debug(f"LLM client close failed: {e}")
+
+
+def _evict(keys: list[tuple]) -> None:
+    """Remove entries (caller holds `_lock`)."""
+    for k in keys:
+        entry = _entries.pop(k, None)
+        if entry is not None:
+            _counters["evicted"] += 1
+            _close_entry(entry)
+
+
+def _lookup(cache_key: tuple) -> Optional[_Entry]:
+    entry = _entries.get(cache_key)
+    if entry is None:
+        return None
+    if entry.mode == "async":
+        loop = entry.loop_ref() if entry.loop_ref else None
+        if loop is None or loop.is_closed():
+            _evict([cache_key])
+            return None
+    _entries.move_to_end(cache_key)
+    entry.uses += 1
+    entry.last_used = time.time()
+    _counters["reused"] += 1
+    return entry
+
+
+def _store(entry: _Entry, cache_key: tuple) -> _Entry:
+    entry.uses = 1
+    _entries[cache_key] = entry
+    _counters["created"] += 1
+    if entry.mode == "gemini":
+        models = [k for k, e in _entries.items() if e.mode == "gemini"]
+        _evict(models[:-_MAX_GEMINI_MODELS])
+    return entry
+
+
+def get_openai_client(
+    provider: str,
+    api_key: str,
+    model: str,
+    *,
+    base_url: Optional[str] = None,
+    headers: Optional[dict] = None,
+    use_async: bool = False,
+):
+    """
+    Return a warm `OpenAI` / `AsyncOpenAI` client for an OpenAI-compatible provider.
+    Async clients are bound to the running event loop.
+    """
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+
+    mode = "async" if use_async else "sync"
+    loop = asyncio.get_running_loop() if use_async else None
+    cache_key = (
+        provider,
+        _fingerprint(api_key),
+        model,
+        mode,
+        id(loop) if loop else None,
+        base_url or "",
+        _headers_fingerprint(headers),
+    )
+
+    with _lock:
+        entry = _lookup(cache_key)
+        if entry is not None:
+            return entry.client
+
+        client_kwargs = {
+            "headers": headers or {},
+            "timeout": _TIMEOUT_SECONDS,
+            "limits": _limits(),
+            "http2": _HTTP2,
+        }
+        if use_async:
+            http_client = httpx.AsyncClient(**client_kwargs)
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+        else:
+            http_client = httpx.Client(**client_kwargs)
+            client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+
+        _store(
+            _Entry(
+                provider=provider,
+                key_fingerprint=cache_key[1],
+                key_preview=_preview(api_key),
+                model=model,
+                mode=mode,
+                client=client,
+                http_client=http_client,
+                loop_ref=weakref.ref(loop) if loop else None,
+            ),
+            cache_key,
+        )
+        return client
+
+
+def get_gemini_model(api_key: str, model_name: str, system_instruction: str):
+    """
+    Return (genai module, warm GenerativeModel). `genai.configure` is global
+    SDK state, so it is only called again when the key actually changes.
+    """
+    global _gemini_configured_key
+    import google.generativeai as genai
+
+    prompt_fp = hashlib.sha256(system_instruction.encode("utf-8")).hexdigest()[:12]
+    cache_key = ("gemini", _fingerprint(api_key), model_name, "gemini", prompt_fp)
+
+    with _lock:
+        if _gemini_configured_key != api_key:
+            genai.configure(api_key=api_key)
+            _gemini_configured_key = api_key
+            # Models created under the previous key must not be reused
+            _evict([k for k in _entries if k[0] == "gemini" and k[1] != cache_key[1]])
+
+        entry = _lookup(cache_key)
+        if entry is not None:
+            return genai, entry.client
+
+        gen_model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+        _store(
+            _Entry(
+                provider="gemini",
+                key_fingerprint=cache_key[1],
+                key_preview=_preview(api_key),
+                model=model_name,
+                mode="gemini",
+                client=gen_model,
+            ),
+            cache_key,
+        )
+        return genai, gen_model
+
+
+def retain(provider: str, api_keys: list[str]) -> None:
+    """Drop clients for `provider` whose key is no longer in `api_keys`."""
+    current = {_fingerprint(k) for k in api_keys if k}
+    with _lock:
+        stale = [k for k, e in _entries.items() if e.provider == provider and e.key_fingerprint not in current]
+        _evict(stale)
+
+
+def invalidate(provider: Optional[str] = None) -> int:
+    """Drop all clients (or those of one provider). Returns how many were evicted."""
+    global _gemini_configured_key
+    with _lock:
+        stale = [k for k, e in _entries.items() if provider is None or e.provider == provider]
+        _evict(stale)
+        if provider in (None, "gemini"):
+            _gemini_configured_key = None
+        return len(stale)
+
+
+def pool_stats() -> dict:
+    """Registry counters plus one row per warm client (keys are previewed, never exposed)."""
+    now = time.time()
+    with _lock:
+        clients = [
+            {
+                "provider": e.provider,
+                "key_preview": e.key_preview,
+                "model": e.model,
+                "mode": e.mode,
+                "uses": e.uses,
+                "age_seconds": round(now - e.created_at, 1),
+                "idle_seconds": round(now - e.last_used, 1),
+            }
+            for e in _entries.values()
+        ]
+        counters = dict(_counters)
+    lookups = counters["created"] + counters["reused"]
+    return {
+        "http2": _HTTP2,
+        "max_connections_per_client": _MAX_CONNECTIONS,
+        "keepalive_expiry_seconds": _KEEPALIVE_EXPIRY,
+        "active_clients": len(clients),
+        **counters,
+        "reuse_ratio": round(counters["reused"] / lookups, 3) if lookups else 0.0,
+        "clients": clients,
+    }
@@ -0,0 +1,268 @@
+"""
+Lexical Pre-Ranking — BM25 of job descriptions against the active resume.
+
+A CPU-only stage in front of LLM scoring. The resume is the query: its
+distinct terms form the vocabulary, and each job description is reduced to
+a sparse term-frequency dict over that vocabulary only, so a full pass over
+100k descriptions is one tokenizer run per job plus a few dict lookups.
+
+Scores are normalized to 0-100 (relative to the best-matching job at the
+last full build) and stored in `jobs.prefilter_score` together with the
+resume hash they were computed for:
+  - a full rebuild happens when the resume changes, on first use in a
+    process, or once the corpus has grown by REBUILD_GROWTH since the build
+  - otherwise `refresh()` only scores rows whose score is still NULL
+
+Descriptions are streamed through a server-side cursor and the statistics
+are built without holding the module lock; only the swap of the finished
+`_Stats` takes it, so a rebuild never stalls callers reading `stats()`.
+One refresh runs at a time.
+"""
+
+import logging
+import math
+import string
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Iterable, Iterator, Optional
+
+from .score_cache import text_hash
+
+logger = logging.getLogger(__name__)
+
+K1 = 1.2
+B = 0.75
+REBUILD_GROWTH = 0.2  # fraction of new docs that makes corpus stats stale
+_WRITE_PAGE_SIZE = 1000
+_READ_PAGE_SIZE = 2000
+
+# ASCII punctuation -> space, then str.split(): ~2x faster than a token regex
+_TOKEN_CHARS = set(string.ascii_lowercase + string.digits + "+#")
+_SEPARATORS = {i: " " for i in range(128) if chr(i) not in _TOKEN_CHARS}
+_STOPWORDS = frozenset(
+    """
+    a about above after all also an and any are as at be been being both but by can
+    could did do does doing during each etc for from had has have having he her here
+    him his how i if in into is it its just me more most my no nor not of off on once
+    only or other our out over own per same she should so some such than that the
+    their them then there these they this those through to too under until up very
+    was we were what when where which while who whom why will with would you your
+    de des du en et la le les un une years year work working using used including
+    """.split()
+)
+
+
+@dataclass
+class _Stats:
+    resume_hash: str
+    idf: dict[str, float]
+    avg_len: float
+    max_raw: float
+    n_docs: int
+    built_at: float = field(default_factory=time.time)
+
+
+_lock = Lock()
+_refresh_lock = Lock()  # one refresh at a time; `_lock` only guards the swap
+_stats: Optional[_Stats] = None
+_counters = {"full_builds": 0, "incremental_docs": 0, "last_elapsed": 0.0}
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    return (text or "").lower().translate(_SEPARATORS).split()
+
+
+def query_terms(resume_text: str) -> set[str]:
+    """Distinct resume terms used as the BM25 query."""
+    return {t for t in tokenize(resume_text) if len(t) > 1 and t not in _STOPWORDS}
+
+
+def _doc_vector(text: Optional[str], vocab: set[str]) -> tuple[dict[str, int], int]:
+    """Sparse term frequencies restricted to `vocab`, plus the document length."""
+    tokens = tokenize(text)
+    counts = Counter(tokens)
+    return {t: counts[t] for t in counts.keys() & vocab}, len(tokens)
+
+
+def _bm25(tf: dict[str, int], length: int, idf: dict[str, float], avg_len: float) -> float:
+    norm = K1 * (1 - B + B * length / avg_len) if avg_len else K1
+    return sum(idf[t] * f * (K1 + 1) / (f + norm) for t, f in tf.items())
+
+
+def build_stats(resume_text: str, docs: Iterable[tuple[int, Optional[str]]]) -> tuple[_Stats, dict[int, float]]:
+    """Corpus statistics plus normalized scores for `docs` ([(job_id, description)])."""
+    vocab = query_terms(resume_text)
+    vectors: list[tuple[int, dict[str, int], int]] = []
+    df: Counter = Counter()
+    total_len = 0
+    for job_id, description in docs:
+        tf, length = _doc_vector(description, vocab)
+        vectors.append((job_id, tf, length))
+        df.update(tf.keys())
+        total_len += length
+
+    n = len(vectors)
+    avg_len = total_len / n if n else 0.0
+    idf = {t: math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) for t in vocab}
+    raw = {job_id: _bm25(tf, length, idf, avg_len) for job_id, tf, length in vectors}
+    max_raw = max(raw.values(), default=0.0)
+
+    stats = _Stats(resume_hash=text_hash(resume_text), idf=idf, avg_len=avg_len, max_raw=max_raw, n_docs=n)
+    return stats, {job_id: _normalize(score, max_raw) for job_id, score in raw.items()}
+
+
+def rank_many(vocabularies: dict, docs: list[tuple[int, Optional[str]]]) -> dict:
+    """
+    Normalized scores of `docs` for several queries at once ({key: {job_id: score}}).
+    Each description is tokenized once over the union of the vocabularies, so
+    ranking a corpus for N resumes costs one tokenizer pass, not N.
+    """
+    vocabs = {key: set(vocab) for key, vocab in vocabularies.items()}
+    union = set().union(*vocabs.values()) if vocabs else set()
+    vectors: list[tuple[int, dict[str, int], int]] = []
+    df: Counter = Counter()
+    total_len = 0
+    for job_id, description in docs:
+        tf, length = _doc_vector(description, union)
+        vectors.append((job_id, tf, length))
+        df.update(tf.keys())
+        total_len += length
+
+    n = len(vectors)
+    avg_len = total_len / n if n else 0.0
+    out = {}
+    for key, vocab in vocabs.items():
+        idf = {t: math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) for t in vocab}
+        raw = {
+            job_id: _bm25({t: f for t, f in tf.items() if t in vocab}, length, idf, avg_len)
+            for job_id, tf, length in vectors
+        }
+        max_raw = max(raw.values(), default=0.0)
+        out[key] = {job_id: _normalize(score, max_raw) for job_id, score in raw.items()}
+    return out
+
+
+def _normalize(raw: float, max_raw: float) -> float:
+    if max_raw <= 0:
+        return 0.0
+    return round(min(100.0, 100.0 * raw / max_raw), 1)
+
+
+def score_text(description: Optional[str], stats: _Stats) -> float:
+    """Normalized score of one description under existing corpus stats."""
+    tf, length = _doc_vector(description, stats.idf.keys())
+    return _normalize(_bm25(tf, length, stats.idf, stats.avg_len), stats.max_raw)
+
+
+# ── Persistence ─────────────────────────────────────────────────────────────
+
+def _write_scores(cur, scores: dict[int, float], resume_hash: str) -> None:
+    from psycopg2.extras import execute_values
+
+    execute_values(
+        cur,
+        """
+        UPDATE jobs AS j
+        SET prefilter_score = v.score, prefilter_resume_hash = v.resume_hash
+        FROM (VALUES %s) AS v(id, score, resume_hash)
+        WHERE j.id = v.id
+        """,
+        [(job_id, score, resume_hash) for job_id, score in scores.items()],
+        template="(%s, %s::real, %s)",
+        page_size=_WRITE_PAGE_SIZE,
+    )
+
+
+def _stream_docs(conn, resume_hash: Optional[str] = None) -> Iterator[tuple[int, Optional[str]]]:
+    """
+    (id, description) of every job — or, given `resume_hash`, of jobs not yet
+    scored for it — fetched _READ_PAGE_SIZE rows at a time.
+    """
+    sql = "SELECT id, job_description FROM jobs"
+    params: list = []
+    if resume_hash is not None:
+        sql += " WHERE prefilter_score IS NULL OR prefilter_resume_hash IS DISTINCT FROM %s"
+        params.append(resume_hash)
+    with conn.cursor(name="prefilter_docs") as cur:
+        cur.itersize = _READ_PAGE_SIZE
+        cur.execute(sql, params)
+        for job_id, description in cur:
+            yield job_id, description
+
+
+def refresh(resume_text: str, full: bool = False) -> dict:
+    """
+    Bring `jobs.prefilter_score` up to date for `resume_text`.
+    Returns {"mode": "full" | "incremental" | "noop", "scored": n, "elapsed": s}.
+    """
+    global _stats
+    from ..db import db
+
+    started = time.perf_counter()
+    resume_hash = text_hash(resume_text)
+
+    with _refresh_lock:
+        with _lock:
+            stats = _stats
+        with db() as (conn, cur):
+            cur.execute(
+                "SELECT COUNT(*) AS count FROM jobs WHERE prefilter_score IS NULL OR prefilter_resume_hash IS DISTINCT FROM %s",
+                [resume_hash],
+            )
+            pending = cur.fetchone()["count"]
+
+            stale = (
+                full
+                or stats is None
+                or stats.resume_hash != resume_hash
+                or pending > REBUILD_GROWTH * max(stats.n_docs, 1)
+            )
+            if stale:
+                stats, scores = build_stats(resume_text, _stream_docs(conn))
+                mode = "full"
+            elif pending:
+                scores = {
+                    job_id: score_text(description, stats)
+                    for job_id, description in _stream_docs(conn, resume_hash)
+                }
+                mode = "incremental"
+            else:
+                scores, mode = {}, "noop"
+
+            if scores:
+                _write_scores(cur, scores, resume_hash)
+
+        elapsed = round(time.perf_counter() - started, 3)
+        with _lock:
+            if mode == "full":
+                _stats = stats
+                _counters["full_builds"] += 1
+            elif mode == "incremental":
+                _counters["incremental_docs"] += len(scores)
+            _counters["last_elapsed"] = elapsed
+
+    if mode != "noop":
+        logger.info(f"Prefilter {mode} refresh: {len(scores)} jobs in {elapsed}s")
+    return {"mode": mode, "scored": len(scores), "elapsed": elapsed}
+
+
+def reset() -> None:
+    global _stats
+    with _lock:
+        _stats = None
+
+
+def stats() -> dict:
+    with _lock:
+        s = _stats
+        counters = dict(_counters)
+    return {
+        "built": s is not None,
+        "resume_hash": s.resume_hash[:12] if s else None,
+        "vocabulary": len(s.idf) if s else 0,
+        "corpus_docs": s.n_docs if s else 0,
+        "avg_doc_length": round(s.avg_len, 1) if s else 0,
+        **counters,
+    }
@@ -0,0 +1,239 @@
+"""
+Rate Limiter — shared token buckets for provider request limits.
+
+Each provider has one bucket per window (minute / hour / day). A bucket is
+two numbers — tokens left and when they were last refilled — and refills
+continuously at `limit / window` tokens per second up to `limit`. A request
+takes one token from every bucket of its provider, atomically.
+
+`acquire(provider, timeout)` waits until all buckets have a token (so a
+burst queues instead of failing) and raises `RateLimitTimeout` only when
+the wait would exceed `timeout`.
+
+State lives in Postgres (`rate_limit_buckets`, rows locked per provider
+while taking) so every API process, worker and scheduler shares one budget
+and a redeploy doesn't reset the day window. RATE_LIMIT_STORE=memory keeps
+it in-process instead; the memory store is also the fallback when the
+database is unreachable.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from threading import Lock
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = {"minute": 60, "hour": 3600, "day": 86400}
+LIMITS = {
+    "groq": {"minute": 60, "hour": 3600, "day": 30000},  # conservative vs official limits
+    "openai": {"minute": 60, "hour": 3500, "day": 10000},
+    "gemini": {"minute": 15, "hour": 1000, "day": 1500},
+}
+MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "60"))
+
+
+class RateLimitTimeout(RuntimeError):
+    """No capacity within the allowed wait. The message starts with "Rate limit" like provider 429s."""
+
+    def __init__(self, provider: str, window: str, limit: int, wait: float):
+        super().__init__(f"Rate limit ({provider}): {limit}/{window} exceeded; next slot in {wait:.1f}s.")
+        self.provider = provider
+        self.window = window
+        self.wait = wait
+
+
+def _refill(tokens: float, updated_at: float, now: float, limit: int, window: str) -> float:
+    return min(float(limit), tokens + max(0.0, now - updated_at) * limit / WINDOW_SECONDS[window])
+
+
+def _take(buckets: dict[str, tuple[float, float]], provider: str, now: float) -> tuple[float, dict[str, float], str]:
+    """
+    Try to take one token from each of `provider`'s buckets.
+    Returns (wait seconds — 0 if taken, new token counts, limiting window).
+    """
+    tokens = {
+        window: _refill(*buckets.get(window, (float(limit), now)), now, limit, window)
+        for window, limit in LIMITS[provider].items()
+    }
+    wait, limiting = 0.0, ""
+    for window, left in tokens.items():
+        if left < 1.0:
+            needed = (1.0 - left) * WINDOW_SECONDS[window] / LIMITS[provider][window]
+            if needed > wait:
+                wait, limiting = needed, window
+    if wait > 0:
+        return wait, tokens, limiting
+    return 0.0, {window: left - 1.0 for window, left in tokens.items()}, ""
+
+
+class MemoryStore:
+    """Per-process buckets."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = Lock()
+        self._buckets: dict[str, dict[str, tuple[float, float]]] = {}
+
+    def take(self, provider: str) -> tuple[float, str]:
+        with self._lock:
+            now = time.time()
+            wait, tokens, limiting = _take(self._buckets.get(provider, {}), provider, now)
+            self._buckets[provider] = {window: (left, now) for window, left in tokens.items()}
+            return wait, limiting
+
+    def snapshot(self, provider: str) -> dict[str, float]:
+        with self._lock:
+            now = time.time()
+            buckets = self._buckets.get(provider, {})
+            return {
+                window: _refill(*buckets.get(window, (float(limit), now)), now, limit, window)
+                for window, limit in LIMITS[provider].items()
+            }
+
+
+class PostgresStore:
+    """Buckets shared by every process through `rate_limit_buckets` (one row per provider+window)."""
+
+    name = "postgres"
+
+    def _rows(self, cur, provider: str, lock: bool) -> tuple[dict[str, tuple[float, float]], float]:
+        cur.execute(
+            f"""
+            SELECT time_window, tokens, updated_at, EXTRACT(EPOCH FROM clock_timestamp())::float8 AS now
+            FROM rate_limit_buckets WHERE provider = %s {"FOR UPDATE" if lock else ""}
+            """,
+            [provider],
+        )
+        rows = cur.fetchall()
+        now = rows[0]["now"] if rows else time.time()
+        return {row["time_window"]: (row["tokens"], row["updated_at"]) for row in rows}, now
+
+    def take(self, provider: str) -> tuple[float, str]:
+        from psycopg2.extras import execute_values
+        from ..db import db
+
+        with db() as (conn, cur):
+            buckets, now = self._rows(cur, provider, lock=True)
+            if len(buckets) < len(LIMITS[provider]):
+                # First use: seed full buckets, then lock them
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO rate_limit_buckets (provider, time_window, tokens, updated_at) VALUES %s
+                    ON CONFLICT (provider, time_window) DO NOTHING
+                    """,
+                    [(provider, window, float(limit), now) for window, limit in LIMITS[provider].items()],
+                )
+                buckets, now = self._rows(cur, provider, lock=True)
+            wait, tokens, limiting = _take(buckets, provider, now)
+            execute_values(
+                cur,
+                """
+                UPDATE rate_limit_buckets AS b SET tokens = v.tokens, updated_at = v.updated_at
+                FROM (VALUES %s) AS v(provider, time_window, tokens, updated_at)
+                WHERE b.provider = v.provider AND b.time_window = v.time_window
+                """,
+                [(provider, window, left, now) for window, left in tokens.items()],
+            )
+        return wait, limiting
+
+    def snapshot(self, provider: str) -> dict[str, float]:
+        from ..db import db
+
+        with db() as (conn, cur):
+            buckets, now = self._rows(cur, provider, lock=False)
+        return {
+            window: _refill(*buckets.get(window, (float(limit), now)), now, limit, window)
+            for window, limit in LIMITS[provider].items()
+        }
+
+
+_memory = MemoryStore()
+_store = None
+_fallback_warned = False
+
+
+def get_store():
+    global _store
+    if _store is None:
+        mode = os.getenv("RATE_LIMIT_STORE", "postgres").lower()
+        _store = _memory if mode == "memory" else PostgresStore()
+    return _store
+
+
+def set_store(store) -> None:
+    """Swap the backing store (tests, or RATE_LIMIT_STORE changes)."""
+    global _store
+    _store = store
+
+
+def _take_once(provider: str) -> tuple[float, str]:
+    global _fallback_warned
+    store = get_store()
+    try:
+        return store.take(provider)
+    except Exception as e:
+        if store is _memory:
+            raise
+        if not _fallback_warned:
+            logger.warning(f"Rate limiter: shared store unavailable, limiting per process: {e}")
+            _fallback_warned = True
+        return _memory.take(provider)
+
+
+def acquire(provider: str, timeout: Optional[float] = None) -> float:
+    """
+    Block until `provider` has capacity, then consume one request.
+    Returns the seconds spent waiting; raises RateLimitTimeout if the
+    next slot is further away than `timeout` (default RATE_LIMIT_MAX_WAIT_SECONDS).
+    """
+    timeout = MAX_WAIT_SECONDS if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    waited = 0.0
+    while True:
+        wait, window = _take_once(provider)
+        if wait <= 0:
+            return waited
+        remaining = deadline - time.monotonic()
+        if wait > remaining:
+            raise RateLimitTimeout(provider, window, LIMITS[provider][window], wait)
+        time.sleep(wait)
+        waited += wait
+
+
+async def acquire_async(provider: str, timeout: Optional[float] = None) -> float:
+    """`acquire` for the event loop — waits with asyncio.sleep, DB access off-loop."""
+    timeout = MAX_WAIT_SECONDS if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    waited = 0.0
+    while True:
+        if get_store() is _memory:
+            wait, window = _take_once(provider)
+        else:
+            wait, window = await asyncio.to_thread(_take_once, provider)
+        if wait <= 0:
+            return waited
+        remaining = deadline - time.monotonic()
+        if wait > remaining:
+            raise RateLimitTimeout(provider, window, LIMITS[provider][window], wait)
+        await asyncio.sleep(wait)
+        waited += wait
+
+
+def stats() -> dict:
+    """Tokens left per provider and window."""
+    store = get_store()
+    out = {"store": store.name, "providers": {}}
+    for provider, limits in LIMITS.items():
+        try:
+            left = store.snapshot(provider)
+        except Exception:
+            left = _memory.snapshot(provider)
+        out["providers"][provider] = {
+            window: {"limit": limit, "available": round(left[window], 2)} for window, limit in limits.items()
+        }
+    return out
@@ -12,14 +12,15 @@ When auto_cv_generation is enabled, qualified jobs automatically get:
 """
 
 import os
-import json
+import time
 import asyncio
 import logging
 from typing import Optional
 from datetime import datetime, timezone
 
+from . import fast_json, settings_cache
+
 logger = logging.getLogger("scheduler")
-_DEFAULT_SCORE_THRESHOLD = int(os.getenv("SCORE_THRESHOLD_DEFAULT", "80"))
 
 _scheduler = None
 
@@ -44,17 +45,8 @@ def start_scheduler():
     cron_expr = os.getenv("SCHEDULER_CRON", "0 8 * * *")
 
     # Also check DB settings
-    try:
-        from ..db import db
-        with db() as (conn, cur):
-            cur.execute("SELECT key, value FROM app_settings WHERE key LIKE 'scheduler_%'")
-            for row in cur.fetchall():
-                if row["key"] == "scheduler_enabled":
-                    enabled = row["value"].lower() in ("true", "1", "yes")
-                elif row["key"] == "scheduler_cron":
-                    cron_expr = row["value"]
-    except Exception:
-        pass
+    enabled = settings_cache.get_bool("scheduler_enabled", enabled)
+    cron_expr = settings_cache.get("scheduler_cron") or cron_expr
 
     if not enabled:
         logger.info("Scheduler is disabled (set SCHEDULER_ENABLED=true to enable)")
@@ -76,16 +68,43 @@ def start_scheduler():
     else:
         trigger_kwargs = {"hour": "8", "minute": "0"}
 
-    _scheduler.add_job(
-        _run_batch_scoring,
-        CronTrigger(**trigger_kwargs),
-        id="batch_scoring",
-        name="AI Job Scoring Batch",
-        replace_existing=True,
-    )
+    mode = _scheduler_mode()
+    if mode == "batch":
+        from apscheduler.triggers.interval import IntervalTrigger
+
+        _scheduler.add_job(
+            _run_batch_api_cycle,
+            CronTrigger(**trigger_kwargs),
+            id="batch_scoring",
+            name="AI Job Scoring Batch (provider batch API)",
+            replace_existing=True,
+        )
+        _scheduler.add_job(
+            _poll_scoring_batches,
+            IntervalTrigger(minutes=int(os.getenv("SCHEDULER_BATCH_POLL_MINUTES", "15"))),
+            id="batch_scoring_poll",
+            name="Poll scoring batches",
+            replace_existing=True,
+        )
+    elif mode == "queue":
+        _scheduler.add_job(
+            _enqueue_for_workers,
+            CronTrigger(**trigger_kwargs),
+            id="batch_scoring",
+            name="Queue jobs for scoring workers",
+            replace_existing=True,
+        )
+    else:
+        _scheduler.add_job(
+            _run_batch_scoring,
+            CronTrigger(**trigger_kwargs),
+            id="batch_scoring",
+            name="AI Job Scoring Batch",
+            replace_existing=True,
+        )
 
     _scheduler.start()
-    logger.info(f"Scheduler started — cron: {cron_expr}")
+    logger.info(f"Scheduler started — cron: {cron_expr}, mode: {mode}")
 
 
 def stop_scheduler():
@@ -126,16 +145,37 @@ def _is_auto_cv_enabled() -> bool:
 
     Reads from app_settings key 'auto_cv_generation'. Default: OFF.
     """
+    default = os.getenv("AUTO_CV_GENERATION", "false").lower() in ("true", "1", "yes")
+    return settings_cache.get_bool("auto_cv_generation", default)
+
+
+def _scheduler_setting(key: str, env_name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read a scheduler option from app_settings, falling back to the environment."""
+    value = settings_cache.get(key)
+    if value not in (None, ""):
+        return value
+    return os.getenv(env_name, default)
+
+
+def _prefilter_min_score() -> Optional[float]:
+    """Lexical pre-ranking cut-off for scheduled runs (None = score everything)."""
+    value = _scheduler_setting("scheduler_prefilter_min", "SCHEDULER_PREFILTER_MIN")
     try:
-        from ..db import db
-        with db() as (conn, cur):
-            cur.execute("SELECT value FROM app_settings WHERE key = 'auto_cv_generation'")
-            row = cur.fetchone()
-            if row:
-                return row["value"].lower() in ("true", "1", "yes")
-    except Exception:
-        pass
-    return os.getenv("AUTO_CV_GENERATION", "false").lower() in ("true", "1", "yes")
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def _scoring_options() -> tuple[str, int]:
+    """(provider, jobs per request) for scheduled runs."""
+    provider = (_scheduler_setting("scheduler_provider", "SCHEDULER_PROVIDER", "groq") or "groq").lower()
+    if provider not in ("groq", "openai", "gemini"):
+        provider = "groq"
+    try:
+        jobs_per_request = int(_scheduler_setting("scheduler_jobs_per_request", "SCHEDULER_JOBS_PER_REQUEST", "1"))
+    except (TypeError, ValueError):
+        jobs_per_request = 1
+    return provider, max(1, jobs_per_request)
 
 
 def _run_autonomous_cv_pipeline(job_id: int, job_data: dict, detailed_score: dict) -> Optional[str]:
@@ -202,8 +242,8 @@ def _run_autonomous_cv_pipeline(job_id: int, job_data: dict, detailed_score: dic
                     next_ver,
                     resume_text,
                     enhanced_cv,
-                    json.dumps(skills_matched),
-                    json.dumps(skills_missing),
+                    fast_json.dumps(skills_matched),
+                    fast_json.dumps(skills_missing),
                     fit_score,
                 ],
             )
@@ -260,6 +300,98 @@ def _run_autonomous_cv_pipeline(job_id: int, job_data: dict, detailed_score: dic
     return drive_url
 
 
+def _scheduler_mode() -> str:
+    """
+    "interactive" (concurrent live calls in this process), "batch" (provider
+    batch API, results within 24h) or "queue" (enqueue for app.worker processes).
+    """
+    mode = (_scheduler_setting("scheduler_mode", "SCHEDULER_MODE", "interactive") or "interactive").lower()
+    return mode if mode in ("interactive", "batch", "queue") else "interactive"
+
+
+def _run_batch_api_cycle():
+    """Batch-API mode: ingest finished batches, then submit every pending job as a new batch."""
+    from . import batch_scoring
+
+    provider, _jobs_per_request = _scoring_options()
+    try:
+        result = batch_scoring.run_cycle(provider)
+        submitted = result["submitted"]
+        logger.info(
+            f"Scheduler: polled {len(result['polled'])} batch(es), "
+            f"submitted {submitted['jobs'] if submitted else 0} job(s) via {provider}"
+        )
+    except Exception as e:
+        logger.error(f"Scheduler: batch-API cycle failed: {e}")
+
+
+def _poll_scoring_batches():
+    """Batch-API mode: ingest any batches that finished since the last poll."""
+    from . import batch_scoring
+
+    try:
+        for summary in batch_scoring.poll():
+            if summary["status"] == "ingested":
+                logger.info(f"Scheduler: ingested batch {summary['id']} — {summary['scored']} scored, {summary['errors']} errors")
+    except Exception as e:
+        logger.error(f"Scheduler: polling scoring batches failed: {e}")
+
+
+def _select_unscored(batch_size: int) -> list[dict]:
+    """Unscored jobs for a scheduled run, most relevant to the resume first."""
+    from ..db import db
+
+    # Rank unscored jobs lexically against the resume so the LLM budget
+    # goes to the most relevant ones first
+    min_prefilter = _prefilter_min_score()
+    ranked = False
+    try:
+        from ..routes.scoring import _get_resume
+        from .prefilter import refresh as refresh_prefilter
+        refresh_prefilter(_get_resume())
+        ranked = True
+    except Exception as e:
+        logger.warning(f"Scheduler: prefilter refresh failed, using recency order: {e}")
+
+    with db() as (conn, cur):
+        if ranked:
+            cur.execute(
+                """
+                SELECT id, job_title, company_name, job_description, score, prefilter_score FROM jobs
+                WHERE score IS NULL AND (%s::real IS NULL OR prefilter_score >= %s)
+                ORDER BY prefilter_score DESC NULLS LAST, created_at DESC
+                LIMIT %s
+                """,
+                [min_prefilter, min_prefilter, batch_size],
+            )
+        else:
+            cur.execute(
+                """
+                SELECT id, job_title, company_name, job_description, score, prefilter_score FROM jobs
+                WHERE score IS NULL ORDER BY created_at DESC LIMIT %s
+                """,
+                [batch_size],
+            )
+        return [dict(r) for r in cur.fetchall()]
+
+
+def _enqueue_for_workers():
+    """Queue mode: hand unscored jobs to standalone workers (python -m app.worker)."""
+    from . import scoring_queue
+
+    try:
+        jobs = _select_unscored(int(os.getenv("SCHEDULER_BATCH_SIZE", "50")))
+        provider, _jobs_per_request = _scoring_options()
+        added = scoring_queue.enqueue(
+            [job["id"] for job in jobs],
+            provider,
+            priority=[float(job.get("prefilter_score") or 0.0) for job in jobs],
+        )
+        logger.info(f"Scheduler: queued {added} of {len(jobs)} unscored job(s) for workers")
+    except Exception as e:
+        logger.error(f"Scheduler: enqueueing jobs failed: {e}")
+
+
 def _run_batch_scoring():
     """Execute batch scoring for all unscored jobs — called by APScheduler.
 
@@ -270,6 +402,7 @@ def _run_batch_scoring():
 
     try:
         from ..db import db
+        from . import scoring_queue
 
         batch_size = int(os.getenv("SCHEDULER_BATCH_SIZE", "50"))
         auto_cv = _is_auto_cv_enabled()
@@ -277,12 +410,12 @@ def _run_batch_scoring():
         if auto_cv:
             logger.info("Scheduler: autonomous CV pipeline is ENABLED")
 
-        with db() as (conn, cur):
-            cur.execute(
-                "SELECT id FROM jobs WHERE score IS NULL ORDER BY created_at DESC LIMIT %s",
-                [batch_size],
-            )
-            unscored = [r["id"] for r in cur.fetchall()]
+        unscored = _select_unscored(batch_size)
+        lease_owner = scoring_queue.new_owner()
+        try:
+            unscored = scoring_queue.claim_jobs(unscored, lease_owner)
+        except Exception as e:
+            logger.warning(f"Scheduler: could not lease jobs, scoring without cross-process claims: {e}")
 
         if not unscored:
             logger.info("Scheduler: no unscored jobs found")
@@ -291,53 +424,74 @@ def _run_batch_scoring():
         logger.info(f"Scheduler: found {len(unscored)} unscored jobs, starting batch...")
 
         # Import scoring and run
-        from ..routes.scoring import _score_single_job
+        from ..routes.scoring import MAX_JOBS_PER_REQUEST, _flush_scores, _written, iter_job_events
+        from .scoring_pool import get_provider_concurrency
+
+        provider, jobs_per_request = _scoring_options()
+        jobs_per_request = min(jobs_per_request, MAX_JOBS_PER_REQUEST)
+        logger.info(f"Scheduler: provider={provider}, jobs_per_request={jobs_per_request}")
 
         scored = 0
         errors = 0
         high_matches = 0
         total_score = 0
         qualified_jobs = []  # For rich batch notification
+        scored_ids = []  # leases are completed once the buffered scores are written
+        failed = {}  # job id -> error, returned to the queue for a retry
 
         # Determine threshold
-        threshold = _DEFAULT_SCORE_THRESHOLD
-        try:
-            with db() as (conn, cur):
-                cur.execute("SELECT value FROM app_settings WHERE key = 'score_threshold'")
-                row = cur.fetchone()
-                if row:
-                    threshold = int(row["value"])
-        except Exception:
-            pass
-
-        for job_id in unscored:
+        threshold = settings_cache.qualification_threshold()
+
+        requests = -(-len(unscored) // jobs_per_request)
+        events = iter_job_events(
+            unscored,
+            provider,
+            threshold,
+            workers=min(requests, get_provider_concurrency(provider)),
+            jobs_per_request=jobs_per_request,
+        )
+        provider_requests = 0.0
+        lease_renewed = time.time()
+        for event in events:
+            if time.time() - lease_renewed > scoring_queue.LEASE_SECONDS / 3:
+                lease_renewed = time.time()
+                try:
+                    scoring_queue.extend(lease_owner)
+                except Exception as e:
+                    logger.warning(f"Scheduler: could not extend scoring leases: {e}")
+            if event.kind == "scoring":
+                continue
+            job_id = event.job["id"]
             try:
-                result = _score_single_job(job_id)
-                if result and result.get("score"):
+                if event.kind != "scored":
+                    raise event.error or RuntimeError(f"job {event.kind}")
+                result = event.result or {}
+                if not (result.get("cache_hit") or result.get("reused_from_job_id")):
+                    provider_requests += 1 / max(result.get("batch_size", 1), 1)
+                if result.get("overall_score") is not None:
                     scored += 1
-                    s = result["score"]
+                    scored_ids.append(job_id)
+                    s = int(result["overall_score"])
                     total_score += s
 
                     if s >= threshold:
                         high_matches += 1
 
-                        # Load full job data for notifications
+                        # The score itself may still be in the write-behind buffer:
+                        # take it from the result, and only the job's own columns from the DB
                         job_data = {}
-                        detailed_score = {}
+                        detailed_score = result
                         try:
                             with db() as (conn, cur):
                                 cur.execute(
                                     """SELECT job_title, company_name, job_description,
-                                              location, job_url, apply_url, detailed_score, justification
+                                              location, job_url, apply_url
                                        FROM jobs WHERE id = %s""",
                                     [job_id],
                                 )
                                 row = cur.fetchone()
                                 if row:
                                     job_data = dict(row)
-                                    ds = row.get("detailed_score")
-                                    if ds:
-                                        detailed_score = json.loads(ds) if isinstance(ds, str) else ds
                         except Exception:
                             pass
 
@@ -369,7 +523,7 @@ def _run_batch_scoring():
                                     company=job_data.get("company_name", "Unknown"),
                                     score=s,
                                     job_id=job_id,
-                                    justification=job_data.get("justification", ""),
+                                    justification=result.get("overall_justification", ""),
                                     location=job_data.get("location", ""),
                                     job_url=job_data.get("job_url", ""),
                                     apply_url=job_data.get("apply_url", ""),
@@ -382,13 +536,25 @@ def _run_batch_scoring():
 
             except Exception as e:
                 errors += 1
+                failed[job_id] = str(e)
                 logger.error(f"Scheduler: error scoring job {job_id}: {e}")
 
+        # Complete only jobs whose score reached the DB; the rest go back to the queue
+        _flush_scores()
+        try:
+            scoring_queue.complete(_written(scored_ids), lease_owner)
+            for job_id, error in failed.items():
+                scoring_queue.fail(job_id, error, lease_owner)
+            scoring_queue.release(lease_owner)
+        except Exception as e:
+            logger.warning(f"Scheduler: could not release scoring leases: {e}")
+
         avg_score = total_score / scored if scored > 0 else 0
 
         logger.info(
             f"Scheduler: batch complete — scored={scored}, errors={errors}, "
-            f"high_matches={high_matches}, avg={avg_score:.1f}"
+            f"high_matches={high_matches}, avg={avg_score:.1f}, "
+            f"provider_requests={round(provider_requests)}"
         )
 
         # Send batch completion notification (with qualified job details)
@@ -0,0 +1,209 @@
+"""
+Score Cache — content-addressed store for LLM scoring results.
+
+The same posting often comes back under a new `job_id` (reposts, the same
+role in several locations). Results are keyed by a hash of what the model
+actually saw, so any such copy is answered from the `scoring_cache` table
+instead of a new 3000-token analysis:
+
+    sha256(normalized title | company | description,
+           resume hash, system prompt version, provider, model)
+
+Eviction: entries older than SCORING_CACHE_TTL_DAYS are dropped, and the
+table is trimmed to SCORING_CACHE_MAX_ENTRIES by least-recent hit (LRU).
+Cache failures never fail a score — they are logged and treated as a miss.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from threading import Lock
+from typing import Optional
+
+from . import fast_json
+
+logger = logging.getLogger(__name__)
+
+_TTL_DAYS = int(os.getenv("SCORING_CACHE_TTL_DAYS", "30"))
+_MAX_ENTRIES = int(os.getenv("SCORING_CACHE_MAX_ENTRIES", "20000"))
+_EVICT_EVERY = 100  # puts between opportunistic eviction passes
+
+_lock = Lock()
+_counters = {"hits": 0, "misses": 0, "writes": 0, "errors": 0, "evicted": 0}
+_puts_since_evict = 0
+
+_WS_RE = re.compile(r"\s+")
+
+
+def is_enabled() -> bool:
+    return os.getenv("SCORING_CACHE_ENABLED", "true").lower() in ("true", "1", "yes")
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Case- and whitespace-insensitive form used for hashing."""
+    return _WS_RE.sub(" ", (value or "")).strip().lower()
+
+
+def text_hash(value: str) -> str:
+    return hashlib.sha256((value or "").encode("utf-8")).hexdigest()
+
+
+def make_key(
+    job_title: str,
+    company: str,
+    description: str,
+    resume_hash: str,
+    prompt_version: str,
+    provider: str,
+    model: str,
+) -> str:
+    """Content address for one (posting, resume, prompt, provider/model) tuple."""
+    parts = [
+        normalize_text(job_title),
+        normalize_text(company),
+        normalize_text(description),
+        resume_hash,
+        prompt_version,
+        provider,
+        model,
+    ]
+    return text_hash("\x1f".join(parts))
+
+
+def _bump(counter: str, n: int = 1) -> None:
+    with _lock:
+        _counters[counter] += n
+
+
+def get(cache_key: str) -> Optional[dict]:
+    """Return the cached result (and record the hit), or None on miss/expiry."""
+    try:
+        from ..db import db
+        with db() as (conn, cur):
+            cur.execute(
+                """
+                UPDATE scoring_cache
+                SET hit_count = hit_count + 1, last_hit_at = NOW()
+                WHERE cache_key = %s
+                  AND created_at > NOW() - make_interval(days => %s)
+                RETURNING result, created_at
+                """,
+                [cache_key, _TTL_DAYS],
+            )
+            row = cur.fetchone()
+    except Exception as e:
+        _bump("errors")
+        logger.warning(f"Score cache lookup failed: {e}")
+        return None
+
+    if not row:
+        _bump("misses")
+        return None
+
+    _bump("hits")
+    result = row["result"]
+    if isinstance(result, str):
+        result = json.loads(result)
+    created_at = row.get("created_at")
+    result["cached_at"] = created_at.isoformat() if hasattr(created_at, "isoformat") else created_at
+    return result
+
+
+def put(cache_key: str, result: dict, provider: str, model: str, prompt_version: str) -> None:
+    """Insert or refresh a cache entry; periodically runs eviction."""
+    global _puts_since_evict
+    payload = {k: v for k, v in result.items() if k not in ("cache_hit", "cached_at")}
+    try:
+        from ..db import db
+        with db() as (conn, cur):
+            cur.execute(
+                """
+                INSERT INTO scoring_cache (cache_key, provider, model, prompt_version, result)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (cache_key) DO UPDATE
+                SET result = EXCLUDED.result,
+                    created_at = NOW(),
+                    last_hit_at = NOW()
+                """,
+                [cache_key, provider, model, prompt_version, fast_json.dumps(payload)],
+            )
+    except Exception as e:
+        _bump("errors")
+        logger.warning(f"Score cache write failed: {e}")
+        return
+
+    _bump("writes")
+    with _lock:
+        _puts_since_evict += 1
+        due = _puts_since_evict >= _EVICT_EVERY
+        if due:
+            _puts_since_evict = 0
+    if due:
+        evict()
+
+
+def evict(ttl_days: Optional[int] = None, max_entries: Optional[int] = None) -> int:
+    """Drop expired entries, then trim to `max_entries` by least-recent hit."""
+    ttl = _TTL_DAYS if ttl_days is None else ttl_days
+    cap = _MAX_ENTRIES if max_entries is None else max_entries
+    removed = 0
+    try:
+        from ..db import db
+        with db() as (conn, cur):
+            cur.execute(
+                "DELETE FROM scoring_cache WHERE created_at <= NOW() - make_interval(days => %s)",
+                [ttl],
+            )
+            removed += cur.rowcount or 0
+            cur.execute(
+                """
+                DELETE FROM scoring_cache
+                WHERE cache_key IN (
+                    SELECT cache_key FROM scoring_cache
+                    ORDER BY last_hit_at DESC
+                    OFFSET %s
+                )
+                """,
+                [cap],
+            )
+            removed += cur.rowcount or 0
+    except Exception as e:
+        _bump("errors")
+        logger.warning(f"Score cache eviction failed: {e}")
+        return 0
+
+    _bump("evicted", removed)
+    return removed
+
+
+def clear() -> int:
+    """Delete every cache entry. Returns how many rows were removed."""
+    from ..db import db
+    with db() as (conn, cur):
+        cur.execute("DELETE FROM scoring_cache")
+        return cur.rowcount or 0
+
+
+def stats() -> dict:
+    """Process-local hit/miss counters plus table size."""
+    with _lock:
+        counters = dict(_counters)
+    lookups = counters["hits"] + counters["misses"]
+    entries = None
+    try:
+        from ..db import db
+        with db() as (conn, cur):
+            cur.execute("SELECT COUNT(*) AS count FROM scoring_cache")
+            entries = cur.fetchone()["count"]
+    except Exception:
+        pass
+    return {
+        "enabled": is_enabled(),
+        "ttl_days": _TTL_DAYS,
+        "max_entries": _MAX_ENTRIES,
+        "entries": entries,
+        **counters,
+        "hit_ratio": round(counters["hits"] / lookups, 3) if lookups else 0.0,
+    }
@@ -0,0 +1,304 @@
+"""
+Score Matrix — scores for several candidates against one job corpus.
+
+`jobs.score` only holds the active candidate's result, so serving a second
+profile used to mean switching candidates and re-scoring everything. The
+matrix keeps one `job_scores` row per (candidate, job) instead, and keeps
+the LLM bill close to that of a single profile:
+
+  1. every candidate is ranked against the corpus lexically — BM25 of each
+     description against the resume (prefilter.rank_many), one tokenizer
+     pass for all candidates together
+  2. only the SCORE_MATRIX_TOP_K best pairs per candidate (at or above
+     `min_prefilter_score`) are planned for the LLM
+  3. pairs already scored for the candidate's current resume are skipped;
+     a new resume version invalidates that candidate's scores
+
+`plan()` does steps 1-3 and records the ranking; the scoring route sends
+the planned pairs grouped by candidate (consecutive calls then share the
+provider's cached resume prefix) and hands results to `record()`, which
+writes through the same write-behind buffer mechanism as `jobs`.
+"""
+
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+from . import candidate_profile, fast_json, prefilter, write_behind
+from .candidate_profile import CandidateProfile
+
+logger = logging.getLogger(__name__)
+
+TOP_K = int(os.getenv("SCORE_MATRIX_TOP_K", "50"))
+_WRITE_PAGE_SIZE = 1000
+
+
+@dataclass
+class Pair:
+    candidate_id: int
+    job_id: int
+    prefilter_score: float
+    rank: int  # 1 = best lexical match for this candidate
+
+
+@dataclass
+class Plan:
+    profiles: dict[int, CandidateProfile]
+    to_score: list[Pair]  # grouped by candidate, best first
+    ranked: list[Pair] = field(default_factory=list)  # every top-K pair, scored before or not
+    corpus: int = 0
+
+    def summary(self) -> dict:
+        per_candidate = {}
+        for pair in self.ranked:
+            entry = per_candidate.setdefault(pair.candidate_id, {"ranked": 0, "to_score": 0})
+            entry["ranked"] += 1
+        for pair in self.to_score:
+            per_candidate[pair.candidate_id]["to_score"] += 1
+        return {
+            "candidates": [
+                {"candidate_id": cid, "name": profile.name, "resume_hash": profile.content_hash[:12],
+                 **per_candidate.get(cid, {"ranked": 0, "to_score": 0})}
+                for cid, profile in self.profiles.items()
+            ],
+            "corpus": self.corpus,
+            "pairs_ranked": len(self.ranked),
+            "pairs_to_score": len(self.to_score),
+            "pairs_reused": len(self.ranked) - len(self.to_score),
+        }
+
+
+def select_pairs(
+    rankings: dict[int, dict[int, float]],
+    top_k: int,
+    min_prefilter_score: Optional[float] = None,
+    scored: frozenset = frozenset(),
+) -> tuple[list[Pair], list[Pair]]:
+    """
+    The top-K pairs per candidate from `rankings` ({candidate_id: {job_id: score}}),
+    and the subset not in `scored` ({(candidate_id, job_id)}). Ties go to the newer job.
+    """
+    ranked, to_score = [], []
+    for candidate_id, scores in rankings.items():
+        best = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        if min_prefilter_score is not None:
+            best = [item for item in best if item[1] >= min_prefilter_score]
+        for rank, (job_id, score) in enumerate(best[:top_k], start=1):
+            pair = Pair(candidate_id, job_id, score, rank)
+            ranked.append(pair)
+            if (candidate_id, job_id) not in scored:
+                to_score.append(pair)
+    return ranked, to_score
+
+
+# ── Planning ─────────────────────────────────────────────────────────────
+
+def _load_corpus(status_filter: Optional[str], job_ids: Optional[list[int]]) -> list[tuple[int, str]]:
+    from ..db import db
+
+    conditions = ["job_description IS NOT NULL", "job_description <> ''"]
+    params: list = []
+    if status_filter:
+        conditions.append("LOWER(status) = LOWER(%s)")
+        params.append(status_filter)
+    if job_ids is not None:
+        conditions.append("id = ANY(%s)")
+        params.append(list(job_ids))
+    with db() as (conn, cur):
+        cur.execute(f"SELECT id, job_description FROM jobs WHERE {' AND '.join(conditions)}", params)
+        return [(row["id"], row["job_description"]) for row in cur.fetchall()]
+
+
+def _scored_pairs(profiles: dict[int, CandidateProfile]) -> frozenset:
+    """(candidate_id, job_id) pairs that already have a score for the candidate's current resume."""
+    from ..db import db
+
+    with db() as (conn, cur):
+        cur.execute(
+            "SELECT candidate_id, job_id, resume_hash FROM job_scores WHERE candidate_id = ANY(%s) AND score IS NOT NULL",
+            [list(profiles)],
+        )
+        rows = cur.fetchall()
+    return frozenset(
+        (row["candidate_id"], row["job_id"])
+        for row in rows
+        if row["resume_hash"] == profiles[row["candidate_id"]].content_hash
+    )
+
+
+def _write_ranking(pairs: list[Pair], profiles: dict[int, CandidateProfile]) -> None:
+    """Upsert the pre-rank of `pairs`; a row computed for an older resume loses its score."""
+    from psycopg2.extras import execute_values
+    from ..db import db
+
+    if not pairs:
+        return
+    with db() as (conn, cur):
+        execute_values(
+            cur,
+            """
+            INSERT INTO job_scores (candidate_id, job_id, resume_hash, prefilter_score, prefilter_rank)
+            VALUES %s
+            ON CONFLICT (candidate_id, job_id) DO UPDATE SET
+                prefilter_score = EXCLUDED.prefilter_score,
+                prefilter_rank = EXCLUDED.prefilter_rank,
+                ranked_at = NOW(),
+                score = CASE WHEN job_scores.resume_hash = EXCLUDED.resume_hash THEN job_scores.score END,
+                detailed_score = CASE WHEN job_scores.resume_hash = EXCLUDED.resume_hash THEN job_scores.detailed_score END,
+                status = CASE WHEN job_scores.resume_hash = EXCLUDED.resume_hash THEN job_scores.status ELSE 'ranked' END,
+                scored_at = CASE WHEN job_scores.resume_hash = EXCLUDED.resume_hash THEN job_scores.scored_at END,
+                resume_hash = EXCLUDED.resume_hash
+            """,
+            [
+                (p.candidate_id, p.job_id, profiles[p.candidate_id].content_hash, p.prefilter_score, p.rank)
+                for p in pairs
+            ],
+            template="(%s, %s, %s, %s::real, %s)",
+            page_size=_WRITE_PAGE_SIZE,
+        )
+
+
+def plan(
+    candidate_ids: Optional[list[int]] = None,
+    top_k: int = TOP_K,
+    min_prefilter_score: Optional[float] = None,
+    status_filter: Optional[str] = None,
+    job_ids: Optional[list[int]] = None,
+    force_rescore: bool = False,
+) -> Plan:
+    """Rank the corpus for each candidate (all candidates when `candidate_ids` is None) and pick what to score."""
+    profiles = {p.candidate_id: p for p in candidate_profile.load_many(candidate_ids)}
+    if not profiles:
+        return Plan(profiles={}, to_score=[])
+
+    corpus = _load_corpus(status_filter, job_ids)
+    rankings = prefilter.rank_many({cid: p.term_freqs.keys() for cid, p in profiles.items()}, corpus)
+    scored = frozenset() if force_rescore else _scored_pairs(profiles)
+    ranked, to_score = select_pairs(rankings, top_k, min_prefilter_score, scored)
+    _write_ranking(ranked, profiles)
+
+    logger.info(
+        f"Score matrix: {len(profiles)} candidates x {len(corpus)} jobs -> "
+        f"{len(ranked)} ranked pairs, {len(to_score)} to score"
+    )
+    return Plan(profiles=profiles, to_score=to_score, ranked=ranked, corpus=len(corpus))
+
+
+# ── Results ──────────────────────────────────────────────────────────────
+
+def _write_results(rows: list[tuple]) -> None:
+    """One upsert for many (candidate_id, job_id, resume_hash, score, status, detailed_score) rows."""
+    from psycopg2.extras import execute_values
+    from ..db import db
+
+    with db() as (conn, cur):
+        execute_values(
+            cur,
+            """
+            INSERT INTO job_scores (candidate_id, job_id, resume_hash, score, status, detailed_score, scored_at)
+            VALUES %s
+            ON CONFLICT (candidate_id, job_id) DO UPDATE SET
+                resume_hash = EXCLUDED.resume_hash,
+                score = EXCLUDED.score,
+                status = EXCLUDED.status,
+                detailed_score = EXCLUDED.detailed_score,
+                scored_at = NOW()
+            """,
+            rows,
+            template="(%s, %s, %s, %s::integer, %s::text, %s::jsonb, NOW())",
+            page_size=max(len(rows), 1),
+        )
+
+
+_write_back = write_behind.WriteBehindBuffer(_write_results, name="score matrix write-back")
+
+
+def record(profile: CandidateProfile, job_id: int, result: dict, qualification_threshold: int) -> None:
+    """Store `profile`'s score for `job_id`; call `flush()` before treating it as durable."""
+    overall_score = int(result.get("overall_score", 0))
+    status = "qualified" if overall_score >= qualification_threshold else "low_score"
+    row = (profile.candidate_id, job_id, profile.content_hash, overall_score, status, fast_json.dumps(result))
+    if write_behind.is_enabled():
+        _write_back.add((profile.candidate_id, job_id), row)
+    else:
+        _write_results([row])
+
+
+def flush() -> None:
+    try:
+        _write_back.flush()
+    except Exception as e:
+        logger.error(f"Score matrix: could not flush buffered scores: {e}")
+
+
+def close() -> None:
+    """Flush and stop the write-back timer (shutdown)."""
+    _write_back.close()
+
+
+def stats() -> dict:
+    return _write_back.stats()
+
+
+# ── Reads ────────────────────────────────────────────────────────────────
+
+def matrix(
+    candidate_ids: Optional[list[int]] = None,
+    limit: int = 20,
+    min_score: Optional[int] = None,
+) -> list[dict]:
+    """Each candidate's best jobs: LLM-scored pairs first (by score), then by lexical rank."""
+    from ..db import db
+
+    conditions = ["TRUE"]
+    params: list = []
+    if candidate_ids is not None:
+        conditions.append("s.candidate_id = ANY(%s)")
+        params.append(list(candidate_ids))
+    if min_score is not None:
+        conditions.append("s.score >= %s")
+        params.append(min_score)
+
+    with db() as (conn, cur):
+        cur.execute(
+            f"""
+            SELECT * FROM (
+                SELECT s.candidate_id, c.name AS candidate_name, s.job_id, j.job_title, j.company_name,
+                       s.score, s.status, s.prefilter_score, s.prefilter_rank, s.scored_at,
+                       s.detailed_score->>'overall_justification' AS justification,
+                       s.resume_hash = c.resume_hash AS current,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY s.candidate_id
+                           ORDER BY s.score DESC NULLS LAST, s.prefilter_rank ASC NULLS LAST, s.job_id DESC
+                       ) AS position
+                FROM job_scores s
+                JOIN candidates c ON c.id = s.candidate_id
+                JOIN jobs j ON j.id = s.job_id
+                WHERE {" AND ".join(conditions)}
+            ) ranked
+            WHERE position <= %s
+            ORDER BY candidate_id, position
+            """,
+            params + [limit],
+        )
+        rows = cur.fetchall()
+
+    out: dict[int, dict] = {}
+    for row in rows:
+        entry = out.setdefault(row["candidate_id"], {
+            "candidate_id": row["candidate_id"], "name": row["candidate_name"], "jobs": [],
+        })
+        entry["jobs"].append({
+            "job_id": row["job_id"],
+            "job_title": row["job_title"],
+            "company": row["company_name"],
+            "score": row["score"],
+            "status": row["status"],
+            "prefilter_score": row["prefilter_score"],
+            "prefilter_rank": row["prefilter_rank"],
+            "justification": row["justification"],
+            "current": row["current"],  # False: scored for an older resume version
+            "scored_at": str(row["scored_at"]) if row["scored_at"] else None,
+        })
+    return list(out.values())
@@ -0,0 +1,207 @@
+"""
+Scoring Pool — bounded-concurrency worker pool for batch scoring.
+
+Jobs are dispatched to workers sized per provider and progress events are
+yielded as soon as each worker reports back, so results arrive out of order.
+Provider rate limits and Groq key delays are still enforced inside the
+scoring callable.
+
+Every in-flight call is an asyncio task that can be cancelled
+(`iter_scored_async`). Blocking callers — the scheduler thread, the queue
+worker, batch transports — run the same coroutines on one shared
+background loop through `run_sync` / `iter_sync`, so there is a single
+scoring implementation.
+
+Worker counts resolve in this order:
+  1) explicit `concurrency` (e.g. ScoringRequest.concurrency)
+  2) SCORING_CONCURRENCY_<PROVIDER> env (e.g. SCORING_CONCURRENCY_GROQ=6)
+  3) built-in per-provider defaults below
+
+and are clamped to `max_concurrency()`: MAX_CONCURRENCY, or fewer when the
+process' database pool (DB_POOL_MAX) could not give every worker a connection.
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Coroutine, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_DEFAULT_PROVIDER_CONCURRENCY = {
+    "groq": 4,     # one in-flight call per key keeps the per-key delay meaningful
+    "openai": 8,
+    "gemini": 2,   # 15 RPM free tier — more workers only queue on the limiter
+}
+MAX_CONCURRENCY = 32
+_DB_HEADROOM = 4  # connections left for the API, scheduler and rate limiter
+
+
+@dataclass
+class PoolEvent:
+    """A progress event emitted by the pool: `scoring`, `scored`, `error` or `cancelled`."""
+
+    kind: str
+    job: dict
+    result: Optional[dict] = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0
+
+
+def max_concurrency() -> int:
+    """MAX_CONCURRENCY, capped to the database pool size minus headroom."""
+    from ..db import pool_size
+
+    return max(1, min(MAX_CONCURRENCY, pool_size() - _DB_HEADROOM))
+
+
+def get_provider_concurrency(provider: str, requested: Optional[int] = None) -> int:
+    """Resolve the worker count for a provider (clamped to 1..max_concurrency())."""
+    value: Optional[int] = requested
+    if not value:
+        raw = os.getenv(f"SCORING_CONCURRENCY_{provider.upper()}", "").strip()
+        if raw:
+            try:
+                value = int(raw)
+            except ValueError:
+                value = None
+    if not value:
+        value = _DEFAULT_PROVIDER_CONCURRENCY.get(provider, 1)
+    return max(1, min(max_concurrency(), int(value)))
+
+
+async def iter_scored_async(
+    jobs: Iterable[dict],
+    score_fn: Callable[[dict], Awaitable[dict]],
+    workers: int,
+    should_cancel: Callable[[], bool] = lambda: False,
+    inflight: Optional[set] = None,
+) -> AsyncIterator[PoolEvent]:
+    """
+    Score `jobs` with up to `workers` concurrent calls to `score_fn`.
+
+    Yields a `scoring` event when a worker picks a job up and a `scored` or
+    `error` event when it finishes; jobs still queued when `should_cancel()`
+    turns true are skipped. Results arrive out of order.
+
+    Each call to `score_fn` runs as its own task and is registered in
+    `inflight` while it runs, so a caller holding that set can cancel calls
+    mid-request (the job is then reported as a `cancelled` event). Closing
+    the iterator cancels all workers.
+    """
+    pending: "asyncio.Queue[dict]" = asyncio.Queue()
+    for job in jobs:
+        pending.put_nowait(job)
+    events: "asyncio.Queue[Optional[PoolEvent]]" = asyncio.Queue()
+    active = inflight if inflight is not None else set()
+
+    async def _worker() -> None:
+        try:
+            while not should_cancel():
+                try:
+                    job = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                events.put_nowait(PoolEvent(kind="scoring", job=job))
+                start = time.time()
+                task = asyncio.ensure_future(score_fn(job))
+                active.add(task)
+                try:
+                    result = await asyncio.shield(task)
+                except asyncio.CancelledError:
+                    if not task.cancelled():
+                        # The worker itself is being torn down — take the call with it
+                        task.cancel()
+                        raise
+                    events.put_nowait(PoolEvent(kind="cancelled", job=job, elapsed=round(time.time() - start, 2)))
+                except Exception as e:  # noqa: BLE001 — surfaced to the caller as an event
+                    events.put_nowait(PoolEvent(kind="error", job=job, error=e, elapsed=round(time.time() - start, 2)))
+                else:
+                    events.put_nowait(PoolEvent(kind="scored", job=job, result=result, elapsed=round(time.time() - start, 2)))
+                finally:
+                    active.discard(task)
+        finally:
+            events.put_nowait(None)
+
+    worker_count = max(1, min(workers, pending.qsize() or 1))
+    tasks = [asyncio.ensure_future(_worker()) for _ in range(worker_count)]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            event = await events.get()
+            if event is None:
+                remaining -= 1
+                continue
+            yield event
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# ── Blocking callers ─────────────────────────────────────────────────────
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+
+def _shared_loop() -> asyncio.AbstractEventLoop:
+    """The background event loop blocking callers submit to (started on first use)."""
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="scoring-loop", daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def run_sync(coro: Coroutine[object, object, T]) -> T:
+    """
+    Run `coro` on the shared scoring loop and block until it finishes.
+
+    The caller's context variables carry over, and async clients stay warm
+    across calls because they are always bound to the same loop.
+    """
+    loop = _shared_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run_sync() called from the scoring loop itself; await the coroutine instead")
+
+    done: "concurrent.futures.Future[T]" = concurrent.futures.Future()
+    context = contextvars.copy_context()
+
+    def _settle(task: asyncio.Task) -> None:
+        if task.cancelled():
+            done.cancel()
+        elif task.exception() is not None:
+            done.set_exception(task.exception())
+        else:
+            done.set_result(task.result())
+
+    def _start() -> None:
+        loop.create_task(coro, context=context).add_done_callback(_settle)
+
+    loop.call_soon_threadsafe(_start)
+    return done.result()
+
+
+def iter_sync(events: AsyncIterator[T]) -> Iterator[T]:
+    """Iterate an async generator from blocking code; closing the iterator closes the generator."""
+    async def _next() -> T:
+        return await events.__anext__()
+
+    try:
+        while True:
+            try:
+                item = run_sync(_next())
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        run_sync(events.aclose())
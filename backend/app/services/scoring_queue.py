@@ -0,0 +1,219 @@
+"""
+Scoring Queue — Postgres-backed job claiming with leases.
+
+Every process that scores jobs (API runs, the scheduler, `python -m
+app.worker`) claims them here first, so two processes never pay for the
+same job:
+
+  - workers pull queued rows with `SELECT … FOR UPDATE SKIP LOCKED`, so
+    concurrent workers never block on or double-claim a row
+  - a claim is a lease (`leased_by`, `lease_expires_at`); a worker that
+    crashes simply stops extending it and the row becomes claimable again
+    after the visibility timeout
+  - in-process runs claim the exact jobs they selected with `claim_jobs`,
+    which skips anything currently leased by someone else
+  - every claimer has its own owner token (`new_owner()`): each API run,
+    each scheduler batch and each worker process. Two claimers in one
+    process therefore never take over, extend, complete or release each
+    other's leases
+
+Finished rows are deleted; rows that keep failing are parked as `failed`
+after MAX_ATTEMPTS and re-queued by the next `enqueue`.
+"""
+
+import logging
+import os
+import socket
+import uuid
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = int(os.getenv("SCORING_LEASE_SECONDS", "300"))
+MAX_ATTEMPTS = int(os.getenv("SCORING_QUEUE_MAX_ATTEMPTS", "3"))
+
+
+def new_owner() -> str:
+    """A lease owner token for one claimer (host:pid plus a random suffix)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+WORKER_ID = new_owner()  # the `python -m app.worker` process's claimer
+
+
+def enqueue(job_ids: list[int], provider: str = "groq", force_rescore: bool = False, priority: Optional[list[float]] = None) -> int:
+    """Queue jobs for the workers. Jobs already queued or leased are left alone. Returns rows added."""
+    from psycopg2.extras import execute_values
+    from ..db import db
+
+    if not job_ids:
+        return 0
+    priorities = priority or [0.0] * len(job_ids)
+    with db() as (conn, cur):
+        rows = execute_values(
+            cur,
+            """
+            INSERT INTO scoring_queue (job_id, provider, force_rescore, priority) VALUES %s
+            ON CONFLICT (job_id) DO UPDATE
+                SET status = 'queued', attempts = 0, error = NULL, provider = EXCLUDED.provider,
+                    force_rescore = EXCLUDED.force_rescore, priority = EXCLUDED.priority, updated_at = NOW()
+                WHERE scoring_queue.status = 'failed'
+            RETURNING job_id
+            """,
+            [(job_id, provider, force_rescore, p) for job_id, p in zip(job_ids, priorities)],
+            fetch=True,
+        )
+    return len(rows)
+
+
+def claim(limit: int, owner: str, lease_seconds: int = LEASE_SECONDS) -> list[dict]:
+    """
+    Lease up to `limit` queued (or lease-expired) jobs for `owner`.
+    Returns job rows with the queue's `provider` and `force_rescore`.
+    """
+    from ..db import db
+
+    with db() as (conn, cur):
+        cur.execute(
+            """
+            WITH next AS (
+                SELECT job_id FROM scoring_queue
+                WHERE (status = 'queued' OR (status = 'leased' AND lease_expires_at < NOW()))
+                  AND attempts < %s
+                ORDER BY priority DESC, enqueued_at
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE scoring_queue q
+            SET status = 'leased', leased_by = %s, attempts = q.attempts + 1, updated_at = NOW(),
+                lease_expires_at = NOW() + make_interval(secs => %s)
+            FROM next
+            WHERE q.job_id = next.job_id
+            RETURNING q.job_id, q.provider, q.force_rescore, q.priority
+            """,
+            [MAX_ATTEMPTS, limit, owner, lease_seconds],
+        )
+        leased = {row["job_id"]: dict(row) for row in cur.fetchall()}
+        if not leased:
+            return []
+        cur.execute(
+            "SELECT id, job_title, company_name, job_description, score FROM jobs WHERE id = ANY(%s)",
+            [list(leased)],
+        )
+        jobs = [{**dict(row), **leased[row["id"]]} for row in cur.fetchall()]
+        missing = set(leased) - {job["id"] for job in jobs}
+        if missing:
+            cur.execute("DELETE FROM scoring_queue WHERE job_id = ANY(%s)", [list(missing)])
+    jobs.sort(key=lambda job: -job["priority"])
+    return jobs
+
+
+def claim_jobs(jobs: list[dict], owner: str, lease_seconds: int = LEASE_SECONDS) -> list[dict]:
+    """Lease exactly these jobs for an in-process run; drops any held by another claimer, in this process or not."""
+    from ..db import db
+
+    if not jobs:
+        return []
+    with db() as (conn, cur):
+        cur.execute(
+            """
+            INSERT INTO scoring_queue (job_id, status, leased_by, lease_expires_at, attempts)
+            SELECT id, 'leased', %s, NOW() + make_interval(secs => %s), 1 FROM unnest(%s::int[]) AS id
+            ON CONFLICT (job_id) DO UPDATE
+                SET status = 'leased', leased_by = EXCLUDED.leased_by,
+                    lease_expires_at = EXCLUDED.lease_expires_at,
+                    attempts = scoring_queue.attempts + 1, updated_at = NOW()
+                WHERE scoring_queue.status <> 'leased'
+                   OR scoring_queue.lease_expires_at < NOW()
+            RETURNING job_id
+            """,
+            [owner, lease_seconds, [job["id"] for job in jobs]],
+        )
+        claimed = {row["job_id"] for row in cur.fetchall()}
+    skipped = len(jobs) - len(claimed)
+    if skipped:
+        logger.info(f"Scoring queue: {skipped} job(s) are being scored by another claimer, skipping")
+    return [job for job in jobs if job["id"] in claimed]
+
+
+def extend(owner: str, lease_seconds: int = LEASE_SECONDS) -> int:
+    """Heartbeat: push back the expiry of every lease `owner` holds."""
+    from ..db import db
+
+    with db() as (conn, cur):
+        cur.execute(
+            """
+            UPDATE scoring_queue SET lease_expires_at = NOW() + make_interval(secs => %s), updated_at = NOW()
+            WHERE status = 'leased' AND leased_by = %s
+            """,
+            [lease_seconds, owner],
+        )
+        return cur.rowcount
+
+
+def complete(job_ids: list[int], owner: str) -> int:
+    """Drop finished jobs from the queue (only while `owner` still holds the lease)."""
+    from ..db import db
+
+    if not job_ids:
+        return 0
+    with db() as (conn, cur):
+        cur.execute(
+            "DELETE FROM scoring_queue WHERE job_id = ANY(%s) AND leased_by = %s",
+            [list(job_ids), owner],
+        )
+        return cur.rowcount
+
+
+def fail(job_id: int, error: str, owner: str) -> None:
+    """Return a failed job to the queue, or park it once it has used MAX_ATTEMPTS."""
+    from ..db import db
+
+    with db() as (conn, cur):
+        cur.execute(
+            """
+            UPDATE scoring_queue
+            SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'queued' END,
+                leased_by = NULL, lease_expires_at = NULL, error = %s, updated_at = NOW()
+            WHERE job_id = %s AND leased_by = %s
+            """,
+            [MAX_ATTEMPTS, error[:2000], job_id, owner],
+        )
+
+
+def release(owner: str) -> int:
+    """Give back every lease `owner` still holds (e.g. on shutdown); the unused attempt is refunded."""
+    from ..db import db
+
+    with db() as (conn, cur):
+        cur.execute(
+            """
+            UPDATE scoring_queue
+            SET status = 'queued', leased_by = NULL, lease_expires_at = NULL,
+                attempts = GREATEST(attempts - 1, 0), updated_at = NOW()
+            WHERE status = 'leased' AND leased_by = %s
+            """,
+            [owner],
+        )
+        return cur.rowcount
+
+
+def stats() -> dict:
+    from ..db import db
+
+    with db() as (conn, cur):
+        cur.execute(
+            """
+            SELECT
+                COUNT(*) FILTER (WHERE status = 'queued') AS queued,
+                COUNT(*) FILTER (WHERE status = 'leased' AND lease_expires_at >= NOW()) AS leased,
+                COUNT(*) FILTER (WHERE status = 'leased' AND lease_expires_at < NOW()) AS expired,
+                COUNT(*) FILTER (WHERE status = 'failed') AS failed,
+                COUNT(DISTINCT leased_by) FILTER (WHERE status = 'leased' AND lease_expires_at >= NOW()) AS workers
+            FROM scoring_queue
+            """
+        )
+        row = dict(cur.fetchone())
+    row["lease_seconds"] = LEASE_SECONDS
+    row["max_attempts"] = MAX_ATTEMPTS
+    return row
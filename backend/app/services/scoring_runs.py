@@ -0,0 +1,362 @@
+"""
+Scoring Runs — durable run state for /scoring/start.
+
+Each run stores its queue in `scoring_run_items` (one row per job, in
+dispatch order) and its counters in `scoring_runs`. Items move
+queued → running → scored | error | cancelled as pool events arrive; the
+scoring route buffers those updates and writes them with `record_many`,
+one transaction per flush.
+
+The process that creates (or resumes) a run is recorded as its `owner` and
+bumps the run's heartbeat from a timer every HEARTBEAT_SECONDS until the
+run finishes, however long a single provider call takes. A run whose owner
+died keeps status `running` with a stale heartbeat; it is reported (and can
+be resumed) as `interrupted`. Resuming re-queues every item that never
+finished and scores only those.
+"""
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from typing import Optional
+
+from . import fast_json
+
+logger = logging.getLogger(__name__)
+
+STALE_SECONDS = int(os.getenv("SCORING_RUN_STALE_SECONDS", "120"))
+HEARTBEAT_SECONDS = float(os.getenv("SCORING_RUN_HEARTBEAT_SECONDS", "15"))
+# host:pid plus a token, so a restarted container reusing the pid is a new owner
+OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+RESUMABLE_STATUSES = ("cancelled", "interrupted", "failed")
+_UNFINISHED_ITEMS = ("queued", "running", "cancelled")
+
+_RUN_COLUMNS = """
+    r.id, r.provider, r.params, r.total, r.scored, r.errors, r.tokens_used, r.error,
+    r.started_at, r.heartbeat_at, r.finished_at,
+    CASE WHEN r.status = 'running' AND r.heartbeat_at < NOW() - make_interval(secs => %s)
+         THEN 'interrupted' ELSE r.status END AS status
+"""
+
+
+def _serialize(row: dict) -> dict:
+    row = dict(row)
+    for col in ("started_at", "heartbeat_at", "finished_at"):
+        if row.get(col) is not None:
+            row[col] = row[col].isoformat()
+    return row
+
+
+# ── Heartbeat ────────────────────────────────────────────────────────────
+
+_heartbeats: dict[int, threading.Event] = {}
+_heartbeats_lock = threading.Lock()
+
+
+def _beat(run_id: int) -> bool:
+    """Bump the heartbeat of a run this process still owns. False once it lost the run."""
+    from ..db import db
+
+    with db() as (conn, cur):
+        cur.execute(
+            "UPDATE scoring_runs SET heartbeat_at = NOW() WHERE id = %s AND owner = %s AND status = 'running'",
+            [run_id, OWNER],
+        )
+        return cur.rowcount > 0
+
+
+def _start_heartbeat(run_id: int) -> None:
+    stop = threading.Event()
+    with _heartbeats_lock:
+        previous = _heartbeats.pop(run_id, None)
+        _heartbeats[run_id] = stop
+    if previous is not None:
+        previous.set()
+
+    def _loop() -> None:
+        while not stop.wait(HEARTBEAT_SECONDS):
+            try:
+                if not _beat(run_id):
+                    logger.warning(f"Scoring run {run_id} is no longer owned by this process; heartbeat stopped")
+                    return
+            except Exception as e:
+                logger.warning(f"Scoring run {run_id}: heartbeat failed: {e}")
+
+    threading.Thread(target=_loop, name=f"scoring-run-{run_id}-heartbeat", daemon=True).start()
+
+
+def _stop_heartbeat(run_id: int) -> None:
+    with _heartbeats_lock:
+        stop = _heartbeats.pop(run_id, None)
+    if stop is not None:
+        stop.set()
+
+
+def _owner_gone(owner: Optional[str]) -> bool:
+    """True when `owner` was a process on this host that no longer exists."""
+    host, _, rest = (owner or "").partition(":")
+    pid = rest.partition(":")[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        return False  # another host: only its heartbeat can tell
+    if int(pid) == os.getpid():
+        return owner != OWNER  # an earlier process that had our pid
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+# ── Runs ─────────────────────────────────────────────────────────────────
+
+def create(provider: str, params: dict, job_ids: list[int]) -> int:
+    """Record a new run owned by this process and its queue. Returns the run id."""
+    from psycopg2.extras import execute_values
+    from ..db import db
+
+    with db() as (conn, cur):
+        cur.execute(
+            "INSERT INTO scoring_runs (provider, params, total, owner) VALUES (%s, %s, %s, %s) RETURNING id",
+            [provider, fast_json.dumps(params), len(job_ids), OWNER],
+        )
+        run_id = cur.fetchone()["id"]
+        execute_values(
+            cur,
+            "INSERT INTO scoring_run_items (run_id, job_id, position) VALUES %s",
+            [(run_id, job_id, position) for position, job_id in enumerate(job_ids)],
+        )
+    _start_heartbeat(run_id)
+    return run_id
+
+
+def resume(run_id: int, retry_errors: bool = False) -> tuple[dict, list[int]]:
+    """
+    Reopen a stopped or crashed run under this process. Returns (run, job ids
+    still to score), in the original order. Raises ValueError if the run
+    can't be resumed.
+    """
+    from ..db import db
+
+    statuses = list(_UNFINISHED_ITEMS) + (["error"] if retry_errors else [])
+    with db() as (conn, cur):
+        cur.execute(f"SELECT {_RUN_COLUMNS} FROM scoring_runs r WHERE r.id = %s FOR UPDATE", [STALE_SECONDS, run_id])
+        run = cur.fetchone()
+        if run is None:
+            raise ValueError(f"Scoring run {run_id} not found")
+        if run["status"] not in RESUMABLE_STATUSES:
+            raise ValueError(f"Scoring run {run_id} is {run['status']} and cannot be resumed")
+
+        cur.execute(
+            """
+            UPDATE scoring_run_items SET status = 'queued', error = NULL, updated_at = NOW()
+            WHERE run_id = %s AND status = ANY(%s)
+            RETURNING job_id, position
+            """,
+            [run_id, statuses],
+        )
+        job_ids = [row["job_id"] for row in sorted(cur.fetchall(), key=lambda r: r["position"])]
+        cur.execute(
+            """
+            UPDATE scoring_runs
+            SET status = 'running', error = NULL, finished_at = NULL, heartbeat_at = NOW(), owner = %s,
+                errors = (SELECT COUNT(*) FROM scoring_run_items WHERE run_id = %s AND status = 'error')
+            WHERE id = %s
+            """,
+            [OWNER, run_id, run_id],
+        )
+    _start_heartbeat(run_id)
+    return _serialize(run), job_ids
+
+
+def item_row(
+    run_id: int,
+    job_id: int,
+    status: str,
+    score: Optional[int] = None,
+    latency_ms: Optional[int] = None,
+    tokens_used: int = 0,
+    error: Optional[str] = None,
+    started: bool = False,
+) -> tuple:
+    """
+    One item update for `record_many`. `started` marks a terminal outcome of
+    an item that was dispatched, so it counts as an attempt even when its
+    `running` row never reached the database (coalesced by a write-behind buffer).
+    """
+    return (run_id, job_id, status, score, latency_ms, tokens_used, error, started)
+
+
+def record_many(rows: list[tuple]) -> None:
+    """Store many `item_row`s in one transaction and roll them into the run counters."""
+    from psycopg2.extras import execute_values
+    from ..db import db
+
+    if not rows:
+        return
+    totals: dict[int, list[int]] = {}
+    for run_id, _job_id, status, _score, _latency, tokens_used, _error, _started in rows:
+        counters = totals.setdefault(run_id, [0, 0, 0])
+        counters[0] += int(status == "scored")
+        counters[1] += int(status == "error")
+        counters[2] += tokens_used or 0
+
+    with db() as (conn, cur):
+        execute_values(
+            cur,
+            """
+            UPDATE scoring_run_items AS i
+            SET status = v.status, score = v.score, latency_ms = v.latency_ms, tokens_used = v.tokens_used,
+                error = v.error, updated_at = NOW(),
+                attempts = i.attempts + CASE
+                    WHEN v.status = 'running' OR (v.started AND i.status <> 'running') THEN 1 ELSE 0 END
+            FROM (VALUES %s) AS v(run_id, job_id, status, score, latency_ms, tokens_used, error, started)
+            WHERE i.run_id = v.run_id AND i.job_id = v.job_id
+            """,
+            rows,
+            template="(%s::integer, %s::integer, %s::text, %s::integer, %s::integer, %s::integer, %s::text, %s::boolean)",
+            page_size=max(len(rows), 1),
+        )
+        execute_values(
+            cur,
+            """
+            UPDATE scoring_runs AS r
+            SET scored = r.scored + v.scored, errors = r.errors + v.errors,
+                tokens_used = r.tokens_used + v.tokens_used, heartbeat_at = NOW()
+            FROM (VALUES %s) AS v(id, scored, errors, tokens_used)
+            WHERE r.id = v.id
+            """,
+            [(run_id, *counters) for run_id, counters in totals.items()],
+            template="(%s::integer, %s::integer, %s::integer, %s::integer)",
+        )
+
+
+def mark_running(run_id: int, job_id: int) -> None:
+    record_many([item_row(run_id, job_id, "running")])
+
+
+def record(
+    run_id: int,
+    job_id: int,
+    status: str,
+    score: Optional[int] = None,
+    latency_ms: Optional[int] = None,
+    tokens_used: int = 0,
+    error: Optional[str] = None,
+) -> None:
+    """Store the outcome of one item and roll it into the run counters."""
+    record_many([item_row(run_id, job_id, status, score, latency_ms, tokens_used, error)])
+
+
+def finish(run_id: int, status: str, error: Optional[str] = None) -> None:
+    """Close a run. Items caught mid-flight go back to `queued` for a later resume."""
+    from ..db import db
+
+    _stop_heartbeat(run_id)
+    with db() as (conn, cur):
+        cur.execute(
+            "UPDATE scoring_run_items SET status = 'queued', updated_at = NOW() WHERE run_id = %s AND status = 'running'",
+            [run_id],
+        )
+        cur.execute(
+            "UPDATE scoring_runs SET status = %s, error = %s, finished_at = NOW(), heartbeat_at = NOW() WHERE id = %s",
+            [status, error, run_id],
+        )
+
+
+def recover_stale() -> int:
+    """
+    Mark runs whose owner is gone as interrupted: the owner stopped
+    heartbeating, or it was a process on this host that no longer exists.
+    Runs other live processes are working on are left alone. Returns how many.
+    """
+    from ..db import db
+
+    with db() as (conn, cur):
+        cur.execute(
+            """
+            SELECT id, owner, heartbeat_at < NOW() - make_interval(secs => %s) AS stale
+            FROM scoring_runs
+            WHERE status = 'running' AND owner IS DISTINCT FROM %s
+            """,
+            [STALE_SECONDS, OWNER],
+        )
+        gone = [row["id"] for row in cur.fetchall() if row["stale"] or _owner_gone(row["owner"])]
+        run_ids = []
+        if gone:
+            cur.execute(
+                """
+                UPDATE scoring_runs SET status = 'interrupted', finished_at = heartbeat_at
+                WHERE id = ANY(%s) AND status = 'running'
+                RETURNING id
+                """,
+                [gone],
+            )
+            run_ids = [row["id"] for row in cur.fetchall()]
+        if run_ids:
+            cur.execute(
+                "UPDATE scoring_run_items SET status = 'queued' WHERE run_id = ANY(%s) AND status = 'running'",
+                [run_ids],
+            )
+    if run_ids:
+        logger.info(f"Scoring runs {run_ids} were interrupted and can be resumed")
+    return len(run_ids)
+
+
+def _item_counts(cur, run_ids: list[int]) -> dict[int, dict[str, int]]:
+    cur.execute(
+        "SELECT run_id, status, COUNT(*) AS n FROM scoring_run_items WHERE run_id = ANY(%s) GROUP BY run_id, status",
+        [run_ids],
+    )
+    counts: dict[int, dict[str, int]] = {run_id: {} for run_id in run_ids}
+    for row in cur.fetchall():
+        counts[row["run_id"]][row["status"]] = row["n"]
+    return counts
+
+
+def list_runs(limit: int = 20) -> list[dict]:
+    """Most recent runs first, with per-status item counts."""
+    from ..db import db
+
+    with db() as (conn, cur):
+        cur.execute(f"SELECT {_RUN_COLUMNS} FROM scoring_runs r ORDER BY r.id DESC LIMIT %s", [STALE_SECONDS, limit])
+        runs = [_serialize(row) for row in cur.fetchall()]
+        counts = _item_counts(cur, [run["id"] for run in runs]) if runs else {}
+    for run in runs:
+        run["items"] = counts.get(run["id"], {})
+        run["resumable"] = run["status"] in RESUMABLE_STATUSES
+    return runs
+
+
+def latest() -> Optional[dict]:
+    runs = list_runs(1)
+    return runs[0] if runs else None
+
+
+def get(run_id: int, item_limit: int = 200) -> Optional[dict]:
+    """One run with its unfinished and failed items."""
+    from ..db import db
+
+    with db() as (conn, cur):
+        cur.execute(f"SELECT {_RUN_COLUMNS} FROM scoring_runs r WHERE r.id = %s", [STALE_SECONDS, run_id])
+        row = cur.fetchone()
+        if row is None:
+            return None
+        run = _serialize(row)
+        run["items"] = _item_counts(cur, [run_id])[run_id]
+        cur.execute(
+            """
+            SELECT job_id, status, score, latency_ms, tokens_used, attempts, error
+            FROM scoring_run_items
+            WHERE run_id = %s AND status <> 'scored'
+            ORDER BY position
+            LIMIT %s
+            """,
+            [run_id, item_limit],
+        )
+        run["pending_or_failed"] = [dict(r) for r in cur.fetchall()]
+    run["resumable"] = run["status"] in RESUMABLE_STATUSES
+    return run
@@ -0,0 +1,186 @@
+"""
+Settings Cache — `app_settings` held in process, invalidated by NOTIFY.
+
+API keys, the qualification threshold and the alert/scheduler toggles
+used to be read from `app_settings` on every call, i.e. several queries
+per scored job. The whole table (a few dozen rows) is now loaded once and
+served from memory:
+
+  - writers call `notify_changed(cur, key)` inside their transaction; the
+    NOTIFY on `app_settings_changed` is delivered at commit to every
+    process running `start_listener()` (API and worker), which drop their
+    copy and reload on next use. The writer also calls `invalidate()`
+    after committing, so its own process never needs the round-trip.
+  - if the listener isn't connected, the copy expires after
+    SETTINGS_CACHE_TTL_SECONDS (default 10), so edits from a process
+    without a listener — or a missed notification — still show up.
+    With the listener up, SETTINGS_CACHE_LISTEN_TTL_SECONDS (default 300)
+    is only a safety net.
+
+A failed load (DB down, table missing) keeps serving the last good copy,
+or nothing — callers then fall back to the environment as before.
+"""
+
+import logging
+import os
+import select
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "app_settings_changed"
+TTL_SECONDS = float(os.getenv("SETTINGS_CACHE_TTL_SECONDS", "10"))
+LISTEN_TTL_SECONDS = float(os.getenv("SETTINGS_CACHE_LISTEN_TTL_SECONDS", "300"))
+_RECONNECT_SECONDS = 5.0
+
+_lock = threading.Lock()
+_values: Optional[dict[str, str]] = None
+_loaded_at = 0.0
+_generation = 0  # bumped by every invalidation; a load that raced one is not kept
+_counters = {"hits": 0, "loads": 0, "load_errors": 0, "invalidations": 0, "notifications": 0}
+
+_listener: Optional[threading.Thread] = None
+_listening = threading.Event()
+_stop = threading.Event()
+
+
+def _ttl() -> float:
+    return LISTEN_TTL_SECONDS if _listening.is_set() else TTL_SECONDS
+
+
+def _load() -> dict[str, str]:
+    from ..db import db
+
+    with db() as (conn, cur):
+        cur.execute("SELECT key, value FROM app_settings")
+        return {row["key"]: row["value"] for row in cur.fetchall()}
+
+
+def snapshot() -> dict[str, str]:
+    """Every setting as stored (values are strings)."""
+    global _values, _loaded_at
+    with _lock:
+        if _values is not None and time.monotonic() - _loaded_at < _ttl():
+            _counters["hits"] += 1
+            return _values
+        generation = _generation
+        stale = _values
+
+    try:
+        values = _load()
+    except Exception as e:
+        logger.debug(f"Settings cache: load failed, using {'stale values' if stale else 'environment only'}: {e}")
+        values = stale if stale is not None else {}
+        with _lock:
+            _counters["load_errors"] += 1
+    else:
+        with _lock:
+            _counters["loads"] += 1
+
+    with _lock:
+        if generation == _generation:
+            _values, _loaded_at = values, time.monotonic()
+    return values
+
+
+def get(key: str) -> Optional[str]:
+    """The stored value of `key`, or None if it isn't set."""
+    return snapshot().get(key)
+
+
+def get_bool(key: str, default: bool) -> bool:
+    value = get(key)
+    if value is None:
+        return default
+    return value.lower() in ("true", "1", "yes")
+
+
+def qualification_threshold() -> int:
+    """Score at which a job counts as `qualified` — app_settings.score_threshold, else SCORE_THRESHOLD_DEFAULT."""
+    value = get("score_threshold")
+    try:
+        if value is not None:
+            return max(0, min(100, int(value)))
+    except ValueError:
+        pass
+    return max(0, min(100, int(os.getenv("SCORE_THRESHOLD_DEFAULT", "80"))))
+
+
+def invalidate() -> None:
+    global _values, _generation
+    with _lock:
+        _values = None
+        _generation += 1
+        _counters["invalidations"] += 1
+
+
+def notify_changed(cur, key: str = "") -> None:
+    """Tell every listening process that `key` changed (delivered when `cur`'s transaction commits)."""
+    cur.execute("SELECT pg_notify(%s, %s)", [CHANNEL, key])
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            **_counters,
+            "cached_keys": len(_values) if _values is not None else 0,
+            "age_seconds": round(time.monotonic() - _loaded_at, 1) if _values is not None else None,
+            "listening": _listening.is_set(),
+            "ttl_seconds": _ttl(),
+        }
+
+
+# ── Listener ─────────────────────────────────────────────────────────────
+
+def start_listener() -> None:
+    """LISTEN for setting changes on a dedicated connection (daemon thread, reconnects)."""
+    global _listener
+    if _listener is not None and _listener.is_alive():
+        return
+    _stop.clear()
+    _listener = threading.Thread(target=_listen_forever, name="settings-listener", daemon=True)
+    _listener.start()
+
+
+def stop_listener() -> None:
+    global _listener
+    _stop.set()
+    if _listener is not None:
+        _listener.join(timeout=5)
+    _listener = None
+
+
+def _listen_forever() -> None:
+    while not _stop.is_set():
+        try:
+            _listen_once()
+        except Exception as e:
+            logger.warning(f"Settings cache: listener disconnected, using {TTL_SECONDS:g}s TTL until it reconnects: {e}")
+        _listening.clear()
+        _stop.wait(_RECONNECT_SECONDS)
+
+
+def _listen_once() -> None:
+    import psycopg2
+    from ..db import DATABASE_URL
+
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+        invalidate()  # anything changed while we weren't listening
+        _listening.set()
+        while not _stop.is_set():
+            if select.select([conn], [], [], 1.0)[0]:
+                conn.poll()
+                if conn.notifies:
+                    with _lock:
+                        _counters["notifications"] += len(conn.notifies)
+                    conn.notifies.clear()
+                    invalidate()
+    finally:
+        _listening.clear()
+        conn.close()
@@ -0,0 +1,164 @@
+"""
+Stream JSON — pick complete fields out of a JSON object while it streams.
+
+LLM scoring responses are one JSON object of ~3000 tokens, but the fields a
+user looks at first (`overall_score`, `fit_assessment_label`, each entry of
+`sections`) are complete long before the closing brace. `IncrementalParser`
+scans each chunk once, tracking string/escape state and nesting depth, and
+reports:
+
+  - every top-level field as soon as its value is complete, and
+  - every element of selected top-level arrays as soon as it is complete,
+    before the array itself closes.
+
+Text before the first "{" (code fences, chatter) is skipped. A value that
+fails to parse is dropped silently — the full response is still parsed the
+normal way when the stream ends.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+
+@dataclass
+class Partial:
+    key: str
+    value: Any
+    index: Optional[int] = None  # set for array elements
+
+
+class IncrementalParser:
+    def __init__(self, stream_arrays: Iterable[str] = ()):
+        self._stream_arrays = set(stream_arrays)
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = "start"  # start -> key -> colon -> value -> after -> key ... -> end
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._array_key: Optional[str] = None  # top-level array whose elements are reported
+        self._item_start: Optional[int] = None
+        self._item_index = 0
+
+    @property
+    def done(self) -> bool:
+        """True once the top-level object has closed."""
+        return self._state == "end"
+
+    @property
+    def text(self) -> str:
+        return self._buf
+
+    def feed(self, chunk: str) -> list[Partial]:
+        """Consume the next chunk; returns the fields/elements it completed."""
+        self._buf += chunk
+        out: list[Partial] = []
+        buf = self._buf
+        for i in range(self._pos, len(buf)):
+            if self._state == "end":
+                break
+            c = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._string_closed(i, out)
+                continue
+
+            if self._state == "start":
+                if c == "{":
+                    self._depth, self._state = 1, "key"
+                continue
+            if c.isspace():
+                continue
+
+            depth = self._depth
+            if c == '"':
+                self._in_string = True
+                if depth == 1 and self._state == "key":
+                    self._key_start = i
+                else:
+                    self._value_started(i)
+            elif c in "{[":
+                self._value_started(i)
+                if depth == 1 and self._state == "value" and c == "[" and self._key in self._stream_arrays:
+                    self._array_key, self._item_index = self._key, 0
+                self._depth += 1
+            elif c in "}]":
+                self._scalar_ended(i, out)
+                self._depth -= 1
+                if self._depth == 0:
+                    self._state = "end"
+                elif self._depth == 1 and self._value_start is not None:
+                    self._emit_field(self._value_start, i + 1, out)
+                    self._array_key = None
+                elif self._depth == 2 and self._array_key and self._item_start is not None:
+                    self._emit_item(self._item_start, i + 1, out)
+            elif c == ":":
+                if depth == 1 and self._state == "colon":
+                    self._state, self._value_start = "value", None
+            elif c == ",":
+                self._scalar_ended(i, out)
+                if depth == 1:
+                    self._state = "key"
+            else:
+                self._value_started(i)
+        self._pos = len(buf)
+        return out
+
+    # ── helpers ──────────────────────────────────────────────────────
+
+    def _value_started(self, i: int) -> None:
+        if self._depth == 1 and self._state == "value" and self._value_start is None:
+            self._value_start = i
+        elif self._depth == 2 and self._array_key and self._item_start is None:
+            self._item_start = i
+
+    def _string_closed(self, i: int, out: list[Partial]) -> None:
+        if self._depth == 1:
+            if self._state == "key" and self._key_start is not None:
+                self._key = self._loads(self._key_start, i + 1)
+                self._key_start, self._state = None, "colon"
+            elif self._state == "value" and self._value_start is not None:
+                self._emit_field(self._value_start, i + 1, out)
+        elif self._depth == 2 and self._array_key and self._item_start is not None and self._buf[self._item_start] == '"':
+            self._emit_item(self._item_start, i + 1, out)
+
+    def _scalar_ended(self, i: int, out: list[Partial]) -> None:
+        """Numbers, true/false/null end at the next , } or ] of their own level."""
+        if self._depth == 1 and self._state == "value" and self._value_start is not None:
+            if self._buf[self._value_start] not in '{["':
+                self._emit_field(self._value_start, i, out)
+        elif self._depth == 2 and self._array_key and self._item_start is not None:
+            if self._buf[self._item_start] not in '{["':
+                self._emit_item(self._item_start, i, out)
+
+    def _emit_field(self, start: int, end: int, out: list[Partial]) -> None:
+        self._value_start, self._state = None, "after"
+        value = self._loads(start, end)
+        if value is not _INVALID and self._key is not None:
+            out.append(Partial(self._key, value))
+
+    def _emit_item(self, start: int, end: int, out: list[Partial]) -> None:
+        self._item_start = None
+        value = self._loads(start, end)
+        if value is not _INVALID:
+            out.append(Partial(self._array_key, value, index=self._item_index))
+        self._item_index += 1
+
+    def _loads(self, start: int, end: int):
+        try:
+            return json.loads(self._buf[start:end])
+        except ValueError:
+            return _INVALID
+
+
+_INVALID = object()
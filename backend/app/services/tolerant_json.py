@@ -0,0 +1,156 @@
+"""
+Tolerant JSON — parse LLM output that is almost JSON.
+
+Model responses arrive wrapped in code fences, followed by chatter, cut off
+at the output-token limit, or with trailing commas. `loads` handles all of
+these with one tokenizer pass over the structural characters (a regex jumps
+over string contents, so a 20 KB HTML value costs a handful of steps) and
+at most two `json.loads` calls:
+
+  1. the first complete top-level value is parsed on its own (anything
+     after it is ignored);
+  2. otherwise the text is repaired — trailing commas dropped, an
+     unterminated string value closed, a dangling key or partial scalar cut
+     back to the last complete value, open containers closed.
+
+`extract_fields` is the last resort for text that still isn't valid: it
+returns the top-level fields that were complete, skipping broken ones.
+"""
+
+import json
+import re
+from typing import Any, Optional
+
+from .stream_json import IncrementalParser
+
+_FENCE_START = re.compile(r"```[a-zA-Z]*")
+_STRUCTURE = re.compile(r'[\\"{}\[\],:]')
+_CLOSERS = {"{": "}", "[": "]"}
+_PARTIAL_ESCAPE = re.compile(r"\\(u[0-9a-fA-F]{0,3})?$")
+
+
+def strip_fences(text: str) -> str:
+    """Remove a leading ```lang fence and a trailing ``` fence."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text[_FENCE_START.match(text).end():].lstrip()
+    if text.endswith("```"):
+        text = text[:-3].rstrip()
+    return text
+
+
+def _is_json(text: str) -> bool:
+    try:
+        json.loads(text)
+    except ValueError:
+        return False
+    return True
+
+
+def _scan(text: str, start: int) -> tuple[str, int, list[str], list[int]]:
+    """
+    Walk the JSON value that opens at `start`. Returns (how, cut,
+    open_containers, trailing_commas) where `how` is:
+
+      "closed"  — the value closes at text[cut - 1]
+      "string"  — the text ends inside a string value (close it)
+      "cut"     — text[start:cut] ends on the last complete value
+    """
+    stack: list[str] = []
+    expect_key: list[bool] = []   # per container: the next string is an object key
+    drop: list[int] = []
+    in_string = False
+    skip_to = -1                  # a backslash escapes the next character
+    last = start                  # last structural character outside strings
+    cut, cut_stack = start, []
+
+    for m in _STRUCTURE.finditer(text, start):
+        i = m.start()
+        if i < skip_to:
+            continue
+        c = m.group()
+        if in_string:
+            if c == "\\":
+                skip_to = i + 2
+            elif c == '"':
+                in_string = False
+                last = i
+                if not expect_key[-1]:
+                    cut, cut_stack = i + 1, stack[:]
+            continue
+
+        if c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append(c)
+            expect_key.append(c == "{")
+            cut, cut_stack = i + 1, stack[:]
+        elif c in "}]":
+            j = i - 1
+            while j > start and text[j].isspace():
+                j -= 1
+            if text[j] == ",":
+                drop.append(j)
+            stack.pop()
+            expect_key.pop()
+            if not stack:
+                return "closed", i + 1, [], drop
+            cut, cut_stack = i + 1, stack[:]
+        elif c == ":":
+            expect_key[-1] = False
+        elif c == ",":
+            if text[last] in ":[,":  # a number/true/false/null just ended
+                cut, cut_stack = i, stack[:]
+            expect_key[-1] = stack[-1] == "{"
+        last = i
+
+    if in_string and not expect_key[-1]:
+        return "string", len(text), stack, drop
+    if not in_string and text[last] in ":[,":
+        tail = text[last + 1:].strip()
+        if tail and _is_json(tail):  # a scalar that was still being written: keep it
+            return "cut", len(text.rstrip()), stack, drop
+    return "cut", cut, cut_stack, drop
+
+
+def repair(text: str) -> Optional[str]:
+    """The first JSON object/array in `text`, made parseable where possible; None if there is none."""
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None
+    start = min(starts)
+    how, cut, open_containers, drop = _scan(text, start)
+    body = text[start:cut]
+    for pos in reversed(drop):
+        if pos < cut:
+            body = body[:pos - start] + body[pos - start + 1:]
+    if how == "string":
+        body = _PARTIAL_ESCAPE.sub("", body) + '"'
+    return body + "".join(_CLOSERS[c] for c in reversed(open_containers))
+
+
+def loads(text: str) -> Any:
+    """Parse `text` tolerantly; raises ValueError if no JSON value can be recovered."""
+    if not text or not text.strip():
+        raise ValueError("Empty response")
+    cleaned = strip_fences(text)
+    try:
+        return json.loads(cleaned)
+    except ValueError:
+        pass
+    repaired = repair(cleaned)
+    if repaired is None:
+        raise ValueError(f"No JSON found in: {cleaned[:300]}...")
+    try:
+        return json.loads(repaired)
+    except ValueError as e:
+        raise ValueError(f"Could not repair JSON ({e}): {cleaned[:300]}...") from None
+
+
+def extract_fields(text: str) -> dict:
+    """Top-level fields of an object that were complete, even if the rest is broken."""
+    text = strip_fences(text or "")
+    start = text.find("{")
+    if start < 0:
+        return {}
+    return {partial.key: partial.value for partial in IncrementalParser().feed(text[start:])}
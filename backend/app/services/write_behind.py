@@ -0,0 +1,218 @@
+"""
+Write-behind — batch scoring results into one UPDATE per flush.
+
+Writing every score as its own `UPDATE jobs … WHERE id = %s` costs a
+round-trip and a commit (fsync) per job, which is most of the DB time of a
+concurrent run. `WriteBehindBuffer` collects rows keyed by job id (a job
+scored twice keeps its latest result) and hands them to a writer in one
+call when either:
+
+  - SCORING_WRITE_BATCH rows are pending (the adding thread flushes), or
+  - the oldest pending row is SCORING_WRITE_FLUSH_MS old (a daemon thread
+    flushes).
+
+Callers that report progress as durable — closing a run, completing queue
+leases, shutting down — call `flush()` first; `close()` flushes and stops
+the timer thread. A failed batch is retried row by row so one bad row
+can't take the others with it. Rows that still fail go back into the buffer
+(unless a newer row for the same key arrived meanwhile) and are retried with
+a later flush; after SCORING_WRITE_ATTEMPTS failed writes a row is logged and
+dropped. `is_pending(key)` tells callers whether a row has been written yet.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("SCORING_WRITE_BATCH", "25"))
+FLUSH_MS = int(os.getenv("SCORING_WRITE_FLUSH_MS", "250"))
+MAX_ATTEMPTS = int(os.getenv("SCORING_WRITE_ATTEMPTS", "3"))
+_LATENCY_WINDOW = 200
+
+
+def is_enabled() -> bool:
+    return os.getenv("SCORING_WRITE_BEHIND", "true").lower() in ("true", "1", "yes")
+
+
+class WriteBehindBuffer:
+    def __init__(
+        self,
+        writer: Callable[[list[Any]], None],
+        batch_size: int = BATCH_SIZE,
+        flush_ms: int = FLUSH_MS,
+        name: str = "write-behind",
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        self._writer = writer
+        self._batch_size = max(1, batch_size)
+        self._flush_seconds = max(flush_ms, 1) / 1000
+        self._name = name
+        self._max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()  # one write at a time, so rows land in order
+        self._pending: dict[Hashable, Any] = {}
+        self._attempts: dict[Hashable, int] = {}  # failed writes of the row pending under a key
+        self._oldest: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._counters = {
+            "flushes": 0, "rows": 0, "max_flush_size": 0, "failed_rows": 0, "retried_flushes": 0,
+            "requeued_rows": 0, "dropped_rows": 0,
+        }
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_WINDOW)
+
+    def add(self, key: Hashable, row: Any) -> None:
+        with self._lock:
+            self._pending[key] = row
+            self._attempts.pop(key, None)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._pending) >= self._batch_size
+            if not full:
+                self._ensure_timer()
+                self._wake.notify()
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write every pending row now. Returns how many rows were written."""
+        with self._flush_lock:
+            with self._lock:
+                items = list(self._pending.items())
+                attempts = {key: self._attempts.pop(key) for key, _row in items if key in self._attempts}
+                self._pending.clear()
+                self._oldest = None
+            if not items:
+                return 0
+            started = time.perf_counter()
+            failed = self._write(items)
+            written = len(items) - len(failed)
+            if failed:
+                self._requeue(failed, attempts)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._counters["flushes"] += 1
+                self._counters["rows"] += written
+                self._counters["max_flush_size"] = max(self._counters["max_flush_size"], len(items))
+                self._latencies.append(elapsed)
+            return written
+
+    def close(self) -> int:
+        """Flush (retrying failed rows until written or dropped) and stop the timer thread; later adds start it again."""
+        with self._lock:
+            self._closed = True
+            self._wake.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+        written = 0
+        for _ in range(self._max_attempts):
+            written += self.flush()
+            if not self.pending():
+                break
+        with self._lock:
+            self._closed = False
+        return written
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def is_pending(self, key: Hashable) -> bool:
+        """True while a row for `key` is buffered (not written yet, or waiting for a retry)."""
+        with self._lock:
+            return key in self._pending
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            latencies = sorted(self._latencies)
+            pending = len(self._pending)
+        flushes = counters["flushes"]
+        return {
+            **counters,
+            "pending": pending,
+            "batch_size": self._batch_size,
+            "flush_ms": round(self._flush_seconds * 1000),
+            "avg_flush_size": round(counters["rows"] / flushes, 1) if flushes else 0.0,
+            "avg_flush_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "p95_flush_ms": round(latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)] * 1000, 2) if latencies else 0.0,
+        }
+
+    # ── internals ────────────────────────────────────────────────────
+
+    def _write(self, items: list[tuple]) -> list[tuple]:
+        """Write `items` ((key, row) pairs); returns the ones that could not be written."""
+        try:
+            self._writer([row for _key, row in items])
+            return []
+        except Exception as e:
+            if len(items) == 1:
+                self._fail(e)
+                return items
+            logger.warning(f"{self._name}: batched write of {len(items)} rows failed, retrying one by one: {e}")
+        with self._lock:
+            self._counters["retried_flushes"] += 1
+        failed = []
+        for key, row in items:
+            try:
+                self._writer([row])
+            except Exception as e:
+                self._fail(e)
+                failed.append((key, row))
+        return failed
+
+    def _fail(self, error: Exception) -> None:
+        logger.warning(f"{self._name}: could not write row: {error}")
+        with self._lock:
+            self._counters["failed_rows"] += 1
+
+    def _requeue(self, failed: list[tuple], attempts: dict) -> None:
+        """Put failed rows back for a later flush, unless superseded or out of attempts."""
+        with self._lock:
+            for key, row in failed:
+                if key in self._pending:
+                    continue  # a newer row for the key was added during the write
+                tries = attempts.get(key, 0) + 1
+                if tries >= self._max_attempts:
+                    logger.error(f"{self._name}: dropping row for {key!r} after {tries} failed writes")
+                    self._counters["dropped_rows"] += 1
+                    continue
+                self._pending[key] = row
+                self._attempts[key] = tries
+                self._counters["requeued_rows"] += 1
+            if self._pending:
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+                self._ensure_timer()
+                self._wake.notify()
+
+    def _ensure_timer(self) -> None:
+        """Called with the lock held."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                if self._oldest is None:
+                    self._wake.wait()
+                    continue
+                remaining = self._oldest + self._flush_seconds - time.monotonic()
+                if remaining > 0:
+                    self._wake.wait(remaining)
+                    continue
+            try:
+                self.flush()
+            except Exception as e:  # the writer's own failures are handled in _write
+                logger.error(f"{self._name}: flush failed: {e}")
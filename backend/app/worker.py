@@ -0,0 +1,148 @@
+"""
+Standalone scoring worker — runs the scoring engine outside the API process.
+
+    python -m app.worker [--claim 16] [--concurrency 4] [--jobs-per-request 1] [--once]
+
+Claims jobs from `scoring_queue` (filled by POST /api/scoring/queue or the
+scheduler in SCHEDULER_MODE=queue), scores and persists them, and keeps its
+leases alive while it works. Start as many workers as you like, on as many
+hosts as can reach the database: `SKIP LOCKED` claiming means each job is
+scored once, and a worker that dies gives its jobs back when its leases
+expire. SIGTERM/SIGINT stop claiming, finish in-flight calls and release the
+remaining leases.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import threading
+import time
+from itertools import groupby
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+
+from .services import scoring_queue, settings_cache  # noqa: E402
+from .services.scoring_queue import WORKER_ID  # noqa: E402
+
+logger = logging.getLogger("worker")
+
+_stop = threading.Event()
+
+
+def _handle_signal(signum, _frame) -> None:
+    logger.info(f"Worker: received signal {signum}, draining...")
+    _stop.set()
+
+
+def process(jobs: list[dict], concurrency: int, jobs_per_request: int) -> dict:
+    """Score one claimed set of jobs. Returns counters."""
+    from .routes.scoring import (
+        MAX_JOBS_PER_REQUEST, _flush_scores, _get_qualification_threshold, _written, iter_job_events,
+    )
+    from .services.scoring_pool import get_provider_concurrency
+
+    counts = {"scored": 0, "skipped": 0, "errors": 0}
+    # A manual run may have scored a job since it was queued
+    done = [job for job in jobs if job["score"] and not job["force_rescore"]]
+    done_ids = {job["id"] for job in done}
+    if done:
+        scoring_queue.complete([job["id"] for job in done], WORKER_ID)
+        counts["skipped"] = len(done)
+
+    threshold = _get_qualification_threshold()
+    jobs_per_request = min(max(jobs_per_request, 1), MAX_JOBS_PER_REQUEST)
+    pending = sorted((job for job in jobs if job["id"] not in done_ids), key=lambda job: (job["provider"], job["force_rescore"]))
+    for (provider, force_rescore), group in groupby(pending, key=lambda job: (job["provider"], job["force_rescore"])):
+        group = list(group)
+        requests = -(-len(group) // jobs_per_request)
+        lease_renewed = time.time()
+        scored = []  # leases are completed once the buffered scores are written
+        try:
+            for event in iter_job_events(
+                group,
+                provider,
+                threshold,
+                workers=min(requests, get_provider_concurrency(provider, concurrency)),
+                jobs_per_request=jobs_per_request,
+                force_rescore=force_rescore,
+                should_cancel=_stop.is_set,
+            ):
+                if time.time() - lease_renewed > scoring_queue.LEASE_SECONDS / 3:
+                    lease_renewed = time.time()
+                    scoring_queue.extend(WORKER_ID)
+                if event.kind == "scoring":
+                    continue
+                if event.kind == "scored":
+                    scored.append(event.job["id"])
+                    counts["scored"] += 1
+                else:
+                    scoring_queue.fail(event.job["id"], str(event.error or event.kind), WORKER_ID)
+                    counts["errors"] += 1
+        finally:
+            _flush_scores()
+            scored = _written(scored)  # a score still waiting for a retry keeps its lease until it expires
+            if scored:
+                scoring_queue.complete(scored, WORKER_ID)
+    return counts
+
+
+def run(claim: int, concurrency: int, jobs_per_request: int, poll_seconds: float, once: bool = False) -> None:
+    logger.info(f"Worker {WORKER_ID} started (claim={claim}, concurrency={concurrency})")
+    settings_cache.start_listener()
+    try:
+        while not _stop.is_set():
+            try:
+                jobs = scoring_queue.claim(claim, WORKER_ID)
+            except Exception as e:
+                logger.error(f"Worker: claiming jobs failed: {e}")
+                jobs = []
+            if not jobs:
+                if once:
+                    break
+                _stop.wait(poll_seconds)
+                continue
+
+            started = time.time()
+            try:
+                counts = process(jobs, concurrency, jobs_per_request)
+                logger.info(
+                    f"Worker: {counts['scored']} scored, {counts['errors']} errors, "
+                    f"{counts['skipped']} already scored in {time.time() - started:.1f}s"
+                )
+            except Exception as e:
+                logger.error(f"Worker: scoring claimed jobs failed: {e}")
+    finally:
+        try:
+            released = scoring_queue.release(WORKER_ID)
+            if released:
+                logger.info(f"Worker: released {released} unfinished lease(s)")
+        except Exception as e:
+            logger.warning(f"Worker: could not release leases (they expire in {scoring_queue.LEASE_SECONDS}s): {e}")
+        settings_cache.stop_listener()
+        from .db import close_pool
+        close_pool()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Score queued jobs outside the API process.")
+    parser.add_argument("--claim", type=int, default=int(os.getenv("SCORING_WORKER_CLAIM", "16")),
+                        help="jobs leased per round")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="parallel provider calls (default: per-provider)")
+    parser.add_argument("--jobs-per-request", type=int, default=int(os.getenv("SCORING_WORKER_JOBS_PER_REQUEST", "1")))
+    parser.add_argument("--poll", type=float, default=float(os.getenv("SCORING_WORKER_POLL_SECONDS", "5")),
+                        help="seconds to wait when the queue is empty")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGINT, _handle_signal)
+    run(args.claim, args.concurrency, args.jobs_per_request, args.poll, once=args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Fake LLM — a local OpenAI-compatible /chat/completions stand-in.
+
+    python -m benchmarks.fake_llm [--port 8099] [--latency lognormal:0.8,0.4] [--rate-limit-every 50 ...]
+
+Answers the scoring prompts with valid analyses (one per "### JOB REF:"
+block for batched prompts) and can misbehave on purpose:
+
+  - latency:     fixed:S | uniform:LO,HI | lognormal:MEDIAN,SIGMA |
+                 bimodal:FAST,SLOW,SLOW_SHARE — seconds before the response
+                 (or the first stream chunk)
+  - 429 bursts:  every `rate_limit_every` requests, the next
+                 `rate_limit_burst` get 429 with retry-after and
+                 x-ratelimit-* headers, like Groq/OpenAI
+  - truncation:  `truncate_rate` of responses are cut off mid-JSON with
+                 finish_reason "length"
+  - slow streams: `stream=True` responses arrive in `stream_chunk_chars`
+                 pieces, `stream_chunk_delay` seconds apart
+
+Used in-process by benchmarks.scoring_throughput; run it standalone to
+point a dev server at it (GROQ_BASE_URL / OPENAI_BASE_URL=http://127.0.0.1:PORT/v1).
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+_REF_RE = re.compile(r"^### JOB REF: (\S+)", re.MULTILINE)
+_TITLE_RE = re.compile(r"^Title: (.*)$", re.MULTILINE)
+_LABELS = [(85, "Strong Fit"), (70, "Good Fit"), (50, "Partial Fit"), (0, "Weak Fit")]
+_SECTIONS = ("Leadership", "Delivery", "Technical Depth", "Domain", "Stakeholders")
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """A sampler for "fixed:S", "uniform:LO,HI", "lognormal:MEDIAN,SIGMA" or "bimodal:FAST,SLOW,SHARE"."""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == "bimodal" and len(values) == 3:
+        return lambda rng: values[1] if rng.random() < values[2] else values[0]
+    raise ValueError(f"Unknown latency spec: {spec!r}")
+
+
+@dataclass
+class Scenario:
+    latency: str = "lognormal:0.8,0.4"
+    rate_limit_every: int = 0     # 0 = never
+    rate_limit_burst: int = 3
+    rate_limit_reset: float = 1.0
+    truncate_rate: float = 0.0
+    stream_chunk_chars: int = 40
+    stream_chunk_delay: float = 0.0
+    seed: int = 7
+
+
+def analysis(title: str, seed_text: str) -> dict:
+    """A plausible scoring result, deterministic per job."""
+    digest = int(hashlib.sha256(seed_text.encode("utf-8")).hexdigest()[:8], 16)
+    score = 35 + digest % 61
+    label = next(name for floor, name in _LABELS if score >= floor)
+    return {
+        "overall_score": score,
+        "fit_assessment_label": label,
+        "overall_justification": f"{label} for {title}: delivery leadership and cloud programme experience match the core of the role.",
+        "sections": [
+            {"name": name, "score": max(0, min(100, score + (digest >> (i * 3)) % 21 - 10)),
+             "evidence": f"Resume shows {name.lower()} experience relevant to the posting."}
+            for i, name in enumerate(_SECTIONS)
+        ],
+        "skills_matched": ["Program Management", "Cloud Migration", "Stakeholder Management"],
+        "skills_missing": ["SAFe certification"] if score < 80 else [],
+        "gap_analysis": {"critical": [], "minor": ["Industry domain depth"]},
+        "interview_probability": "High" if score >= 80 else "Medium" if score >= 60 else "Low",
+        "key_risks": ["Seniority mismatch"] if score < 60 else [],
+    }
+
+
+def response_text(prompt: str) -> str:
+    refs = _REF_RE.findall(prompt)
+    if not refs:
+        title = (_TITLE_RE.search(prompt) or [None, "the role"])[1]
+        return json.dumps(analysis(title, prompt))
+    blocks = _REF_RE.split(prompt)[1:]  # [ref, block, ref, block, ...]
+    results = []
+    for ref, block in zip(blocks[::2], blocks[1::2]):
+        title = (_TITLE_RE.search(block) or [None, "the role"])[1]
+        results.append({**analysis(title, block), "job_ref": ref})
+    return json.dumps({"results": results})
+
+
+class FakeLLMServer:
+    def __init__(self, scenario: Optional[Scenario] = None, host: str = "127.0.0.1", port: int = 0):
+        self.scenario = scenario or Scenario()
+        self._latency = parse_latency(self.scenario.latency)
+        self._rng = random.Random(self.scenario.seed)
+        self._lock = threading.Lock()
+        self._burst_left = 0
+        self.counters = {"requests": 0, "rate_limited": 0, "truncated": 0, "streams": 0}
+        self._httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_exc):
+        self.stop()
+        return False
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.counters = dict.fromkeys(self.counters, 0)
+
+    def plan(self) -> tuple[bool, float, bool]:
+        """(rate limited, latency, truncated) for the next request."""
+        s = self.scenario
+        with self._lock:
+            self.counters["requests"] += 1
+            if s.rate_limit_every and self.counters["requests"] % s.rate_limit_every == 0:
+                self._burst_left = s.rate_limit_burst
+            if self._burst_left > 0:
+                self._burst_left -= 1
+                self.counters["rate_limited"] += 1
+                return True, 0.0, False
+            latency = max(0.0, self._latency(self._rng))
+            truncated = self._rng.random() < s.truncate_rate
+            if truncated:
+                self.counters["truncated"] += 1
+            return False, latency, truncated
+
+    def cut_point(self, length: int) -> int:
+        with self._lock:
+            return int(length * self._rng.uniform(0.3, 0.9))
+
+
+def _handler(server: FakeLLMServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *_args):  # keep benchmark output clean
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            if not self.path.endswith("/chat/completions"):
+                return self._json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+            limited, latency, truncated = server.plan()
+            if limited:
+                reset = server.scenario.rate_limit_reset
+                return self._json(429, {"error": {
+                    "message": "Rate limit reached for requests. Please try again in 1s.",
+                    "type": "requests", "code": "rate_limit_exceeded",
+                }}, {
+                    "retry-after": f"{reset:g}",
+                    "x-ratelimit-limit-requests": "1000",
+                    "x-ratelimit-remaining-requests": "0",
+                    "x-ratelimit-reset-requests": f"{reset:g}s",
+                })
+
+            messages = body.get("messages") or [{}]
+            prompt = messages[-1].get("content") or ""
+            text = response_text(prompt)
+            if truncated:
+                text = text[:server.cut_point(len(text))]
+            finish = "length" if truncated else "stop"
+            usage = {
+                "prompt_tokens": sum(len(m.get("content") or "") for m in messages) // 4,
+                "completion_tokens": len(text) // 4,
+            }
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            time.sleep(latency)
+            if body.get("stream"):
+                return self._stream(body, text, finish, usage)
+            self._json(200, {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": finish}],
+                "usage": usage,
+            }, _ok_headers())
+
+        def _json(self, status: int, payload: dict, headers: Optional[dict] = None):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, body: dict, text: str, finish: str, usage: dict):
+            with server._lock:
+                server.counters["streams"] += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            for name, value in _ok_headers().items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.close_connection = True
+
+            def chunk(delta: dict, finish_reason=None, **extra):
+                payload = {
+                    "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+                    **extra,
+                }
+                self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            step = max(1, server.scenario.stream_chunk_chars)
+            try:
+                for i in range(0, len(text), step):
+                    if i:
+                        time.sleep(server.scenario.stream_chunk_delay)
+                    chunk({"content": text[i:i + step]})
+                chunk({}, finish)
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    chunk(None, usage=usage)
+                self.wfile.write(b"data: [DONE]\n\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client cancelled the stream
+
+    return Handler
+
+
+def _ok_headers() -> dict:
+    return {
+        "x-ratelimit-limit-requests": "1000",
+        "x-ratelimit-remaining-requests": "999",
+        "x-ratelimit-reset-requests": "60ms",
+        "x-ratelimit-limit-tokens": "1000000",
+        "x-ratelimit-remaining-tokens": "990000",
+        "x-ratelimit-reset-tokens": "6ms",
+    }
+
+
+def add_scenario_args(parser: argparse.ArgumentParser) -> None:
+    defaults = Scenario()
+    parser.add_argument("--latency", default=defaults.latency, help="fixed:S | uniform:LO,HI | lognormal:MEDIAN,SIGMA | bimodal:FAST,SLOW,SHARE")
+    parser.add_argument("--rate-limit-every", type=int, default=defaults.rate_limit_every, help="start a 429 burst every N requests (0 = off)")
+    parser.add_argument("--rate-limit-burst", type=int, default=defaults.rate_limit_burst)
+    parser.add_argument("--rate-limit-reset", type=float, default=defaults.rate_limit_reset)
+    parser.add_argument("--truncate-rate", type=float, default=defaults.truncate_rate, help="share of responses cut off mid-JSON")
+    parser.add_argument("--stream-chunk-chars", type=int, default=defaults.stream_chunk_chars)
+    parser.add_argument("--stream-chunk-delay", type=float, default=defaults.stream_chunk_delay, help="seconds between stream chunks")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def scenario_from_args(args: argparse.Namespace) -> Scenario:
+    return Scenario(
+        latency=args.latency,
+        rate_limit_every=args.rate_limit_every,
+        rate_limit_burst=args.rate_limit_burst,
+        rate_limit_reset=args.rate_limit_reset,
+        truncate_rate=args.truncate_rate,
+        stream_chunk_chars=args.stream_chunk_chars,
+        stream_chunk_delay=args.stream_chunk_delay,
+        seed=args.seed,
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in for scoring benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    add_scenario_args(parser)
+    args = parser.parse_args(argv)
+
+    server = FakeLLMServer(scenario_from_args(args), args.host, args.port)
+    print(f"Fake LLM listening on {server.url} ({args.latency}); Ctrl+C to stop")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+        print(f"Served: {server.counters}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark: GET /api/jobs?limit=200 before and after the fast JSON layer.
+
+    python -m benchmarks.jobs_listing [--requests 200] [--description-kb 6]
+
+Serves 200 synthetic rows (full descriptions, timestamps, numerics) from an
+in-memory cursor through the real `jobs` router and measures requests per
+second end to end with TestClient:
+
+  before — stdlib JSONResponse as the app default and the route returning a
+           dict, so FastAPI runs jsonable_encoder + json.dumps (the old path)
+  after  — FastJSONResponse returned by the route (orjson, no encoder walk)
+
+It also times serialization alone, without the HTTP stack.
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.routes import jobs
+from app.services import fast_json
+
+_WORDS = "delivery leadership cloud migration stakeholders agile budget vendor governance roadmap".split()
+
+
+def make_rows(count: int, description_kb: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    text = " ".join(_WORDS[i % len(_WORDS)] for i in range(description_kb * 1024 // 9))
+    return [
+        {
+            "id": i, "job_id": f"li-{4000000 + i}", "job_title": f"Senior Program Manager {i}",
+            "company_name": f"Company {i % 37}", "location": "São Paulo, Brazil", "work_type": "Remote",
+            "employment_type": "Full-time", "seniority_level": "Director", "salary_info": None,
+            "score": 60 + i % 40, "status": "qualified", "justification": "Strong delivery fit. " * 4,
+            "job_url": f"https://www.linkedin.com/jobs/view/{4000000 + i}", "apply_url": None,
+            "job_description": f"Role {i}: {text}", "custom_resume_url": None,
+            "posted_date": now - timedelta(days=i % 30), "time_posted": "2 days ago", "sector": "IT Services",
+            "num_applicants": Decimal(i % 200), "created_at": now - timedelta(days=i % 60),
+            "updated_at": now, "version": 3,
+        }
+        for i in range(count)
+    ]
+
+
+class _Cursor:
+    def __init__(self, rows):
+        self._rows, self._last = rows, ""
+
+    def execute(self, query, _params=None):
+        self._last = query
+
+    def fetchone(self):
+        return {"count": len(self._rows)}
+
+    def fetchall(self):
+        return self._rows
+
+
+class _DB:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        return None, _Cursor(self._rows)
+
+    def __exit__(self, *_exc):
+        return False
+
+
+def _client(default_response_class) -> TestClient:
+    app = FastAPI(default_response_class=default_response_class)
+    app.include_router(jobs.router, prefix="/api")
+    return TestClient(app)
+
+
+def _rps(client: TestClient, requests: int) -> tuple[float, int]:
+    size = len(client.get("/api/jobs?limit=200").content)  # warm up
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get("/api/jobs?limit=200")
+    return requests / (time.perf_counter() - started), size
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark /jobs?limit=200 serialization.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--description-kb", type=int, default=6)
+    args = parser.parse_args(argv)
+
+    rows = make_rows(200, args.description_kb)
+    original_db, original_response = jobs.db, jobs.FastJSONResponse
+    jobs.db = _DB(rows)
+    try:
+        jobs.FastJSONResponse = lambda content: content  # route returns a dict, as before
+        before_rps, before_size = _rps(_client(JSONResponse), args.requests)
+        jobs.FastJSONResponse = original_response
+        after_rps, after_size = _rps(_client(fast_json.FastJSONResponse), args.requests)
+    finally:
+        jobs.db, jobs.FastJSONResponse = original_db, original_response
+
+    payload = {"data": [jobs._serialize_job(r) for r in rows], "total": 200, "page": 1, "limit": 200, "has_more": False}
+    n = max(20, args.requests // 4)
+    started = time.perf_counter()
+    for _ in range(n):
+        JSONResponse(jsonable_encoder(payload))
+    before_ms = (time.perf_counter() - started) / n * 1000
+    started = time.perf_counter()
+    for _ in range(n):
+        fast_json.FastJSONResponse(payload)
+    after_ms = (time.perf_counter() - started) / n * 1000
+
+    backend = "orjson" if fast_json.orjson else "stdlib fallback"
+    print(f"GET /api/jobs?limit=200 — 200 rows, ~{args.description_kb} KB descriptions, serializer: {backend}")
+    print(f"{'':10} {'req/s':>8} {'body KB':>8} {'serialize ms':>13}")
+    print(f"{'before':10} {before_rps:8.1f} {before_size / 1024:8.0f} {before_ms:13.2f}")
+    print(f"{'after':10} {after_rps:8.1f} {after_size / 1024:8.0f} {after_ms:13.2f}")
+    print(f"speed-up: {after_rps / before_rps:.1f}x end to end, {before_ms / after_ms:.1f}x serialization")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Benchmark: tolerant JSON parsing of model output.
+
+    python -m benchmarks.json_parsing [--repeat 200]
+
+Runs the parsers over the corpus in tests/fixtures/llm_outputs (clean,
+fenced, truncated and malformed scoring / batch / CV-enhancement
+responses) and prints, per file, what the pre-tolerant_json regex cascade
+and the current parser recover and how long each takes. The legacy
+implementations below are frozen copies kept for this comparison (and for
+tests/test_tolerant_json.py); nothing in the app uses them.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from typing import Optional
+
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "llm_outputs")
+
+
+def corpus() -> dict[str, str]:
+    out = {}
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        with open(os.path.join(CORPUS_DIR, name), encoding="utf-8") as f:
+            out[name] = f.read()
+    return out
+
+
+# ── Legacy parsers (as of the regex cascade) ──────────────────────────────
+
+def legacy_extract_json_robust(text: str) -> dict:
+    """scoring._extract_json_robust before tolerant_json."""
+    if not text:
+        return {"overall_score": 0, "overall_justification": "No response received from AI"}
+    cleaned = text.strip()
+    cleaned = re.sub(r'^```json\s*', '', cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(r'^```\s*', '', cleaned)
+    cleaned = re.sub(r'\s*```$', '', cleaned)
+    cleaned = cleaned.strip()
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        pass
+    json_match = re.search(r'\{[\s\S]*\}', cleaned)
+    if json_match:
+        try:
+            return json.loads(json_match.group())
+        except json.JSONDecodeError:
+            pass
+    fixed = cleaned
+    open_brackets = fixed.count('[') - fixed.count(']')
+    open_braces = fixed.count('{') - fixed.count('}')
+    if open_brackets > 0:
+        fixed += ']' * open_brackets
+    if open_braces > 0:
+        fixed += '}' * open_braces
+    try:
+        return json.loads(fixed)
+    except json.JSONDecodeError:
+        pass
+    result = {}
+    score_m = re.search(r'"overall_score"\s*:\s*(\d+)', cleaned) or re.search(r'"score"\s*:\s*(\d+)', cleaned)
+    if score_m:
+        result["overall_score"] = int(score_m.group(1))
+    just_m = (
+        re.search(r'"overall_justification"\s*:\s*"([^"]*(?:\\"[^"]*)*)"', cleaned)
+        or re.search(r'"executive_summary"\s*:\s*"([^"]*(?:\\"[^"]*)*)"', cleaned)
+        or re.search(r'"justification"\s*:\s*"([^"]*(?:\\"[^"]*)*)"', cleaned)
+    )
+    if just_m:
+        result["overall_justification"] = just_m.group(1).replace('\\"', '"')
+    if result:
+        return result
+    raise ValueError(f"Could not parse JSON from AI response: {cleaned[:300]}...")
+
+
+def legacy_extract_cv_payload(text: str) -> Optional[dict]:
+    """cv._extract_json_robust_cv before tolerant_json, minus normalisation (None = HTML fallback)."""
+    if not text or not text.strip():
+        raise ValueError("Empty Gemini response")
+    cleaned = text.strip()
+    cleaned = re.sub(r"^```json\s*", "", cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(r"^```[a-zA-Z]*\s*", "", cleaned)
+    cleaned = re.sub(r"\s*```$", "", cleaned)
+    cleaned = cleaned.strip()
+    try:
+        payload = json.loads(cleaned)
+        if isinstance(payload, dict):
+            return payload
+    except Exception:
+        pass
+    m = re.search(r"\{[\s\S]*\}", cleaned)
+    if m:
+        candidate = m.group(0)
+        try:
+            payload = json.loads(candidate)
+            if isinstance(payload, dict):
+                return payload
+        except Exception:
+            fixed = candidate
+            open_brackets = fixed.count("[") - fixed.count("]")
+            open_braces = fixed.count("{") - fixed.count("}")
+            if open_brackets > 0:
+                fixed += "]" * open_brackets
+            if open_braces > 0:
+                fixed += "}" * open_braces
+            try:
+                payload = json.loads(fixed)
+                if isinstance(payload, dict):
+                    return payload
+            except Exception:
+                pass
+    if "<h1" in cleaned.lower() or ("<p" in cleaned.lower() and "<" in cleaned and ">" in cleaned):
+        return None
+    raise ValueError("Gemini returned invalid JSON and no HTML fallback could be extracted.")
+
+
+def legacy_extract_enhanced_cv(text: str) -> Optional[str]:
+    """cv._extract_enhanced_cv_from_json_like_text before tolerant_json."""
+    if not isinstance(text, str):
+        return None
+    stripped = text.strip()
+    if not stripped:
+        return None
+    try:
+        payload = json.loads(stripped)
+        if isinstance(payload, dict):
+            cv = payload.get("enhanced_cv")
+            if isinstance(cv, str) and cv.strip():
+                return cv.strip()
+    except Exception:
+        pass
+    key_match = re.search(r'"enhanced_cv"\s*:\s*"', stripped)
+    if not key_match:
+        return None
+    raw_chars: list[str] = []
+    escaped = False
+    idx = key_match.end()
+    while idx < len(stripped):
+        ch = stripped[idx]
+        if escaped:
+            raw_chars.append(ch)
+            escaped = False
+            idx += 1
+            continue
+        if ch == "\\":
+            raw_chars.append(ch)
+            escaped = True
+            idx += 1
+            continue
+        if ch == '"':
+            break
+        raw_chars.append(ch)
+        idx += 1
+    raw = "".join(raw_chars).strip()
+    if not raw:
+        return None
+    try:
+        return json.loads(f'"{raw}"').strip()
+    except Exception:
+        return (
+            raw.replace('\\"', '"').replace("\\n", "\n").replace("\\r", "\n")
+            .replace("\\t", "\t").replace("\\/", "/").replace("\\\\", "\\").strip()
+        )
+
+
+# ── Current parser, same entry points ─────────────────────────────────────
+
+def current_extract_json_robust(text: str) -> dict:
+    from app.routes.scoring import _extract_json_robust
+    return _extract_json_robust(text)
+
+
+def current_extract_enhanced_cv(text: str) -> Optional[str]:
+    from app.routes.cv import _extract_enhanced_cv_from_json_like_text
+    return _extract_enhanced_cv_from_json_like_text(text)
+
+
+def _attempt(fn, text):
+    try:
+        return fn(text)
+    except ValueError:
+        return None
+
+
+def _time(fn, text: str, repeat: int) -> float:
+    _attempt(fn, text)  # warm up (imports, regex compilation)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        _attempt(fn, text)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def _recovered(result) -> int:
+    """How much a parser got back: scalar leaves of a parsed payload, or characters of a string."""
+    if isinstance(result, dict):
+        return sum(_recovered(v) if isinstance(v, (dict, list)) else 1 for v in result.values())
+    if isinstance(result, list):
+        return sum(_recovered(v) if isinstance(v, (dict, list)) else 1 for v in result)
+    if isinstance(result, str):
+        return len(result)
+    return 0
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    pairs = [
+        ("json", legacy_extract_json_robust, current_extract_json_robust),
+        ("cv", legacy_extract_enhanced_cv, current_extract_enhanced_cv),
+    ]
+    print(f"{'file':36} {'parser':5} {'bytes':>6} {'legacy got':>10} {'new got':>8} {'legacy µs':>10} {'new µs':>8}")
+    totals = {"legacy": 0.0, "new": 0.0}
+    for name, text in corpus().items():
+        for label, legacy, current in pairs:
+            if label == "cv" and not name.startswith("cv_"):
+                continue
+            old_us, new_us = _time(legacy, text, args.repeat), _time(current, text, args.repeat)
+            totals["legacy"] += old_us
+            totals["new"] += new_us
+            print(
+                f"{name:36} {label:5} {len(text):6d} {_recovered(_attempt(legacy, text)):10d} "
+                f"{_recovered(_attempt(current, text)):8d} {old_us:10.1f} {new_us:8.1f}"
+            )
+    print(f"{'total':36} {'':5} {'':6} {'':10} {'':8} {totals['legacy']:10.1f} {totals['new']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+Benchmark: scoring run throughput against a local fake LLM.
+
+    python -m benchmarks.scoring_throughput --database-url postgresql://USER:PW@127.0.0.1:5432/DB \\
+        [--jobs 200] [--concurrency 1,4,8,16] [--provider groq] [--jobs-per-request 1] \\
+        [--streams 0] [fake LLM options, see benchmarks.fake_llm]
+
+Starts benchmarks.fake_llm in-process, points the Groq/OpenAI clients at
+it, and drives `_scoring_generator_async` (the /scoring/start stream) over
+a synthetic jobs table once per concurrency setting. No provider quota is
+used.
+
+The database must be a disposable Postgres (the docker-compose.postgres.yml
+service is fine): everything happens in its own `scoring_bench` schema —
+backend/init.sql plus backend/migrations, seeded with --jobs synthetic
+pending postings — which is dropped at the end unless --keep-schema.
+Between settings the jobs are reset to unscored.
+
+The in-app request limiter is lifted to the fake server's capacity (use
+--keep-limits to measure with the real per-minute buckets); the scoring
+cache is off so every job reaches the "provider". Per setting it reports:
+
+  jobs/min        scored jobs per minute of wall time
+  p50/p95 s       per-job latency (dispatch to result, from the scored events)
+  DB s / ms/job   time spent holding a pooled connection, summed over threads
+  truncated       responses the fake server cut off mid-JSON
+  fallbacks       responses the JSON repair couldn't fix (field-level extraction used)
+  parse fail      responses nothing could be parsed from
+  errors          jobs that ended in an error event
+  429s            rate-limit responses the fake server sent
+
+--streams N additionally scores N jobs through /scoring/single/stream and
+reports time to first partial and to the final result.
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import threading
+import time
+from pathlib import Path
+
+from .fake_llm import FakeLLMServer, add_scenario_args, scenario_from_args
+
+SCHEMA = "scoring_bench"
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+_WORDS = (
+    "programme delivery cloud migration stakeholder governance budget vendor agile roadmap "
+    "portfolio transformation data platform risk compliance insurance banking leadership"
+).split()
+_RESUME = (
+    "Senior delivery director with 18 years leading cloud migration and data platform programmes "
+    "for banking and insurance clients; P&L ownership, vendor governance, agile at scale."
+)
+
+
+def _configure_env(args: argparse.Namespace, server_url: str) -> None:
+    """Environment the app reads at import/call time — must run before `app` is imported."""
+    from psycopg2.extensions import make_dsn
+
+    os.environ["DATABASE_URL"] = make_dsn(args.database_url, options=f"-c search_path={SCHEMA}")
+    os.environ["GROQ_API_KEYS"] = ",".join(f"bench-groq-{i}" for i in range(args.groq_keys))
+    os.environ["GROQ_BASE_URL"] = server_url
+    os.environ["OPENAI_API_KEY"] = "bench-openai"
+    os.environ["OPENAI_BASE_URL"] = server_url
+    os.environ["RATE_LIMIT_STORE"] = "memory"
+    os.environ["SCORING_CACHE_ENABLED"] = "false"
+
+
+# ── Schema and data ───────────────────────────────────────────────────────
+
+def _create_schema(database_url: str, jobs: int) -> None:
+    import psycopg2
+    from psycopg2.extras import execute_values
+
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            cur.execute(f"CREATE SCHEMA {SCHEMA}")
+            cur.execute(f"SET search_path TO {SCHEMA}")
+            for path in [BACKEND_DIR / "init.sql", *sorted((BACKEND_DIR / "migrations").glob("*.sql"))]:
+                cur.execute(path.read_text(encoding="utf-8"))
+            execute_values(
+                cur,
+                "INSERT INTO jobs (job_id, job_title, company_name, job_description, status) VALUES %s",
+                [_synthetic_job(i) for i in range(jobs)],
+            )
+            cur.execute(
+                "INSERT INTO candidates (name, resume_text, is_active) VALUES ('Benchmark', %s, TRUE)",
+                [_RESUME],
+            )
+    finally:
+        conn.close()
+
+
+def _synthetic_job(i: int) -> tuple:
+    # Distinct text per job so duplicate detection never reuses a score
+    words = " ".join(_WORDS[(i * 7 + k * 3) % len(_WORDS)] for k in range(400))
+    return (
+        f"bench-{i}",
+        f"Delivery Director {i}",
+        f"Company {i % 53}",
+        f"Posting {i}. Requirements: {words}. Reference {i * 7919}.",
+        "pending",
+    )
+
+
+def _reset_jobs() -> None:
+    from app.db import db
+
+    with db() as (conn, cur):
+        cur.execute(
+            "UPDATE jobs SET score = NULL, justification = NULL, detailed_score = NULL, "
+            "status = 'pending', scored_at = NULL"
+        )
+        cur.execute("DELETE FROM scoring_queue")
+        cur.execute("DELETE FROM scoring_runs")
+
+
+def _drop_schema(database_url: str) -> None:
+    import psycopg2
+
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    finally:
+        conn.close()
+
+
+# ── Instrumentation ───────────────────────────────────────────────────────
+
+class _Meter:
+    """DB time and parse outcomes, collected by wrapping the app's own functions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.db_seconds = 0.0
+        self.db_uses = 0
+        self.fallbacks = 0
+        self.parse_failures = 0
+
+    def add_db(self, seconds: float) -> None:
+        with self._lock:
+            self.db_seconds += seconds
+            self.db_uses += 1
+
+    def bump(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+def _instrument(meter: _Meter) -> None:
+    from app import db as db_module
+    from app.routes import scoring
+    from app.services import tolerant_json
+
+    enter, exit_ = db_module.DBConnection.__enter__, db_module.DBConnection.__exit__
+
+    def timed_enter(self):
+        self._bench_started = time.perf_counter()
+        return enter(self)
+
+    def timed_exit(self, *exc):
+        try:
+            return exit_(self, *exc)
+        finally:
+            meter.add_db(time.perf_counter() - self._bench_started)
+
+    db_module.DBConnection.__enter__, db_module.DBConnection.__exit__ = timed_enter, timed_exit
+
+    loads, extract = tolerant_json.loads, scoring._extract_json_robust
+
+    def counted_loads(text):
+        try:
+            return loads(text)
+        except ValueError:
+            meter.bump("fallbacks")
+            raise
+
+    def counted_extract(text):
+        try:
+            return extract(text)
+        except ValueError:
+            meter.bump("parse_failures")
+            raise
+
+    tolerant_json.loads = counted_loads
+    scoring._extract_json_robust = counted_extract
+
+
+def _lift_limits() -> None:
+    from app.services import rate_limiter
+
+    for provider in rate_limiter.LIMITS:
+        rate_limiter.LIMITS[provider] = {window: 10 ** 9 for window in rate_limiter.LIMITS[provider]}
+
+
+# ── Runs ──────────────────────────────────────────────────────────────────
+
+def _quantile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))]
+
+
+def _events(frames: list[str]) -> list[tuple[str, dict]]:
+    from app.services import fast_json
+
+    out = []
+    for frame in frames:
+        head, _, data = frame.partition("\ndata: ")
+        out.append((head.removeprefix("event: "), fast_json.loads(data)))
+    return out
+
+
+def _generator_kwargs(args: argparse.Namespace, concurrency: int) -> dict:
+    return {
+        "batch_size": args.jobs,
+        "status_filter": "pending",
+        "sort_by": "id",
+        "provider": args.provider,
+        "concurrency": concurrency,
+        "force_rescore": True,
+        "jobs_per_request": args.jobs_per_request,
+    }
+
+
+def _run_once(args: argparse.Namespace, concurrency: int) -> tuple[list[tuple[str, dict]], float]:
+    from app.routes import scoring
+
+    kwargs = _generator_kwargs(args, concurrency)
+    started = time.perf_counter()
+
+    async def consume():
+        return [frame async for frame in scoring._scoring_generator_async(**kwargs)]
+
+    frames = asyncio.run(consume())
+    return _events(frames), time.perf_counter() - started
+
+
+def _stream_once(args: argparse.Namespace) -> list[tuple[float, float]]:
+    """(first partial ms, total ms) for --streams jobs scored through the streaming endpoint."""
+    from app.routes import scoring
+
+    jobs = scoring._load_jobs(list(range(1, args.streams + 1)))
+
+    async def consume():
+        timings = []
+        for job in jobs:
+            body = scoring.SingleScoreRequest(job_db_id=job["id"], model=args.provider, force_rescore=True)
+            frames = [frame async for frame in scoring._single_stream_generator(body, job)]
+            for kind, data in _events(frames):
+                if kind == "done":
+                    timings.append((data["result"].get("first_partial_ms") or 0, data["elapsed_ms"]))
+        return timings
+
+    return asyncio.run(consume())
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Scoring throughput against a local fake LLM.")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="disposable Postgres (default: $BENCH_DATABASE_URL)")
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,4,8,16", help="comma-separated settings to compare")
+    parser.add_argument("--provider", choices=("groq", "openai"), default="groq")
+    parser.add_argument("--groq-keys", type=int, default=4)
+    parser.add_argument("--jobs-per-request", type=int, default=1)
+    parser.add_argument("--streams", type=int, default=0, help="also score N jobs through the streaming endpoint")
+    parser.add_argument("--keep-limits", action="store_true", help="keep the real request-limiter buckets")
+    parser.add_argument("--keep-schema", action="store_true")
+    add_scenario_args(parser)
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("--database-url (or BENCH_DATABASE_URL) is required; use a disposable database")
+    settings = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    server = FakeLLMServer(scenario_from_args(args)).start()
+    _configure_env(args, server.url)
+    _create_schema(args.database_url, args.jobs)
+    meter = _Meter()
+    try:
+        from app.services import write_behind
+
+        _instrument(meter)
+        if not args.keep_limits:
+            _lift_limits()
+
+        print(
+            f"{args.jobs} jobs via {args.provider} ({args.jobs_per_request} job(s)/request), "
+            f"fake LLM {args.latency}, 429 every {args.rate_limit_every or '-'}, truncate {args.truncate_rate:.0%}, "
+            f"write-behind {'on' if write_behind.is_enabled() else 'off'}"
+        )
+        print(f"{'conc':>4} {'jobs/min':>9} {'p50 s':>7} {'p95 s':>7} {'DB s':>7} {'ms/job':>7} "
+              f"{'truncated':>9} {'fallbacks':>9} {'parse fail':>10} {'errors':>6} {'429s':>5}")
+        for concurrency in settings:
+            _reset_jobs()
+            meter.reset()
+            server.reset_counters()
+            events, elapsed = _run_once(args, concurrency)
+            scored = [data for kind, data in events if kind == "scored"]
+            errors = sum(1 for kind, _data in events if kind == "error")
+            latencies = [data["elapsed_seconds"] for data in scored if data.get("elapsed_seconds") is not None]
+            print(
+                f"{concurrency:4d} {len(scored) / elapsed * 60:9.1f} {_quantile(latencies, 0.5):7.2f} "
+                f"{_quantile(latencies, 0.95):7.2f} {meter.db_seconds:7.2f} "
+                f"{meter.db_seconds / max(len(scored), 1) * 1000:7.1f} {server.counters['truncated']:9d} {meter.fallbacks:9d} "
+                f"{meter.parse_failures:10d} {errors:6d} {server.counters['rate_limited']:5d}"
+            )
+
+        if args.streams:
+            server.reset_counters()
+            timings = _stream_once(args)
+            first = [t[0] for t in timings]
+            total = [t[1] for t in timings]
+            print(
+                f"streaming: {len(timings)}/{args.streams} jobs, first partial p50 {_quantile(first, 0.5):.0f} ms "
+                f"p95 {_quantile(first, 0.95):.0f} ms, result p50 {_quantile(total, 0.5):.0f} ms "
+                f"p95 {_quantile(total, 0.95):.0f} ms ({args.stream_chunk_chars} chars / {args.stream_chunk_delay}s chunks)"
+            )
+    finally:
+        server.stop()
+        from app.db import close_pool
+        close_pool()
+        if not args.keep_schema:
+            _drop_schema(args.database_url)
+
+
+if __name__ == "__main__":
+    main()
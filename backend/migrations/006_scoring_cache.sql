@@ -0,0 +1,19 @@
+-- Migration 006: Content-addressed cache for LLM scoring results
+-- Key = sha256(normalized title + company + description, resume hash,
+--              system prompt version, provider, model)
+-- Lets reposts / multi-location copies of a posting reuse a prior analysis.
+
+CREATE TABLE IF NOT EXISTS scoring_cache (
+    cache_key       TEXT PRIMARY KEY,
+    provider        TEXT NOT NULL,
+    model           TEXT NOT NULL,
+    prompt_version  TEXT NOT NULL,
+    result          JSONB NOT NULL,
+    hit_count       INTEGER NOT NULL DEFAULT 0,
+    created_at      TIMESTAMP NOT NULL DEFAULT now(),
+    last_hit_at     TIMESTAMP NOT NULL DEFAULT now()
+);
+
+-- LRU eviction scans by recency; TTL eviction by age
+CREATE INDEX IF NOT EXISTS idx_scoring_cache_last_hit ON scoring_cache(last_hit_at);
+CREATE INDEX IF NOT EXISTS idx_scoring_cache_created ON scoring_cache(created_at);
@@ -0,0 +1,9 @@
+-- Migration 007: MinHash signatures for near-duplicate job detection
+-- One 64 x uint32 MinHash signature (256 bytes) per job description.
+-- The LSH band index is rebuilt in memory from this table by the backend.
+
+CREATE TABLE IF NOT EXISTS job_signatures (
+    job_id      INTEGER PRIMARY KEY REFERENCES jobs(id) ON DELETE CASCADE,
+    signature   BYTEA NOT NULL,
+    updated_at  TIMESTAMP NOT NULL DEFAULT now()
+);
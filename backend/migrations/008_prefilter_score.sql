@@ -0,0 +1,8 @@
+-- Migration 008: Lexical pre-ranking score (BM25 against the active resume)
+-- Filled by app/services/prefilter.py before LLM scoring so batch runs can
+-- score the most relevant jobs first and skip plainly irrelevant ones.
+
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS prefilter_score REAL;
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS prefilter_resume_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_jobs_prefilter_score ON jobs(prefilter_score DESC NULLS LAST);
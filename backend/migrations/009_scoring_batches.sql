@@ -0,0 +1,23 @@
+-- Migration 009: Offline bulk scoring through provider batch APIs
+-- One row per submitted batch; jobs listed in an open batch are not
+-- resubmitted until the batch is ingested or fails.
+
+CREATE TABLE IF NOT EXISTS scoring_batches (
+    id               SERIAL PRIMARY KEY,
+    provider         TEXT NOT NULL,
+    model            TEXT NOT NULL,
+    transport        TEXT NOT NULL,
+    remote_batch_id  TEXT,
+    input_file_id    TEXT,
+    output_file_id   TEXT,
+    status           TEXT NOT NULL DEFAULT 'submitted',  -- submitted | ingested | failed | expired | cancelled
+    job_ids          INTEGER[] NOT NULL,
+    request_count    INTEGER NOT NULL DEFAULT 0,
+    scored_count     INTEGER NOT NULL DEFAULT 0,
+    error_count      INTEGER NOT NULL DEFAULT 0,
+    error            TEXT,
+    created_at       TIMESTAMP NOT NULL DEFAULT now(),
+    completed_at     TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_scoring_batches_status ON scoring_batches(status);
@@ -0,0 +1,37 @@
+-- Migration 010: Durable scoring runs
+-- Every /scoring/start run records its queue here so progress survives a
+-- restart, failures stay inspectable and a stopped or crashed run can be
+-- resumed from the items that never finished.
+
+CREATE TABLE IF NOT EXISTS scoring_runs (
+    id            SERIAL PRIMARY KEY,
+    status        TEXT NOT NULL DEFAULT 'running',  -- running | completed | cancelled | interrupted | failed
+    provider      TEXT NOT NULL,
+    params        JSONB NOT NULL DEFAULT '{}'::jsonb,
+    total         INTEGER NOT NULL DEFAULT 0,
+    scored        INTEGER NOT NULL DEFAULT 0,
+    errors        INTEGER NOT NULL DEFAULT 0,
+    tokens_used   INTEGER NOT NULL DEFAULT 0,
+    error         TEXT,
+    started_at    TIMESTAMP NOT NULL DEFAULT now(),
+    heartbeat_at  TIMESTAMP NOT NULL DEFAULT now(),
+    finished_at   TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS scoring_run_items (
+    run_id       INTEGER NOT NULL REFERENCES scoring_runs(id) ON DELETE CASCADE,
+    job_id       INTEGER NOT NULL,
+    position     INTEGER NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'queued',  -- queued | running | scored | error | cancelled | skipped
+    score        INTEGER,
+    latency_ms   INTEGER,
+    tokens_used  INTEGER NOT NULL DEFAULT 0,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    error        TEXT,
+    updated_at   TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (run_id, job_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_scoring_runs_status ON scoring_runs(status);
+CREATE INDEX IF NOT EXISTS idx_scoring_run_items_pending ON scoring_run_items(run_id, position)
+    WHERE status IN ('queued', 'running', 'cancelled');
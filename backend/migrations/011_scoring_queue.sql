@@ -0,0 +1,21 @@
+-- Migration 011: Leased scoring queue shared by API runs, the scheduler and
+-- standalone workers (python -m app.worker). A job is scored only by the
+-- process holding its lease; expired leases are reclaimed.
+
+CREATE TABLE IF NOT EXISTS scoring_queue (
+    job_id            INTEGER PRIMARY KEY REFERENCES jobs(id) ON DELETE CASCADE,
+    provider          TEXT NOT NULL DEFAULT 'groq',
+    force_rescore     BOOLEAN NOT NULL DEFAULT FALSE,
+    priority          REAL NOT NULL DEFAULT 0,
+    status            TEXT NOT NULL DEFAULT 'queued',  -- queued | leased | failed
+    attempts          INTEGER NOT NULL DEFAULT 0,
+    leased_by         TEXT,
+    lease_expires_at  TIMESTAMP,
+    error             TEXT,
+    enqueued_at       TIMESTAMP NOT NULL DEFAULT now(),
+    updated_at        TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_scoring_queue_claim ON scoring_queue(priority DESC, enqueued_at)
+    WHERE status IN ('queued', 'leased');
+CREATE INDEX IF NOT EXISTS idx_scoring_queue_owner ON scoring_queue(leased_by) WHERE status = 'leased';
@@ -0,0 +1,12 @@
+-- Migration 012: Shared provider rate-limit buckets
+-- Token buckets (tokens left + last refill, epoch seconds) used by
+-- app/services/rate_limiter.py so every process draws from one budget and
+-- the day window survives restarts.
+
+CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+    provider     TEXT NOT NULL,
+    time_window  TEXT NOT NULL,  -- minute | hour | day
+    tokens       DOUBLE PRECISION NOT NULL,
+    updated_at   DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (provider, time_window)
+);
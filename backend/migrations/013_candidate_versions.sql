@@ -0,0 +1,33 @@
+-- Migration 013: Content hash and version for candidate resumes
+-- app/services/candidate_profile.py re-checks (id, version) of the current
+-- candidate instead of re-reading resume_text, and rebuilds its derived data
+-- only when the version moved. The trigger keeps both columns right for any
+-- writer, including manual edits.
+
+ALTER TABLE candidates ADD COLUMN IF NOT EXISTS resume_hash TEXT;
+ALTER TABLE candidates ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+UPDATE candidates
+SET resume_hash = encode(sha256(convert_to(COALESCE(resume_text, ''), 'UTF8')), 'hex')
+WHERE resume_hash IS NULL;
+
+CREATE OR REPLACE FUNCTION candidates_resume_version() RETURNS trigger AS $$
+BEGIN
+    NEW.resume_hash := encode(sha256(convert_to(COALESCE(NEW.resume_text, ''), 'UTF8')), 'hex');
+    IF TG_OP = 'UPDATE' THEN
+        IF NEW.resume_hash IS DISTINCT FROM OLD.resume_hash THEN
+            NEW.version := OLD.version + 1;
+        ELSE
+            NEW.version := OLD.version;
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_candidates_resume_version ON candidates;
+CREATE TRIGGER trg_candidates_resume_version
+    BEFORE INSERT OR UPDATE ON candidates
+    FOR EACH ROW EXECUTE FUNCTION candidates_resume_version();
+
+CREATE INDEX IF NOT EXISTS idx_candidates_active ON candidates(is_active) WHERE is_active;
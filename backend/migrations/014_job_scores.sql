@@ -0,0 +1,23 @@
+-- Migration 014: Per-candidate job scores (candidate x job matrix)
+-- jobs.score / jobs.detailed_score hold the active candidate's result only.
+-- app/services/score_matrix.py keeps one row per candidate and job here:
+-- the lexical pre-rank for every pair it considered, and the LLM result for
+-- the top-K pairs per candidate it actually sent. `resume_hash` is the
+-- resume the row was computed for; a new resume version resets the score.
+
+CREATE TABLE IF NOT EXISTS job_scores (
+    candidate_id     INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+    job_id           INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    resume_hash      TEXT NOT NULL,
+    prefilter_score  REAL,
+    prefilter_rank   INTEGER,
+    score            INTEGER,
+    status           TEXT NOT NULL DEFAULT 'ranked',  -- ranked | qualified | low_score
+    detailed_score   JSONB,
+    ranked_at        TIMESTAMP DEFAULT now(),
+    scored_at        TIMESTAMP,
+    PRIMARY KEY (candidate_id, job_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_scores_candidate_score ON job_scores(candidate_id, score DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_job_scores_job_id ON job_scores(job_id);
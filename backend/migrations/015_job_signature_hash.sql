@@ -0,0 +1,10 @@
+-- Migration 015: Track which description each job signature was computed from
+-- app/services/dedup_index.py compares `description_hash` with the job's
+-- current description and recomputes the signature when they differ. Rows
+-- from before this migration have no hash and are recomputed on next use.
+-- The updated_at index serves the incremental reload of the in-memory LSH
+-- index (rows changed since the last high-water mark).
+
+ALTER TABLE job_signatures ADD COLUMN IF NOT EXISTS description_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_job_signatures_updated_at ON job_signatures(updated_at);
@@ -0,0 +1,7 @@
+-- Migration 016: Owner of a scoring run
+-- `owner` identifies the process running it (host:pid:token, see
+-- app/services/scoring_runs.py). That process bumps heartbeat_at from a
+-- timer, so a stale heartbeat means the owner is gone; on startup a process
+-- also recovers runs whose owner was a dead process on the same host.
+
+ALTER TABLE scoring_runs ADD COLUMN IF NOT EXISTS owner TEXT;
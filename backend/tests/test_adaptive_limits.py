@@ -0,0 +1,55 @@
+import pytest
+
+from app.services import adaptive_limits
+
+
+def _headers(**values):
+    return {f"x-ratelimit-{k.replace('_', '-')}": str(v) for k, v in values.items()}
+
+
+def test_parse_provider_durations():
+    assert adaptive_limits.parse_duration("2m59.56s") == 179.56
+    assert adaptive_limits.parse_duration("6ms") == 0.006
+    assert adaptive_limits.parse_duration("1h2m") == 3720
+    assert adaptive_limits.parse_duration("7") == 7.0
+    assert adaptive_limits.parse_duration("soon") is None
+
+    info = adaptive_limits.parse_headers({**_headers(remaining_requests=14, reset_tokens="7.66s"), "retry-after": "3"})
+    assert info.remaining_requests == 14 and info.reset_tokens == 7.66 and info.retry_after == 3.0
+    assert adaptive_limits.parse_headers({"content-type": "application/json"}) is None
+
+
+def test_concurrency_grows_with_headroom_and_halves_on_429():
+    ctl = adaptive_limits.AdaptiveController()
+    for _ in range(20):
+        key = ctl.acquire(["k"])
+        ctl.release(key, _headers(remaining_requests=1000, remaining_tokens=100000), tokens_used=500)
+    grown = ctl.snapshot()["k"]["concurrency"]
+    assert grown > adaptive_limits.INITIAL_CONCURRENCY
+
+    key = ctl.acquire(["k"])
+    ctl.release(key, {"retry-after": "1.5"}, rate_limited=True)
+    state = ctl.snapshot()["k"]
+    assert abs(state["concurrency"] - grown * adaptive_limits.DECREASE_FACTOR) < 0.01
+    assert 1.0 < state["paused_for_seconds"] <= 1.5
+
+
+def test_exhausted_quota_pauses_key_until_reset():
+    ctl = adaptive_limits.AdaptiveController()
+    key = ctl.acquire(["a", "b"])
+    ctl.release(key, _headers(remaining_requests=0, reset_requests="30s"))
+
+    # The paused key is skipped while the other one has slots
+    assert ctl.try_reserve(["a", "b"])[0] != key
+    other = "b" if key == "a" else "a"
+    ctl.release(other)
+    assert ctl.snapshot()[key]["paused_for_seconds"] > 29
+
+
+def test_slots_are_capped_per_key():
+    ctl = adaptive_limits.AdaptiveController()
+    taken = [ctl.try_reserve(["k"])[0] for _ in range(3)]
+    assert taken == ["k", "k", None]
+
+    with pytest.raises(RuntimeError, match="^Rate limit"):
+        ctl.acquire(["k"], timeout=0.1)
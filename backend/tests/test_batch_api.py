@@ -0,0 +1,85 @@
+import json
+
+from app.routes import scoring
+from app.services import batch_scoring
+
+_JOBS = [
+    {"id": 11, "job_title": "Data Engineer", "company_name": "Acme", "job_description": "Spark and Airflow"},
+    {"id": 12, "job_title": "Nurse", "company_name": "Clinic", "job_description": "Night rotations"},
+]
+
+
+def _fake_store(monkeypatch):
+    """Route scoring_batches bookkeeping and score writes to in-memory dicts."""
+    store = {"batches": {}, "scores": {}}
+
+    def record(provider, model, transport, remote_id, input_file_id, job_ids):
+        batch_id = len(store["batches"]) + 1
+        store["batches"][batch_id] = {
+            "id": batch_id, "provider": provider, "transport": transport,
+            "remote_batch_id": remote_id, "status": "submitted", "job_ids": job_ids,
+        }
+        return batch_id
+
+    def close(batch_id, status, output_file_id=None, scored=0, errors=0, error=None):
+        store["batches"][batch_id].update(status=status, scored=scored, errors=errors)
+
+    monkeypatch.setattr(batch_scoring, "_pending_jobs", lambda limit: _JOBS[:limit])
+    monkeypatch.setattr(batch_scoring, "_record_batch", record)
+    monkeypatch.setattr(batch_scoring, "_close_batch", close)
+    monkeypatch.setattr(
+        batch_scoring, "_open_batches",
+        lambda: [b for b in store["batches"].values() if b["status"] == "submitted"],
+    )
+    monkeypatch.setattr(scoring, "_persist_score", lambda job_id, result, _t: store["scores"].__setitem__(job_id, result))
+    monkeypatch.setattr(scoring, "_get_qualification_threshold", lambda: 80)
+    monkeypatch.setattr(scoring, "_resume_hash", lambda: "resume")
+    return store
+
+
+def _handler(body):
+    prompt = body["messages"][-1]["content"]
+    if "Nurse" in prompt:
+        raise RuntimeError("model refused")
+    return {
+        "model": body["model"],
+        "choices": [{"message": {"content": json.dumps({"overall_score": 91, "overall_justification": "fit"})}}],
+        "usage": {"total_tokens": 700, "prompt_tokens": 500, "prompt_tokens_details": {"cached_tokens": 400}},
+    }
+
+
+def test_requests_use_interactive_prompt():
+    lines = batch_scoring.build_requests(_JOBS, "openai").decode().splitlines()
+    first = json.loads(lines[0])
+
+    assert len(lines) == 2
+    assert first["custom_id"] == "job-11" and first["url"] == "/v1/chat/completions"
+    assert first["body"]["messages"][0]["content"] == scoring._prompt_messages("x")[0]["content"]
+    assert "Data Engineer" in first["body"]["messages"][-1]["content"]
+
+
+def test_submit_poll_ingest_round_trip(monkeypatch):
+    store = _fake_store(monkeypatch)
+    transport = batch_scoring.LocalBatchTransport(_handler)
+
+    submitted = batch_scoring.submit("openai", transport=transport)
+    assert submitted["jobs"] == 2 and submitted["transport"] == "local"
+
+    summaries = batch_scoring.poll(transport=transport)
+
+    assert summaries == [{"id": 1, "status": "ingested", "scored": 1, "errors": 1}]
+    result = store["scores"][11]
+    assert result["overall_score"] == 91
+    assert result["batch_api"] is True and result["resume_hash"] == "resume"
+    assert result["cached_tokens"] == 400
+    assert 12 not in store["scores"]
+    assert batch_scoring.poll(transport=transport) == []
+
+
+def test_lost_local_batch_is_expired(monkeypatch):
+    store = _fake_store(monkeypatch)
+    batch_scoring.submit("gemini", transport=batch_scoring.LocalBatchTransport(_handler))
+    batch_scoring._local_transports.clear()  # simulates a process restart
+
+    assert batch_scoring.poll() == [{"id": 1, "status": "expired"}]
+    assert store["batches"][1]["status"] == "expired"
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+from app.routes import scoring
+
+
+def _completion(results):
+    return scoring._Completion(
+        json.dumps({"results": results}),
+        "llama-3.3-70b-versatile",
+        "groq",
+        {"tokens_used": 900, "prompt_tokens": 600, "cached_tokens": 300},
+    )
+
+
+def test_batch_prompt_tags_every_job():
+    prompt = scoring._build_batch_prompt([("J1", "Engineer", "Acme", "Spark"), ("J2", "Nurse", "Clinic", "Ward")])
+    assert "exactly 2 entries" in prompt
+    assert "### JOB REF: J1" in prompt and "### JOB REF: J2" in prompt
+
+
+def test_split_validates_each_slot():
+    results = scoring._split_batch_completion(
+        _completion([
+            {"job_ref": "J2", "overall_score": 40, "overall_justification": "weak"},
+            {"job_ref": "J1", "overall_score": 88, "overall_justification": "strong"},
+            {"job_ref": "J3", "overall_score": "not a number"},
+        ]),
+        ["J1", "J2", "J3"],
+    )
+
+    assert [r["overall_score"] if r else None for r in results] == [88, 40, None]
+    assert results[0]["batch_size"] == 3
+    assert results[0]["tokens_used"] == 300  # an even share of the request
+    assert "job_ref" not in results[0]
+
+
+def test_untagged_entries_match_by_position():
+    results = scoring._split_batch_completion(
+        _completion([{"overall_score": 70}, {"overall_score": 20}]), ["J1", "J2"]
+    )
+    assert [r["overall_score"] for r in results] == [70, 20]
+
+
+def test_malformed_slot_falls_back_to_single_scoring(monkeypatch):
+    monkeypatch.setattr(scoring, "_cache_key", lambda *_a: None)
+    monkeypatch.setattr(scoring, "_resume_hash", lambda: "resume")
+    calls = {"batch": 0, "single": []}
+
+    async def no_wait(_provider, timeout=None):
+        return None
+
+    async def fake_complete(provider, prompt, max_tokens):
+        calls["batch"] += 1
+        return _completion([{"job_ref": "J1", "overall_score": 81}, {"job_ref": "J2", "oops": True}])
+
+    async def fake_single(job_title, company, description, provider="groq"):
+        calls["single"].append(job_title)
+        return {"overall_score": 55, "tokens_used": 400}
+
+    monkeypatch.setattr(scoring, "_enforce_provider_rate_limit_async", no_wait)
+    monkeypatch.setattr(scoring, "_complete_async", fake_complete)
+    monkeypatch.setattr(scoring, "_score_job_uncached_async", fake_single)
+
+    out = asyncio.run(
+        scoring._score_batch_detailed_async([("A", "Acme", "desc a"), ("B", "Acme", "desc b")], provider="groq")
+    )
+
+    assert calls == {"batch": 1, "single": ["B"]}
+    assert out[0]["overall_score"] == 81 and out[0]["batch_size"] == 2
+    assert out[1]["overall_score"] == 55 and out[1]["batch_fallback"] is True
+
+
+def test_batched_run_reports_jobs_per_request(monkeypatch):
+    jobs = [{"id": i, "job_title": f"Role {i}", "company_name": "Acme", "job_description": "d"} for i in range(5)]
+    monkeypatch.setattr(scoring, "_fetch_jobs_to_score", lambda *_a: jobs)
+    monkeypatch.setattr(scoring, "_get_qualification_threshold", lambda: 80)
+    monkeypatch.setattr(scoring, "_persist_score", lambda *_a: None)
+    monkeypatch.setattr(scoring, "_find_scored_sibling", lambda *_a: None)
+
+    async def fake_batch(job_args, provider="groq", force_rescore=False):
+        return [{"overall_score": 75, "tokens_used": 10, "batch_size": len(job_args)} for _ in job_args]
+
+    monkeypatch.setattr(scoring, "_score_batch_detailed_async", fake_batch)
+
+    async def collect():
+        gen = scoring._scoring_generator_async(5, "Pending", provider="groq", jobs_per_request=2)
+        return [json.loads(chunk.split("data: ", 1)[1]) async for chunk in gen]
+
+    events = asyncio.run(collect())
+    assert [e["type"] for e in events].count("scored") == 5
+    complete = events[-1]
+    assert complete["type"] == "complete"
+    assert complete["provider_requests"] == 3
+    assert complete["jobs_per_request"] == round(5 / 3, 2)
@@ -0,0 +1,141 @@
+import pytest
+
+from app.routes import candidates, cv, scoring
+from app.services import candidate_profile
+
+RESUME_A = """Ana Lima
+Sao Paulo | ana@example.com
+
+Executive Summary
+Delivery director for cloud programmes.
+
+Core Competencies
+- Cloud Migration | IT Governance (ITIL, COBIT) | Python
+- Vendor Management; Budget Ownership
+
+Education
+MBA
+"""
+RESUME_B = "Bruno Costa\n\nSkills\nKubernetes, Go\n"
+
+
+@pytest.fixture
+def table(monkeypatch, tmp_path):
+    """An in-memory candidates table and no resume files; counts full loads."""
+    rows = {1: {"id": 1, "name": "Ana", "version": 1, "resume_text": RESUME_A, "is_active": True}}
+    loads = []
+
+    def current_row():
+        usable = [r for r in rows.values() if r["resume_text"]]
+        # ORDER BY is_active DESC NULLS LAST, id DESC
+        return max(usable, key=lambda r: ({True: 2, False: 1}.get(r["is_active"], 0), r["id"]), default=None)
+
+    def load_candidate(candidate_id):
+        loads.append(candidate_id)
+        row = rows[candidate_id]
+        return candidate_profile.build(row["resume_text"], "candidate", row["id"], row["version"], row["name"])
+
+    dropped = []
+    monkeypatch.setattr(candidate_profile, "_current_row", current_row)
+    monkeypatch.setattr(candidate_profile, "_load_candidate", load_candidate)
+    monkeypatch.setattr(candidate_profile, "_drop_derived_caches", lambda: dropped.append(1))
+    monkeypatch.setattr(candidate_profile, "RESUME_FILES", [str(tmp_path / "candidate_resume.txt")])
+    monkeypatch.setattr(candidate_profile, "PROCESS_FILE", str(tmp_path / "missing.md"))
+    monkeypatch.setattr(candidate_profile, "TTL_SECONDS", 60)
+    monkeypatch.setattr(candidate_profile, "_profile", None)
+    candidate_profile.invalidate()
+    yield rows, loads, dropped
+    candidate_profile.invalidate()
+    candidate_profile._profile = None
+
+
+def test_derived_data_is_computed_once(table):
+    _rows, loads, _dropped = table
+    profile = candidate_profile.active()
+
+    assert profile.name == "Ana"
+    assert profile.content_hash == scoring.score_cache.text_hash(RESUME_A)
+    assert "delivery director" in profile.sections["summary"].lower()
+    assert {"cloud migration", "it governance (itil, cobit)", "python", "budget ownership"} <= profile.skills
+    assert profile.term_freqs["cloud"] == 2 and "the" not in profile.term_freqs
+    assert profile.token_count > 0
+
+    for _ in range(20):
+        assert scoring._get_resume() == cv._get_resume() == RESUME_A
+        assert scoring._resume_hash() == profile.content_hash
+    assert loads == [1]
+
+
+def test_switching_active_candidate_reaches_scoring_and_cv(table, monkeypatch):
+    rows, loads, dropped = table
+    before = scoring._resume_hash()
+    rows[2] = {"id": 2, "name": "Bruno", "version": 1, "resume_text": RESUME_B, "is_active": False}
+
+    class Cursor:
+        def execute(self, sql, params=None):
+            if "SET is_active = FALSE" in sql:
+                for row in rows.values():
+                    row["is_active"] = False
+            elif "SET is_active = TRUE" in sql:
+                rows[params[0]]["is_active"] = True
+
+        def fetchone(self):
+            return {"id": 2}
+
+    class DB:
+        def __enter__(self):
+            return type("Conn", (), {"commit": lambda self: None})(), Cursor()
+
+        def __exit__(self, *_exc):
+            return False
+
+    monkeypatch.setattr(candidates, "db", lambda: DB())
+    candidates.set_active(2)
+
+    assert cv._get_resume() == RESUME_B
+    assert scoring._resume_hash() != before
+    assert candidate_profile.active().cache_key.startswith("2:v1:")
+    assert loads == [1, 2]
+    assert dropped == [1]
+
+
+def test_other_processes_pick_up_changes_after_ttl(table, monkeypatch):
+    rows, loads, dropped = table
+    candidate_profile.active()
+    monkeypatch.setattr(candidate_profile, "TTL_SECONDS", 0)
+
+    candidate_profile.active()  # row unchanged: one small query, no rebuild
+    assert loads == [1] and candidate_profile.stats()["checks"] >= 1
+
+    rows[1].update(resume_text=RESUME_B, version=2)
+    assert candidate_profile.active().version == 2
+    assert loads == [1, 1]
+    assert dropped == [1]
+
+
+def test_resolution_order(table, tmp_path, monkeypatch):
+    rows, _loads, _dropped = table
+    rows[2] = {"id": 2, "name": "Bruno", "version": 1, "resume_text": RESUME_B, "is_active": None}
+    (tmp_path / "candidate_resume.txt").write_text("File Resume\n", encoding="utf-8")
+    candidate_profile.invalidate()
+    assert candidate_profile.active().source == "file"  # shadows the active row
+
+    (tmp_path / "candidate_resume.txt").unlink()
+    process_file = tmp_path / "process.md"
+    process_file.write_text("Intro\n\n📄 RESUME — Carla\nSkills\nSQL\n", encoding="utf-8")
+    monkeypatch.setattr(candidate_profile, "PROCESS_FILE", str(process_file))
+    candidate_profile.invalidate()
+    assert candidate_profile.active().source == "process_file"
+
+    process_file.write_text("No resume block here\n", encoding="utf-8")
+    candidate_profile.invalidate()
+    assert candidate_profile.active().candidate_id == 1  # active row, not the newer is_active=NULL one
+
+    rows[1]["is_active"] = rows[2]["is_active"] = False
+    candidate_profile.invalidate()
+    assert candidate_profile.active().candidate_id == 2  # newest row
+
+    rows.clear()
+    candidate_profile.invalidate()
+    with pytest.raises(RuntimeError):
+        candidate_profile.active()
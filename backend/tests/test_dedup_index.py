@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import dedup_index
+
+_BASE = (
+    "We are hiring a Senior Data Engineer to design and operate batch and streaming pipelines "
+    "on AWS using Spark, Airflow and dbt. You will own data models for finance and marketing, "
+    "mentor two junior engineers, and work closely with analytics to improve data quality. "
+    "Requirements: five years of Python and SQL, experience with Kafka, Terraform and Snowflake, "
+    "strong communication skills and a pragmatic approach to testing and observability."
+)
+_REPOST = _BASE + " Location: Lisbon, hybrid two days per week."
+_OTHER = (
+    "Our clinic is looking for a registered nurse to join the paediatric ward. Duties include "
+    "patient assessment, medication administration, family education and coordination with "
+    "physicians across night and weekend rotations. A valid nursing licence is required."
+)
+
+
+@pytest.fixture(autouse=True)
+def _memory_index(monkeypatch):
+    dedup_index.reset()
+    monkeypatch.setattr(dedup_index, "_loaded", True)  # keep the DB out of it
+    monkeypatch.setattr(dedup_index, "_checked_at", float("inf"))
+    yield
+    dedup_index.reset()
+
+
+def _add(job_id, text):
+    sig = dedup_index.signature_for(text)
+    with dedup_index._lock:
+        dedup_index._add_to_memory(job_id, sig, dedup_index.description_hash(text))
+    return sig
+
+
+class _SignatureTable:
+    """job_signatures in memory; records each query's parameters."""
+
+    def __init__(self):
+        self.rows, self.queries = {}, []
+
+    def put(self, job_id, text, updated_at):
+        sig = dedup_index.signature_for(text)
+        self.rows[job_id] = {"job_id": job_id, "signature": dedup_index.pack(sig),
+                             "description_hash": dedup_index.description_hash(text), "updated_at": updated_at}
+
+    def __call__(self):
+        table = self
+
+        class Cursor:
+            def execute(self, sql, params=None):
+                table.queries.append(params)
+                if sql.lstrip().startswith("INSERT"):
+                    job_id, blob, desc_hash = params
+                    table.rows[job_id] = {"job_id": job_id, "signature": blob, "description_hash": desc_hash,
+                                          "updated_at": datetime(2026, 1, 2)}
+                    self.result = []
+                else:
+                    since = params[0] if params else datetime.min
+                    self.result = [r for r in table.rows.values() if r["updated_at"] >= since]
+
+            def fetchall(self):
+                return self.result
+
+        class Ctx:
+            def __enter__(self):
+                return None, Cursor()
+
+            def __exit__(self, *exc):
+                return False
+
+        return Ctx()
+
+
+def test_signature_round_trips_through_blob():
+    sig = dedup_index.signature_for(_BASE)
+    blob = dedup_index.pack(sig)
+    assert len(blob) == dedup_index.NUM_PERM * 4
+    assert dedup_index.unpack(blob) == sig
+    assert dedup_index.signature_for("   ") is None
+
+
+def test_repost_is_found_and_unrelated_posting_is_not():
+    _add(1, _BASE)
+    _add(2, _OTHER)
+    sig = _add(3, _REPOST)
+
+    matches = dedup_index.candidates(sig, exclude=3, threshold=0.7)
+    assert [jid for jid, _ in matches] == [1]
+    assert matches[0][1] >= 0.7
+
+
+def test_duplicate_groups_cluster_reposts():
+    _add(1, _BASE)
+    _add(2, _REPOST)
+    _add(3, _BASE.upper())  # case differences are not a new posting
+    _add(4, _OTHER)
+
+    assert dedup_index.duplicate_groups(threshold=0.7) == [[1, 2, 3]]
+
+
+def test_scoring_reuses_sibling_scored_for_same_resume(monkeypatch):
+    from app.routes import scoring
+
+    monkeypatch.setattr(dedup_index, "find_duplicates", lambda *_a, **_k: [(7, 0.95), (8, 0.93)])
+    monkeypatch.setattr(scoring, "_resume_hash", lambda: "resume-a")
+    scored = [
+        {"id": 7, "detailed_score": {"overall_score": 55, "resume_hash": "resume-old"}},
+        {"id": 8, "detailed_score": {"overall_score": 81, "resume_hash": "resume-a", "tokens_used": 900}},
+    ]
+
+    class _Cursor:
+        def execute(self, *_args, **_kwargs):
+            return None
+
+        def fetchall(self):
+            return scored
+
+    class _Ctx:
+        def __enter__(self):
+            return None, _Cursor()
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(scoring, "db", lambda: _Ctx())
+
+    reused = scoring._find_scored_sibling(9, _REPOST)
+    assert reused["overall_score"] == 81
+    assert reused["reused_from_job_id"] == 8
+    assert reused["tokens_used"] == 0
+
+
+def test_index_reloads_rows_written_by_other_processes(monkeypatch):
+    table = _SignatureTable()
+    t0 = datetime(2026, 1, 1, 12, 0, 0)
+    table.put(1, _BASE, t0)
+    monkeypatch.setattr("app.db.db", table)
+    dedup_index.reset()
+
+    dedup_index._ensure_loaded()
+    assert table.queries == [None]  # full load
+    dedup_index._ensure_loaded()
+    assert len(table.queries) == 1  # within DEDUP_RELOAD_SECONDS
+
+    table.put(2, _REPOST, t0 + timedelta(minutes=5))  # another worker indexed a repost
+    monkeypatch.setattr(dedup_index, "_checked_at", 0.0)
+    matches = dedup_index.find_duplicates(1, threshold=0.7)
+
+    assert table.queries[-1] == [t0 - dedup_index._RELOAD_OVERLAP]  # incremental, from the high-water mark
+    assert [jid for jid, _ in matches] == [2]
+    assert dedup_index.stats()["high_water"] == (t0 + timedelta(minutes=5)).isoformat()
+
+
+def test_reload_drops_deleted_jobs(monkeypatch):
+    table = _SignatureTable()
+    t0 = datetime(2026, 1, 1, 12, 0, 0)
+    table.put(1, _BASE, t0)
+    table.put(2, _REPOST, t0)
+    monkeypatch.setattr("app.db.db", table)
+    dedup_index.reset()
+    assert [jid for jid, _ in dedup_index.find_duplicates(1, threshold=0.7)] == [2]
+
+    del table.rows[2]  # job deleted; its signature row cascades away
+    monkeypatch.setattr(dedup_index, "_checked_at", 0.0)
+
+    assert dedup_index.find_duplicates(1, threshold=0.7) == []
+    assert dedup_index.stats()["signatures"] == 1
+    assert dedup_index.duplicate_groups(threshold=0.7) == []
+
+
+def test_changed_description_is_signed_again(monkeypatch):
+    table = _SignatureTable()
+    monkeypatch.setattr("app.db.db", table)
+    _add(1, _BASE)
+    _add(2, _OTHER)
+
+    assert dedup_index.find_duplicates(1, _BASE, threshold=0.7) == []
+    assert table.queries == []  # unchanged description: nothing recomputed
+
+    edited = _OTHER + " Night shifts are paid at a higher rate."
+    matches = dedup_index.find_duplicates(1, edited, threshold=0.7)
+    assert [jid for jid, _ in matches] == [2]
+    assert table.rows[1]["description_hash"] == dedup_index.description_hash(edited)
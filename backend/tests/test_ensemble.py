@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from app.services import ensemble
+from app.services.ensemble import MemberResult
+
+
+def test_consensus_matches_legacy_agreement_bands():
+    high = ensemble.consensus([{"overall_score": 80}, {"overall_score": 88}], threshold=75)
+    moderate = ensemble.consensus([{"overall_score": 60}, {"overall_score": 80}], threshold=75)
+    low = ensemble.consensus([{"overall_score": 40}, {"overall_score": 90}, {"score": 70}], threshold=75)
+
+    assert high == {
+        "average_score": 84.0, "min_score": 80, "max_score": 88, "consensus_qualified": True,
+        "all_qualified": True, "any_qualified": True, "agreement_level": "high", "members": 2,
+    }
+    assert moderate["agreement_level"] == "moderate" and not moderate["consensus_qualified"]
+    assert moderate["any_qualified"] and not moderate["all_qualified"]
+    assert low["agreement_level"] == "low" and low["average_score"] == 66.7
+    assert ensemble.consensus([])["agreement_level"] == "none"
+
+
+def test_members_run_concurrently_and_stream_in_completion_order():
+    delays = {"openai:a": 0.15, "gemini:b": 0.05, "groq:c": 0.1}
+
+    async def call(label):
+        await asyncio.sleep(delays[label])
+        if label == "groq:c":
+            raise RuntimeError("boom")
+        return {"overall_score": 70}
+
+    async def collect():
+        return [m async for m in ensemble.run(list(delays), call)]
+
+    started = time.monotonic()
+    members = asyncio.run(collect())
+
+    assert time.monotonic() - started < 0.28  # not 0.3s sequential
+    assert [m.label for m in members] == ["gemini:b", "groq:c", "openai:a"]
+    assert members[1].error == "boom" and members[1].result is None
+
+
+def test_compact_payload_keeps_representative_breakdown_only():
+    members = [
+        MemberResult("openai:gpt-4o-mini", {"overall_score": 70, "sections": [{"dimension": "A"}]}, latency_ms=900),
+        MemberResult("gemini:gemini-2.5-flash", {"overall_score": 80, "sections": [{"dimension": "B"}]}, latency_ms=1200),
+        MemberResult("openai:gpt-4o", {"overall_score": 84, "sections": [{"dimension": "C"}]}, latency_ms=1500),
+        MemberResult("groq:llama", None, error="Rate limit", latency_ms=50),
+    ]
+    summary = ensemble.consensus([m.result for m in members if m.result], threshold=80)
+
+    payload = ensemble.compact_payload(members, summary, {"groq:llama": {"provider": "groq"}})
+
+    assert payload["overall_score"] == 78
+    assert payload["sections"] == [{"dimension": "B"}]  # closest to the 78.0 average
+    assert payload["ensemble"]["representative"] == "gemini:gemini-2.5-flash"
+    summaries = payload["ensemble"]["members"]
+    assert [s["overall_score"] for s in summaries] == [70, 80, 84, None]
+    assert summaries[3]["provider"] == "groq" and summaries[3]["error"] == "Rate limit"
+    assert "sections" not in summaries[0]
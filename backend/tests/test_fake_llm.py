@@ -0,0 +1,84 @@
+import asyncio
+import random
+
+import pytest
+
+from app.routes import scoring
+from app.services import adaptive_limits, candidate_profile, rate_limiter
+from benchmarks.fake_llm import FakeLLMServer, Scenario, parse_latency
+
+
+@pytest.fixture
+def fake_groq(monkeypatch):
+    def start(scenario: Scenario) -> FakeLLMServer:
+        server = FakeLLMServer(scenario).start()
+        monkeypatch.setattr(scoring, "_GROQ_BASE_URL", server.url)
+        monkeypatch.setattr(scoring, "get_groq_api_keys", lambda: ["bench-a", "bench-b"])
+        profile = candidate_profile.build("Delivery director, cloud programmes.")
+        monkeypatch.setattr(candidate_profile, "active", lambda: profile)
+        monkeypatch.setattr(adaptive_limits, "controller", adaptive_limits.AdaptiveController())
+        monkeypatch.setattr(rate_limiter, "_store", rate_limiter.MemoryStore())
+        servers.append(server)
+        return server
+
+    servers = []
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def test_latency_specs():
+    rng = random.Random(1)
+    assert parse_latency("fixed:0.5")(rng) == 0.5
+    assert 0.2 <= parse_latency("uniform:0.2,0.4")(rng) <= 0.4
+    assert parse_latency("bimodal:0.1,3,0")(rng) == 0.1
+    assert parse_latency("lognormal:0.8,0.3")(rng) > 0
+    with pytest.raises(ValueError):
+        parse_latency("normal:1")
+
+
+def test_groq_path_scores_single_and_batched_prompts(fake_groq):
+    server = fake_groq(Scenario(latency="fixed:0"))
+
+    async def run():
+        single = await scoring._complete_groq_async(scoring._build_user_prompt("Delivery Director", "Acme", "Cloud"))
+        refs, prompt = scoring._batch_refs([("Role A", "Acme", "desc a"), ("Role B", "Beta", "desc b")])
+        batch = await scoring._complete_groq_async(prompt, 6000)
+        return scoring._finalize_completion(single), scoring._split_batch_completion(batch, refs)
+
+    single, slots = asyncio.run(run())
+    assert 35 <= single["overall_score"] <= 95
+    assert single["tokens_used"] > 0
+    assert [slot is not None for slot in slots] == [True, True]
+    assert server.counters["requests"] == 2
+
+
+def test_rate_limit_bursts_and_truncation_are_served(fake_groq):
+    server = fake_groq(Scenario(latency="fixed:0", rate_limit_every=2, rate_limit_burst=1, rate_limit_reset=0.1, truncate_rate=1.0))
+
+    async def run():
+        prompt = scoring._build_user_prompt("PM", "Acme", "desc")
+        return [(await scoring._complete_groq_async(prompt)).text for _ in range(2)]
+
+    text = asyncio.run(run())[-1]
+
+    assert server.counters["rate_limited"] >= 1
+    assert server.counters["truncated"] >= 1
+    assert not text.rstrip().endswith("}")
+    assert "overall_score" in scoring._extract_json_robust(text)
+
+
+def test_slow_stream_arrives_in_chunks(fake_groq):
+    server = fake_groq(Scenario(latency="fixed:0", stream_chunk_chars=16, stream_chunk_delay=0.001))
+
+    async def run():
+        usage, pieces = {}, []
+        async for piece in scoring._stream_completion("groq", scoring._build_user_prompt("PM", "Acme", "d"), usage, {}):
+            pieces.append(piece)
+        return usage, pieces
+
+    usage, pieces = asyncio.run(run())
+    assert len(pieces) > 10
+    assert all(len(piece) <= 16 for piece in pieces)
+    assert usage["tokens_used"] > 0
+    assert server.counters["streams"] == 1
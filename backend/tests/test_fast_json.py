@@ -0,0 +1,59 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.services import fast_json
+
+_PAYLOAD = {
+    "id": 7,
+    "title": "Gerente de Programas — São Paulo",
+    "score": Decimal("82.5"),
+    "tags": {"agile"},
+    "at": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    "by_id": {3: "three"},
+}
+_EXPECTED = {
+    "id": 7,
+    "title": "Gerente de Programas — São Paulo",
+    "score": 82.5,
+    "tags": ["agile"],
+    "at": "2026-01-02T03:04:05+00:00",
+    "by_id": {"3": "three"},
+}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        if fast_json.orjson is None:
+            pytest.skip("orjson not installed")
+    else:
+        monkeypatch.setattr(fast_json, "orjson", None)
+    return request.param
+
+
+def test_dumps_handles_db_and_python_types(backend):
+    assert json.loads(fast_json.dumps(_PAYLOAD)) == _EXPECTED
+    assert fast_json.loads(fast_json.dumpb(_PAYLOAD)) == _EXPECTED
+
+
+def test_sse_event_frame(backend):
+    frame = fast_json.sse_event("partial", {"field": "overall_score", "value": 82})
+
+    event, data, blank, end = frame.split("\n")
+    assert event == "event: partial" and blank == end == ""
+    assert json.loads(data.removeprefix("data: ")) == {"field": "overall_score", "value": 82}
+
+
+def test_response_renders_without_encoder(backend):
+    response = fast_json.FastJSONResponse({"data": [_PAYLOAD]})
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {"data": [_EXPECTED]}
+
+
+def test_unknown_types_still_fail_loudly(backend):
+    with pytest.raises(TypeError):
+        fast_json.dumps({"x": object()})
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from app.services import hedging
+from app.services.hedging import LatencyTracker
+
+
+def _provider(delays, calls, fail=()):
+    async def call(provider):
+        calls.append(provider)
+        await asyncio.sleep(delays[provider])
+        if provider in fail:
+            raise RuntimeError(f"{provider} down")
+        return {"overall_score": 70, "provider": provider}
+    return call
+
+
+def test_fast_primary_is_not_hedged():
+    calls = []
+    result, info = asyncio.run(hedging.hedged("groq", "gemini", _provider({"groq": 0.01, "gemini": 0.01}, calls), delay=0.2))
+
+    assert result["provider"] == "groq"
+    assert info == {"winner": "groq", "hedged": False, "delay": 0.2}
+    assert calls == ["groq"]
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    calls, cancelled = [], []
+
+    async def call(provider):
+        calls.append(provider)
+        try:
+            await asyncio.sleep({"groq": 5, "gemini": 0.01}[provider])
+        except asyncio.CancelledError:
+            cancelled.append(provider)
+            raise
+        return {"provider": provider}
+
+    result, info = asyncio.run(hedging.hedged("groq", "gemini", call, delay=0.05))
+
+    assert result["provider"] == "gemini"
+    assert info["winner"] == "gemini" and info["hedged"]
+    assert cancelled == ["groq"]
+
+
+def test_primary_failure_fires_secondary_immediately():
+    calls = []
+    call = _provider({"groq": 0.01, "gemini": 0.01}, calls, fail={"groq"})
+
+    result, info = asyncio.run(hedging.hedged("groq", "gemini", call, delay=10))
+
+    assert result["provider"] == "gemini" and info["hedged"]
+
+
+def test_invalid_results_raise_primary_error():
+    calls = []
+    call = _provider({"groq": 0.01, "gemini": 0.01}, calls, fail={"groq"})
+
+    with pytest.raises(RuntimeError, match="groq down"):
+        asyncio.run(hedging.hedged("groq", "gemini", call, is_valid=lambda r: False, delay=0.05))
+
+
+def test_delay_tracks_p95_within_bounds(monkeypatch):
+    monkeypatch.setattr(hedging, "MIN_SAMPLES", 5)
+    monkeypatch.setattr(hedging, "MIN_DELAY", 1.0)
+    monkeypatch.setattr(hedging, "MAX_DELAY", 30.0)
+    tracker = LatencyTracker(window=20)
+
+    assert hedging.hedge_delay("groq", tracker) == hedging.DEFAULT_DELAY
+    for seconds in [2.0] * 19 + [12.0]:
+        tracker.record("groq", seconds)
+    assert hedging.hedge_delay("groq", tracker) == 2.0
+    for _ in range(20):
+        tracker.record("groq", 0.1)
+    assert hedging.hedge_delay("groq", tracker) == 1.0  # window rolled, clamped to MIN_DELAY
+
+
+def test_timed_records_cancelled_calls():
+    tracker = LatencyTracker()
+
+    async def main():
+        task = asyncio.create_task(hedging.timed("openai", asyncio.sleep(5), tracker))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    assert tracker.count("openai") == 1
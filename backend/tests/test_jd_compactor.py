@@ -0,0 +1,64 @@
+from app.services import jd_compactor
+
+_POSTING = """About Acme
+Acme has built industrial widgets since 1901.
+We have offices in twelve countries and a great culture.
+
+Responsibilities:
+- Build batch pipelines in Spark
+- Own the Airflow deployment
+- Build batch pipelines in Spark
+
+Requirements
+- 5+ years of Python
+- Strong SQL
+
+Benefits
+- Health insurance
+- Pension plan
+- Gym membership
+- Free lunch
+- Bike scheme
+- Pet friendly office
+
+Acme is an equal opportunity employer and hires without regard to race, color, religion or sex.
+"""
+
+
+def test_sections_follow_headings():
+    kinds = [kind for kind, _lines in jd_compactor.sections(_POSTING)]
+    assert kinds == ["company", "responsibilities", "requirements", "benefits"]
+
+
+def test_compaction_drops_boilerplate_and_duplicate_lines():
+    out = jd_compactor.compact(_POSTING)
+
+    assert "equal opportunity" not in out.text
+    assert out.text.count("Build batch pipelines in Spark") == 1
+    assert "Pet friendly office" not in out.text  # benefits compressed
+    assert "- Strong SQL" in out.text
+    assert out.dropped["legal"] == 1
+    assert out.tokens < out.original_tokens
+    assert out.tokens_saved == out.original_tokens - out.tokens
+
+
+def test_tight_budget_keeps_requirements_first():
+    out = jd_compactor.compact(_POSTING, token_budget=20)
+
+    assert out.text.splitlines() == ["Requirements", "- 5+ years of Python", "- Strong SQL"]
+    assert out.tokens <= 20
+
+
+def test_single_paragraph_posting_is_split_not_dropped():
+    blob = " ".join(f"Sentence number {i} describes the role in some detail." for i in range(200))
+    out = jd_compactor.compact(blob, token_budget=100)
+
+    assert out.text.startswith("Sentence number 0")
+    assert 0 < out.tokens <= 100
+
+
+def test_disabled_compaction_passes_text_through(monkeypatch):
+    monkeypatch.setenv("SCORING_JD_COMPACTION", "false")
+    out = jd_compactor.compact(_POSTING)
+    assert out.text == _POSTING
+    assert out.tokens_saved == 0
@@ -0,0 +1,110 @@
+import asyncio
+
+from app.services import adaptive_limits, key_scheduler
+from app.services.key_scheduler import KeyScheduler, KeySpec
+
+
+def _scheduler(*specs, interval=1.0, monkeypatch=None):
+    monkeypatch.setattr(key_scheduler, "MIN_INTERVAL", interval)
+    return KeyScheduler(list(specs), controller=adaptive_limits.AdaptiveController())
+
+
+def test_free_key_is_handed_out_without_waiting(monkeypatch):
+    ks = _scheduler(KeySpec("a"), KeySpec("b"), monkeypatch=monkeypatch)
+
+    first, wait_a = ks.reserve()
+    second, wait_b = ks.reserve()
+    third, wait_c = ks.reserve()
+
+    assert {first, second} == {"a", "b"} and wait_a == wait_b == 0
+    assert third in ("a", "b") and 0.9 < wait_c <= 1.0  # next start on the earliest key
+
+
+def test_weighted_key_gets_more_starts(monkeypatch):
+    ks = _scheduler(KeySpec("tier1", weight=1), KeySpec("tier3", weight=3), monkeypatch=monkeypatch)
+    picks = []
+    for _ in range(8):
+        key, _wait = ks.reserve()
+        ks.controller.release(key)
+        ks.release(key)
+        picks.append(key)
+
+    assert picks[0] == "tier3"  # ties go to the heavier key
+    assert picks.count("tier3") == 6
+
+
+def test_slots_cap_concurrency_and_release_requeues(monkeypatch):
+    ks = _scheduler(KeySpec("a", slots=1), interval=0, monkeypatch=monkeypatch)
+
+    assert ks.reserve()[0] == "a"
+    assert ks.reserve() == (None, key_scheduler._POLL_SECONDS)
+    ks.release("a")
+    assert ks.reserve()[0] == "a"
+
+
+def test_paused_key_is_skipped_for_a_free_one(monkeypatch):
+    ks = _scheduler(KeySpec("a"), KeySpec("b"), interval=0, monkeypatch=monkeypatch)
+    key, _ = ks.reserve()
+    ks.controller.release(key, {"retry-after": "30"}, rate_limited=True)
+    ks.release(key)
+
+    other = "b" if key == "a" else "a"
+    assert [ks.reserve()[0] for _ in range(2)] == [other, other]
+
+
+def test_concurrent_workers_report_wait_stats(monkeypatch):
+    ks = _scheduler(KeySpec("a", slots=2), KeySpec("b", slots=2), interval=0, monkeypatch=monkeypatch)
+
+    async def worker():
+        key = await ks.acquire_async(timeout=5)
+        await asyncio.sleep(0.02)
+        ks.controller.release(key)
+        ks.release(key)
+
+    async def main():
+        await asyncio.gather(*(worker() for _ in range(12)))
+
+    asyncio.run(main())
+    stats = ks.stats()
+    assert stats["reservations"] == 12
+    assert stats["max_wait_seconds"] > 0  # only 4 slots for 12 workers
+    assert all(k["inflight"] == 0 for k in stats["keys"].values())
+
+
+def test_keys_keep_their_identity_when_reordered(monkeypatch):
+    monkeypatch.delenv("GROQTEST_KEY_WEIGHTS", raising=False)
+    monkeypatch.delenv("GROQTEST_KEY_SLOTS", raising=False)
+    first, second = "gsk_first_key_0001", "gsk_second_key_0002"
+    ids = [key_scheduler.key_id("groqtest", k) for k in (first, second)]
+
+    assert ids[0] == key_scheduler.key_id("groqtest", first) and ids[0] != ids[1]
+    assert all(k not in kid for k in (first, second) for kid in ids)
+
+    before = key_scheduler.get_scheduler("groqtest", ids)
+    after = key_scheduler.get_scheduler("groqtest", list(reversed(ids)))
+    assert set(after.stats()["keys"]) == set(before.stats()["keys"]) == set(ids)
+
+
+def test_failed_groq_client_returns_both_slots(monkeypatch):
+    from app.routes import scoring
+
+    controller = adaptive_limits.AdaptiveController()
+    monkeypatch.setattr(adaptive_limits, "controller", controller)
+    monkeypatch.setattr(key_scheduler, "_schedulers", {})
+    monkeypatch.setattr(key_scheduler, "MIN_INTERVAL", 0)
+    monkeypatch.setattr(scoring, "get_groq_api_keys", lambda: ["gsk_only_key_00001"])
+
+    def broken_client(*_a, **_k):
+        raise ValueError("bad base url")
+
+    monkeypatch.setattr(scoring, "_groq_client", broken_client)
+
+    for _ in range(3):
+        try:
+            asyncio.run(scoring._complete_groq_async("prompt"))
+        except ValueError:
+            pass
+
+    key_id = key_scheduler.key_id("groq", "gsk_only_key_00001")
+    assert key_scheduler.get_scheduler("groq", [key_id]).stats()["keys"][key_id]["inflight"] == 0
+    assert controller.snapshot()[key_id]["inflight"] == 0
@@ -0,0 +1,114 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+from app.services import llm_clients
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    llm_clients.invalidate()
+    yield
+    llm_clients.invalidate()
+
+
+def test_sync_client_is_reused_per_key_and_model():
+    a = llm_clients.get_openai_client("groq", "gsk_key_one_123456", "llama", base_url="http://localhost:1/v1")
+    b = llm_clients.get_openai_client("groq", "gsk_key_one_123456", "llama", base_url="http://localhost:1/v1")
+    c = llm_clients.get_openai_client("groq", "gsk_key_two_123456", "llama", base_url="http://localhost:1/v1")
+
+    assert a is b
+    assert a is not c
+    stats = llm_clients.pool_stats()
+    assert stats["active_clients"] == 2
+    assert stats["created"] >= 2 and stats["reused"] >= 1
+    assert all("gsk_key" not in row["key_preview"] for row in stats["clients"])
+
+
+def test_groq_header_profile_is_kept_on_the_warm_client():
+    client = llm_clients.get_openai_client(
+        "groq", "gsk_key_one_123456", "llama", headers={"X-Request-Source": "data-pipeline"}
+    )
+    assert client._client.headers["X-Request-Source"] == "data-pipeline"
+
+
+def test_retain_drops_clients_for_removed_keys():
+    llm_clients.get_openai_client("groq", "gsk_key_one_123456", "llama")
+    llm_clients.get_openai_client("groq", "gsk_key_two_123456", "llama")
+    llm_clients.get_openai_client("openai", "sk-openai_123456789", "gpt-4o-mini")
+
+    llm_clients.retain("groq", ["gsk_key_two_123456"])
+
+    providers = sorted(row["provider"] for row in llm_clients.pool_stats()["clients"])
+    assert providers == ["groq", "openai"]
+
+
+def test_async_clients_are_bound_to_their_event_loop():
+    async def get():
+        return llm_clients.get_openai_client("openai", "sk-openai_123456789", "gpt-4o-mini", use_async=True)
+
+    first = asyncio.run(get())
+    second = asyncio.run(get())  # new loop — the old client's pool is unusable
+    assert first is not second
+
+
+def test_gemini_configure_only_runs_when_key_changes(monkeypatch):
+    calls = {"configure": 0, "models": 0}
+
+    class FakeModel:
+        def __init__(self, model_name, system_instruction=None):
+            calls["models"] += 1
+
+    def configure(**_kwargs):
+        calls["configure"] += 1
+
+    fake_genai = types.SimpleNamespace(configure=configure, GenerativeModel=FakeModel)
+    fake_google = types.ModuleType("google")
+    fake_google.generativeai = fake_genai
+    monkeypatch.setitem(sys.modules, "google", fake_google)
+    monkeypatch.setitem(sys.modules, "google.generativeai", fake_genai)
+
+    for _ in range(3):
+        llm_clients.get_gemini_model("gemini-key-aaaaaaaa", "gemini-2.5-flash", "prompt")
+    assert calls == {"configure": 1, "models": 1}
+
+    llm_clients.get_gemini_model("gemini-key-bbbbbbbb", "gemini-2.5-flash", "prompt")
+    assert calls == {"configure": 2, "models": 2}
+
+
+def test_clients_differ_per_base_url_and_header_profile():
+    key = "gsk_key_one_123456"
+    plain = llm_clients.get_openai_client("groq", key, "llama", base_url="http://localhost:1/v1")
+    other_url = llm_clients.get_openai_client("groq", key, "llama", base_url="http://localhost:2/v1")
+    profile_a = llm_clients.get_openai_client("groq", key, "llama", headers={"X-Request-Source": "a"})
+    profile_b = llm_clients.get_openai_client("groq", key, "llama", headers={"X-Request-Source": "b"})
+
+    assert len({id(plain), id(other_url), id(profile_a), id(profile_b)}) == 4
+    assert profile_b._client.headers["X-Request-Source"] == "b"
+    assert llm_clients.get_openai_client("groq", key, "llama", headers={"x-request-source": "b"}) is not profile_a
+
+
+def test_gemini_models_per_prompt_are_kept_side_by_side(monkeypatch):
+    built = []
+
+    class FakeModel:
+        def __init__(self, model_name, system_instruction=None):
+            built.append(system_instruction)
+
+    fake_genai = types.SimpleNamespace(configure=lambda **_kwargs: None, GenerativeModel=FakeModel)
+    fake_google = types.ModuleType("google")
+    fake_google.generativeai = fake_genai
+    monkeypatch.setitem(sys.modules, "google", fake_google)
+    monkeypatch.setitem(sys.modules, "google.generativeai", fake_genai)
+    monkeypatch.setattr(llm_clients, "_MAX_GEMINI_MODELS", 2)
+
+    for prompt in ["resume A", "resume B", "resume A", "resume B"]:
+        llm_clients.get_gemini_model("gemini-key-aaaaaaaa", "gemini-2.5-flash", prompt)
+    assert built == ["resume A", "resume B"]  # alternating candidates do not rebuild
+
+    llm_clients.get_gemini_model("gemini-key-aaaaaaaa", "gemini-2.5-flash", "resume C")
+    llm_clients.get_gemini_model("gemini-key-aaaaaaaa", "gemini-2.5-flash", "resume B")
+    llm_clients.get_gemini_model("gemini-key-aaaaaaaa", "gemini-2.5-flash", "resume A")
+    assert built == ["resume A", "resume B", "resume C", "resume A"]  # A was least recently used
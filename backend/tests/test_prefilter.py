@@ -0,0 +1,86 @@
+from app.services import prefilter
+
+_RESUME = "Senior data engineer. Python, SQL, Spark, Airflow and Kafka pipelines on AWS; dbt and Snowflake."
+
+_DOCS = [
+    (1, "Data Engineer to build Spark and Airflow pipelines on AWS. Python and SQL required, Kafka a plus."),
+    (2, "Registered nurse for the paediatric ward, night rotations, valid licence required."),
+    (3, "Analytics engineer: SQL and dbt models in Snowflake, some Python."),
+    (4, ""),
+]
+
+
+def test_tokenize_keeps_language_names():
+    assert prefilter.tokenize("C++, C# and Node.js!") == ["c++", "c#", "and", "node", "js"]
+
+
+def test_bm25_ranks_relevant_jobs_first():
+    stats, scores = prefilter.build_stats(_RESUME, _DOCS)
+
+    ranked = sorted(scores, key=lambda jid: -scores[jid])
+    assert ranked[:2] == [1, 3]
+    assert scores[1] == 100.0
+    assert scores[2] == 0.0 and scores[4] == 0.0
+    assert stats.n_docs == 4
+
+
+def test_incremental_score_uses_existing_corpus_stats():
+    stats, scores = prefilter.build_stats(_RESUME, _DOCS)
+
+    assert prefilter.score_text(_DOCS[0][1], stats) == scores[1]
+    new_job = "Python and Spark data engineer, streaming with Kafka."
+    assert 0 < prefilter.score_text(new_job, stats) <= 100
+
+
+def test_full_refresh_streams_docs_without_holding_the_lock(monkeypatch):
+    written, fetched = {}, []
+
+    class NamedCursor:
+        itersize = None
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *_exc):
+            return False
+
+        def execute(self, sql, params=None):
+            pass
+
+        def __iter__(self):
+            for row in _DOCS:
+                assert prefilter._lock.acquire(blocking=False)  # readers are not stalled by the build
+                prefilter._lock.release()
+                fetched.append(row[0])
+                yield row
+
+    class Conn:
+        def cursor(self, name=None):
+            assert name  # server-side cursor
+            return NamedCursor()
+
+    class Cursor:
+        def execute(self, sql, params=None):
+            pass
+
+        def fetchone(self):
+            return {"count": len(_DOCS)}
+
+    class DB:
+        def __enter__(self):
+            return Conn(), Cursor()
+
+        def __exit__(self, *_exc):
+            return False
+
+    monkeypatch.setattr("app.db.db", lambda: DB())
+    monkeypatch.setattr(prefilter, "_write_scores", lambda cur, scores, resume_hash: written.update(scores))
+    prefilter.reset()
+    try:
+        result = prefilter.refresh(_RESUME)
+        assert result["mode"] == "full" and result["scored"] == 4
+        assert fetched == [1, 2, 3, 4]
+        assert written[1] == 100.0
+        assert prefilter.stats()["corpus_docs"] == 4
+    finally:
+        prefilter.reset()
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from app.services import rate_limiter
+
+
+@pytest.fixture
+def memory_store(monkeypatch):
+    store = rate_limiter.MemoryStore()
+    monkeypatch.setattr(rate_limiter, "_store", store)
+    monkeypatch.setitem(rate_limiter.LIMITS, "test", {"minute": 3, "day": 100})
+    return store
+
+
+def test_bucket_refills_continuously(monkeypatch):
+    monkeypatch.setitem(rate_limiter.LIMITS, "test", {"minute": 60, "day": 100})
+    now = 1000.0
+    wait, tokens, _ = rate_limiter._take({"minute": (0.0, now - 30), "day": (50.0, now)}, "test", now)
+
+    assert wait == 0
+    assert tokens == {"minute": 29.0, "day": 49.0}
+
+
+def test_acquire_waits_for_the_next_token(memory_store, monkeypatch):
+    slept = []
+    monkeypatch.setattr(rate_limiter.time, "sleep", lambda s: slept.append(s))
+    for _ in range(3):
+        assert rate_limiter.acquire("test", timeout=5) == 0
+
+    # Bucket is empty; the next token arrives after 60/3 = 20s of refill
+    with pytest.raises(rate_limiter.RateLimitTimeout, match=r"^Rate limit \(test\): 3/minute"):
+        rate_limiter.acquire("test", timeout=5)
+    assert slept == []
+
+
+def test_async_acquire_sleeps_instead_of_failing(memory_store, monkeypatch):
+    monkeypatch.setitem(rate_limiter.LIMITS, "test", {"minute": 600})
+    for _ in range(600):
+        rate_limiter.acquire("test", timeout=0)
+
+    waited = asyncio.run(rate_limiter.acquire_async("test", timeout=1))
+    assert 0 < waited <= 0.2
+
+
+def test_unreachable_database_falls_back_to_memory(monkeypatch):
+    class Broken:
+        name = "postgres"
+
+        def take(self, provider):
+            raise ConnectionError("db down")
+
+    monkeypatch.setattr(rate_limiter, "_store", Broken())
+    monkeypatch.setattr(rate_limiter, "_memory", rate_limiter.MemoryStore())
+    assert rate_limiter.acquire("gemini", timeout=0) == 0
@@ -0,0 +1,73 @@
+import asyncio
+
+from app.routes import scoring
+from app.services import candidate_profile, score_cache
+
+
+def test_cache_key_ignores_case_and_whitespace_but_not_content():
+    base = ("Senior Engineer", "Acme", "Build  scalable\nsystems", "r1", "p1", "groq", "llama")
+    same = ("senior engineer ", "ACME", "build scalable systems", "r1", "p1", "groq", "llama")
+    assert score_cache.make_key(*base) == score_cache.make_key(*same)
+
+    for idx, other in ((2, "Build other systems"), (3, "r2"), (4, "p2"), (6, "gpt-4o-mini")):
+        changed = list(base)
+        changed[idx] = other
+        assert score_cache.make_key(*changed) != score_cache.make_key(*base)
+
+
+def _install_fake_cache(monkeypatch):
+    store = {}
+    profile = candidate_profile.build("resume text")
+    monkeypatch.setattr(candidate_profile, "active", lambda: profile)
+    monkeypatch.setattr(scoring.score_cache, "get", lambda key: dict(store[key]) if key in store else None)
+    monkeypatch.setattr(
+        scoring.score_cache, "put", lambda key, result, *_a: store.__setitem__(key, dict(result))
+    )
+    return store
+
+
+def test_detailed_score_uses_cache_and_force_rescore(monkeypatch):
+    store = _install_fake_cache(monkeypatch)
+    calls = []
+
+    async def fake_uncached(*_args, **_kwargs):
+        calls.append(1)
+        return {"overall_score": 77, "tokens_used": 900}
+
+    monkeypatch.setattr(scoring, "_score_job_uncached_async", fake_uncached)
+
+    async def run():
+        return (
+            await scoring._score_job_detailed_async("Role", "Acme", "desc", provider="groq"),
+            await scoring._score_job_detailed_async("role", "ACME", "desc ", provider="groq"),
+            await scoring._score_job_detailed_async("Role", "Acme", "desc", provider="groq", force_rescore=True),
+        )
+
+    first, repost, forced = asyncio.run(run())
+
+    assert len(calls) == 2
+    assert len(store) == 1
+    assert "cache_hit" not in first
+    assert repost["cache_hit"] is True
+    assert repost["tokens_used"] == 0
+    assert "cache_hit" not in forced
+
+
+def test_async_detailed_score_uses_cache(monkeypatch):
+    _install_fake_cache(monkeypatch)
+    calls = []
+
+    async def fake_uncached(*_args, **_kwargs):
+        calls.append(1)
+        return {"overall_score": 64, "tokens_used": 100}
+
+    monkeypatch.setattr(scoring, "_score_job_uncached_async", fake_uncached)
+
+    async def run():
+        await scoring._score_job_detailed_async("Role", "Acme", "desc", provider="openai")
+        return await scoring._score_job_detailed_async("Role", "Acme", "desc", provider="openai")
+
+    second = asyncio.run(run())
+    assert len(calls) == 1
+    assert second["cache_hit"] is True
+    assert second["overall_score"] == 64
@@ -0,0 +1,74 @@
+import asyncio
+
+from app.routes import scoring
+from app.services import candidate_profile, prefilter, score_matrix
+
+DOCS = [
+    (1, "Senior Python engineer: Django, PostgreSQL, AWS"),
+    (2, "Registered nurse for ward rotations and patient care"),
+    (3, "Data engineer building Spark and Python pipelines on AWS"),
+    (4, "Pastry chef, early shifts"),
+]
+
+
+def test_rank_many_matches_single_resume_ranking():
+    resumes = {7: "Python engineer, AWS and PostgreSQL", 8: "Nurse with ICU patient care experience"}
+    together = prefilter.rank_many({cid: prefilter.query_terms(text) for cid, text in resumes.items()}, DOCS)
+    for cid, text in resumes.items():
+        assert together[cid] == prefilter.build_stats(text, DOCS)[1]
+    assert max(together[8], key=together[8].get) == 2
+
+
+def test_select_pairs_keeps_top_k_and_skips_scored_pairs():
+    rankings = {7: {1: 100.0, 2: 0.0, 3: 80.0, 4: 5.0}, 8: {1: 0.0, 2: 100.0, 3: 0.0, 4: 0.0}}
+    ranked, to_score = score_matrix.select_pairs(rankings, top_k=2, min_prefilter_score=1, scored=frozenset({(7, 1)}))
+
+    assert [(p.candidate_id, p.job_id, p.rank) for p in ranked] == [(7, 1, 1), (7, 3, 2), (8, 2, 1)]
+    assert [(p.candidate_id, p.job_id) for p in to_score] == [(7, 3), (8, 2)]
+
+
+def test_matrix_run_scores_each_pair_with_its_own_resume(monkeypatch):
+    profiles = {
+        7: candidate_profile.build("Python engineer, AWS", "candidate", 7, 1, "Ana"),
+        8: candidate_profile.build("ICU nurse", "candidate", 8, 3, "Bruno"),
+    }
+    active = candidate_profile.build("Active resume")
+    pairs = [score_matrix.Pair(7, 1, 100.0, 1), score_matrix.Pair(7, 3, 80.0, 2), score_matrix.Pair(8, 2, 100.0, 1)]
+    plan = score_matrix.Plan(profiles=profiles, to_score=pairs, ranked=pairs, corpus=4)
+    jobs = {job_id: {"id": job_id, "job_title": f"Job {job_id}", "company_name": "Acme", "job_description": text}
+            for job_id, text in DOCS}
+    seen, recorded = [], []
+
+    async def fake_uncached(job_title, company, description, provider="groq"):
+        await asyncio.sleep(0)
+        seen.append((job_title, scoring._get_resume(), scoring._resume_hash()))
+        return {"overall_score": 90 if "Python" in scoring._get_resume() else 40, "tokens_used": 10}
+
+    monkeypatch.setattr(candidate_profile, "active", lambda: active)
+    monkeypatch.setattr(score_matrix, "plan", lambda *_a, **_k: plan)
+    monkeypatch.setattr(scoring, "_load_jobs", lambda ids: [jobs[i] for i in ids])
+    monkeypatch.setattr(scoring, "_score_job_uncached_async", fake_uncached)
+    monkeypatch.setattr(scoring, "_get_qualification_threshold", lambda: 80)
+    monkeypatch.setattr(scoring.score_cache, "is_enabled", lambda: False)
+    monkeypatch.setattr(score_matrix, "record", lambda profile, job_id, result, threshold: recorded.append(
+        (profile.candidate_id, job_id, result["overall_score"], result["resume_hash"])
+    ))
+    monkeypatch.setattr(score_matrix, "flush", lambda: None)
+
+    async def run():
+        return [frame async for frame in scoring._matrix_generator(scoring.MatrixRequest(candidate_ids=[7, 8]))]
+
+    frames = asyncio.run(run())
+
+    assert sorted(recorded) == [
+        (7, 1, 90, profiles[7].content_hash),
+        (7, 3, 90, profiles[7].content_hash),
+        (8, 2, 40, profiles[8].content_hash),
+    ]
+    assert {(title, resume) for title, resume, _hash in seen} == {
+        ("Job 1", "Python engineer, AWS"), ("Job 3", "Python engineer, AWS"), ("Job 2", "ICU nurse"),
+    }
+    assert '"pairs_to_score":3' in frames[0].replace(" ", "")
+    assert '"scored":3' in frames[-1].replace(" ", "")
+    assert scoring._get_resume() == "Active resume"  # the override never leaks out of the pair's task
+    assert not scoring._running
@@ -1,3 +1,4 @@
+import asyncio
 import sys
 import types
 
@@ -63,7 +64,7 @@ def test_gemini_default_model_is_25_flash(monkeypatch):
         def __init__(self, model_name, system_instruction=None):
             captured["model_name"] = model_name
 
-        def generate_content(self, *_args, **_kwargs):
+        async def generate_content_async(self, *_args, **_kwargs):
             return FakeResponse()
 
     class FakeGenerationConfig:
@@ -83,7 +84,7 @@ def test_gemini_default_model_is_25_flash(monkeypatch):
     monkeypatch.delenv("GEMINI_MODEL", raising=False)
     monkeypatch.setattr(scoring, "get_api_key", lambda _k: "fake-key")
 
-    result = scoring._score_job_gemini("Role", "Company", "Description")
+    result = asyncio.run(scoring._score_job_gemini_async("Role", "Company", "Description"))
     assert captured["model_name"] == "gemini-2.5-flash"
     assert result["provider"] == "gemini"
 
@@ -91,15 +92,15 @@ def test_gemini_default_model_is_25_flash(monkeypatch):
 def test_compare_mode_returns_both_and_best_provider(monkeypatch):
     from app.routes import scoring
 
-    def fake_score(_jt, _co, _desc, provider="openai"):
+    async def fake_score(_jt, _co, _desc, provider="openai", **_kwargs):
         if provider == "openai":
             return {"overall_score": 74, "overall_justification": "Good", "provider": "openai", "model": "gpt-4o-mini"}
         return {"overall_score": 82, "overall_justification": "Better", "provider": "gemini", "model": "gemini-2.5-flash"}
 
     monkeypatch.setattr(scoring, "db", _fake_db)
-    monkeypatch.setattr(scoring, "_score_job_detailed", fake_score)
+    monkeypatch.setattr(scoring, "_score_job_detailed_async", fake_score)
 
-    res = scoring.score_single_job(scoring.SingleScoreRequest(job_db_id=1, model="compare"))
+    res = asyncio.run(scoring.score_single_job(scoring.SingleScoreRequest(job_db_id=1, model="compare")))
     assert res["mode"] == "compare"
     assert res["result"]["compare_mode"] is True
     assert "openai" in res["result"]["results"]
@@ -107,18 +108,53 @@ def test_compare_mode_returns_both_and_best_provider(monkeypatch):
     assert res["result"]["best_provider"] == "gemini"
 
 
+def test_ensemble_streams_members_and_saves_consensus(monkeypatch):
+    from app.routes import scoring
+
+    seen_models = []
+
+    async def fake_score(_jt, _co, _desc, provider="openai", **_kwargs):
+        model = scoring._provider_model(provider)
+        seen_models.append((provider, model))
+        await asyncio.sleep(0.05 if provider == "openai" else 0.01)
+        return {"overall_score": 70 if provider == "openai" else 90, "provider": provider, "model": model}
+
+    saved = {}
+    monkeypatch.setattr(scoring, "_score_job_detailed_async", fake_score)
+    monkeypatch.setattr(scoring, "_get_qualification_threshold", lambda: 75)
+    monkeypatch.setattr(scoring, "_save_single_score", lambda job_id, payload: saved.update({job_id: payload}))
+
+    body = scoring.EnsembleRequest(
+        job_db_id=1,
+        members=[scoring.EnsembleMember(provider="openai", model="gpt-4o"), scoring.EnsembleMember(provider="gemini")],
+    )
+    job = {"job_title": "Role", "company_name": "Acme", "job_description": "Build things"}
+
+    async def collect():
+        return [chunk async for chunk in scoring._ensemble_generator(body, job)]
+
+    events = [chunk.split("\n")[0].removeprefix("event: ") for chunk in asyncio.run(collect())]
+
+    assert events == ["start", "member", "member", "consensus", "done"]
+    assert ("openai", "gpt-4o") in seen_models  # the override reached the scorer
+    assert scoring._model_override.get() is None  # and didn't leak out of the member's task
+    payload = saved[1]
+    assert payload["overall_score"] == 80
+    assert payload["ensemble"]["consensus"]["agreement_level"] == "moderate"
+    assert [m["label"] for m in payload["ensemble"]["members"]][0].startswith("gemini:")
+
+
 def test_single_scoring_returns_429_when_rate_limited(monkeypatch):
     from app.routes import scoring
 
+    async def rate_limited(*_args, **_kwargs):
+        raise RuntimeError("Rate limit (openai): 60/min exceeded.")
+
     monkeypatch.setattr(scoring, "db", _fake_db)
-    monkeypatch.setattr(
-        scoring,
-        "_score_job_detailed",
-        lambda *_args, **_kwargs: (_ for _ in ()).throw(RuntimeError("Rate limit (openai): 60/min exceeded.")),
-    )
+    monkeypatch.setattr(scoring, "_score_job_detailed_async", rate_limited)
 
     with pytest.raises(HTTPException) as exc:
-        scoring.score_single_job(scoring.SingleScoreRequest(job_db_id=1, model="openai"))
+        asyncio.run(scoring.score_single_job(scoring.SingleScoreRequest(job_db_id=1, model="openai")))
     assert exc.value.status_code == 429
 
 
@@ -209,3 +245,25 @@ def test_normalize_enhanced_content_handles_truncated_json_payload():
     normalized = _normalize_enhanced_content(payload)
     assert normalized.startswith("<h1>Manoel Benicio</h1>")
     assert '{"enhanced_cv"' not in normalized
+
+
+def test_prompt_prefix_is_shared_and_cached_tokens_are_recorded(monkeypatch):
+    from app.routes import scoring
+
+    monkeypatch.setattr(scoring, "_get_resume", lambda: "RESUME: ten years of Python")
+    first = scoring._chat_messages("Data Engineer", "Acme", "Spark pipelines")
+    second = scoring._chat_messages("Nurse", "Clinic", "Ward rotations")
+
+    assert first[0] == second[0]
+    assert "ten years of Python" in first[0]["content"]
+    assert "ten years of Python" not in first[1]["content"]
+
+    usage = types.SimpleNamespace(
+        total_tokens=1500,
+        prompt_tokens=1200,
+        prompt_tokens_details=types.SimpleNamespace(cached_tokens=1024),
+    )
+    result = scoring._finalize_result(
+        '{"overall_score": 70}', "gpt-4o-mini", "openai", scoring._chat_usage(types.SimpleNamespace(usage=usage))
+    )
+    assert (result["tokens_used"], result["prompt_tokens"], result["cached_tokens"]) == (1500, 1200, 1024)
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import threading
+import time
+
+from app.services.scoring_pool import get_provider_concurrency, iter_scored_async, iter_sync, run_sync
+
+
+def _jobs(n):
+    return [{"id": i, "job_title": f"Role {i}", "company_name": "Acme", "job_description": "desc"} for i in range(n)]
+
+
+def test_provider_concurrency_resolution(monkeypatch):
+    monkeypatch.delenv("SCORING_CONCURRENCY_GEMINI", raising=False)
+    assert get_provider_concurrency("gemini") == 2
+    monkeypatch.setenv("SCORING_CONCURRENCY_GEMINI", "5")
+    assert get_provider_concurrency("gemini") == 5
+    assert get_provider_concurrency("gemini", 3) == 3
+    monkeypatch.setenv("DB_POOL_MAX", "100")
+    assert get_provider_concurrency("gemini", 1000) == 32
+    monkeypatch.setenv("DB_POOL_MAX", "10")
+    assert get_provider_concurrency("gemini", 1000) == 6  # every worker can get a connection
+
+
+def test_pool_bounds_concurrency_and_yields_out_of_order():
+    active = 0
+    peak = 0
+
+    async def score(job):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        # First job is the slowest, so it must not be reported first
+        await asyncio.sleep(0.15 if job["id"] == 0 else 0.02)
+        active -= 1
+        return {"overall_score": job["id"]}
+
+    events = list(iter_sync(iter_scored_async(_jobs(6), score, workers=3)))
+    done = [e.job["id"] for e in events if e.kind == "scored"]
+
+    assert sorted(done) == list(range(6))
+    assert done[0] != 0
+    assert peak <= 3
+    assert sum(1 for e in events if e.kind == "scoring") == 6
+
+
+def test_pool_reports_errors_and_skips_after_cancel():
+    cancelled = threading.Event()
+
+    async def score(job):
+        if job["id"] == 0:
+            cancelled.set()
+            raise RuntimeError("boom")
+        return {"overall_score": 1}
+
+    events = list(iter_sync(iter_scored_async(_jobs(5), score, workers=1, should_cancel=cancelled.is_set)))
+    assert [e.kind for e in events] == ["scoring", "error"]
+    assert str(events[1].error) == "boom"
+
+
+def test_blocking_callers_share_one_loop_and_keep_context():
+    from app.routes import scoring
+
+    async def loop_and_model():
+        return id(asyncio.get_running_loop()), scoring._model_override.get()
+
+    token = scoring._model_override.set(("groq", "llama-test"))
+    try:
+        first = run_sync(loop_and_model())
+        second = [None]
+        worker = threading.Thread(target=lambda: second.__setitem__(0, run_sync(loop_and_model())))
+        worker.start()
+        worker.join(timeout=5)
+    finally:
+        scoring._model_override.reset(token)
+
+    assert first[1] == ("groq", "llama-test")
+    assert second[0][0] == first[0] and second[0][1] is None
+
+
+def test_closing_a_blocking_iterator_cancels_inflight_calls():
+    started = threading.Event()
+    finished = []
+
+    async def score(job):
+        started.set()
+        try:
+            await asyncio.sleep(30)
+        finally:
+            finished.append(job["id"])
+
+    events = iter_sync(iter_scored_async(_jobs(2), score, workers=2))
+    assert next(events).kind == "scoring"
+    started.wait(timeout=5)
+    begun = time.time()
+    events.close()
+    assert time.time() - begun < 5
+    assert sorted(finished) == [0, 1]
+
+
+def test_scoring_generator_reports_throughput(monkeypatch):
+    from app.routes import scoring
+
+    rows = _jobs(4)
+
+    class _Cursor:
+        def execute(self, *_args, **_kwargs):
+            return None
+
+        def fetchall(self):
+            return rows
+
+    class _Ctx:
+        def __enter__(self):
+            return None, _Cursor()
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(scoring, "db", lambda: _Ctx())
+    monkeypatch.setattr(scoring, "_get_qualification_threshold", lambda: 80)
+
+    async def fake_score(*_a, **_k):
+        return {"overall_score": 90, "overall_justification": "ok", "tokens_used": 10}
+
+    monkeypatch.setattr(scoring, "_score_job_detailed_async", fake_score)
+    monkeypatch.setattr(scoring, "_find_scored_sibling", lambda *_a: None)
+    monkeypatch.setattr(scoring, "_persist_score", lambda *_a: None)
+
+    async def collect():
+        return [chunk async for chunk in scoring._scoring_generator_async(4, "Pending", provider="openai", concurrency=2)]
+
+    chunks = asyncio.run(collect())
+    events = [json.loads(c.split("data: ", 1)[1]) for c in chunks]
+
+    assert events[0]["type"] == "start"
+    assert events[0]["concurrency"] == 2
+    complete = events[-1]
+    assert complete["type"] == "complete"
+    assert complete["scored"] == 4
+    assert complete["total_tokens"] == 40
+    assert complete["jobs_per_minute"] > 0
+
+
+def test_async_pool_cancels_inflight_calls_immediately():
+    async def run():
+        inflight = set()
+        cancel = False
+
+        async def score(job):
+            if job["id"] == 0:
+                return {"overall_score": 1}
+            await asyncio.sleep(30)  # a hung provider call
+            return {"overall_score": 2}
+
+        kinds = []
+        start = asyncio.get_running_loop().time()
+        async for event in iter_scored_async(_jobs(4), score, workers=4, should_cancel=lambda: cancel, inflight=inflight):
+            kinds.append(event.kind)
+            if event.kind == "scored":
+                cancel = True
+                for task in list(inflight):
+                    task.cancel()
+        return kinds, asyncio.get_running_loop().time() - start, inflight
+
+    kinds, elapsed, inflight = asyncio.run(run())
+    assert kinds.count("scored") == 1
+    assert kinds.count("cancelled") == 3
+    assert elapsed < 5
+    assert not inflight
+
+
+def test_async_scoring_generator_streams_results(monkeypatch):
+    from app.routes import scoring
+
+    monkeypatch.setattr(scoring, "_fetch_jobs_to_score", lambda *_a: _jobs(3))
+    monkeypatch.setattr(scoring, "_get_qualification_threshold", lambda: 80)
+    monkeypatch.setattr(scoring, "_persist_score", lambda *_a: None)
+
+    async def fake_score(*_a, **_k):
+        await asyncio.sleep(0)
+        return {"overall_score": 70, "overall_justification": "ok", "tokens_used": 5}
+
+    monkeypatch.setattr(scoring, "_score_job_detailed_async", fake_score)
+
+    async def collect():
+        return [chunk async for chunk in scoring._scoring_generator_async(3, "Pending", provider="groq")]
+
+    events = [json.loads(c.split("data: ", 1)[1]) for c in asyncio.run(collect())]
+    assert [e["type"] for e in events].count("scored") == 3
+    assert events[-1]["type"] == "complete"
+    assert events[-1]["total_tokens"] == 15
+    assert scoring._running is False
+
+
+def test_db_pool_waits_for_a_free_connection_instead_of_failing(monkeypatch):
+    from app import db as db_module
+
+    class FakeConn:
+        def close(self):
+            pass
+
+    class FakePool:
+        def __init__(self, minconn, maxconn, dsn):
+            self.maxconn, self.used, self.closed = maxconn, 0, False
+
+        def getconn(self):
+            assert self.used < self.maxconn, "connection pool exhausted"
+            self.used += 1
+            return FakeConn()
+
+        def putconn(self, conn):
+            self.used -= 1
+
+        def closeall(self):
+            self.closed = True
+
+    monkeypatch.setattr(db_module.pool, "ThreadedConnectionPool", FakePool)
+    monkeypatch.setattr("app.services.fast_json.register_psycopg2", lambda: None)
+    monkeypatch.setenv("DB_POOL_MAX", "2")
+    db_module.close_pool()
+    try:
+        held = [db_module.get_conn(), db_module.get_conn()]
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(db_module.get_conn()))
+        waiter.start()
+        time.sleep(0.05)
+        assert not got  # blocked, not PoolError
+        db_module.put_conn(held.pop())
+        waiter.join(timeout=2)
+        assert len(got) == 1
+    finally:
+        db_module.close_pool()
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import os
+import time
+
+from app.routes import scoring
+from app.services import scoring_runs
+from app.services.write_behind import WriteBehindBuffer
+
+_JOBS = [{"id": i, "job_title": f"Role {i}", "company_name": "Acme", "job_description": "d", "score": None} for i in range(4)]
+
+
+def _fake_runs(monkeypatch):
+    """In-memory stand-in for the scoring_runs tables."""
+    state = {"items": {}, "finished": None, "params": None}
+
+    def create(provider, params, job_ids):
+        state["params"] = params
+        state["items"] = {job_id: "queued" for job_id in job_ids}
+        return 7
+
+    def resume(run_id, retry_errors=False):
+        pending = [j for j, s in state["items"].items() if s in ("queued", "running", "cancelled")]
+        return {"id": run_id}, pending
+
+    def record(run_id, job_id, status, **_kw):
+        state["items"][job_id] = status
+
+    monkeypatch.setattr(scoring_runs, "create", create)
+    monkeypatch.setattr(scoring_runs, "resume", resume)
+    monkeypatch.setattr(scoring_runs, "mark_running", lambda run_id, job_id: record(run_id, job_id, "running"))
+    monkeypatch.setattr(scoring_runs, "record", record)
+    monkeypatch.setattr(scoring_runs, "record_many", lambda rows: [record(row[0], row[1], row[2]) for row in rows])
+    monkeypatch.setattr(scoring_runs, "finish", lambda run_id, status, error=None: state.update(finished=status))
+    monkeypatch.setattr(scoring, "_fetch_jobs_to_score", lambda *_a: list(_JOBS))
+    monkeypatch.setattr(scoring, "_load_jobs", lambda ids: [j for j in _JOBS if j["id"] in ids])
+    monkeypatch.setattr(scoring, "_get_qualification_threshold", lambda: 80)
+    return state
+
+
+def _run(**kwargs):
+    async def collect():
+        gen = scoring._scoring_generator_async(10, "Pending", provider="groq", concurrency=1, **kwargs)
+        return [json.loads(chunk.split("data: ", 1)[1]) async for chunk in gen]
+
+    return asyncio.run(collect())
+
+
+async def _drain_stream(gen):
+    async for _chunk in gen:
+        pass
+
+
+def test_run_records_every_item(monkeypatch):
+    state = _fake_runs(monkeypatch)
+
+    async def fake_score(job, provider, threshold, force_rescore=False):
+        if job["id"] == 2:
+            raise RuntimeError("provider down")
+        return {"overall_score": 70, "tokens_used": 5}
+
+    monkeypatch.setattr(scoring, "_score_and_persist_async", fake_score)
+
+    events = _run()
+
+    assert events[0]["run_id"] == 7
+    assert state["items"] == {0: "scored", 1: "scored", 2: "error", 3: "scored"}
+    assert state["finished"] == "completed"
+    assert state["params"]["batch_size"] == 10 and state["params"]["provider"] == "groq"
+
+
+def test_stopped_run_resumes_unfinished_items(monkeypatch):
+    state = _fake_runs(monkeypatch)
+    seen = []
+
+    async def stop_after_two(job, provider, threshold, force_rescore=False):
+        seen.append(job["id"])
+        if len(seen) == 2:
+            scoring._cancel_flag = True
+        return {"overall_score": 70}
+
+    monkeypatch.setattr(scoring, "_score_and_persist_async", stop_after_two)
+    _run()
+    assert state["finished"] == "cancelled"
+    assert state["items"] == {0: "scored", 1: "scored", 2: "queued", 3: "queued"}
+
+    seen.clear()
+    monkeypatch.setattr(scoring, "_score_and_persist_async", lambda job, *_a, **_k: asyncio.sleep(0, {"overall_score": 60}))
+    events = _run(resume_run_id=7)
+
+    assert events[0]["total"] == 2
+    assert state["finished"] == "completed"
+    assert set(state["items"].values()) == {"scored"}
+
+
+def test_item_is_scored_only_once_its_score_is_written(monkeypatch):
+    from app.services import scoring_queue
+
+    state = _fake_runs(monkeypatch)
+    written = []
+    leases = {"complete": [], "release": 0}
+    monkeypatch.setattr(scoring_queue, "claim_jobs", lambda jobs, owner: jobs)
+    monkeypatch.setattr(scoring_queue, "complete", lambda ids, owner: leases["complete"].extend(ids))
+    monkeypatch.setattr(scoring_queue, "release", lambda owner: leases.update(release=leases["release"] + 1))
+
+    def write_scores(rows):
+        if any(row[0] == 1 for row in rows):
+            raise RuntimeError("deadlock detected")
+        written.extend(row[0] for row in rows)
+
+    monkeypatch.setattr(scoring, "_write_back", WriteBehindBuffer(write_scores, batch_size=100, flush_ms=60_000))
+    monkeypatch.setattr(scoring, "_run_items", WriteBehindBuffer(scoring._write_run_items, batch_size=100, flush_ms=60_000))
+    monkeypatch.setenv("SCORING_WRITE_BEHIND", "true")
+
+    async def persist(job, provider, threshold, force_rescore=False):
+        result = {"overall_score": 70}
+        scoring._persist_score(job["id"], result, threshold)
+        return result
+
+    monkeypatch.setattr(scoring, "_score_and_persist_async", persist)
+    _run()
+
+    assert sorted(written) == [0, 2, 3]
+    assert state["items"][1] in ("queued", "running")  # left for a resume
+    assert [state["items"][job_id] for job_id in (0, 2, 3)] == ["scored"] * 3
+    assert scoring._write_back.is_pending(1)  # kept for a retry, not dropped
+    assert sorted(leases["complete"]) == [0, 2, 3] and leases["release"] == 1  # job 1 goes back to the queue
+
+
+def test_drain_marks_run_interrupted(monkeypatch):
+    state = _fake_runs(monkeypatch)
+
+    async def slow(job, provider, threshold, force_rescore=False):
+        await asyncio.sleep(0.05)
+        return {"overall_score": 70}
+
+    monkeypatch.setattr(scoring, "_score_and_persist_async", slow)
+
+    async def main():
+        gen = scoring._scoring_generator_async(10, "Pending", provider="groq", concurrency=1)
+        consumer = asyncio.create_task(_drain_stream(gen))
+        await asyncio.sleep(0.02)
+        drained = await scoring.drain(timeout=2)
+        await consumer
+        return drained
+
+    assert asyncio.run(main()) is True
+    assert state["finished"] == "interrupted"
+    assert "queued" in state["items"].values()
+
+
+def test_owner_is_gone_only_when_its_process_is(monkeypatch):
+    import socket
+    import subprocess
+    import sys
+
+    host = socket.gethostname()
+    finished = subprocess.Popen([sys.executable, "-c", "pass"])
+    finished.wait()
+
+    assert not scoring_runs._owner_gone(scoring_runs.OWNER)
+    assert not scoring_runs._owner_gone(f"{host}:{os.getppid()}:abcd1234")  # alive
+    assert scoring_runs._owner_gone(f"{host}:{finished.pid}:abcd1234")
+    assert scoring_runs._owner_gone(f"{host}:{os.getpid()}:older000")  # earlier process with our pid
+    assert not scoring_runs._owner_gone(f"other-host:{finished.pid}:abcd1234")  # left to its heartbeat
+    assert not scoring_runs._owner_gone(None)
+
+
+def test_heartbeat_runs_on_a_timer_until_the_run_finishes(monkeypatch):
+    beats = []
+    monkeypatch.setattr(scoring_runs, "HEARTBEAT_SECONDS", 0.01)
+    monkeypatch.setattr(scoring_runs, "_beat", lambda run_id: beats.append(run_id) or True)
+
+    scoring_runs._start_heartbeat(5)  # no pool events at all, e.g. one slow provider call
+    time.sleep(0.1)
+    scoring_runs._stop_heartbeat(5)
+    count = len(beats)
+    time.sleep(0.05)
+
+    assert count >= 3 and set(beats) == {5}
+    assert len(beats) <= count + 1
+    assert 5 not in scoring_runs._heartbeats
+
+
+def test_recover_stale_leaves_live_owners_alone(monkeypatch):
+    import socket
+    import subprocess
+    import sys
+
+    finished = subprocess.Popen([sys.executable, "-c", "pass"])
+    finished.wait()
+    running = [
+        {"id": 1, "owner": "api-2:41:aaaa0000", "stale": False},  # another live worker's run
+        {"id": 2, "owner": "api-2:41:aaaa0000", "stale": True},  # its owner stopped heartbeating
+        {"id": 3, "owner": f"{socket.gethostname()}:{finished.pid}:bbbb0000", "stale": False},  # owner died here
+    ]
+    updated = []
+
+    class Cursor:
+        def execute(self, sql, params):
+            if sql.lstrip().startswith("SELECT"):
+                assert params[1] == scoring_runs.OWNER
+                self.rows = running
+            elif "scoring_runs" in sql:
+                updated.extend(params[0])
+                self.rows = [{"id": run_id} for run_id in params[0]]
+
+        def fetchall(self):
+            return self.rows
+
+    class Ctx:
+        def __enter__(self):
+            return None, Cursor()
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr("app.db.db", lambda: Ctx())
+
+    assert scoring_runs.recover_stale() == 2
+    assert updated == [2, 3]
+
+
+def test_each_run_leases_under_its_own_owner(monkeypatch):
+    from app.services import scoring_queue
+
+    _fake_runs(monkeypatch)
+    owners = {"claim": [], "complete": [], "release": []}
+
+    def claim_jobs(jobs, owner, lease_seconds=None):
+        owners["claim"].append(owner)
+        return jobs
+
+    monkeypatch.setattr(scoring_queue, "claim_jobs", claim_jobs)
+    monkeypatch.setattr(scoring_queue, "complete", lambda ids, owner: owners["complete"].append(owner))
+    monkeypatch.setattr(scoring_queue, "release", lambda owner: owners["release"].append(owner))
+    monkeypatch.setattr(scoring, "_score_and_persist_async", lambda job, *_a, **_k: asyncio.sleep(0, {"overall_score": 60}))
+
+    _run()
+    _run()
+
+    assert owners["claim"] == owners["complete"] == owners["release"]
+    assert len(set(owners["claim"])) == 2
+    assert scoring_queue.WORKER_ID not in owners["claim"]
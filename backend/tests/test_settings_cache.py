@@ -0,0 +1,131 @@
+import pytest
+
+from app.routes import cv, jobs, scoring
+from app.routes import settings as settings_routes
+from app.services import alerts, settings_cache
+
+
+@pytest.fixture
+def table(monkeypatch):
+    """An in-memory app_settings table; counts how often it is read."""
+    rows = {"score_threshold": "70", "OPENAI_API_KEY": "sk-db", "telegram_enabled": "false"}
+    reads = []
+
+    def load():
+        reads.append(1)
+        if rows.get("__down__"):
+            raise RuntimeError("connection refused")
+        return dict(rows)
+
+    monkeypatch.setattr(settings_cache, "_load", load)
+    monkeypatch.setattr(settings_cache, "TTL_SECONDS", 60)
+    settings_cache.invalidate()
+    yield rows, reads
+    settings_cache.invalidate()
+
+
+def test_table_is_read_once_for_many_lookups(table):
+    _rows, reads = table
+    for _ in range(50):
+        assert scoring._get_qualification_threshold() == 70
+        assert jobs._get_qualification_threshold() == 70
+        assert cv._get_qualification_threshold() == 70
+        assert settings_routes.get_api_key("OPENAI_API_KEY") == "sk-db"
+    assert len(reads) == 1
+
+
+def test_invalidate_picks_up_changes(table):
+    rows, reads = table
+    assert settings_cache.qualification_threshold() == 70
+    rows["score_threshold"] = "85"
+    assert settings_cache.qualification_threshold() == 70  # still cached
+    settings_cache.invalidate()
+    assert settings_cache.qualification_threshold() == 85
+    assert len(reads) == 2
+
+
+def test_short_ttl_without_listener(table, monkeypatch):
+    rows, _reads = table
+    monkeypatch.setattr(settings_cache, "TTL_SECONDS", 0)
+    assert settings_cache.get("score_threshold") == "70"
+    rows["score_threshold"] = "90"
+    assert settings_cache.get("score_threshold") == "90"
+
+
+def test_failed_load_serves_stale_copy_then_environment(table, monkeypatch):
+    rows, _reads = table
+    monkeypatch.setattr(settings_cache, "TTL_SECONDS", 0)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-env")
+    assert settings_routes.get_api_key("OPENAI_API_KEY") == "sk-db"
+    rows["__down__"] = "1"
+    assert settings_routes.get_api_key("OPENAI_API_KEY") == "sk-db"
+
+    settings_cache.invalidate()
+    assert settings_routes.get_api_key("OPENAI_API_KEY") == "sk-env"
+    assert settings_cache.stats()["load_errors"] >= 2
+
+
+def test_load_racing_an_invalidation_is_not_kept(table, monkeypatch):
+    rows, reads = table
+
+    def load_then_change():
+        reads.append(1)
+        snapshot = dict(rows)
+        settings_cache.invalidate()  # a NOTIFY lands while the old values are in flight
+        return snapshot
+
+    monkeypatch.setattr(settings_cache, "_load", load_then_change)
+    assert settings_cache.get("score_threshold") == "70"
+    monkeypatch.setattr(settings_cache, "_load", lambda: dict(rows, score_threshold="95"))
+    assert settings_cache.get("score_threshold") == "95"
+
+
+def test_threshold_defaults_and_clamps(table, monkeypatch):
+    rows, _reads = table
+    monkeypatch.setenv("SCORE_THRESHOLD_DEFAULT", "75")
+    rows["score_threshold"] = "250"
+    settings_cache.invalidate()
+    assert settings_cache.qualification_threshold() == 100
+    rows["score_threshold"] = "not a number"
+    settings_cache.invalidate()
+    assert settings_cache.qualification_threshold() == 75
+    del rows["score_threshold"]
+    settings_cache.invalidate()
+    assert settings_cache.qualification_threshold() == 75
+
+
+def test_alert_settings_use_cache(table, monkeypatch):
+    rows, reads = table
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "env-chat")
+    rows["TELEGRAM_BOT_TOKEN"] = "bot-db"
+    settings_cache.invalidate()
+    assert alerts._get_setting("TELEGRAM_BOT_TOKEN") == "bot-db"
+    assert alerts._get_setting("TELEGRAM_CHAT_ID") == "env-chat"
+    assert settings_cache.get_bool("telegram_enabled", True) is False
+    assert len(reads) == 1
+
+
+def test_writers_notify_and_invalidate(table, monkeypatch):
+    rows, reads = table
+    executed = []
+
+    class Cursor:
+        def execute(self, sql, params=None):
+            executed.append((sql, params))
+            if "INSERT INTO app_settings" in sql:
+                rows[params[0]] = params[1]
+
+    class DB:
+        def __enter__(self):
+            return None, Cursor()
+
+        def __exit__(self, *_exc):
+            return False
+
+    monkeypatch.setattr(settings_routes, "db", lambda: DB())
+    assert settings_routes.get_api_key("GEMINI_API_KEY") is None
+    settings_routes._set_setting("GEMINI_API_KEY", "gm-new")
+
+    assert ("SELECT pg_notify(%s, %s)", [settings_cache.CHANNEL, "GEMINI_API_KEY"]) in executed
+    assert settings_routes.get_api_key("GEMINI_API_KEY") == "gm-new"
+    assert len(reads) == 2
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+from app.services.stream_json import IncrementalParser
+
+_RESPONSE = {
+    "overall_score": 82,
+    "overall_justification": 'Strong "platform" fit, {braces} and [brackets] in text',
+    "sections": [
+        {"dimension": "Technical Skills", "score": 88, "strong": ["Python]"], "weak": []},
+        {"dimension": "Experience Level", "score": 75, "strong": [], "weak": ["No \"lead\" title"]},
+    ],
+    "skills_matched": ["Python", "SQL"],
+    "fit_assessment_label": "Strong Technical Fit",
+    "interview_probability": "HIGH",
+    "gap_analysis": {"total_gap_percentage": 18, "gap_breakdown": []},
+    "remote": True,
+    "salary": None,
+}
+
+
+def _feed_all(text, step, **kwargs):
+    parser = IncrementalParser(**kwargs)
+    events = []
+    for i in range(0, len(text), step):
+        events += [(p.key, p.index, p.value) for p in parser.feed(text[i:i + step])]
+    return parser, events
+
+
+def test_fields_and_section_items_complete_in_stream_order():
+    text = "```json\n" + json.dumps(_RESPONSE, indent=2) + "\n```"
+
+    for step in (1, 5, 64, len(text)):
+        parser, events = _feed_all(text, step, stream_arrays=("sections",))
+        assert parser.done
+        assert events[0] == ("overall_score", None, 82)
+        assert events[1] == ("overall_justification", None, _RESPONSE["overall_justification"])
+        assert events[2] == ("sections", 0, _RESPONSE["sections"][0])
+        assert events[3] == ("sections", 1, _RESPONSE["sections"][1])
+        fields = {key: value for key, index, value in events if index is None}
+        assert fields == _RESPONSE
+
+
+def test_score_is_reported_before_the_response_ends():
+    text = json.dumps(_RESPONSE)
+    parser = IncrementalParser()
+    cut = text.index('"overall_justification"')
+
+    assert [(p.key, p.value) for p in parser.feed(text[:cut])] == [("overall_score", 82)]
+    assert not parser.done
+
+
+def test_malformed_value_is_skipped_without_losing_later_fields():
+    parser, events = _feed_all('{"a": tru, "b": 2}', 1)
+
+    assert events == [("b", None, 2)]
+
+
+def test_streamed_single_score_emits_partials_then_done(monkeypatch):
+    from app.routes import scoring
+
+    text = json.dumps(_RESPONSE)
+
+    async def fake_stream(provider, _prompt, usage, meta):
+        meta["model"] = "fake-model"
+        for i in range(0, len(text), 7):
+            yield text[i:i + 7]
+        usage.update({"tokens_used": 1234})
+
+    saved = {}
+    monkeypatch.setattr(scoring, "_stream_completion", fake_stream)
+    monkeypatch.setattr(scoring, "_cache_key", lambda *_a: None)
+    monkeypatch.setattr(scoring, "_resume_hash", lambda: "resume")
+    monkeypatch.setattr(scoring, "_find_scored_sibling", lambda *_a: None)
+    monkeypatch.setattr(scoring, "_save_single_score", lambda job_id, result: saved.update({job_id: result}))
+
+    body = scoring.SingleScoreRequest(job_db_id=7, model="openai")
+    job = {"job_title": "Role", "company_name": "Acme", "job_description": "Build things"}
+
+    async def collect():
+        return [chunk async for chunk in scoring._single_stream_generator(body, job)]
+
+    events = []
+    for chunk in asyncio.run(collect()):
+        head, data = chunk.strip().split("\n")
+        events.append((head.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+
+    kinds = [kind for kind, _data in events]
+    assert kinds == ["start"] + ["partial"] * 5 + ["done"]
+    partials = [(d["field"], d.get("index")) for kind, d in events if kind == "partial"]
+    assert partials == [
+        ("overall_score", None), ("overall_justification", None),
+        ("sections", 0), ("sections", 1), ("fit_assessment_label", None),
+    ]
+    result = saved[7]
+    assert result["overall_score"] == 82 and result["model"] == "fake-model"
+    assert result["tokens_used"] == 1234 and result["first_partial_ms"] is not None
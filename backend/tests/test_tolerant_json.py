@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from app.routes.cv import _extract_enhanced_cv_from_json_like_text, _extract_json_robust_cv
+from app.routes.scoring import _extract_json_robust
+from app.services import tolerant_json
+from benchmarks.json_parsing import (
+    corpus,
+    legacy_extract_cv_payload,
+    legacy_extract_enhanced_cv,
+    legacy_extract_json_robust,
+)
+
+CORPUS = corpus()
+
+
+def _attempt(fn, text):
+    try:
+        return fn(text)
+    except ValueError:
+        return None
+
+
+def _leaves(value, path=()):
+    if isinstance(value, dict):
+        for k, v in value.items():
+            yield from _leaves(v, path + (k,))
+    elif isinstance(value, list):
+        for i, v in enumerate(value):
+            yield from _leaves(v, path + (i,))
+    else:
+        yield path, value
+
+
+@pytest.mark.parametrize("name", sorted(CORPUS))
+def test_scoring_parser_recovers_at_least_what_the_regex_cascade_did(name):
+    text = CORPUS[name]
+    old, new = _attempt(legacy_extract_json_robust, text), _attempt(_extract_json_robust, text)
+    if old is None:
+        return
+    assert isinstance(new, dict)
+    if "overall_score" in old:
+        # The old field regex also matched nested scores; the new parser must still find a score
+        assert "overall_score" in new or "results" in new
+    old_leaves, new_leaves = dict(_leaves(old)), dict(_leaves(new))
+    if not old_leaves.keys() <= new_leaves.keys():
+        # Only the last-resort regex fields may be missing, and only because they were nested
+        assert set(old) <= {"overall_score", "overall_justification"} and len(new_leaves) > len(old_leaves)
+
+
+@pytest.mark.parametrize("name", [n for n in sorted(CORPUS) if n.startswith("cv_")])
+def test_cv_extraction_recovers_at_least_as_much(name):
+    text = CORPUS[name]
+    old, new = legacy_extract_enhanced_cv(text), _extract_enhanced_cv_from_json_like_text(text)
+    if old is None:
+        return
+    # A trailing half-written escape (e.g. a lone backslash) is dropped rather than kept
+    assert new is not None and old.startswith(new) and len(old) - len(new) <= 2
+
+    legacy_payload = _attempt(legacy_extract_cv_payload, text)
+    payload = _extract_json_robust_cv(text)
+    assert payload["enhanced_cv"]
+    if legacy_payload:
+        assert payload["fit_score"] == legacy_payload.get("fit_score", payload["fit_score"])
+
+
+def test_repairs_truncation_trailing_commas_and_chatter():
+    assert tolerant_json.loads('```json\n{"a": [1, 2,], "b": {"c": 1,},}\n```') == {"a": [1, 2], "b": {"c": 1}}
+    assert tolerant_json.loads('{"a": "x}"} and then {more} text') == {"a": "x}"}
+    assert tolerant_json.loads('{"a": 1, "b": "unterminated \\"quo') == {"a": 1, "b": 'unterminated "quo'}
+    assert tolerant_json.loads('{"a": 1, "b": [1, 2') == {"a": 1, "b": [1, 2]}
+    assert tolerant_json.loads('{"a": 1, "dangling') == {"a": 1}
+    assert tolerant_json.loads('{"a": 1, "b": tr') == {"a": 1}
+    assert tolerant_json.loads('{"a": "\\u00e') == {"a": ""}
+    with pytest.raises(ValueError):
+        tolerant_json.loads("no json here")
+
+
+def test_extract_fields_skips_broken_values():
+    fields = tolerant_json.extract_fields('{"overall_score": 71, "interview_probability": HIGH, "overall_justification": "ok"}')
+
+    assert fields == {"overall_score": 71, "overall_justification": "ok"}
+
+
+def test_truncated_batch_keeps_complete_results():
+    payload = _extract_json_robust(CORPUS["batch_results_truncated.txt"])
+
+    complete = [r for r in payload["results"] if "compensation_insight" in r]
+    assert [r["job_ref"] for r in complete] == ["J1", "J2"]
+    assert json.loads(json.dumps(payload))  # plain JSON types only
+
+
+def test_scoring_parser_always_returns_an_object():
+    wrapped = _extract_json_robust('[{"overall_score": 64, "overall_justification": "ok"}, {"overall_score": 1}]')
+    assert wrapped == {"overall_score": 64, "overall_justification": "ok"}
+
+    for text in ("42", '"just text"', "[1, 2, 3]", "null"):
+        with pytest.raises(ValueError, match="Could not parse JSON"):
+            _extract_json_robust(text)
@@ -0,0 +1,50 @@
+from app import worker
+from app.routes import scoring
+from app.services import scoring_queue
+
+
+def _job(job_id, provider="groq", score=None, force_rescore=False):
+    return {
+        "id": job_id, "job_title": f"Role {job_id}", "company_name": "Acme", "job_description": "d",
+        "score": score, "provider": provider, "force_rescore": force_rescore, "priority": 0.0,
+    }
+
+
+def test_worker_settles_every_claimed_job(monkeypatch):
+    settled = {"complete": [], "fail": []}
+    monkeypatch.setattr(scoring_queue, "complete", lambda ids, owner=None: settled["complete"].extend(ids))
+    monkeypatch.setattr(scoring_queue, "fail", lambda job_id, error, owner=None: settled["fail"].append(job_id))
+    monkeypatch.setattr(scoring, "_get_qualification_threshold", lambda: 80)
+    calls = []
+
+    async def fake_score(job, provider, threshold, force_rescore=False):
+        calls.append((job["id"], provider))
+        if job["id"] == 3:
+            raise RuntimeError("provider down")
+        return {"overall_score": 70}
+
+    monkeypatch.setattr(scoring, "_score_and_persist_async", fake_score)
+
+    counts = worker.process([_job(1), _job(2, "openai"), _job(3), _job(4, score=55)], concurrency=2, jobs_per_request=1)
+
+    assert counts == {"scored": 2, "skipped": 1, "errors": 1}
+    assert sorted(calls) == [(1, "groq"), (2, "openai"), (3, "groq")]
+    assert sorted(settled["complete"]) == [1, 2, 4]
+    assert settled["fail"] == [3]
+
+
+def test_stopped_worker_leaves_unstarted_jobs_leased(monkeypatch):
+    settled = []
+    monkeypatch.setattr(scoring_queue, "complete", lambda ids, owner=None: settled.extend(ids))
+    monkeypatch.setattr(scoring_queue, "fail", lambda job_id, error, owner=None: settled.append(job_id))
+    monkeypatch.setattr(scoring, "_get_qualification_threshold", lambda: 80)
+    monkeypatch.setattr(worker._stop, "is_set", lambda: True)
+    async def fake_score(*_a, **_k):
+        return {"overall_score": 70}
+
+    monkeypatch.setattr(scoring, "_score_and_persist_async", fake_score)
+
+    counts = worker.process([_job(1), _job(2)], concurrency=1, jobs_per_request=1)
+
+    # Nothing dispatched; release() on exit hands both back to the queue
+    assert counts["scored"] == 0 and settled == []
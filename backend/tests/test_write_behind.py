@@ -0,0 +1,153 @@
+import threading
+import time
+
+from app.routes import scoring
+from app.services.write_behind import WriteBehindBuffer
+
+
+def _recorder(fail_on=()):
+    batches = []
+
+    def write(rows):
+        if any(row[0] in fail_on for row in rows):
+            raise RuntimeError("constraint violation")
+        batches.append([row[0] for row in rows])
+    return write, batches
+
+
+def test_flushes_when_batch_is_full():
+    write, batches = _recorder()
+    buffer = WriteBehindBuffer(write, batch_size=3, flush_ms=60_000)
+    for job_id in (1, 2, 3, 4):
+        buffer.add(job_id, (job_id, "row"))
+
+    assert batches == [[1, 2, 3]]
+    assert buffer.pending() == 1
+    assert buffer.close() == 1
+    assert batches == [[1, 2, 3], [4]]
+
+
+def test_flushes_after_delay():
+    write, batches = _recorder()
+    buffer = WriteBehindBuffer(write, batch_size=100, flush_ms=20)
+    buffer.add(1, (1, "row"))
+    buffer.add(2, (2, "row"))
+    deadline = time.monotonic() + 2
+    while not batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    buffer.close()
+
+    assert batches == [[1, 2]]
+
+
+def test_latest_result_per_key_wins():
+    rows = []
+    buffer = WriteBehindBuffer(rows.extend, batch_size=10, flush_ms=60_000)
+    buffer.add(7, (7, "first"))
+    buffer.add(7, (7, "second"))
+    buffer.flush()
+
+    assert rows == [(7, "second")]
+
+
+def test_failed_batch_is_retried_row_by_row():
+    write, batches = _recorder(fail_on={2})
+    buffer = WriteBehindBuffer(write, batch_size=10, flush_ms=60_000)
+    for job_id in (1, 2, 3):
+        buffer.add(job_id, (job_id, "row"))
+
+    assert buffer.flush() == 2
+    assert batches == [[1], [3]]
+    stats = buffer.stats()
+    assert stats["failed_rows"] == 1
+    assert stats["retried_flushes"] == 1
+
+
+def test_failed_row_is_kept_for_a_later_flush():
+    fail_on = {2}
+
+    def write(rows):
+        if any(row[0] in fail_on for row in rows):
+            raise RuntimeError("deadlock detected")
+        batches.append([row[0] for row in rows])
+
+    batches = []
+    buffer = WriteBehindBuffer(write, batch_size=10, flush_ms=60_000, max_attempts=3)
+    buffer.add(1, (1, "row"))
+    buffer.add(2, (2, "row"))
+    assert buffer.flush() == 1
+    assert buffer.is_pending(2) and not buffer.is_pending(1)
+
+    fail_on.clear()
+    assert buffer.flush() == 1
+    assert batches == [[1], [2]]
+    assert buffer.stats()["requeued_rows"] == 1
+
+
+def test_row_is_dropped_after_max_attempts():
+    write, batches = _recorder(fail_on={5})
+    buffer = WriteBehindBuffer(write, batch_size=10, flush_ms=60_000, max_attempts=2)
+    buffer.add(5, (5, "row"))
+
+    assert buffer.close() == 0
+    assert buffer.pending() == 0
+    stats = buffer.stats()
+    assert stats["failed_rows"] == 2 and stats["dropped_rows"] == 1
+
+
+def test_stats_count_flush_size_and_latency():
+    write, _batches = _recorder()
+    buffer = WriteBehindBuffer(write, batch_size=2, flush_ms=60_000)
+    for job_id in range(5):
+        buffer.add(job_id, (job_id, "row"))
+    buffer.close()
+    stats = buffer.stats()
+
+    assert stats["flushes"] == 3
+    assert stats["rows"] == 5
+    assert stats["max_flush_size"] == 2
+    assert stats["avg_flush_size"] == 1.7
+    assert stats["pending"] == 0
+    assert stats["p95_flush_ms"] >= 0
+
+
+def test_concurrent_adds_are_written_once():
+    write, batches = _recorder()
+    buffer = WriteBehindBuffer(write, batch_size=7, flush_ms=10)
+
+    def add(offset):
+        for i in range(50):
+            buffer.add(offset + i, (offset + i, "row"))
+
+    threads = [threading.Thread(target=add, args=(n * 1000,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    buffer.close()
+
+    written = [job_id for batch in batches for job_id in batch]
+    assert sorted(written) == sorted(n * 1000 + i for n in range(4) for i in range(50))
+
+
+def test_persist_score_buffers_until_flush(monkeypatch):
+    writes = []
+    buffer = WriteBehindBuffer(writes.append, batch_size=10, flush_ms=60_000)
+    monkeypatch.setattr(scoring, "_write_back", buffer)
+    monkeypatch.setenv("SCORING_WRITE_BEHIND", "true")
+
+    scoring._persist_score(1, {"overall_score": 82, "overall_justification": "Strong"}, 75)
+    scoring._persist_score(2, {"overall_score": 40, "overall_justification": "Weak"}, 75)
+    assert writes == []
+
+    scoring._flush_scores()
+    assert [(row[0], row[1], row[3]) for row in writes[0]] == [(1, 82, "qualified"), (2, 40, "low_score")]
+
+
+def test_persist_score_writes_through_when_disabled(monkeypatch):
+    writes = []
+    monkeypatch.setattr(scoring, "_write_scores", writes.append)
+    monkeypatch.setenv("SCORING_WRITE_BEHIND", "false")
+
+    scoring._persist_score(3, {"overall_score": 75}, 75)
+    assert [[row[:4] for row in batch] for batch in writes] == [[(3, 75, "", "qualified")]]
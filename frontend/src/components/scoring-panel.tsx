@@ -372,6 +372,7 @@ export function ScoringPanel({ open, onClose }: { open: boolean; onClose: () =>
                                 <option value="newest_first">Newest First</option>
                                 <option value="oldest_first">Oldest First</option>
                                 <option value="id">Job ID</option>
+                                <option value="prefilter">Best Resume Match</option>
                             </select>
                         </div>
                         <div className="scoring-control-group scoring-control-group--info">
@@ -112,6 +112,7 @@ export function ScoringView() {
     const [batchSize, setBatchSize] = useState(25);
     const [statusFilter, setStatusFilter] = useState('Pending');
     const [sortBy, setSortBy] = useState('newest_first');
+    const [jobsPerRequest, setJobsPerRequest] = useState(1);
     const [unscoredCount, setUnscoredCount] = useState<number | null>(null);
     const [state, setState] = useState<ScoringState>({
         status: 'idle',
@@ -243,7 +244,12 @@ export function ScoringView() {
         fetch(`${API_BASE}/scoring/start`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ batch_size: batchSize, status_filter: statusFilter, sort_by: sortBy }),
+            body: JSON.stringify({
+                batch_size: batchSize,
+                status_filter: statusFilter,
+                sort_by: sortBy,
+                jobs_per_request: jobsPerRequest,
+            }),
             signal: controller.signal,
         })
             .then(async response => {
@@ -303,7 +309,7 @@ export function ScoringView() {
                     }));
                 }
             });
-    }, [batchSize, statusFilter, sortBy, handleSSEEvent]);
+    }, [batchSize, statusFilter, sortBy, jobsPerRequest, handleSSEEvent]);
 
     const stopScoring = useCallback(() => {
         fetch(`${API_BASE}/scoring/stop`, { method: 'POST' }).catch(() => { });
@@ -368,6 +374,22 @@ export function ScoringView() {
                         <option value="newest_first">Newest First</option>
                         <option value="oldest_first">Oldest First</option>
                         <option value="id">Job ID</option>
+                        <option value="prefilter">Best Resume Match</option>
+                    </select>
+                </div>
+
+                {/* Jobs per request */}
+                <div className="scoring-sidebar__group">
+                    <label className="scoring-sidebar__label">Jobs per Request</label>
+                    <select
+                        className="scoring-sidebar__select"
+                        value={jobsPerRequest}
+                        onChange={e => setJobsPerRequest(Number(e.target.value))}
+                        disabled={state.status === 'running'}
+                    >
+                        <option value={1}>1 (single)</option>
+                        <option value={3}>3 per prompt</option>
+                        <option value={5}>5 per prompt</option>
                     </select>
                 </div>
 
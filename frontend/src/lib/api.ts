@@ -88,6 +88,18 @@ export const api = {
     getJobStats: () =>
         request<import('./types').JobStats>(`/jobs/stats`),
 
+    // Near-duplicate postings
+    getJobDuplicates: (id: number) =>
+        request<import('./types').JobDuplicatesResponse>(`/jobs/${id}/duplicates`),
+
+    getDuplicateGroups: (threshold?: number) =>
+        request<import('./types').DuplicateGroupsResponse>(
+            `/jobs/duplicates/groups${threshold ? `?threshold=${threshold}` : ''}`
+        ),
+
+    reindexDuplicates: () =>
+        request<{ indexed: number; signatures: number }>(`/jobs/duplicates/reindex`, { method: 'POST' }),
+
     // Export jobs to Excel (triggers browser download)
     exportJobsToExcel: (opts?: { status?: string; min_score?: number; ids?: number[] }) => {
         const params = new URLSearchParams();
@@ -71,6 +71,30 @@ export interface JobStats {
     today_count: number;
 }
 
+export interface DuplicateJob {
+    id: number;
+    job_title: string;
+    company_name: string;
+    location: string | null;
+    score: number | null;
+    status: JobStatus;
+    created_at: string | null;
+    similarity?: number;
+}
+
+export interface JobDuplicatesResponse {
+    job_id: number;
+    threshold: number;
+    duplicates: DuplicateJob[];
+}
+
+export interface DuplicateGroupsResponse {
+    threshold: number;
+    total_groups: number;
+    duplicate_jobs: number;
+    groups: DuplicateJob[][];
+}
+
 // === Filter types ===
 export interface JobFilters {
     search: string;
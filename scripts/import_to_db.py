@@ -2,7 +2,10 @@
 Import jobs_merged_final.csv into the Postgres jobs table.
 
 Reads the merged CSV and inserts rows into the `jobs` table using
-psycopg2 with batch inserts for performance.
+psycopg2 with batch inserts for performance. Each inserted posting also
+gets its near-duplicate signature (backend/app/services/dedup_index.py)
+in the same transaction, so imports are deduplicated and reused by
+scoring without a separate reindex.
 """
 import csv
 import os
@@ -18,6 +21,9 @@ except ImportError:
     import psycopg2
     from psycopg2.extras import execute_values
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from app.services import dedup_index  # noqa: E402
+
 CSV_FILE = r"D:\VMs\Projetos\RFP_Automation_VF\AI_Job_Matcher\migrations\jobs_merged_final.csv"
 
 DB_CONFIG = {
@@ -76,6 +82,27 @@ def parse_applicants(val):
     return val, None
 
 
+def index_signatures(cur, inserted_rows):
+    """Store MinHash signatures for freshly inserted (id, job_description) rows."""
+    values = []
+    for job_db_id, description in inserted_rows:
+        sig = dedup_index.signature_for(description or "")
+        if sig is not None:
+            values.append((job_db_id, dedup_index.pack(sig), dedup_index.description_hash(description)))
+    if values:
+        execute_values(
+            cur,
+            """
+            INSERT INTO job_signatures (job_id, signature, description_hash)
+            VALUES %s
+            ON CONFLICT (job_id) DO UPDATE
+            SET signature = EXCLUDED.signature, description_hash = EXCLUDED.description_hash, updated_at = NOW()
+            """,
+            [(job_db_id, psycopg2.Binary(blob), desc_hash) for job_db_id, blob, desc_hash in values],
+        )
+    return len(values)
+
+
 def main():
     print("=" * 60)
     print("  CSV -> Postgres Import")
@@ -112,6 +139,7 @@ def main():
         INSERT INTO jobs ({col_names})
         VALUES %s
         ON CONFLICT (job_id) DO NOTHING
+        RETURNING id, job_description
     """
 
     # Build value tuples
@@ -120,6 +148,7 @@ def main():
     inserted = 0
     skipped = 0
     errors = 0
+    signed = 0
 
     batch = []
     for i, row in enumerate(rows):
@@ -149,7 +178,8 @@ def main():
 
         if len(batch) >= BATCH_SIZE:
             try:
-                execute_values(cur, insert_sql, batch, template=f"({placeholders})")
+                returned = execute_values(cur, insert_sql, batch, template=f"({placeholders})", fetch=True)
+                signed += index_signatures(cur, returned)
                 inserted += len(batch)
             except Exception as e:
                 conn.rollback()
@@ -166,7 +196,8 @@ def main():
     # Final batch
     if batch:
         try:
-            execute_values(cur, insert_sql, batch, template=f"({placeholders})")
+            returned = execute_values(cur, insert_sql, batch, template=f"({placeholders})", fetch=True)
+            signed += index_signatures(cur, returned)
             inserted += len(batch)
         except Exception as e:
             conn.rollback()
@@ -189,6 +220,7 @@ def main():
     print(f"{'='*60}")
     print(f"  CSV rows:        {len(rows):>10,}")
     print(f"  Inserted:        {inserted:>10,}")
+    print(f"  Signatures:      {signed:>10,}")
     print(f"  Errors:          {errors:>10,}")
     print(f"  DB total rows:   {final_count:>10,}")
     print(f"  Time:            {elapsed:>10.1f}s")